@@ -0,0 +1,5 @@
+"""Load, scale and performance testing for pfn-mcp.
+
+Everything here runs against a synthetic Valkyrie database built by
+benchmarks.dataset, never against production.
+"""
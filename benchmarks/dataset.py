@@ -0,0 +1,679 @@
+"""Synthetic Valkyrie dataset generator.
+
+Builds a local Postgres (optionally TimescaleDB) database with the schema
+subset the tools read (benchmarks/schema.sql) and fills it with a
+deterministic, configurable fleet:
+
+- tenants, each with an asset tree (depth x fanout) and devices on its leaves
+- device tags (number of keys x values per key)
+- quantities from the production catalogue (energy registers, power, V, I, PF)
+- 15-minute aggregates for the whole history, raw telemetry for the most
+  recent days, and the daily cost summary per shift and tariff
+- outages (gap_rate), random missing buckets (dropout_rate) and devices
+  that stopped reporting (stale_rate)
+
+Telemetry is streamed to the database with COPY. Generation is CPU bound
+(roughly 100k rows/s per core), so each job is a separate process with its
+own connection; the large preset keeps to the two main quantities.
+
+Usage:
+    python -m benchmarks.dataset --dsn postgresql://localhost/valkyrie_bench --scale medium
+    python -m benchmarks.dataset --dsn ... --devices 10000 --days 730 --timescale --jobs 8
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import math
+import os
+import random
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).with_name("schema.sql")
+COVERAGE_MIGRATION_PATH = (
+    Path(__file__).parent.parent / "migrations" / "003_device_quantity_coverage.sql"
+)
+
+BUCKET = timedelta(minutes=15)
+BUCKETS_PER_DAY = 96
+SOURCE_SYSTEM = "SYNTH"
+
+# Asia/Jakarta has no DST: shifts and tariffs use a fixed UTC+7 local hour
+LOCAL_OFFSET_HOURS = 7
+RATES = {"WBP": 1553.67, "LWBP1": 1035.78, "LWBP2": 1035.78}
+
+# Rows buffered per COPY call
+COPY_CHUNK_ROWS = 50_000
+
+# Preset scales (explicit CLI flags override individual fields)
+SCALES = {
+    "small": {"tenants": 2, "devices": 50, "days": 30},
+    "medium": {"tenants": 5, "devices": 1000, "days": 180},
+    "large": {"tenants": 10, "devices": 10_000, "days": 730, "quantities": 2},
+}
+
+TAG_KEYS = [
+    "building", "process", "floor", "cost_center",
+    "equipment_type", "line", "area", "shift_group",
+]
+EQUIPMENT = [
+    "Compressor", "Chiller", "Press", "Pump", "Lighting",
+    "Boiler", "Conveyor", "Blower", "Mixer", "Panel",
+]
+ASSET_TYPES = ["FACILITY", "BUILDING", "PANEL", "SUB_PANEL", "MACHINE_GROUP", "MACHINE"]
+
+
+@dataclass(frozen=True)
+class SyntheticQuantity:
+    """A production quantity and the signal it is generated from."""
+
+    id: int
+    code: str
+    name: str
+    unit: str
+    aggregation_method: str
+    is_cumulative: bool
+    signal: str  # energy, reactive_energy, power, voltage, current, pf
+
+
+# Production IDs and codes (docs/quantities-mapping.md); energy first so
+# --quantities 1 still produces cost data
+QUANTITY_CATALOG = [
+    SyntheticQuantity(124, "PME_129_ACTIVE_ENERGY_DELIVE", "Active Energy Delivered",
+                      "kWh", "SUM", True, "energy"),
+    SyntheticQuantity(185, "PME_193_ACTIVE_POWER", "Active Power",
+                      "kW", "LATEST", False, "power"),
+    SyntheticQuantity(3332, "PME_3482_100MS_VOLTAGE_L-N_AV", "100ms Voltage L-N Avg",
+                      "V", "LATEST", False, "voltage"),
+    SyntheticQuantity(3324, "PME_3474_100MS_CURRENT_AVG", "100ms Current Avg",
+                      "A", "LATEST", False, "current"),
+    SyntheticQuantity(1072, "PME_1104_100MS_TRUE_POWER_FAC", "100ms True Power Factor Total",
+                      "", "LATEST", False, "pf"),
+    SyntheticQuantity(89, "PME_91_REACTIVE_ENERGY_DELI", "Reactive Energy Delivered",
+                      "kVARh", "SUM", True, "reactive_energy"),
+]
+ENERGY_QUANTITY_ID = 124
+
+
+@dataclass
+class DatasetConfig:
+    """Shape of the synthetic fleet."""
+
+    tenants: int = 2
+    devices: int = 50  # total, spread over tenants
+    days: int = 30  # history of 15-minute aggregates
+    raw_days: int = 2  # most recent days also written to telemetry_data
+    raw_interval_minutes: int = 5
+    quantities: int = len(QUANTITY_CATALOG)
+    tag_keys: int = 4
+    tag_cardinality: int = 8  # distinct values per tag key
+    hierarchy_depth: int = 3  # asset levels below the tenant root
+    hierarchy_fanout: int = 4
+    gap_rate: float = 0.02  # probability of a 1-8 hour outage per device-day
+    dropout_rate: float = 0.002  # probability of a single missing bucket
+    stale_rate: float = 0.02  # devices that stopped reporting 1-30 days ago
+    seed: int = 42
+    end: datetime | None = None  # default: now (UTC), floored to the bucket
+
+    def window(self) -> tuple[datetime, datetime]:
+        """[start, end) of the generated history, on bucket boundaries."""
+        end = self.end or datetime.now(UTC).replace(tzinfo=None)
+        end = end.replace(minute=end.minute - end.minute % 15, second=0, microsecond=0)
+        return end - timedelta(days=self.days), end
+
+
+@dataclass
+class Catalog:
+    """Non-telemetry rows, ready for COPY (column order as in COLUMNS)."""
+
+    tenants: list[tuple] = field(default_factory=list)
+    assets: list[tuple] = field(default_factory=list)
+    devices: list[tuple] = field(default_factory=list)
+    device_tags: list[tuple] = field(default_factory=list)
+    quantities: list[tuple] = field(default_factory=list)
+    meter_aggregations: list[tuple] = field(default_factory=list)
+    utility_sources: list[tuple] = field(default_factory=list)
+
+
+COLUMNS = {
+    "tenants": ["id", "tenant_code", "tenant_name", "tenant_type"],
+    "assets": [
+        "id", "tenant_id", "parent_id", "asset_code", "asset_name",
+        "asset_type", "utility_type", "utility_level",
+    ],
+    "devices": [
+        "id", "tenant_id", "asset_id", "device_code", "device_name",
+        "device_type", "display_name",
+    ],
+    "device_tags": ["device_id", "tag_key", "tag_value", "tag_category"],
+    "quantities": [
+        "id", "quantity_code", "quantity_name", "unit", "category",
+        "aggregation_method", "is_cumulative",
+    ],
+    "meter_aggregations": ["tenant_id", "name", "aggregation_type", "formula", "description"],
+    "utility_sources": ["id", "tenant_id", "source_name"],
+    "telemetry_15min_agg": [
+        "bucket", "tenant_id", "device_id", "quantity_id",
+        "aggregated_value", "sample_count", "source_system",
+    ],
+    "telemetry_data": [
+        "timestamp", "tenant_id", "device_id", "quantity_id", "value", "quality", "source_system",
+    ],
+    "daily_energy_cost_summary": [
+        "daily_bucket", "tenant_id", "device_id", "quantity_id", "grouping_type",
+        "shift_period", "rate_code", "rate_per_unit", "utility_source_id",
+        "total_consumption", "interval_count", "avg_interval_consumption",
+        "max_interval_consumption", "min_interval_consumption", "total_cost",
+        "refresh_method",
+    ],
+}
+
+POST_LOAD_INDEXES = [
+    "CREATE INDEX ON telemetry_15min_agg (device_id, quantity_id, bucket DESC)",
+    "CREATE INDEX ON telemetry_15min_agg (quantity_id, bucket DESC)",
+    "CREATE INDEX ON telemetry_data (device_id, quantity_id, \"timestamp\" DESC)",
+    "CREATE INDEX ON daily_energy_cost_summary (device_id, quantity_id, daily_bucket)",
+    "CREATE INDEX ON daily_energy_cost_summary (tenant_id, quantity_id, daily_bucket)",
+    "CREATE INDEX ON device_tags (tag_key, tag_value)",
+    "CREATE INDEX ON device_tags (device_id)",
+    "CREATE INDEX ON devices (tenant_id)",
+    "CREATE INDEX ON assets (parent_id)",
+]
+
+TIME_BUCKET_FALLBACK = """
+    CREATE FUNCTION time_bucket(bucket_width INTERVAL, ts TIMESTAMP)
+    RETURNS TIMESTAMP LANGUAGE sql IMMUTABLE AS $$
+        SELECT date_bin(bucket_width, ts, TIMESTAMP '2000-01-03')
+    $$
+"""
+
+
+# ============================================================================
+# Catalog
+# ============================================================================
+
+
+def _split(total: int, parts: int) -> list[int]:
+    """Split total into `parts` near-equal counts."""
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def build_catalog(config: DatasetConfig) -> Catalog:
+    """Build tenants, asset trees, devices, tags, quantities and aggregations."""
+    rng = random.Random(config.seed)
+    catalog = Catalog()
+    asset_id = 0
+    device_id = 0
+
+    catalog.quantities = [
+        (q.id, q.code, q.name, q.unit, "Electricity", q.aggregation_method, q.is_cumulative)
+        for q in QUANTITY_CATALOG[: max(config.quantities, 1)]
+    ]
+    tag_keys = TAG_KEYS[: config.tag_keys]
+
+    for tenant_id, device_count in enumerate(_split(config.devices, config.tenants), start=1):
+        code = f"SYN{tenant_id:02d}"
+        catalog.tenants.append((tenant_id, code, f"Synthetic Tenant {tenant_id}", "PME"))
+        catalog.utility_sources.append((tenant_id, tenant_id, "PLN"))
+
+        # Asset tree, breadth first; devices hang off the deepest level
+        asset_id += 1
+        catalog.assets.append(
+            (asset_id, tenant_id, None, f"{code}-A{asset_id}", f"{code} Facility",
+             ASSET_TYPES[0], "ELECTRICITY", 0)
+        )
+        level = [asset_id]
+        for depth in range(1, config.hierarchy_depth + 1):
+            next_level = []
+            asset_type = ASSET_TYPES[min(depth, len(ASSET_TYPES) - 1)]
+            for parent in level:
+                for _ in range(config.hierarchy_fanout):
+                    asset_id += 1
+                    catalog.assets.append(
+                        (asset_id, tenant_id, parent, f"{code}-A{asset_id}",
+                         f"{code} {asset_type.title().replace('_', ' ')} {asset_id}",
+                         asset_type, "ELECTRICITY", depth)
+                    )
+                    next_level.append(asset_id)
+            level = next_level
+
+        tenant_devices = []
+        for n in range(1, device_count + 1):
+            device_id += 1
+            equipment = EQUIPMENT[rng.randrange(len(EQUIPMENT))]
+            catalog.devices.append(
+                (device_id, tenant_id, level[(n - 1) % len(level)], f"{code}-M{n:05d}",
+                 f"{code}_METER_{n:05d}", "POWER_METER", f"{equipment} {n:04d} ({code})")
+            )
+            tenant_devices.append(device_id)
+            for key in tag_keys:
+                # Skewed values: low-numbered values are the big groups
+                value = int(config.tag_cardinality * rng.random() ** 2) + 1
+                catalog.device_tags.append((device_id, key, f"{key}_{value}", "synthetic"))
+
+        # Named formulas over the first meters (incomers)
+        mains = tenant_devices[:4]
+        if mains:
+            catalog.meter_aggregations.append(
+                (tenant_id, "facility", "facility", "+".join(map(str, mains)),
+                 "Total facility consumption")
+            )
+        if len(mains) >= 2:
+            catalog.meter_aggregations.append(
+                (tenant_id, "main_division", "department", f"({mains[0]})-({mains[1]})",
+                 "Main incomer minus sub-division")
+            )
+
+    return catalog
+
+
+# ============================================================================
+# Telemetry
+# ============================================================================
+
+
+@dataclass
+class DeviceProfile:
+    """Deterministic load profile of one device."""
+
+    device_id: int
+    tenant_id: int
+    base_kw: float
+    night_factor: float
+    weekend_factor: float
+    pf: float
+    voltage: float
+    register_start: float
+    stop_at: datetime | None  # stale devices stop reporting here
+    rng: random.Random
+
+
+def device_profile(
+    device_id: int, tenant_id: int, config: DatasetConfig, end: datetime
+) -> DeviceProfile:
+    """Draw a device's load profile from its own seeded generator."""
+    rng = random.Random(config.seed * 1_000_003 + device_id)
+    stop_at = None
+    if rng.random() < config.stale_rate:
+        stop_at = end - timedelta(days=rng.uniform(1, 30))
+    return DeviceProfile(
+        device_id=device_id,
+        tenant_id=tenant_id,
+        base_kw=rng.lognormvariate(math.log(40), 1.0),
+        night_factor=rng.uniform(0.15, 0.6),
+        weekend_factor=rng.uniform(0.3, 0.9),
+        pf=rng.uniform(0.82, 0.98),
+        voltage=rng.uniform(225, 235),
+        register_start=rng.uniform(1e4, 5e6),
+        stop_at=stop_at,
+        rng=rng,
+    )
+
+
+def _local_hour(ts: datetime) -> int:
+    return (ts.hour + LOCAL_OFFSET_HOURS) % 24
+
+
+def shift_and_rate(ts: datetime) -> tuple[str, str]:
+    """Shift (SHIFT1 07-15, SHIFT2 15-23, SHIFT3) and PLN tariff of a UTC time."""
+    hour = _local_hour(ts)
+    shift = "SHIFT1" if 7 <= hour < 15 else "SHIFT2" if 15 <= hour < 23 else "SHIFT3"
+    rate = "WBP" if 17 <= hour < 22 else "LWBP2" if hour >= 22 else "LWBP1"
+    return shift, rate
+
+
+def _load_kw(profile: DeviceProfile, ts: datetime) -> float:
+    """Average power in the bucket starting at ts."""
+    hour = _local_hour(ts) + ts.minute / 60
+    # Smooth day shape: full load around 13:00 local, night_factor at 01:00
+    day = (1 - math.cos((hour - 1) / 24 * 2 * math.pi)) / 2
+    factor = profile.night_factor + (1 - profile.night_factor) * day
+    if (ts + timedelta(hours=LOCAL_OFFSET_HOURS)).weekday() >= 5:
+        factor *= profile.weekend_factor
+    return max(profile.base_kw * factor * profile.rng.gauss(1.0, 0.08), 0.0)
+
+
+def iter_buckets(
+    profile: DeviceProfile,
+    config: DatasetConfig,
+    start: datetime,
+    end: datetime,
+) -> Iterator[tuple[datetime, dict[str, float], bool]]:
+    """
+    Yield (bucket, signals, present) for every bucket of [start, end).
+
+    Registers keep counting through outages, so the first bucket after a gap
+    carries the whole gap's consumption, as real meters do. Buckets with
+    present=False are not written.
+    """
+    rng = profile.rng
+    energy = profile.register_start
+    reactive = profile.register_start * 0.3
+    tan_phi = math.tan(math.acos(profile.pf))
+    outage_from = outage_until = None
+    ts = start
+    index = 0
+    while ts < end:
+        if index % BUCKETS_PER_DAY == 0 and rng.random() < config.gap_rate:
+            outage_from = ts + BUCKET * rng.randrange(BUCKETS_PER_DAY)
+            outage_until = outage_from + timedelta(hours=rng.uniform(1, 8))
+
+        kw = _load_kw(profile, ts)
+        energy += kw * 0.25
+        reactive += kw * 0.25 * tan_phi
+        voltage = profile.voltage + rng.gauss(0, 1.5)
+        pf = min(profile.pf + rng.gauss(0, 0.01), 1.0)
+        present = not (
+            (outage_from is not None and outage_from <= ts < outage_until)
+            or (profile.stop_at is not None and ts >= profile.stop_at)
+            or rng.random() < config.dropout_rate
+        )
+        yield ts, {
+            "energy": energy,
+            "reactive_energy": reactive,
+            "power": kw,
+            "voltage": voltage,
+            "current": kw * 1000 / (3 * voltage * pf),
+            "pf": pf,
+        }, present
+        ts += BUCKET
+        index += 1
+
+
+def _fmt(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def device_rows(
+    device_id: int,
+    tenant_id: int,
+    config: DatasetConfig,
+    quantities: list[SyntheticQuantity],
+) -> Iterator[tuple[str, str]]:
+    """
+    Yield (table, csv_line) rows of one device for all telemetry tables.
+
+    Daily cost rows are built from the energy register deltas between
+    consecutive present buckets, per UTC day, shift and tariff.
+    """
+    start, end = config.window()
+    raw_start = end - timedelta(days=config.raw_days)
+    raw_step = timedelta(minutes=config.raw_interval_minutes)
+    profile = device_profile(device_id, tenant_id, config, end)
+    with_cost = any(q.id == ENERGY_QUANTITY_ID for q in quantities)
+
+    prefix = f"{tenant_id},{device_id}"
+    previous: dict[str, float] | None = None
+    day = None
+    day_groups: dict[tuple[str, str], list[float]] = {}
+
+    for ts, signals, present in iter_buckets(profile, config, start, end):
+        if with_cost and ts.date() != day:
+            yield from _cost_rows(day, prefix, tenant_id, day_groups)
+            day, day_groups = ts.date(), {}
+        if not present:
+            continue
+
+        for q in quantities:
+            yield (
+                "telemetry_15min_agg",
+                f"{_fmt(ts)},{prefix},{q.id},{signals[q.signal]:.4f},15,{SOURCE_SYSTEM}\n",
+            )
+
+        if ts >= raw_start:
+            yield from _raw_rows(ts, raw_step, prefix, quantities, signals, previous, profile.rng)
+
+        if with_cost and previous is not None:
+            delta = signals["energy"] - previous["energy"]
+            day_groups.setdefault(shift_and_rate(ts), []).append(delta)
+        previous = signals
+
+    if with_cost:
+        yield from _cost_rows(day, prefix, tenant_id, day_groups)
+
+
+def _raw_rows(
+    ts: datetime,
+    step: timedelta,
+    prefix: str,
+    quantities: list[SyntheticQuantity],
+    signals: dict[str, float],
+    previous: dict[str, float] | None,
+    rng: random.Random,
+) -> Iterator[tuple[str, str]]:
+    """Raw samples inside one bucket: registers interpolated, the rest jittered."""
+    samples = int(BUCKET / step)
+    for i in range(samples):
+        sample_ts = ts + step * i
+        for q in quantities:
+            value = signals[q.signal]
+            if q.is_cumulative and previous is not None:
+                before = previous[q.signal]
+                value = before + (value - before) * (i + 1) / samples
+            elif not q.is_cumulative:
+                value *= rng.gauss(1.0, 0.02)
+            yield (
+                "telemetry_data",
+                f"{_fmt(sample_ts)},{prefix},{q.id},{value:.4f},1,{SOURCE_SYSTEM}\n",
+            )
+
+
+def _cost_rows(
+    day, prefix: str, tenant_id: int, groups: dict[tuple[str, str], list[float]]
+) -> Iterator[tuple[str, str]]:
+    """daily_energy_cost_summary rows of one device-day."""
+    if day is None:
+        return
+    for (shift, rate), deltas in sorted(groups.items()):
+        total = sum(deltas)
+        yield (
+            "daily_energy_cost_summary",
+            f"{day} 00:00:00,{prefix},{ENERGY_QUANTITY_ID},SHIFT_RATE,{shift},{rate},"
+            f"{RATES[rate]},{tenant_id},{total:.4f},{len(deltas)},{total / len(deltas):.4f},"
+            f"{max(deltas):.4f},{min(deltas):.4f},{total * RATES[rate]:.2f},{SOURCE_SYSTEM}\n",
+        )
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+
+async def _copy_lines(conn: asyncpg.Connection, table: str, lines: list[str]) -> None:
+    await conn.copy_to_table(
+        table,
+        source=io.BytesIO("".join(lines).encode()),
+        columns=COLUMNS[table],
+        format="csv",
+    )
+
+
+async def _load_telemetry_slice(
+    dsn: str,
+    devices: list[tuple],
+    config: DatasetConfig,
+    quantities: list[SyntheticQuantity],
+) -> dict[str, int]:
+    """COPY all telemetry rows of a slice of devices over one connection."""
+    counts: dict[str, int] = {}
+    buffers: dict[str, list[str]] = {}
+    conn = await asyncpg.connect(dsn)
+    try:
+        for device in devices:
+            for table, line in device_rows(device[0], device[1], config, quantities):
+                buffer = buffers.setdefault(table, [])
+                buffer.append(line)
+                if len(buffer) >= COPY_CHUNK_ROWS:
+                    await _copy_lines(conn, table, buffer)
+                    counts[table] = counts.get(table, 0) + len(buffer)
+                    buffer.clear()
+        for table, buffer in buffers.items():
+            if buffer:
+                await _copy_lines(conn, table, buffer)
+                counts[table] = counts.get(table, 0) + len(buffer)
+    finally:
+        await conn.close()
+    return counts
+
+
+def _load_telemetry_slice_process(
+    dsn: str,
+    devices: list[tuple],
+    config: DatasetConfig,
+    quantities: list[SyntheticQuantity],
+) -> dict[str, int]:
+    """Worker process entry point for _load_telemetry_slice."""
+    return asyncio.run(_load_telemetry_slice(dsn, devices, config, quantities))
+
+
+async def create_schema(conn: asyncpg.Connection, timescale: bool) -> None:
+    """Create the schema subset (and hypertables, or the time_bucket fallback)."""
+    if timescale:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+    await conn.execute(SCHEMA_PATH.read_text())
+    if timescale:
+        await conn.execute(
+            "SELECT create_hypertable('telemetry_15min_agg', 'bucket', "
+            "chunk_time_interval => INTERVAL '7 days')"
+        )
+        await conn.execute(
+            "SELECT create_hypertable('telemetry_data', 'timestamp', "
+            "chunk_time_interval => INTERVAL '1 day')"
+        )
+    else:
+        await conn.execute(TIME_BUCKET_FALLBACK)
+
+
+async def load_dataset(
+    dsn: str,
+    config: DatasetConfig,
+    timescale: bool = False,
+    jobs: int = 4,
+) -> dict[str, int]:
+    """
+    Create the schema in an empty database and load the synthetic dataset.
+
+    Returns:
+        Row count per table
+    """
+    # Pin "now" so every worker process generates the same window
+    config = replace(config, end=config.window()[1])
+    catalog = build_catalog(config)
+    quantities = QUANTITY_CATALOG[: max(config.quantities, 1)]
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        exists = await conn.fetchval("SELECT to_regclass('public.devices') IS NOT NULL")
+        if exists:
+            raise RuntimeError("Target database already has a devices table; use a fresh one")
+        await create_schema(conn, timescale)
+
+        counts = {}
+        for table in (
+            "tenants", "utility_sources", "assets", "devices",
+            "device_tags", "quantities", "meter_aggregations",
+        ):
+            rows = getattr(catalog, table)
+            await conn.copy_records_to_table(table, records=rows, columns=COLUMNS[table])
+            counts[table] = len(rows)
+        logger.info(f"Catalog loaded: {counts}")
+
+        # Telemetry: devices interleaved over the jobs so slices are balanced
+        started = time.monotonic()
+        slices = [s for s in (catalog.devices[i::jobs] for i in range(jobs)) if s]
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=len(slices)) as pool:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        pool, _load_telemetry_slice_process, dsn, s, config, quantities
+                    )
+                    for s in slices
+                )
+            )
+        for result in results:
+            for table, count in result.items():
+                counts[table] = counts.get(table, 0) + count
+        logger.info(f"Telemetry loaded in {time.monotonic() - started:.1f}s")
+
+        for statement in POST_LOAD_INDEXES:
+            await conn.execute(statement)
+        await conn.execute(
+            "INSERT INTO daily_energy_refresh_log (refresh_method) VALUES ($1)", SOURCE_SYSTEM
+        )
+        if timescale:
+            # The coverage catalog's refresh job needs TimescaleDB (add_job)
+            await conn.execute(COVERAGE_MIGRATION_PATH.read_text())
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+    return counts
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.dataset",
+        description="Build a synthetic Valkyrie database for load and scale testing.",
+    )
+    parser.add_argument(
+        "--dsn",
+        default=os.environ.get("BENCH_DATABASE_URL"),
+        help="Target database, must be empty (default: $BENCH_DATABASE_URL)",
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--timescale", action="store_true", help="Use TimescaleDB hypertables")
+    parser.add_argument("--jobs", type=int, default=4, help="Parallel COPY connections")
+    defaults = DatasetConfig()
+    for name in (
+        "tenants", "devices", "days", "raw_days", "raw_interval_minutes", "quantities",
+        "tag_keys", "tag_cardinality", "hierarchy_depth", "hierarchy_fanout", "seed",
+    ):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None,
+                            help=f"(default: scale preset or {getattr(defaults, name)})")
+    for name in ("gap_rate", "dropout_rate", "stale_rate"):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=None,
+                            help=f"(default: {getattr(defaults, name)})")
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> DatasetConfig:
+    """Scale preset overridden by any explicit flag."""
+    config = replace(DatasetConfig(), **SCALES[args.scale])
+    overrides = {
+        name: value
+        for name, value in vars(args).items()
+        if name in DatasetConfig.__dataclass_fields__ and value is not None
+    }
+    return replace(config, **overrides)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    args = _parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("--dsn (or BENCH_DATABASE_URL) is required")
+    config = config_from_args(args)
+    logger.info(f"Generating {config}")
+    counts = asyncio.run(load_dataset(args.dsn, config, args.timescale, max(args.jobs, 1)))
+    for table, count in counts.items():
+        logger.info(f"{table}: {count:,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Microbenchmarks for the pure-Python hot paths of the tools.
+
+Every case builds realistic inputs once (10k-point series, 100-device
+pivots and breakdowns, real formulas and period strings) and times only the
+call itself with timeit: the loop count is auto-ranged to at least 0.2s and
+the best and median of several repeats are reported per call.
+
+Reports use the same JSON layout as benchmarks.tools, so baselines are
+stored and compared the same way (on the median).
+
+Usage:
+    python -m benchmarks.micro run --output benchmarks/baselines/micro.json
+    python -m benchmarks.micro run --only format_ --output /tmp/micro.json
+    python -m benchmarks.micro compare benchmarks/baselines/micro.json /tmp/micro.json
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import timeit
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from benchmarks.tools import _git_revision, compare_reports, format_comparison
+from pfn_mcp.tools import (
+    electricity_cost,
+    formula_parser,
+    group_telemetry,
+    periods,
+    quantities,
+    telemetry,
+    telemetry_batch,
+    wages_data,
+)
+from pfn_mcp.tools.datetime_utils import format_display_datetime
+from pfn_mcp.tools.downsample import downsample_lttb
+
+logger = logging.getLogger(__name__)
+
+COMPARED_METRICS = ("median_us",)
+
+REPEAT = 5
+MIN_TIME = 0.2  # seconds per repeat
+
+START = datetime(2025, 1, 1)
+
+
+@dataclass(frozen=True)
+class Case:
+    """A microbenchmark: setup() builds the inputs and returns the timed call."""
+
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+
+
+# ============================================================================
+# Inputs
+# ============================================================================
+
+
+def device_names(count: int) -> list[str]:
+    return [f"Compressor {i:04d} (SYN01)" for i in range(1, count + 1)]
+
+
+def series_points(count: int, step: timedelta = timedelta(minutes=15)) -> list[dict]:
+    """Telemetry data points as built by get_device_telemetry."""
+    points = []
+    for i in range(count):
+        ts = START + step * i
+        avg = 100 + 40 * ((i * 7919) % 97) / 97
+        points.append({
+            "time": ts.isoformat(),
+            "time_dt": ts,
+            "avg": round(avg, 3),
+            "min": round(avg * 0.9, 3),
+            "max": round(avg * 1.1, 3),
+            "sum": round(avg * 15, 3),
+            "count": 15,
+        })
+    return points
+
+
+def pivot_rows(devices: int, buckets: int) -> tuple[list[dict], list[int], list[str]]:
+    """Long-format (time_bucket, device_id, value) rows as the group queries return."""
+    device_ids = list(range(1, devices + 1))
+    rows = [
+        {"time_bucket": START + timedelta(hours=b), "device_id": d, "value": float(b + d)}
+        for b in range(buckets)
+        for d in device_ids
+    ]
+    return rows, device_ids, device_names(devices)
+
+
+def telemetry_result(points: int) -> dict:
+    data = series_points(points)
+    return {
+        "device": {"id": 1, "name": "Compressor 0001 (SYN01)"},
+        "quantity": {
+            "id": 185, "name": "Active Power", "code": "PME_193_ACTIVE_POWER",
+            "unit": "kW", "aggregation_method": "LATEST",
+        },
+        "time_range": {
+            "start": data[0]["time"], "end": data[-1]["time"],
+            "start_dt": data[0]["time_dt"], "end_dt": data[-1]["time_dt"],
+            "bucket": "15min", "bucket_interval": "15 minutes",
+            "data_source": "aggregated", "downsample": None,
+        },
+        "data": data,
+        "point_count": len(data),
+    }
+
+
+def group_timeseries_result(devices: int, buckets: int) -> dict:
+    rows, device_ids, names = pivot_rows(devices, buckets)
+    data = group_telemetry._pivot_timeseries(rows, device_ids, names)
+    return {
+        "group": {
+            "label": "building=building_1", "result_type": "aggregated_group",
+            "devices": names, "device_count": devices, "devices_with_data": devices,
+        },
+        "quantity": {"name": "Active Power", "unit": "kW"},
+        "timeseries": {"period": "7d", "bucket": "1hour", "row_count": len(data), "data": data},
+    }
+
+
+def group_summary_result(devices: int) -> dict:
+    names = device_names(devices)
+    return {
+        "group": {
+            "label": "building=building_1", "result_type": "aggregated_group",
+            "devices": names, "device_count": devices, "devices_with_data": devices,
+        },
+        "quantity": {
+            "name": "Active Power", "unit": "kW",
+            "aggregation": "average", "is_instantaneous": True,
+        },
+        "summary": {
+            "period": "2025-01-01 to 2025-01-31", "days_with_data": 31,
+            "average_value": 123.45, "min_value": 1.2, "min_device": names[0],
+            "min_time": START, "max_value": 987.6, "max_device": names[-1],
+            "max_time": START + timedelta(days=3), "data_points": 297_600,
+        },
+        "breakdown": [
+            {"device": name, "value": 100.0 + i, "min": 1.0 + i, "max": 900.0 + i}
+            for i, name in enumerate(names)
+        ],
+    }
+
+
+def wages_result(devices: int, points: int) -> dict:
+    names = device_names(devices)
+    return {
+        "summary": {
+            "value": 12345.678, "unit": "kWh", "quantity": "Active Energy Delivered",
+            "agg_method": "sum", "period": "30d", "bucket": "1hour",
+        },
+        "scope_type": "formula",
+        "scope": {"formula": "(1+2+3)-(4)", "devices": []},
+        "breakdown": [
+            {"device_id": i, "device_name": name, "value": 100.0 * i, "samples": 2880}
+            for i, name in enumerate(names, start=1)
+        ],
+        "breakdown_type": "device",
+        "timeseries": {
+            "bucket": "1hour",
+            "data": [
+                {"time": p["time"], "time_dt": p["time_dt"], "value": p["avg"], "devices": 4}
+                for p in series_points(points, timedelta(hours=1))
+            ],
+            "point_count": points,
+        },
+    }
+
+
+def batch_result(devices: int, quantities_per_device: int, points: int) -> dict:
+    timestamps = [START + timedelta(hours=i) for i in range(points)]
+    series = []
+    for device_id, name in enumerate(device_names(devices), start=1):
+        for q in range(quantities_per_device):
+            values = [float(device_id + q + i % 24) for i in range(points)]
+            series.append({
+                "device_id": device_id, "device": name, "quantity_id": q,
+                "quantity": f"Quantity {q}", "unit": "kW", "values": values,
+                "avg": sum(values) / len(values), "min": min(values),
+                "max": max(values), "last": values[-1], "count": len(values),
+            })
+    return {
+        "time_range": {
+            "start": timestamps[0].isoformat(), "end": timestamps[-1].isoformat(),
+            "start_dt": timestamps[0], "end_dt": timestamps[-1],
+            "bucket": "1hour", "bucket_interval": "1 hour", "data_source": "aggregated",
+        },
+        "timestamps": [ts.isoformat() for ts in timestamps],
+        "series": series,
+        "point_count": points,
+        "series_count": len(series),
+    }
+
+
+def _each(func: Callable, inputs: list) -> Callable[[], None]:
+    """Timed call that runs func over every input (one 'call' = the whole list)."""
+    def run() -> None:
+        for item in inputs:
+            func(*item) if isinstance(item, tuple) else func(item)
+    return run
+
+
+LARGE_FORMULA = "(" + "+".join(str(i) for i in range(1, 81)) + ")-(" + "+".join(
+    str(i) for i in range(81, 101)
+) + ")"
+
+
+def _formula_values() -> Callable[[], Any]:
+    terms = formula_parser.parse_formula(LARGE_FORMULA)
+    values = {i: float(i) for i in range(1, 101)}
+    return lambda: formula_parser.calculate_formula_result(terms, values)
+
+
+def _natural_periods() -> Callable[[], None]:
+    now = datetime.now(UTC).replace(tzinfo=None)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    terms = ["yesterday", "kemarin", "this month", "bulan lalu", "last 7 days", "minggu ini"]
+    return _each(lambda p: periods._parse_natural_language_period(p, today, now), terms)
+
+
+CASES = [
+    # Periods (electricity_cost.parse_period is the same function)
+    Case("periods.parse_period:relative", lambda: _each(
+        periods.parse_period, [("7d", None, None), ("30d", None, None), ("24h", None, None)]
+    )),
+    Case("periods.parse_period:calendar", lambda: _each(
+        electricity_cost.parse_period,
+        [("2025-12", None, None), ("2025-12-01 to 2025-12-15", None, None),
+         (None, "2025-11-01", "2025-11-30")],
+    )),
+    Case("periods.parse_period:natural", lambda: _each(
+        periods.parse_period,
+        [("yesterday", None, None), ("bulan lalu", None, None), ("last 3 days", None, None)],
+    )),
+    Case("periods._parse_natural_language_period", _natural_periods),
+    Case("telemetry.parse_period", lambda: _each(telemetry.parse_period, ["1h", "7d", "3M"])),
+    # Lookups and formulas
+    Case("quantities.expand_quantity_aliases", lambda: _each(
+        quantities.expand_quantity_aliases,
+        ["power", "voltage", "thd current", "water flow", "no such quantity"],
+    )),
+    Case("formula_parser.parse_formula:small", lambda: (
+        lambda: formula_parser.parse_formula("(94+11+27)-(84)")
+    )),
+    Case("formula_parser.parse_formula:100", lambda: (
+        lambda: formula_parser.parse_formula(LARGE_FORMULA)
+    )),
+    Case("formula_parser.calculate_formula_result:100", _formula_values),
+    # Group helpers
+    Case("group_telemetry.select_group_bucket", lambda: _each(
+        group_telemetry.select_group_bucket,
+        [(timedelta(days=d), n) for d in (1, 7, 30, 365) for n in (1, 10, 100)],
+    )),
+    Case("group_telemetry._pivot_timeseries:100x200", lambda: (
+        lambda rows=pivot_rows(100, 200): group_telemetry._pivot_timeseries(*rows)
+    )),
+    Case("downsample.lttb:10k", lambda: (
+        lambda points=series_points(10_000): downsample_lttb(points, 500)
+    )),
+    # Renderers
+    Case("format_telemetry_response:10k", lambda: (
+        lambda result=telemetry_result(10_000): telemetry.format_telemetry_response(result)
+    )),
+    Case("format_group_telemetry_response:timeseries-100x200", lambda: (
+        lambda result=group_timeseries_result(100, 200):
+            group_telemetry.format_group_telemetry_response(result)
+    )),
+    Case("format_group_telemetry_response:breakdown-100", lambda: (
+        lambda result=group_summary_result(100):
+            group_telemetry.format_group_telemetry_response(result)
+    )),
+    Case("format_wages_data_response:100-devices", lambda: (
+        lambda result=wages_result(100, 500): wages_data.format_wages_data_response(result)
+    )),
+    Case("format_batch_telemetry_response:20x3", lambda: (
+        lambda result=batch_result(20, 3, 168):
+            telemetry_batch.format_batch_telemetry_response(result)
+    )),
+    Case("datetime_utils.format_display_datetime", lambda: _each(
+        format_display_datetime,
+        [START, datetime(2025, 6, 1, 12, 30, tzinfo=UTC), "2025-01-01T10:00:00", None],
+    )),
+]
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+
+def measure(case: Case, repeat: int = REPEAT, min_time: float = MIN_TIME) -> dict:
+    """Time one case: auto-ranged loops, best and median per call."""
+    func = case.setup()
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    per_call = [t / loops * 1e6 for t in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "loops": loops,
+        "best_us": round(min(per_call), 3),
+        "median_us": round(statistics.median(per_call), 3),
+    }
+
+
+def run_cases(only: str | None = None, repeat: int = REPEAT) -> dict:
+    """Run the (filtered) cases and return the JSON report."""
+    results = {}
+    for case in CASES:
+        if only and only not in case.name:
+            continue
+        results[case.name] = measure(case, repeat)
+        logger.info(f"{case.name}: {results[case.name]['median_us']} us")
+    return {
+        "meta": {
+            "label": "micro",
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the microbenchmarks and write a JSON report")
+    run.add_argument("--only", help="Only cases whose name contains this")
+    run.add_argument("--repeat", type=int, default=REPEAT)
+    run.add_argument("--output", type=Path, help="Report path (default: stdout)")
+
+    compare = commands.add_parser("compare", help="Flag slowdowns against a baseline")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.command == "run":
+        text = json.dumps(run_cases(args.only, args.repeat), indent=2)
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(text + "\n")
+        else:
+            print(text)
+        return
+
+    regressions = compare_reports(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.current.read_text()),
+        args.threshold,
+        COMPARED_METRICS,
+    )
+    print(format_comparison(regressions, args.threshold))
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
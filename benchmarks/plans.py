@@ -0,0 +1,472 @@
+"""EXPLAIN plan capture and plan-regression checks for the tool SQL.
+
+`capture` runs every benchmark scenario (benchmarks.tools.SCENARIOS) against
+a database. Each read query a tool issues is run a second time as
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) with the same arguments. Per query
+the report stores the call site (tool module and function), a normalized
+plan shape, timings, buffers and findings:
+
+- seq_scan_hypertable: sequential scan on a hypertable or one of its chunks
+- no_chunk_exclusion: every chunk of a hypertable was scanned
+- decompress_unfiltered: compressed chunks decompressed without any filter
+- row_estimate: estimated vs actual rows off by ESTIMATE_ERROR_FACTOR or more
+
+Chunks are mapped back to their hypertable (or continuous aggregate) through
+the TimescaleDB catalog. Without TimescaleDB (plain synthetic tables),
+DEFAULT_HYPERTABLES are treated as hypertables.
+
+`check` compares two captures: a changed plan shape or a new finding for the
+same query is reported and exits non-zero. Shapes ignore chunk counts, costs
+and row numbers, so a longer dataset does not count as a change.
+
+Usage:
+    python -m benchmarks.plans capture --dsn postgresql://localhost/valkyrie_bench \\
+        --output benchmarks/baselines/plans-medium.json
+    python -m benchmarks.plans check benchmarks/baselines/plans-medium.json /tmp/plans.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import traceback
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks.tools import (
+    SCENARIOS,
+    _call,
+    _git_revision,
+    _prime_background_indexes,
+    load_fixtures,
+)
+from pfn_mcp import db
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HYPERTABLES = ("telemetry_data", "telemetry_15min_agg")
+
+# Row-estimate findings: off by at least this factor, on at least this many rows
+ESTIMATE_ERROR_FACTOR = 10.0
+ESTIMATE_MIN_ROWS = 1000
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+_EXPLAINABLE = re.compile(r"^\s*(?:--[^\n]*\n\s*)*(WITH|SELECT)\b", re.IGNORECASE)
+_CHUNK_NAME = re.compile(r"_hyper_\d+_\d+_chunk")
+_COMPRESSED_CHUNK_NAME = re.compile(r"compress_hyper_\d+_\d+_chunk")
+_FILTER_KEYS = ("Filter", "Index Cond", "Recheck Cond", "Vectorized Filter")
+
+
+@dataclass
+class HypertableCatalog:
+    """Which relations are hypertables and which chunks belong to them."""
+
+    hypertables: set[str] = field(default_factory=lambda: set(DEFAULT_HYPERTABLES))
+    chunk_parent: dict[str, str] = field(default_factory=dict)
+    chunk_counts: dict[str, int] = field(default_factory=dict)
+
+    def parent(self, relation: str | None) -> str | None:
+        """Hypertable a relation belongs to (itself for a hypertable), else None."""
+        if relation is None:
+            return None
+        if relation in self.chunk_parent:
+            return self.chunk_parent[relation]
+        return relation if relation in self.hypertables else None
+
+
+async def load_catalog() -> HypertableCatalog:
+    """Hypertables and chunks of the target database (TimescaleDB optional)."""
+    catalog = HypertableCatalog()
+    has_timescale = await db.fetch_val(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb')"
+    )
+    if not has_timescale:
+        return catalog
+
+    # Continuous aggregates are reported under their view name
+    names = {
+        row["materialization_hypertable_name"]: row["view_name"]
+        for row in await db.fetch_all(
+            "SELECT view_name, materialization_hypertable_name "
+            "FROM timescaledb_information.continuous_aggregates"
+        )
+    }
+    for row in await db.fetch_all(
+        "SELECT hypertable_name FROM timescaledb_information.hypertables"
+    ):
+        catalog.hypertables.add(names.get(row["hypertable_name"], row["hypertable_name"]))
+    for row in await db.fetch_all(
+        "SELECT hypertable_name, chunk_name FROM timescaledb_information.chunks"
+    ):
+        parent = names.get(row["hypertable_name"], row["hypertable_name"])
+        catalog.chunk_parent[row["chunk_name"]] = parent
+        catalog.chunk_counts[parent] = catalog.chunk_counts.get(parent, 0) + 1
+    return catalog
+
+
+# ============================================================================
+# Plan analysis
+# ============================================================================
+
+
+def normalize_sql(query: str) -> str:
+    return " ".join(query.split())
+
+
+def query_id(query: str) -> str:
+    """Stable id of a SQL text (whitespace-insensitive)."""
+    return hashlib.sha1(normalize_sql(query).encode()).hexdigest()[:12]
+
+
+def call_site() -> str:
+    """module:function of the innermost pfn_mcp frame outside the db layer."""
+    for frame in reversed(traceback.extract_stack()):
+        path = frame.filename.replace("\\", "/")
+        if "/pfn_mcp/" in path and not path.endswith("/pfn_mcp/db.py"):
+            module = path.rsplit("/pfn_mcp/", 1)[1].removesuffix(".py").replace("/", ".")
+            return f"{module}:{frame.name}"
+    return "unknown"
+
+
+def iter_nodes(node: dict):
+    """Every node of a plan tree, depth first."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_nodes(child)
+
+
+def _node_type(node: dict) -> str:
+    provider = node.get("Custom Plan Provider")
+    return f"{node['Node Type']} ({provider})" if provider else node["Node Type"]
+
+
+def _relation(node: dict, catalog: HypertableCatalog) -> str | None:
+    relation = node.get("Relation Name")
+    if relation and _COMPRESSED_CHUNK_NAME.fullmatch(relation):
+        return "<compressed chunk>"
+    return catalog.parent(relation) or relation
+
+
+def plan_shape(node: dict, catalog: HypertableCatalog) -> dict:
+    """Node types, relations and indexes; chunks folded into their hypertable."""
+    shape: dict[str, Any] = {"node": _node_type(node)}
+    relation = _relation(node, catalog)
+    if relation:
+        shape["relation"] = relation
+    if node.get("Index Name"):
+        shape["index"] = _CHUNK_NAME.sub("<chunk>", node["Index Name"])
+    children = []
+    for child in node.get("Plans", []):
+        child_shape = plan_shape(child, catalog)
+        if child_shape not in children:
+            children.append(child_shape)
+    if children:
+        shape["children"] = children
+    return shape
+
+
+def shape_hash(shape: dict) -> str:
+    return hashlib.sha1(json.dumps(shape, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _executed(node: dict) -> bool:
+    return node.get("Actual Loops", 1) > 0
+
+
+def analyze_plan(plan: dict, catalog: HypertableCatalog) -> list[dict]:
+    """Findings for one plan (the "Plan" node of EXPLAIN FORMAT JSON)."""
+    findings: dict[tuple, dict] = {}
+    scanned_chunks: dict[str, set[str]] = {}
+
+    for node in iter_nodes(plan):
+        relation = node.get("Relation Name")
+        parent = catalog.parent(relation)
+        node_type = _node_type(node)
+
+        if parent and relation in catalog.chunk_parent and _executed(node):
+            scanned_chunks.setdefault(parent, set()).add(relation)
+
+        if parent and node["Node Type"] == "Seq Scan" and _executed(node):
+            finding = findings.setdefault(
+                ("seq_scan_hypertable", parent, "Seq Scan"),
+                {"kind": "seq_scan_hypertable", "relation": parent, "rows": 0},
+            )
+            finding["rows"] += node.get("Actual Rows", 0) * node.get("Actual Loops", 1)
+
+        if node.get("Custom Plan Provider") == "DecompressChunk" and _executed(node):
+            filtered = any(key in n for n in iter_nodes(node) for key in _FILTER_KEYS)
+            if not filtered:
+                target = _relation(node, catalog) or "<chunk>"
+                finding = findings.setdefault(
+                    ("decompress_unfiltered", target, node_type),
+                    {"kind": "decompress_unfiltered", "relation": target, "rows": 0},
+                )
+                finding["rows"] += node.get("Actual Rows", 0) * node.get("Actual Loops", 1)
+
+        if "Actual Rows" in node and _executed(node):
+            estimated = node.get("Plan Rows", 0)
+            actual = node["Actual Rows"] * node.get("Actual Loops", 1)
+            factor = max(actual, 1) / max(estimated, 1)
+            factor = max(factor, 1 / factor)
+            if max(estimated, actual) >= ESTIMATE_MIN_ROWS and factor >= ESTIMATE_ERROR_FACTOR:
+                key = ("row_estimate", _relation(node, catalog), node_type)
+                if key not in findings or findings[key]["factor"] < factor:
+                    findings[key] = {
+                        "kind": "row_estimate", "relation": key[1], "node": node_type,
+                        "estimated": estimated, "actual": actual, "factor": round(factor, 1),
+                    }
+
+    for parent, chunks in scanned_chunks.items():
+        total = catalog.chunk_counts.get(parent, 0)
+        if total > 1 and len(chunks) >= total:
+            findings[("no_chunk_exclusion", parent, "")] = {
+                "kind": "no_chunk_exclusion", "relation": parent,
+                "chunks": len(chunks), "total": total,
+            }
+    return list(findings.values())
+
+
+def finding_key(finding: dict) -> str:
+    """Identity of a finding across runs (without its numbers)."""
+    return ":".join(str(finding.get(k) or "") for k in ("kind", "relation", "node"))
+
+
+# ============================================================================
+# Capture
+# ============================================================================
+
+
+class PlanCapture:
+    """Explains every read query issued through db.fetch_* while installed."""
+
+    FUNCTIONS = ("fetch_all", "fetch_one", "fetch_val")
+
+    def __init__(self, catalog: HypertableCatalog):
+        self.catalog = catalog
+        self.queries: dict[str, dict] = {}
+        self._explain: Callable[..., Awaitable[Any]] | None = None
+
+    def reset(self) -> None:
+        self.queries = {}
+
+    async def _record(self, query: str, args: tuple) -> None:
+        qid = query_id(query)
+        entry = self.queries.get(qid)
+        if entry is not None:
+            entry["calls"] += 1
+            return
+        entry = {
+            "query_id": qid,
+            "site": call_site(),
+            "sql": normalize_sql(query)[:300],
+            "calls": 1,
+        }
+        self.queries[qid] = entry
+        try:
+            raw = await self._explain(EXPLAIN_PREFIX + query, *args)
+        except Exception as e:
+            entry["error"] = str(e)[:200]
+            return
+        explained = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        plan = explained["Plan"]
+        shape = plan_shape(plan, self.catalog)
+        entry.update({
+            "shape_hash": shape_hash(shape),
+            "shape": shape,
+            "findings": analyze_plan(plan, self.catalog),
+            "planning_ms": explained.get("Planning Time"),
+            "execution_ms": explained.get("Execution Time"),
+            "shared_hit": plan.get("Shared Hit Blocks"),
+            "shared_read": plan.get("Shared Read Blocks"),
+            "rows": plan.get("Actual Rows"),
+        })
+
+    def _wrap(self, func: Callable) -> Callable:
+        async def explained(query: str, *args: Any, **kwargs: Any) -> Any:
+            result = await func(query, *args, **kwargs)
+            if _EXPLAINABLE.match(query):
+                await self._record(query, args)
+            return result
+
+        return explained
+
+    @contextmanager
+    def installed(self):
+        """Patch the db module functions the tools call, restoring them on exit."""
+        originals = {name: getattr(db, name) for name in self.FUNCTIONS}
+        self._explain = originals["fetch_val"]
+        for name, func in originals.items():
+            setattr(db, name, self._wrap(func))
+        try:
+            yield self
+        finally:
+            for name, func in originals.items():
+                setattr(db, name, func)
+
+
+async def run_capture(dsn: str, label: str, only: str | None = None) -> dict:
+    """Capture plans for the (filtered) scenarios and return the JSON report."""
+    settings.database_url = dsn
+    settings.database_replica_url = None
+    settings.tool_cache_enabled = False
+    settings.db_coalesce_reads = False
+
+    await db.init_pool()
+    try:
+        await _prime_background_indexes()
+        fixtures = await load_fixtures()
+        capture = PlanCapture(await load_catalog())
+        results = {}
+        with capture.installed():
+            for scenario in SCENARIOS:
+                if only and only not in scenario.name:
+                    continue
+                capture.reset()
+                await _call(scenario, fixtures)
+                queries = list(capture.queries.values())
+                results[scenario.name] = {"tool": scenario.tool, "queries": queries}
+                flagged = sum(len(q.get("findings", [])) for q in queries)
+                logger.info(f"{scenario.name}: {len(queries)} queries, {flagged} findings")
+    finally:
+        await db.close_pool()
+
+    return {
+        "meta": {
+            "label": label,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "hypertables": sorted(capture.catalog.hypertables),
+        },
+        "results": results,
+    }
+
+
+# ============================================================================
+# Reports
+# ============================================================================
+
+
+def compare_plans(baseline: dict, current: dict) -> list[dict]:
+    """
+    Plan changes between two captures, matched by scenario and query id.
+
+    Returns:
+        One entry per change: scenario, site, query_id, change ("shape" or
+        "finding") and detail
+    """
+    changes = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        old_queries = {q["query_id"]: q for q in old["queries"]}
+        for query in new["queries"]:
+            before = old_queries.get(query["query_id"])
+            if before is None or "shape_hash" not in query or "shape_hash" not in before:
+                continue
+            base = {"scenario": name, "site": query["site"], "query_id": query["query_id"]}
+            if query["shape_hash"] != before["shape_hash"]:
+                changes.append({
+                    **base, "change": "shape",
+                    "detail": f"{before['shape_hash']} -> {query['shape_hash']}",
+                })
+            known = {finding_key(f) for f in before.get("findings", [])}
+            for finding in query.get("findings", []):
+                if finding_key(finding) not in known:
+                    changes.append({**base, "change": "finding", "detail": finding})
+    return changes
+
+
+def format_finding(finding: dict) -> str:
+    kind = finding["kind"]
+    if kind == "row_estimate":
+        return (
+            f"row estimate off {finding['factor']}x on {finding['node']} "
+            f"{finding['relation'] or ''} (est {finding['estimated']}, actual {finding['actual']})"
+        )
+    if kind == "no_chunk_exclusion":
+        return f"no chunk exclusion on {finding['relation']} ({finding['chunks']} chunks)"
+    if kind == "seq_scan_hypertable":
+        return f"seq scan on {finding['relation']} ({finding['rows']} rows)"
+    return f"unfiltered decompression on {finding['relation']} ({finding['rows']} rows)"
+
+
+def format_findings(report: dict) -> str:
+    """Findings of one capture, grouped by call site."""
+    by_site: dict[str, list[str]] = {}
+    for result in report["results"].values():
+        for query in result["queries"]:
+            for finding in query.get("findings", []):
+                line = f"  [{query['query_id']}] {format_finding(finding)}"
+                lines = by_site.setdefault(query["site"], [])
+                if line not in lines:
+                    lines.append(line)
+    if not by_site:
+        return "No plan findings"
+    return "\n".join(
+        f"{site}\n" + "\n".join(lines) for site, lines in sorted(by_site.items())
+    )
+
+
+def format_changes(changes: list[dict]) -> str:
+    if not changes:
+        return "No plan changes"
+    lines = [f"{len(changes)} plan change(s):"]
+    for c in changes:
+        detail = format_finding(c["detail"]) if c["change"] == "finding" else c["detail"]
+        lines.append(f"- {c['scenario']} {c['site']} [{c['query_id']}] {c['change']}: {detail}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.plans")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture = commands.add_parser("capture", help="EXPLAIN ANALYZE every tool query")
+    capture.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"))
+    capture.add_argument("--label", default="default", help="Dataset scale label, e.g. medium")
+    capture.add_argument("--only", help="Only scenarios whose name contains this")
+    capture.add_argument("--output", type=Path, help="Report path (default: stdout)")
+
+    check = commands.add_parser("check", help="Compare plan shapes and findings")
+    check.add_argument("baseline", type=Path)
+    check.add_argument("current", type=Path)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.command == "capture":
+        if not args.dsn:
+            raise SystemExit("--dsn (or BENCH_DATABASE_URL) is required")
+        report = asyncio.run(run_capture(args.dsn, args.label, args.only))
+        text = json.dumps(report, indent=2, default=str)
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(text + "\n")
+            print(format_findings(report))
+        else:
+            print(text)
+        return
+
+    changes = compare_plans(
+        json.loads(args.baseline.read_text()), json.loads(args.current.read_text())
+    )
+    print(format_changes(changes))
+    if changes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Replay a recorded tool-call corpus against a database.
+
+The corpus is the JSONL written by pfn_mcp.recording (TOOL_RECORDING_ENABLED).
+Its pseudonym markers are mapped onto entities of the target database: each
+distinct tenant ref gets a tenant (largest first), and each device / asset /
+tag / aggregation ref gets an entity of that tenant, in first-seen order.
+Repeated refs therefore hit the same entity, so the production mix of hot
+and cold devices survives the mapping.
+
+Calls are started at their recorded offsets divided by --speed (0 = as fast
+as --concurrency allows) and run through the same registry and dispatch
+layer as the chat API. The report has throughput plus latency percentiles
+overall and per tool, and how far calls started behind schedule (lag), which
+shows when the target could not keep up with the recorded rate.
+
+Usage:
+    python -m benchmarks.replay run recordings/tool_calls.jsonl \\
+        --dsn postgresql://localhost/valkyrie_bench --concurrency 8 --speed 10 \\
+        --output /tmp/replay.json
+    python -m benchmarks.replay compare baseline.json /tmp/replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks.tools import (
+    _git_revision,
+    _prime_background_indexes,
+    compare_reports,
+    format_comparison,
+    invoke,
+    percentile,
+)
+from pfn_mcp import db
+from pfn_mcp.chat.tool_registry import TOOL_REGISTRY
+from pfn_mcp.config import settings
+from pfn_mcp.recording import ANON_KEY
+
+logger = logging.getLogger(__name__)
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "errors")
+
+OVERALL = "__all__"
+
+
+@dataclass
+class TargetTenant:
+    """Entities of one tenant in the replay database."""
+
+    id: int
+    code: str
+    name: str
+    devices: list[tuple[int, str]] = field(default_factory=list)  # (id, display_name)
+    assets: list[int] = field(default_factory=list)
+    tags: dict[str, list[str]] = field(default_factory=dict)  # key -> values
+    aggregations: list[str] = field(default_factory=list)
+
+
+class Resolver:
+    """Maps pseudonym markers onto target entities, consistently per ref."""
+
+    def __init__(self, tenants: list[TargetTenant]):
+        if not tenants:
+            raise ValueError("Replay target has no tenants")
+        self.tenants = tenants
+        self._assigned: dict[tuple, dict[str, int]] = {}
+
+    def _pick(self, pool_key: tuple, ref: str, pool: list) -> Any:
+        """Entity for a ref: first-seen refs take the pool in order, then wrap."""
+        if not pool:
+            return None
+        assigned = self._assigned.setdefault(pool_key, {})
+        if ref not in assigned:
+            assigned[ref] = len(assigned) % len(pool)
+        return pool[assigned[ref]]
+
+    def tenant_for(self, marker: dict | None) -> TargetTenant | None:
+        if not marker:
+            return None
+        return self._pick(("tenant",), marker["ref"], self.tenants)
+
+    def _tag_key(self, tenant: TargetTenant, ref: str) -> str | None:
+        return self._pick((tenant.code, "tag_key"), ref, sorted(tenant.tags))
+
+    def _resolve_marker(self, marker: dict, tenant: TargetTenant) -> Any:
+        kind, ref = marker[ANON_KEY], marker.get("ref")
+        if kind == "tenant":
+            target = self.tenant_for(marker)
+            return {"code": target.code, "name": target.name, "id": target.id}[marker["field"]]
+        if kind == "device":
+            device = self._pick((tenant.code, "device"), ref, tenant.devices)
+            if device is None:
+                return None
+            return device[0] if marker["field"] == "id" else device[1]
+        if kind == "asset":
+            return self._pick((tenant.code, "asset"), ref, tenant.assets)
+        if kind == "tag_key":
+            return self._tag_key(tenant, ref)
+        if kind == "tag_value":
+            key = self._tag_key(tenant, marker["key"]) if marker.get("key") else None
+            values = (
+                tenant.tags.get(key, []) if key
+                else [v for vs in tenant.tags.values() for v in vs]
+            )
+            return self._pick((tenant.code, "tag_value", key), ref, values)
+        if kind == "aggregation":
+            return self._pick((tenant.code, "aggregation"), ref, tenant.aggregations)
+        if kind == "formula":
+            ids = [self._pick((tenant.code, "device"), r, tenant.devices) for r in marker["refs"]]
+            if None in ids:
+                return None
+            return marker["template"].format(*(d[0] for d in ids))
+        if kind == "ip":
+            # Unknown addresses cost the same metadata lookup as known ones
+            return f"10.255.{int(ref[:2], 16)}.{int(ref[2:4], 16)}"
+        raise ValueError(f"Unknown marker kind: {kind}")
+
+    def resolve(self, value: Any, tenant: TargetTenant) -> Any:
+        """Replace every marker in an argument structure."""
+        if isinstance(value, dict):
+            if ANON_KEY in value:
+                return self._resolve_marker(value, tenant)
+            return {k: self.resolve(v, tenant) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(v, tenant) for v in value]
+        return value
+
+    def resolve_record(self, record: dict) -> tuple[dict, str | None]:
+        """Target arguments and tenant code for one recorded call."""
+        arguments = record.get("arguments") or {}
+        tenant = self.tenant_for(record.get("tenant") or arguments.get("tenant"))
+        context = tenant or self.tenants[0]
+        resolved = {
+            k: v for k, v in self.resolve(arguments, context).items() if v is not None
+        }
+        return resolved, tenant.code if tenant else None
+
+
+def load_corpus(path: Path, only: str | None = None, limit: int | None = None) -> list[dict]:
+    """Recorded calls in time order, skipping tools this build does not have."""
+    records, unknown = [], 0
+    with path.open() as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["tool"] not in TOOL_REGISTRY:
+                unknown += 1
+                continue
+            if only and only not in record["tool"]:
+                continue
+            records.append(record)
+    if unknown:
+        logger.warning(f"Skipped {unknown} calls to unknown tools")
+    records.sort(key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+
+def schedule(records: list[dict], speed: float) -> list[float]:
+    """Start offset in seconds of each call (recorded gaps divided by speed)."""
+    if speed <= 0 or not records:
+        return [0.0] * len(records)
+    first = datetime.fromisoformat(records[0]["ts"])
+    return [
+        (datetime.fromisoformat(r["ts"]) - first).total_seconds() / speed for r in records
+    ]
+
+
+async def load_target() -> list[TargetTenant]:
+    """Tenants of the replay database with their entities (largest first)."""
+    tenant_rows = await db.fetch_all(
+        """
+        SELECT t.id, t.tenant_code, t.tenant_name
+        FROM tenants t
+        JOIN devices d ON d.tenant_id = t.id AND d.is_active
+        WHERE t.is_active
+        GROUP BY t.id, t.tenant_code, t.tenant_name
+        ORDER BY COUNT(*) DESC, t.id
+        """
+    )
+    tenants = [TargetTenant(r["id"], r["tenant_code"], r["tenant_name"]) for r in tenant_rows]
+    by_id = {t.id: t for t in tenants}
+
+    for row in await db.fetch_all(
+        "SELECT id, tenant_id, display_name FROM devices WHERE is_active ORDER BY id"
+    ):
+        if row["tenant_id"] in by_id:
+            by_id[row["tenant_id"]].devices.append((row["id"], row["display_name"]))
+    for row in await db.fetch_all("SELECT id, tenant_id FROM assets ORDER BY id"):
+        if row["tenant_id"] in by_id:
+            by_id[row["tenant_id"]].assets.append(row["id"])
+    for row in await db.fetch_all(
+        """
+        SELECT DISTINCT d.tenant_id, dt.tag_key, dt.tag_value
+        FROM device_tags dt
+        JOIN devices d ON d.id = dt.device_id
+        WHERE dt.is_active
+        ORDER BY d.tenant_id, dt.tag_key, dt.tag_value
+        """
+    ):
+        if row["tenant_id"] in by_id:
+            by_id[row["tenant_id"]].tags.setdefault(row["tag_key"], []).append(row["tag_value"])
+    for row in await db.fetch_all(
+        "SELECT tenant_id, name FROM meter_aggregations WHERE is_active ORDER BY id"
+    ):
+        if row["tenant_id"] in by_id:
+            by_id[row["tenant_id"]].aggregations.append(row["name"])
+    return tenants
+
+
+async def replay(
+    records: list[dict],
+    resolver: Resolver,
+    concurrency: int,
+    speed: float,
+) -> tuple[list[dict], float]:
+    """Run the corpus; returns per-call outcomes and the wall time in seconds."""
+    offsets = schedule(records, speed)
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes: list[dict] = []
+    start = time.perf_counter()
+
+    async def run_one(record: dict, offset: float) -> None:
+        delay = offset - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with semaphore:
+            began = time.perf_counter()
+            try:
+                arguments, tenant = resolver.resolve_record(record)
+                text = await invoke(record["tool"], arguments, tenant)
+                error = text.startswith("Error")
+            except Exception as e:
+                logger.debug(f"{record['tool']} failed: {e}")
+                error = True
+            outcomes.append({
+                "tool": record["tool"],
+                "latency_ms": (time.perf_counter() - began) * 1000,
+                "lag_ms": max((began - start - offset) * 1000, 0.0),
+                "recorded_ms": record.get("latency_ms"),
+                "error": error,
+            })
+
+    await asyncio.gather(*(run_one(r, o) for r, o in zip(records, offsets)))
+    return outcomes, time.perf_counter() - start
+
+
+def summarize(outcomes: list[dict], wall_s: float) -> dict[str, dict]:
+    """Throughput and latency distribution overall and per tool."""
+    groups: dict[str, list[dict]] = {OVERALL: outcomes}
+    for outcome in outcomes:
+        groups.setdefault(outcome["tool"], []).append(outcome)
+
+    results = {}
+    for name, items in groups.items():
+        if not items:
+            continue
+        latencies = [o["latency_ms"] for o in items]
+        recorded = [o["recorded_ms"] for o in items if o["recorded_ms"] is not None]
+        results[name] = {
+            "calls": len(items),
+            "errors": sum(o["error"] for o in items),
+            "throughput_rps": round(len(items) / wall_s, 3) if wall_s else None,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "max_ms": round(max(latencies), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "p95_lag_ms": round(percentile([o["lag_ms"] for o in items], 95), 3),
+            "recorded_p50_ms": round(percentile(recorded, 50), 3) if recorded else None,
+        }
+    return results
+
+
+async def run_replay(
+    corpus: Path,
+    dsn: str,
+    concurrency: int = 4,
+    speed: float = 1.0,
+    only: str | None = None,
+    limit: int | None = None,
+    cache: bool = False,
+) -> dict:
+    """Replay a corpus against a database and return the JSON report."""
+    records = load_corpus(corpus, only, limit)
+    settings.database_url = dsn
+    settings.database_replica_url = None
+    settings.tool_cache_enabled = cache
+    settings.tool_recording_enabled = False
+
+    await db.init_pool()
+    try:
+        await _prime_background_indexes()
+        resolver = Resolver(await load_target())
+        outcomes, wall_s = await replay(records, resolver, concurrency, speed)
+    finally:
+        await db.close_pool()
+
+    results = summarize(outcomes, wall_s)
+    overall = results.get(OVERALL, {})
+    logger.info(
+        f"{len(outcomes)} calls in {wall_s:.1f}s ({overall.get('throughput_rps')} calls/s), "
+        f"p50={overall.get('p50_ms')}ms p95={overall.get('p95_ms')}ms "
+        f"errors={overall.get('errors')}"
+    )
+    return {
+        "meta": {
+            "label": corpus.name,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "concurrency": concurrency,
+            "speed": speed,
+            "cache": cache,
+            "wall_s": round(wall_s, 3),
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Replay a recorded corpus and write a JSON report")
+    run.add_argument("corpus", type=Path)
+    run.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"))
+    run.add_argument("--concurrency", type=int, default=4, help="Calls in flight at once")
+    run.add_argument(
+        "--speed", type=float, default=1.0,
+        help="Time scaling of recorded gaps (2 = twice as fast, 0 = no pacing)",
+    )
+    run.add_argument("--only", help="Only tools whose name contains this")
+    run.add_argument("--limit", type=int, help="Replay only the first N calls")
+    run.add_argument("--cache", action="store_true", help="Keep the tool-result cache on")
+    run.add_argument("--output", type=Path, help="Report path (default: stdout)")
+
+    compare = commands.add_parser("compare", help="Flag regressions against a baseline")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.command == "run":
+        if not args.dsn:
+            raise SystemExit("--dsn (or BENCH_DATABASE_URL) is required")
+        report = asyncio.run(run_replay(
+            args.corpus, args.dsn, args.concurrency, args.speed,
+            args.only, args.limit, args.cache,
+        ))
+        text = json.dumps(report, indent=2)
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(text + "\n")
+        else:
+            print(text)
+        return
+
+    regressions = compare_reports(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.current.read_text()),
+        args.threshold,
+        COMPARED_METRICS,
+    )
+    print(format_comparison(regressions, args.threshold))
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
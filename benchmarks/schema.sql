@@ -0,0 +1,254 @@
+-- Synthetic Valkyrie schema subset for load and scale testing.
+--
+-- Only the tables, views and functions the pfn-mcp tools read, with the
+-- production column names and types (see docs/schema/full-schema.sql).
+-- Production-only columns the tools never touch are left out.
+--
+-- Applied by benchmarks/dataset.py, which also creates the hypertables when
+-- TimescaleDB is requested (or a date_bin() based time_bucket() without it)
+-- and builds the indexes after the bulk load.
+
+-- ============================================================================
+-- CATALOG
+-- ============================================================================
+
+CREATE TABLE tenants (
+    id INTEGER PRIMARY KEY,
+    tenant_code VARCHAR(50) NOT NULL,
+    tenant_name VARCHAR(255) NOT NULL,
+    tenant_type VARCHAR(50) NOT NULL DEFAULT 'PME',
+    description TEXT,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE assets (
+    id INTEGER PRIMARY KEY,
+    tenant_id INTEGER NOT NULL REFERENCES tenants(id),
+    parent_id INTEGER REFERENCES assets(id),
+    asset_code VARCHAR(100) NOT NULL,
+    asset_name VARCHAR(255) NOT NULL,
+    asset_type VARCHAR(100) NOT NULL,
+    utility_type VARCHAR(50) NOT NULL,
+    utility_level INTEGER DEFAULT 0,
+    description TEXT,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE devices (
+    id INTEGER PRIMARY KEY,
+    tenant_id INTEGER NOT NULL REFERENCES tenants(id),
+    asset_id INTEGER REFERENCES assets(id),
+    device_code VARCHAR(100) NOT NULL,
+    device_name VARCHAR(255) NOT NULL,
+    device_type VARCHAR(100),
+    display_name VARCHAR(255),
+    alias VARCHAR(255),
+    is_active BOOLEAN DEFAULT true,
+    metadata JSONB,
+    status VARCHAR(50) DEFAULT 'ONLINE',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE device_tags (
+    id SERIAL PRIMARY KEY,
+    device_id INTEGER NOT NULL REFERENCES devices(id),
+    tag_key VARCHAR(100) NOT NULL,
+    tag_value VARCHAR(255) NOT NULL,
+    tag_category VARCHAR(50),
+    tag_description TEXT,
+    effective_from DATE DEFAULT CURRENT_DATE,
+    effective_to DATE,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE quantities (
+    id INTEGER PRIMARY KEY,
+    quantity_code VARCHAR(50) NOT NULL,
+    quantity_name VARCHAR(255) NOT NULL,
+    unit VARCHAR(50),
+    category VARCHAR(100),
+    data_type VARCHAR(50) DEFAULT 'NUMERIC',
+    aggregation_method VARCHAR(50) DEFAULT 'SUM',
+    description TEXT,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_cumulative BOOLEAN DEFAULT false
+);
+
+CREATE TABLE meter_aggregations (
+    id SERIAL PRIMARY KEY,
+    tenant_id INTEGER NOT NULL REFERENCES tenants(id),
+    name VARCHAR(100) NOT NULL,
+    aggregation_type VARCHAR(50) NOT NULL,
+    formula TEXT NOT NULL,
+    description TEXT,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+
+    UNIQUE(tenant_id, name)
+);
+
+CREATE TABLE utility_sources (
+    id SERIAL PRIMARY KEY,
+    tenant_id INTEGER NOT NULL REFERENCES tenants(id),
+    source_name VARCHAR(255) NOT NULL,
+    is_active BOOLEAN DEFAULT true
+);
+
+-- ============================================================================
+-- TELEMETRY
+-- ============================================================================
+
+CREATE TABLE telemetry_data (
+    "timestamp" TIMESTAMP NOT NULL,
+    tenant_id INTEGER NOT NULL,
+    device_id INTEGER NOT NULL,
+    quantity_id INTEGER NOT NULL,
+    value NUMERIC,
+    quality INTEGER DEFAULT 1,
+    source_system VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- A table here (a continuous aggregate view in production): the generator
+-- bulk-loads the 15-minute aggregates directly.
+CREATE TABLE telemetry_15min_agg (
+    bucket TIMESTAMP NOT NULL,
+    tenant_id INTEGER,
+    device_id INTEGER,
+    quantity_id INTEGER,
+    aggregated_value NUMERIC,
+    sample_count BIGINT,
+    source_system VARCHAR(50)
+);
+
+CREATE TABLE daily_energy_cost_summary (
+    daily_bucket TIMESTAMP,
+    tenant_id INTEGER,
+    device_id INTEGER,
+    quantity_id INTEGER,
+    grouping_type TEXT,
+    grouping_value VARCHAR,
+    shift_period VARCHAR,
+    rate_code VARCHAR,
+    rate_per_unit NUMERIC,
+    utility_source_id INTEGER,
+    total_consumption NUMERIC,
+    interval_count NUMERIC,
+    avg_interval_consumption NUMERIC,
+    max_interval_consumption NUMERIC,
+    min_interval_consumption NUMERIC,
+    total_cost NUMERIC,
+    last_refreshed TIMESTAMPTZ,
+    refresh_method TEXT
+);
+
+CREATE TABLE daily_energy_refresh_log (
+    id SERIAL PRIMARY KEY,
+    refresh_timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    refresh_method TEXT
+);
+
+-- Simplified production view: interval = register delta, negative deltas
+-- (resets) are flagged and zeroed
+CREATE VIEW telemetry_intervals_cumulative AS
+WITH raw_intervals AS (
+    SELECT
+        ta.bucket,
+        ta.tenant_id,
+        ta.device_id,
+        ta.quantity_id,
+        q.quantity_code,
+        q.quantity_name,
+        q.unit,
+        ta.aggregated_value AS cumulative_value,
+        ta.aggregated_value - lag(ta.aggregated_value) OVER (
+            PARTITION BY ta.tenant_id, ta.device_id, ta.quantity_id ORDER BY ta.bucket
+        ) AS raw_interval_value,
+        ta.sample_count,
+        ta.source_system
+    FROM telemetry_15min_agg ta
+    JOIN quantities q ON ta.quantity_id = q.id
+    WHERE ta.quantity_id = ANY (ARRAY[62, 89, 96, 124, 130, 481])
+)
+SELECT
+    bucket,
+    tenant_id,
+    device_id,
+    quantity_id,
+    quantity_code,
+    quantity_name,
+    unit,
+    cumulative_value,
+    CASE
+        WHEN raw_interval_value IS NULL OR raw_interval_value < 0 THEN 0
+        ELSE raw_interval_value
+    END AS interval_value,
+    sample_count,
+    source_system,
+    raw_interval_value,
+    CASE
+        WHEN raw_interval_value < 0 THEN 'NEGATIVE_READING'
+        ELSE 'NORMAL'
+    END AS data_quality_flag
+FROM raw_intervals;
+
+-- ============================================================================
+-- FUNCTIONS
+-- ============================================================================
+
+-- Descendants of an asset through parent_id (production also follows
+-- asset_connections, which the generator does not model)
+CREATE FUNCTION get_all_downstream_assets(
+    source_asset_id INTEGER,
+    target_utility VARCHAR DEFAULT NULL
+)
+RETURNS TABLE(
+    asset_id INTEGER,
+    asset_name VARCHAR,
+    utility_type VARCHAR,
+    distance_levels INTEGER,
+    traversal_method VARCHAR
+)
+LANGUAGE sql STABLE AS $$
+    WITH RECURSIVE tree AS (
+        SELECT a.id, a.asset_name, a.utility_type, 1 AS distance_levels
+        FROM assets a
+        WHERE a.parent_id = source_asset_id
+        UNION ALL
+        SELECT a.id, a.asset_name, a.utility_type, t.distance_levels + 1
+        FROM assets a
+        JOIN tree t ON a.parent_id = t.id
+    )
+    SELECT id, asset_name, utility_type, distance_levels, 'HIERARCHY'::VARCHAR
+    FROM tree
+    WHERE target_utility IS NULL OR utility_type = target_utility
+    ORDER BY distance_levels, utility_type, asset_name
+$$;
+
+-- PLN time-of-use tariff on local (UTC+7) hours: WBP 17-22, LWBP otherwise
+CREATE FUNCTION get_utility_rate(
+    p_tenant_id INTEGER,
+    p_device_id INTEGER,
+    p_timestamp TIMESTAMP
+)
+RETURNS TABLE(rate_per_unit NUMERIC, rate_code VARCHAR, utility_source_id INTEGER)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        CASE WHEN h BETWEEN 17 AND 21 THEN 1553.67 ELSE 1035.78 END::NUMERIC,
+        CASE
+            WHEN h BETWEEN 17 AND 21 THEN 'WBP'
+            WHEN h >= 22 THEN 'LWBP2'
+            ELSE 'LWBP1'
+        END::VARCHAR,
+        (SELECT us.id FROM utility_sources us WHERE us.tenant_id = p_tenant_id LIMIT 1)
+    FROM (SELECT EXTRACT(HOUR FROM p_timestamp + INTERVAL '7 hours')::INTEGER AS h) local_hour
+$$;
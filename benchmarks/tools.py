@@ -0,0 +1,591 @@
+"""Per-tool benchmark suite.
+
+Runs every MCP tool (through the same registry and dispatch layer as the
+chat API) against a synthetic database from benchmarks.dataset and records,
+per scenario:
+
+- p50 / p95 / mean wall-clock latency
+- SQL round trips and rows fetched per call (db.fetch_* calls)
+- Python CPU time per call
+- peak traced Python memory (one extra tracemalloc pass, so tracing
+  overhead never skews the latency numbers)
+
+The tool-result cache and read coalescing are disabled so every iteration
+does the full work. Background indexes (coverage, last-seen, last values)
+are primed once before measuring, as a running server would have them.
+
+Results are JSON reports; `compare` flags metrics that regressed beyond a
+relative threshold against a baseline.
+
+Usage:
+    python -m benchmarks.tools run --dsn postgresql://localhost/valkyrie_bench \\
+        --label medium --output benchmarks/baselines/medium.json
+    python -m benchmarks.tools compare benchmarks/baselines/medium.json current.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from pfn_mcp import db
+from pfn_mcp.chat.tool_registry import TOOL_REGISTRY
+from pfn_mcp.config import settings
+from pfn_mcp.coverage import refresh_coverage_index
+from pfn_mcp.dispatch import run_tool
+from pfn_mcp.freshness import refresh_last_seen
+from pfn_mcp.last_values import refresh_last_values
+from pfn_mcp.tool_schema import get_tool_metadata
+
+logger = logging.getLogger(__name__)
+
+# Metrics compared by `compare` (all lower-is-better)
+COMPARED_METRICS = ("p50_ms", "p95_ms", "round_trips", "rows", "cpu_ms", "peak_kib")
+
+# Latency / CPU changes smaller than this (ms) are noise, whatever the ratio
+NOISE_FLOOR_MS = 2.0
+
+
+@dataclass
+class Fixtures:
+    """Entities of the target database the scenarios run against."""
+
+    tenant: str
+    device_id: int
+    device_name: str
+    device_ids: list[int]
+    tag_key: str
+    tag_value: str
+    other_tag_value: str
+    asset_id: int
+    aggregation: str | None
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One benchmarked tool call."""
+
+    name: str
+    tool: str
+    args: Callable[[Fixtures], dict]
+    tenant_scoped: bool = True  # run as the fixture tenant (tenant injection)
+
+
+SCENARIOS = [
+    # Discovery
+    Scenario("list_tenants", "list_tenants", lambda f: {}, tenant_scoped=False),
+    Scenario("list_devices", "list_devices", lambda f: {"limit": 50}),
+    Scenario("list_devices:search", "list_devices", lambda f: {"search": "compressor"}),
+    Scenario("list_quantities", "list_quantities", lambda f: {}),
+    Scenario(
+        "list_device_quantities", "list_device_quantities",
+        lambda f: {"device_id": f.device_id},
+    ),
+    Scenario(
+        "compare_device_quantities", "compare_device_quantities",
+        lambda f: {"device_ids": f.device_ids[:5]},
+    ),
+    Scenario(
+        "get_device_data_range", "get_device_data_range",
+        lambda f: {"device_id": f.device_id, "quantity_search": "energy"},
+    ),
+    Scenario(
+        "find_devices_by_quantity", "find_devices_by_quantity",
+        lambda f: {"quantity_search": "power"},
+    ),
+    Scenario("get_device_info", "get_device_info", lambda f: {"device_id": f.device_id}),
+    Scenario("check_data_freshness", "check_data_freshness", lambda f: {}),
+    Scenario(
+        "get_tenant_summary", "get_tenant_summary",
+        lambda f: {"tenant_name": f.tenant}, tenant_scoped=False,
+    ),
+    Scenario("resolve_device", "resolve_device", lambda f: {"search": f.device_name}),
+    # Telemetry
+    Scenario(
+        "get_device_telemetry:1d", "get_device_telemetry",
+        lambda f: {"device_id": f.device_id, "quantity_search": "power", "period": "1d"},
+    ),
+    Scenario(
+        "get_device_telemetry:30d", "get_device_telemetry",
+        lambda f: {"device_id": f.device_id, "quantity_search": "power", "period": "30d"},
+    ),
+    Scenario(
+        "get_device_telemetry:30d-lttb", "get_device_telemetry",
+        lambda f: {
+            "device_id": f.device_id, "quantity_search": "power",
+            "period": "30d", "downsample": "lttb",
+        },
+    ),
+    Scenario(
+        "get_quantity_stats", "get_quantity_stats",
+        lambda f: {"device_id": f.device_id, "quantity_search": "power", "period": "30d"},
+    ),
+    Scenario(
+        "get_batch_telemetry", "get_batch_telemetry",
+        lambda f: {
+            "device_ids": f.device_ids, "quantity_searches": ["power", "voltage"],
+            "period": "7d",
+        },
+    ),
+    Scenario(
+        "get_latest_values", "get_latest_values",
+        lambda f: {"device_ids": f.device_ids, "quantity_search": "power"},
+    ),
+    Scenario(
+        "get_energy_consumption:7d", "get_energy_consumption",
+        lambda f: {"device_id": f.device_id, "period": "7d"},
+    ),
+    # Electricity cost
+    Scenario("get_electricity_cost:1M", "get_electricity_cost", lambda f: {"period": "1M"}),
+    Scenario(
+        "get_electricity_cost:device-shift", "get_electricity_cost",
+        lambda f: {"device": f.device_name, "period": "1M", "group_by": "shift"},
+    ),
+    Scenario(
+        "get_electricity_cost_ranking", "get_electricity_cost_ranking",
+        lambda f: {"tenant": f.tenant, "period": "1M"},
+    ),
+    Scenario(
+        "compare_electricity_periods", "compare_electricity_periods",
+        lambda f: {"period1": "7d", "period2": "30d"},
+    ),
+    # Groups
+    Scenario("list_tags", "list_tags", lambda f: {}),
+    Scenario("list_tag_values", "list_tag_values", lambda f: {"tag_key": f.tag_key}),
+    Scenario("search_tags", "search_tags", lambda f: {"search": f.tag_value}),
+    Scenario(
+        "get_group_telemetry:tag-7d", "get_group_telemetry",
+        lambda f: {"tag_key": f.tag_key, "tag_value": f.tag_value, "period": "7d"},
+    ),
+    Scenario(
+        "get_group_telemetry:tag-power-30d", "get_group_telemetry",
+        lambda f: {
+            "tag_key": f.tag_key, "tag_value": f.tag_value,
+            "quantity_search": "power", "period": "30d", "breakdown": "device",
+        },
+    ),
+    Scenario(
+        "get_group_telemetry:asset", "get_group_telemetry",
+        lambda f: {"asset_id": f.asset_id, "period": "7d"},
+    ),
+    Scenario(
+        "compare_groups", "compare_groups",
+        lambda f: {
+            "groups": [
+                {"tag_key": f.tag_key, "tag_value": f.tag_value},
+                {"tag_key": f.tag_key, "tag_value": f.other_tag_value},
+            ],
+            "period": "7d",
+        },
+    ),
+    Scenario(
+        "get_peak_analysis:device", "get_peak_analysis",
+        lambda f: {"device_id": f.device_id, "quantity_search": "power", "period": "7d"},
+    ),
+    Scenario(
+        "get_peak_analysis:tag", "get_peak_analysis",
+        lambda f: {
+            "tag_key": f.tag_key, "tag_value": f.tag_value,
+            "quantity_search": "power", "period": "30d", "breakdown": "device_daily",
+        },
+    ),
+    # WAGES
+    Scenario(
+        "get_wages_data:device-cost", "get_wages_data",
+        lambda f: {"device_id": f.device_id, "period": "1M"},
+    ),
+    Scenario(
+        "get_wages_data:tag-power", "get_wages_data",
+        lambda f: {
+            "tag_key": f.tag_key, "tag_value": f.tag_value,
+            "quantity_search": "power", "period": "7d", "breakdown": "device",
+        },
+    ),
+    Scenario(
+        "get_wages_data:formula-timeseries", "get_wages_data",
+        lambda f: {
+            "formula": f"{f.device_ids[0]}+{f.device_ids[1]}-{f.device_ids[2]}",
+            "quantity_search": "energy", "period": "7d", "output": "timeseries",
+        },
+    ),
+    Scenario(
+        "get_wages_data:aggregation", "get_wages_data",
+        lambda f: {"aggregation": f.aggregation or "facility", "period": "1M"},
+    ),
+]
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+
+class QueryCounter:
+    """Counts db.fetch_* round trips and rows while installed."""
+
+    FUNCTIONS = ("fetch_all", "fetch_one", "fetch_val")
+
+    def __init__(self) -> None:
+        self.round_trips = 0
+        self.rows = 0
+
+    def reset(self) -> None:
+        self.round_trips = 0
+        self.rows = 0
+
+    def _wrap(self, name: str, func: Callable) -> Callable:
+        async def counted(*args: Any, **kwargs: Any) -> Any:
+            result = await func(*args, **kwargs)
+            self.round_trips += 1
+            if name == "fetch_all":
+                self.rows += len(result)
+            elif result is not None:
+                self.rows += 1
+            return result
+
+        return counted
+
+    @contextmanager
+    def installed(self):
+        """Patch the db module functions the tools call, restoring them on exit."""
+        originals = {name: getattr(db, name) for name in self.FUNCTIONS}
+        for name, func in originals.items():
+            setattr(db, name, self._wrap(name, func))
+        try:
+            yield self
+        finally:
+            for name, func in originals.items():
+                setattr(db, name, func)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+async def invoke(tool: str, call_args: dict, tenant: str | None) -> str:
+    """One tool call through the dispatch layer, as the chat executor does it."""
+    tool_func, format_func = TOOL_REGISTRY[tool]
+    metadata = get_tool_metadata()[tool]
+    # Tenant injection as in chat.tool_executor (only tools with a tenant param)
+    if tenant and metadata["tenant_aware"] and "tenant" in metadata["params"]:
+        call_args["tenant"] = tenant
+
+    async def call() -> str:
+        result = await tool_func(**call_args)
+        if tool == "list_devices":
+            return format_func(result, call_args.get("search", ""))
+        return format_func(result)
+
+    return await run_tool(tool, call_args, tenant, call)
+
+
+async def _call(scenario: Scenario, fixtures: Fixtures) -> str:
+    tenant = fixtures.tenant if scenario.tenant_scoped else None
+    return await invoke(scenario.tool, scenario.args(fixtures), tenant)
+
+
+async def measure(
+    scenario: Scenario,
+    fixtures: Fixtures,
+    counter: QueryCounter,
+    iterations: int,
+    warmup: int,
+) -> dict:
+    """Run one scenario and summarize its metrics."""
+    for _ in range(warmup):
+        await _call(scenario, fixtures)
+
+    latencies, cpu = [], []
+    error = None
+    for _ in range(iterations):
+        counter.reset()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        response = await _call(scenario, fixtures)
+        latencies.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        if response.startswith("Error"):
+            error = response[:200]
+    round_trips, rows = counter.round_trips, counter.rows
+
+    tracemalloc.start()
+    try:
+        await _call(scenario, fixtures)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "tool": scenario.tool,
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "round_trips": round_trips,
+        "rows": rows,
+        "cpu_ms": round(sum(cpu) / len(cpu), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+async def load_fixtures() -> Fixtures:
+    """Pick scenario inputs from the target database (largest tenant first)."""
+    tenant = await db.fetch_one(
+        """
+        SELECT t.id, t.tenant_code
+        FROM tenants t
+        JOIN devices d ON d.tenant_id = t.id
+        WHERE t.is_active
+        GROUP BY t.id, t.tenant_code
+        ORDER BY COUNT(*) DESC, t.id
+        LIMIT 1
+        """
+    )
+    if not tenant:
+        raise RuntimeError("No tenant with devices in the target database")
+    devices = await db.fetch_all(
+        """
+        SELECT id, display_name FROM devices
+        WHERE tenant_id = $1 AND is_active
+        ORDER BY id
+        LIMIT 10
+        """,
+        tenant["id"],
+    )
+    tags = await db.fetch_all(
+        """
+        SELECT dt.tag_key, dt.tag_value, COUNT(*) as devices
+        FROM device_tags dt
+        JOIN devices d ON d.id = dt.device_id
+        WHERE d.tenant_id = $1 AND dt.is_active
+        GROUP BY dt.tag_key, dt.tag_value
+        ORDER BY devices DESC, dt.tag_key, dt.tag_value
+        """,
+        tenant["id"],
+    )
+    if len(devices) < 3 or not tags:
+        raise RuntimeError("Benchmark tenant needs at least 3 devices and one tag")
+    tag_key = tags[0]["tag_key"]
+    same_key = [t["tag_value"] for t in tags if t["tag_key"] == tag_key]
+    asset_id = await db.fetch_val(
+        "SELECT id FROM assets WHERE tenant_id = $1 AND parent_id IS NULL ORDER BY id LIMIT 1",
+        tenant["id"],
+    )
+    aggregation = await db.fetch_val(
+        "SELECT name FROM meter_aggregations WHERE tenant_id = $1 AND is_active "
+        "ORDER BY id LIMIT 1",
+        tenant["id"],
+    )
+    return Fixtures(
+        tenant=tenant["tenant_code"],
+        device_id=devices[0]["id"],
+        device_name=devices[0]["display_name"],
+        device_ids=[d["id"] for d in devices],
+        tag_key=tag_key,
+        tag_value=same_key[0],
+        other_tag_value=same_key[1] if len(same_key) > 1 else same_key[0],
+        asset_id=asset_id,
+        aggregation=aggregation,
+    )
+
+
+async def _prime_background_indexes() -> None:
+    """One refresh of each background index a running server keeps warm."""
+    if settings.coverage_index_enabled:
+        await refresh_coverage_index()
+    if settings.freshness_tracker_enabled:
+        await refresh_last_seen()
+    if settings.last_value_cache_enabled:
+        await refresh_last_values()
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(
+    dsn: str,
+    label: str,
+    iterations: int = 10,
+    warmup: int = 2,
+    only: str | None = None,
+) -> dict:
+    """Run the (filtered) scenarios and return the JSON report."""
+    settings.database_url = dsn
+    settings.database_replica_url = None
+    settings.tool_cache_enabled = False
+    settings.db_coalesce_reads = False
+
+    await db.init_pool()
+    try:
+        await _prime_background_indexes()
+        fixtures = await load_fixtures()
+        counter = QueryCounter()
+        results = {}
+        with counter.installed():
+            for scenario in SCENARIOS:
+                if only and only not in scenario.name:
+                    continue
+                results[scenario.name] = await measure(
+                    scenario, fixtures, counter, iterations, warmup
+                )
+                logger.info(
+                    f"{scenario.name}: p50={results[scenario.name]['p50_ms']}ms "
+                    f"p95={results[scenario.name]['p95_ms']}ms "
+                    f"queries={results[scenario.name]['round_trips']}"
+                )
+    finally:
+        await db.close_pool()
+
+    return {
+        "meta": {
+            "label": label,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "iterations": iterations,
+            "fixtures": fixtures.__dict__,
+        },
+        "results": results,
+    }
+
+
+# ============================================================================
+# Comparison
+# ============================================================================
+
+
+def compare_reports(
+    baseline: dict,
+    current: dict,
+    threshold: float = 0.2,
+    metrics: tuple[str, ...] = COMPARED_METRICS,
+) -> list[dict]:
+    """
+    Compare two reports metric by metric.
+
+    A metric regresses when it grew by more than `threshold` (relative).
+    Latency and CPU changes under NOISE_FLOOR_MS are ignored; round trips
+    and rows are exact, so any increase beyond the threshold counts.
+
+    Returns:
+        One entry per regression: scenario, metric, baseline, current, change
+    """
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        if "error" in new and "error" not in old:
+            regressions.append(
+                {"scenario": name, "metric": "error", "baseline": None,
+                 "current": new["error"], "change": None}
+            )
+        for metric in metrics:
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None or after <= before:
+                continue
+            if metric.endswith("_ms") and after - before < NOISE_FLOOR_MS:
+                continue
+            change = (after - before) / before if before else math.inf
+            if change > threshold:
+                regressions.append(
+                    {"scenario": name, "metric": metric, "baseline": before,
+                     "current": after, "change": round(change, 3)}
+                )
+    return regressions
+
+
+def format_comparison(regressions: list[dict], threshold: float) -> str:
+    """Human-readable regression list."""
+    if not regressions:
+        return f"No regressions beyond {threshold:.0%}"
+    lines = [f"{len(regressions)} regression(s) beyond {threshold:.0%}:"]
+    for r in regressions:
+        if r["metric"] == "error":
+            lines.append(f"- {r['scenario']}: now fails: {r['current']}")
+        else:
+            change = "new" if r["change"] == math.inf else f"+{r['change']:.0%}"
+            lines.append(
+                f"- {r['scenario']} {r['metric']}: {r['baseline']} -> {r['current']} ({change})"
+            )
+    return "\n".join(lines)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Benchmark all tools and write a JSON report")
+    run.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"))
+    run.add_argument("--label", default="default", help="Dataset scale label, e.g. medium")
+    run.add_argument("--iterations", type=int, default=10)
+    run.add_argument("--warmup", type=int, default=2)
+    run.add_argument("--only", help="Only scenarios whose name contains this")
+    run.add_argument("--output", type=Path, help="Report path (default: stdout)")
+
+    compare = commands.add_parser("compare", help="Flag regressions against a baseline")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.command == "run":
+        if not args.dsn:
+            raise SystemExit("--dsn (or BENCH_DATABASE_URL) is required")
+        report = asyncio.run(
+            run_suite(args.dsn, args.label, args.iterations, args.warmup, args.only)
+        )
+        text = json.dumps(report, indent=2, default=str)
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(text + "\n")
+        else:
+            print(text)
+        return
+
+    regressions = compare_reports(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.current.read_text()),
+        args.threshold,
+    )
+    print(format_comparison(regressions, args.threshold))
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+-- Migration: Create device_quantity_coverage catalog
+-- Purpose: Answer "which device has which quantity, and over what range" without
+--          scanning telemetry_15min_agg. Used by get_device_data_range,
+--          list_device_quantities, find_devices_by_quantity, list_quantities
+--          (in_use_only) and get_tenant_summary via the in-memory index in
+--          pfn_mcp/coverage.py.
+--
+-- The catalog is maintained incrementally by a TimescaleDB job. Each run
+-- re-scans the buckets newer than the stored high-water mark minus a
+-- late-arrival overlap (default 2 hours: the cagg's 1-hour refresh lookback
+-- plus gateway upload lag) and recounts that window for the pairs it touches:
+-- row_count keeps the buckets below the window (row_count - recent_count) and
+-- adds the fresh count, so buckets that land late within the overlap are
+-- counted once. Buckets younger than the settle interval are left for the next
+-- run. Buckets that land later than the overlap (e.g. the daily 7-day backfill)
+-- are not counted, so row_count is approximate for such pairs.
+--
+-- When the retention policy drops chunks (2 years on telemetry_15min_agg),
+-- pairs whose first_bucket is older than the oldest remaining bucket are
+-- recounted in full; pairs with no data left get row_count = 0, which the
+-- in-memory index treats as removed.
+
+-- ============================================================================
+-- SCHEMA
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS device_quantity_coverage (
+    device_id INTEGER NOT NULL,
+    quantity_id INTEGER NOT NULL,
+    tenant_id INTEGER NOT NULL,
+    first_bucket TIMESTAMP NOT NULL,
+    last_bucket TIMESTAMP NOT NULL,
+    row_count BIGINT NOT NULL DEFAULT 0,
+    recent_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (device_id, quantity_id)
+);
+
+COMMENT ON TABLE device_quantity_coverage IS 'Per device x quantity coverage of telemetry_15min_agg';
+COMMENT ON COLUMN device_quantity_coverage.row_count IS '15-min buckets up to the refresh high-water mark (0 = no data left)';
+COMMENT ON COLUMN device_quantity_coverage.recent_count IS 'Part of row_count within the late-arrival overlap (recounted by the next run)';
+COMMENT ON COLUMN device_quantity_coverage.updated_at IS 'Last refresh that touched this row (used for incremental reload)';
+
+CREATE INDEX IF NOT EXISTS idx_dq_coverage_quantity ON device_quantity_coverage(quantity_id);
+CREATE INDEX IF NOT EXISTS idx_dq_coverage_tenant ON device_quantity_coverage(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_dq_coverage_updated ON device_quantity_coverage(updated_at);
+
+-- Single-row refresh state
+CREATE TABLE IF NOT EXISTS device_quantity_coverage_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    high_water TIMESTAMP NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ============================================================================
+-- INCREMENTAL REFRESH
+-- ============================================================================
+
+CREATE OR REPLACE PROCEDURE refresh_device_quantity_coverage(
+    job_id INTEGER DEFAULT NULL,
+    config JSONB DEFAULT NULL
+)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_settle INTERVAL := COALESCE((config ->> 'settle_interval')::INTERVAL, INTERVAL '30 minutes');
+    v_overlap INTERVAL := COALESCE((config ->> 'late_arrival_overlap')::INTERVAL, INTERVAL '2 hours');
+    v_from TIMESTAMP;
+    v_to TIMESTAMP;
+    v_oldest TIMESTAMP;
+BEGIN
+    SELECT high_water INTO v_from FROM device_quantity_coverage_state WHERE id;
+    v_from := COALESCE(v_from, '-infinity'::TIMESTAMP);
+    v_to := (NOW() AT TIME ZONE 'UTC') - v_settle;
+
+    IF v_to <= v_from THEN
+        RETURN;
+    END IF;
+
+    -- Recount (high_water - overlap, v_to]. The previous run counted
+    -- (its high_water - overlap, its high_water] as recent_count, i.e. the
+    -- same lower bound, so row_count - recent_count is the settled part.
+    INSERT INTO device_quantity_coverage AS c
+        (device_id, quantity_id, tenant_id, first_bucket, last_bucket, row_count,
+         recent_count, updated_at)
+    SELECT
+        device_id,
+        quantity_id,
+        MAX(tenant_id),
+        MIN(bucket),
+        MAX(bucket),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE bucket > v_to - v_overlap),
+        NOW()
+    FROM telemetry_15min_agg
+    WHERE bucket > v_from - v_overlap AND bucket <= v_to
+    GROUP BY device_id, quantity_id
+    ON CONFLICT (device_id, quantity_id) DO UPDATE SET
+        tenant_id = EXCLUDED.tenant_id,
+        first_bucket = CASE
+            WHEN c.row_count = 0 THEN EXCLUDED.first_bucket
+            ELSE LEAST(c.first_bucket, EXCLUDED.first_bucket)
+        END,
+        last_bucket = GREATEST(c.last_bucket, EXCLUDED.last_bucket),
+        row_count = c.row_count - c.recent_count + EXCLUDED.row_count,
+        recent_count = EXCLUDED.recent_count,
+        updated_at = NOW();
+
+    -- Retention: recount pairs whose oldest buckets were dropped
+    SELECT MIN(bucket) INTO v_oldest FROM telemetry_15min_agg;
+    IF EXISTS (
+        SELECT 1 FROM device_quantity_coverage
+        WHERE row_count > 0 AND (v_oldest IS NULL OR first_bucket < v_oldest)
+    ) THEN
+        WITH dropped AS (
+            SELECT device_id, quantity_id
+            FROM device_quantity_coverage
+            WHERE row_count > 0 AND (v_oldest IS NULL OR first_bucket < v_oldest)
+        ),
+        remaining AS (
+            SELECT
+                t.device_id,
+                t.quantity_id,
+                MIN(t.bucket) AS first_bucket,
+                COUNT(*) AS row_count,
+                COUNT(*) FILTER (WHERE t.bucket > v_to - v_overlap) AS recent_count
+            FROM telemetry_15min_agg t
+            JOIN dropped d USING (device_id, quantity_id)
+            WHERE t.bucket <= v_to
+            GROUP BY t.device_id, t.quantity_id
+        )
+        UPDATE device_quantity_coverage c SET
+            first_bucket = COALESCE(r.first_bucket, c.first_bucket),
+            row_count = COALESCE(r.row_count, 0),
+            recent_count = COALESCE(r.recent_count, 0),
+            updated_at = NOW()
+        FROM dropped d
+        LEFT JOIN remaining r USING (device_id, quantity_id)
+        WHERE c.device_id = d.device_id AND c.quantity_id = d.quantity_id;
+    END IF;
+
+    INSERT INTO device_quantity_coverage_state (id, high_water, refreshed_at)
+    VALUES (TRUE, v_to, NOW())
+    ON CONFLICT (id) DO UPDATE SET
+        high_water = EXCLUDED.high_water,
+        refreshed_at = EXCLUDED.refreshed_at;
+END;
+$$;
+
+-- Initial backfill (one full scan of telemetry_15min_agg)
+CALL refresh_device_quantity_coverage();
+
+-- Keep the catalog current (only the overlap and new buckets are scanned on each run)
+SELECT add_job('refresh_device_quantity_coverage', '5 minutes');
+
+-- The MCP server only reads the catalog:
+-- GRANT SELECT ON device_quantity_coverage, device_quantity_coverage_state TO readonly_user;
+
+-- Verification query (run after migration):
+-- SELECT COUNT(*) AS pairs, SUM(row_count) AS buckets, MAX(last_bucket) AS latest
+-- FROM device_quantity_coverage WHERE row_count > 0;
@@ -46,6 +46,8 @@ TOOL_CATEGORIES = {
         "resolve_device",
         "get_device_telemetry",
         "get_quantity_stats",
+        "get_batch_telemetry",
+        "get_latest_values",
         "get_energy_consumption",
     ],
     "Electricity Cost": [
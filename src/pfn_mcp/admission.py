@@ -0,0 +1,274 @@
+"""Per-tenant weighted fair admission control in front of the connection pool.
+
+Every pool acquisition in db.get_connection() first takes an admission slot
+from the controller of that pool (primary or analytics replica), so a queue
+of analytics calls on the replica never holds back calls on the primary.
+Each controller has as many slots as its pool has connections, split into
+two lanes:
+- interactive: lookups and short-range queries, may use every slot
+- heavy: long-range / multi-device analytics, capped at db_admission_heavy_slots
+  so quick lookups always have connections left
+
+When slots are exhausted, waiters are ordered by start-time fair queuing
+(a WFQ variant): each tenant's requests get virtual start tags spaced by
+cost / weight, so a tenant firing many heavy queries interleaves with other
+tenants instead of queueing ahead of them. Waiters that cannot be admitted
+within db_admission_max_wait are shed with AdmissionRejectedError.
+
+The tenant and lane are carried in context variables set by the dispatch
+layer (see tool_context()), so tools do not need to pass them through.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+HEAVY = "heavy"
+
+# Tools that scan long ranges or many devices per call
+HEAVY_TOOLS = frozenset({
+    "compare_device_quantities",
+    "get_energy_consumption",
+    "get_electricity_cost",
+    "get_electricity_cost_ranking",
+    "compare_electricity_periods",
+    "get_group_telemetry",
+    "compare_groups",
+    "get_peak_analysis",
+    "get_wages_data",
+})
+
+# Virtual cost of one admission per lane (heavy queries hold slots longer)
+LANE_COSTS = {INTERACTIVE: 1.0, HEAVY: 4.0}
+
+current_tenant: ContextVar[str | None] = ContextVar("admission_tenant", default=None)
+current_lane: ContextVar[str] = ContextVar("admission_lane", default=INTERACTIVE)
+current_tool: ContextVar[str | None] = ContextVar("admission_tool", default=None)
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a query waits longer than the admission deadline."""
+
+
+def classify_tool(tool_name: str) -> str:
+    """Get the admission lane for a tool."""
+    return HEAVY if tool_name in HEAVY_TOOLS else INTERACTIVE
+
+
+@contextmanager
+def tool_context(tool_name: str, tenant: str | None) -> Iterator[None]:
+    """Tag database work done inside the block with a tool, tenant and lane."""
+    tool_token = current_tool.set(tool_name)
+    tenant_token = current_tenant.set(tenant)
+    lane_token = current_lane.set(classify_tool(tool_name))
+    try:
+        yield
+    finally:
+        current_lane.reset(lane_token)
+        current_tool.reset(tool_token)
+        current_tenant.reset(tenant_token)
+
+
+@dataclass(order=True)
+class _Waiter:
+    start_tag: float
+    seq: int
+    tenant: str = field(compare=False)
+    lane: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class LaneStats:
+    """Counters for one admission lane."""
+
+    admitted: int = 0
+    queued: int = 0
+    shed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class AdmissionController:
+    """Weighted fair queue of pool slots with interactive/heavy lanes."""
+
+    def __init__(
+        self,
+        slots: int,
+        heavy_slots: int,
+        max_wait: float,
+        weights: dict[str, float] | None = None,
+    ):
+        self.slots = slots
+        self.heavy_slots = min(heavy_slots, slots)
+        self.max_wait = max_wait
+        self.weights = {k.lower(): v for k, v in (weights or {}).items()}
+        self.stats = {INTERACTIVE: LaneStats(), HEAVY: LaneStats()}
+        self._in_use = {INTERACTIVE: 0, HEAVY: 0}
+        self._waiters: list[_Waiter] = []
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._seq = itertools.count()
+
+    def _can_admit(self, lane: str) -> bool:
+        if sum(self._in_use.values()) >= self.slots:
+            return False
+        return lane != HEAVY or self._in_use[HEAVY] < self.heavy_slots
+
+    def _next_start_tag(self, tenant: str, lane: str) -> float:
+        """Assign a virtual start tag and advance the tenant's finish tag."""
+        weight = self.weights.get(tenant, 1.0)
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        self._last_finish[tenant] = start + LANE_COSTS[lane] / weight
+        return start
+
+    def _dispatch(self) -> None:
+        """Admit queued waiters in start-tag order while slots are free."""
+        skipped: list[_Waiter] = []
+        while self._waiters and sum(self._in_use.values()) < self.slots:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue  # Shed or cancelled
+            if not self._can_admit(waiter.lane):
+                skipped.append(waiter)  # Heavy lane full, let interactive pass
+                continue
+            self._in_use[waiter.lane] += 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            waiter.future.set_result(None)
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
+
+    async def acquire(self, tenant: str | None, lane: str) -> None:
+        """Wait for a slot in the given lane, or raise AdmissionRejectedError."""
+        tenant_key = (tenant or "*").lower()
+        start_tag = self._next_start_tag(tenant_key, lane)
+        stats = self.stats[lane]
+
+        if not self._waiters and self._can_admit(lane):
+            self._in_use[lane] += 1
+            self._virtual_time = max(self._virtual_time, start_tag)
+            stats.admitted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, _Waiter(start_tag, next(self._seq), tenant_key, lane, future)
+        )
+        self._dispatch()
+
+        stats.queued += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait({future}, timeout=self.max_wait)
+        except BaseException:
+            # Caller cancelled: hand back the slot if it was granted meanwhile
+            if future.done() and not future.cancelled():
+                self.release(lane)
+            else:
+                future.cancel()
+            raise
+        waited = time.monotonic() - started
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+
+        if not future.done():
+            future.cancel()
+            stats.shed += 1
+            logger.warning(
+                f"Shed {lane} query for tenant {tenant_key} after {waited:.1f}s "
+                f"({self.queue_depth()} queued)"
+            )
+            raise AdmissionRejectedError(
+                f"Server busy: no database connection available within "
+                f"{self.max_wait:.0f}s. Try again shortly or narrow the time range."
+            )
+        stats.admitted += 1
+
+    def release(self, lane: str) -> None:
+        """Return a slot and admit the next waiter."""
+        self._in_use[lane] -= 1
+        self._dispatch()
+
+    def queue_depth(self, lane: str | None = None) -> int:
+        """Number of waiters still queued (optionally for one lane)."""
+        return sum(
+            1 for w in self._waiters
+            if not w.future.done() and (lane is None or w.lane == lane)
+        )
+
+    def snapshot(self) -> dict:
+        """Get slot usage, queue depths and per-lane counters."""
+        by_tenant: dict[str, int] = {}
+        for w in self._waiters:
+            if not w.future.done():
+                by_tenant[w.tenant] = by_tenant.get(w.tenant, 0) + 1
+        return {
+            "slots": self.slots,
+            "heavy_slots": self.heavy_slots,
+            "in_use": dict(self._in_use),
+            "queue_depth": {lane: self.queue_depth(lane) for lane in self.stats},
+            "queued_by_tenant": by_tenant,
+            "lanes": {
+                lane: {
+                    "admitted": s.admitted,
+                    "queued": s.queued,
+                    "shed": s.shed,
+                    "avg_wait": round(s.total_wait / s.queued, 3) if s.queued else 0.0,
+                    "max_wait": round(s.max_wait, 3),
+                }
+                for lane, s in self.stats.items()
+            },
+        }
+
+
+# Global controllers, one per pool name (created on first use)
+_controllers: dict[str, AdmissionController] = {}
+
+
+def get_controller(pool: str = "primary") -> AdmissionController | None:
+    """Get the admission controller of a pool (None when disabled)."""
+    if not settings.db_admission_enabled:
+        return None
+    controller = _controllers.get(pool)
+    if controller is None:
+        controller = _controllers[pool] = AdmissionController(
+            slots=settings.db_pool_max_size,
+            heavy_slots=settings.db_admission_heavy_slots,
+            max_wait=settings.db_admission_max_wait,
+            weights=settings.db_admission_tenant_weights,
+        )
+    return controller
+
+
+def get_controllers() -> dict[str, AdmissionController]:
+    """Get the admission controllers created so far, by pool (empty when disabled)."""
+    if not settings.db_admission_enabled:
+        return {}
+    return dict(_controllers)
+
+
+@asynccontextmanager
+async def admission_slot(pool: str = "primary"):
+    """Hold an admission slot of a pool for the current tenant/lane while in the block."""
+    controller = get_controller(pool)
+    if controller is None:
+        yield
+        return
+
+    lane = current_lane.get()
+    await controller.acquire(current_tenant.get(), lane)
+    try:
+        yield
+    finally:
+        controller.release(lane)
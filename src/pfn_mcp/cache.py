@@ -0,0 +1,260 @@
+"""Tool-result cache for the dispatch layer.
+
+Formatted tool responses are cached under a key built from:
+- the tool name
+- the canonicalized arguments (schema defaults filled in, None dropped)
+- the tenant the call runs as
+- a data watermark (latest telemetry_15min_agg bucket + last cost refresh)
+
+When new telemetry lands or the daily cost refresh runs, the watermark moves
+and every older entry simply stops matching. Entries also expire by per-tool
+TTL and are evicted LRU when the cache is full.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from pfn_mcp import db
+from pfn_mcp.config import settings
+from pfn_mcp.tool_schema import load_tools_yaml
+from pfn_mcp.tools.periods import normalized_range_key
+
+logger = logging.getLogger(__name__)
+
+# Per-tool TTL overrides in seconds (0 = never cache).
+# Tools not listed use settings.tool_cache_default_ttl.
+TOOL_CACHE_TTLS: dict[str, float] = {
+    # Reference data - changes rarely
+    "list_tenants": 3600,
+    "list_quantities": 3600,
+    "list_tags": 900,
+    "list_tag_values": 900,
+    "search_tags": 900,
+    "list_aggregations": 900,
+    "list_devices": 600,
+    "get_device_info": 600,
+    "resolve_device": 600,
+    # Answers relative to "now" - keep short
+    "check_data_freshness": 60,
+    "get_tenant_summary": 120,
+    # Pure computation, cheaper than a cache lookup
+    "get_date_info": 0,
+    # Live readings - already served from the in-memory last-value cache
+    "get_latest_values": 0,
+}
+
+# Cheap watermark: the newest 15-min bucket (bounded to recent chunks so it
+# never scans the whole hypertable) plus the last daily cost refresh.
+WATERMARK_QUERY = """
+    SELECT
+        (SELECT MAX(bucket) FROM telemetry_15min_agg
+         WHERE bucket > NOW() - INTERVAL '2 days') as telemetry_watermark,
+        (SELECT MAX(refresh_timestamp) FROM daily_energy_refresh_log) as cost_watermark
+"""
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the tool-result cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    by_tool: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def record(self, tool_name: str, outcome: str) -> None:
+        """Record a hit or miss for a tool."""
+        tool_stats = self.by_tool.setdefault(tool_name, {"hits": 0, "misses": 0})
+        if outcome == "hit":
+            self.hits += 1
+            tool_stats["hits"] += 1
+        else:
+            self.misses += 1
+            tool_stats["misses"] += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_tool_defaults: dict[str, dict[str, Any]] | None = None
+
+
+def _get_tool_defaults() -> dict[str, dict[str, Any]]:
+    """Get schema default values per tool from tools.yaml (cached)."""
+    global _tool_defaults
+    if _tool_defaults is None:
+        _tool_defaults = {
+            tool["name"]: {
+                p["name"]: p["default"] for p in tool.get("params", []) if "default" in p
+            }
+            for tool in load_tools_yaml()
+        }
+    return _tool_defaults
+
+
+def canonicalize_arguments(tool_name: str, arguments: dict) -> str:
+    """
+    Build a canonical string for tool arguments.
+
+    Fills in schema defaults, drops None values and trims strings so that
+    {"period": "7d "} and {"period": "7d", "bucket": "auto"} share a key.
+    A `period` is additionally pinned to the range it currently resolves to.
+    """
+    merged = dict(_get_tool_defaults().get(tool_name, {}))
+    for key, value in arguments.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        merged[key] = value
+
+    # Relative periods resolve against "now" - key on the snapped window so
+    # "24h" only matches calls that resolve to the same 15-minute slot
+    if isinstance(merged.get("period"), str):
+        resolved = normalized_range_key(
+            merged["period"], merged.get("start_date"), merged.get("end_date")
+        )
+        if resolved:
+            merged["_range"] = resolved
+    return json.dumps(merged, sort_keys=True, default=str, separators=(",", ":"))
+
+
+class ToolResultCache:
+    """Size-bounded LRU cache of formatted tool responses with per-tool TTLs."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        default_ttl: float,
+        ttls: dict[str, float] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = ttls if ttls is not None else TOOL_CACHE_TTLS
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, tool_name: str) -> float:
+        """Get TTL in seconds for a tool (0 = not cacheable)."""
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    @staticmethod
+    def make_key(
+        tool_name: str,
+        arguments: dict,
+        tenant: str | None,
+        watermark: str,
+    ) -> str:
+        """Build the cache key for a tool call."""
+        args_key = canonicalize_arguments(tool_name, arguments)
+        tenant_key = (tenant or "*").strip().lower()
+        return f"{tool_name}|{tenant_key}|{watermark}|{args_key}"
+
+    def get(self, key: str, tool_name: str) -> str | None:
+        """Get a cached response, or None on miss/expiry."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats.record(tool_name, "hit")
+                return value
+            del self._entries[key]
+            self.stats.expirations += 1
+        self.stats.record(tool_name, "miss")
+        return None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Store a response, evicting least recently used entries if full."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (stats are kept)."""
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """Get cache size and hit/miss metrics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "hit_ratio": round(self.stats.hit_ratio, 3),
+            "evictions": self.stats.evictions,
+            "expirations": self.stats.expirations,
+            "by_tool": {k: dict(v) for k, v in self.stats.by_tool.items()},
+        }
+
+
+# Global cache instance
+_cache: ToolResultCache | None = None
+
+# Watermark state (refreshed at most every tool_cache_watermark_interval)
+_watermark: str | None = None
+_watermark_checked_at: float = float("-inf")
+_watermark_lock = asyncio.Lock()
+
+
+def get_cache() -> ToolResultCache:
+    """Get the global tool-result cache."""
+    global _cache
+    if _cache is None:
+        _cache = ToolResultCache(
+            max_entries=settings.tool_cache_max_entries,
+            default_ttl=settings.tool_cache_default_ttl,
+        )
+    return _cache
+
+
+async def get_data_watermark() -> str | None:
+    """
+    Get the current data watermark.
+
+    Returns None if the watermark cannot be read, in which case callers
+    should bypass the cache rather than risk serving stale data.
+    """
+    global _watermark, _watermark_checked_at
+
+    if time.monotonic() - _watermark_checked_at < settings.tool_cache_watermark_interval:
+        return _watermark
+
+    async with _watermark_lock:
+        # Another task may have refreshed while we waited
+        if time.monotonic() - _watermark_checked_at < settings.tool_cache_watermark_interval:
+            return _watermark
+        try:
+            row = await db.fetch_one(WATERMARK_QUERY)
+            telemetry_wm = row["telemetry_watermark"] if row else None
+            cost_wm = row["cost_watermark"] if row else None
+            _watermark = (
+                f"{telemetry_wm.isoformat() if telemetry_wm else '-'}"
+                f"/{cost_wm.isoformat() if cost_wm else '-'}"
+            )
+        except Exception as e:
+            logger.warning(f"Cache watermark check failed, bypassing cache: {e}")
+            _watermark = None
+        _watermark_checked_at = time.monotonic()
+        return _watermark
+
+
+def is_error_response(text: str) -> bool:
+    """Check whether a formatted tool response is an error (never cached)."""
+    head = text.lstrip().splitlines()[:3]
+    return any(
+        line.startswith(("Error", "Unknown tool")) for line in head
+    )
@@ -3,18 +3,22 @@
 import asyncio
 import json
 import logging
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 from urllib.parse import urlencode
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import anthropic
 from fastapi import Depends, FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, StreamingResponse
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
+from pfn_mcp import metrics, tracing
+from pfn_mcp.config import settings
 from pfn_mcp.db import close_pool, init_pool
+from pfn_mcp.services import start_background_services, stop_background_services
 
 from .auth import (
     TokenResponse,
@@ -50,9 +54,11 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting PFN Chat API...")
     await init_pool()
+    await start_background_services()
     yield
     # Shutdown
     logger.info("Shutting down PFN Chat API...")
+    await stop_background_services()
     await close_pool()
 
 
@@ -162,6 +168,14 @@ async def health_check():
     return {"status": "healthy", "service": "pfn-chat-api"}
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # =============================================================================
 # Auth Endpoints
 # =============================================================================
@@ -366,7 +380,22 @@ async def chat(
     - error: {message} - if an error occurs
     """
 
+    request_id = uuid4().hex
+
     async def generate():
+        # Trace id = request id, also returned as X-Request-ID
+        outcome = "aborted"  # client went away mid-stream
+        try:
+            with tracing.span("chat.turn", trace_id=request_id, request_id=request_id):
+                outcome = "ok"
+                async for event in generate_events():
+                    if event.startswith("event: error"):
+                        outcome = "error"
+                    yield event
+        finally:
+            metrics.CHAT_TURNS.inc(status=outcome)
+
+    async def generate_events():
         try:
             # Check budget before processing
             is_allowed, budget_error = await check_budget(user.sub)
@@ -465,93 +494,112 @@ async def chat(
             # Tool loop - continue until no more tool calls
             while iteration < max_tool_iterations:
                 iteration += 1
-                accumulated_content = ""
-                tool_calls = None
-
-                # Stream response
-                async for chunk in await client.chat(messages, stream=True):
-                    if chunk.content:
-                        accumulated_content += chunk.content
-                        yield f"event: content\ndata: {json.dumps({'text': chunk.content})}\n\n"
-
-                    if chunk.tool_calls:
-                        tool_calls = chunk.tool_calls
-
-                    if chunk.finish_reason:
-                        total_input_tokens += chunk.input_tokens
-                        total_output_tokens += chunk.output_tokens
-
-                # Handle tool calls
-                if not tool_calls:
-                    # No tool calls - save final assistant response and break
-                    if accumulated_content:
-                        await add_message(
-                            conversation_id=conversation_id,
-                            role="assistant",
-                            content=accumulated_content,
-                            input_tokens=total_input_tokens,
-                            output_tokens=total_output_tokens,
-                        )
-                    break  # No tool calls, we're done
-
-                logger.info(f"Tool calls received: {tool_calls}")
-
-                # Save assistant message WITH tool_calls to database
-                await add_message(
-                    conversation_id=conversation_id,
-                    role="assistant",
-                    content=accumulated_content or "",  # Use empty string, not NULL
-                    tool_calls=tool_calls,
-                    input_tokens=total_input_tokens,
-                    output_tokens=total_output_tokens,
-                )
+                with tracing.span("llm.iteration", iteration=iteration):
+                    accumulated_content = ""
+                    tool_calls = None
+
+                    # Stream response
+                    model = chat_settings.llm_model
+                    stream_started = time.perf_counter()
+                    with tracing.span("llm.stream", model=model) as span:
+                        async for chunk in await client.chat(messages, stream=True):
+                            if chunk.content:
+                                accumulated_content += chunk.content
+                                text = json.dumps({"text": chunk.content})
+                                yield f"event: content\ndata: {text}\n\n"
+
+                            if chunk.tool_calls:
+                                tool_calls = chunk.tool_calls
+
+                            if chunk.finish_reason:
+                                total_input_tokens += chunk.input_tokens
+                                total_output_tokens += chunk.output_tokens
+                                metrics.LLM_TOKENS.inc(
+                                    chunk.input_tokens, model=model, direction="input"
+                                )
+                                metrics.LLM_TOKENS.inc(
+                                    chunk.output_tokens, model=model, direction="output"
+                                )
+                                if span:
+                                    span.set(
+                                        input_tokens=chunk.input_tokens,
+                                        output_tokens=chunk.output_tokens,
+                                    )
+                    metrics.LLM_STREAM_DURATION.observe(
+                        time.perf_counter() - stream_started, model=model
+                    )
 
-                # Add assistant message with tool calls to history for current request
-                messages.append(
-                    ChatMessage(
+                    # Handle tool calls
+                    if not tool_calls:
+                        # No tool calls - save final assistant response and break
+                        if accumulated_content:
+                            await add_message(
+                                conversation_id=conversation_id,
+                                role="assistant",
+                                content=accumulated_content,
+                                input_tokens=total_input_tokens,
+                                output_tokens=total_output_tokens,
+                            )
+                        break  # No tool calls, we're done
+
+                    logger.info(f"Tool calls received: {tool_calls}")
+
+                    # Save assistant message WITH tool_calls to database
+                    await add_message(
+                        conversation_id=conversation_id,
                         role="assistant",
-                        content=accumulated_content or None,
+                        content=accumulated_content or "",  # Use empty string, not NULL
                         tool_calls=tool_calls,
+                        input_tokens=total_input_tokens,
+                        output_tokens=total_output_tokens,
                     )
-                )
 
-                logger.info(f"Message history length: {len(messages)}")
+                    # Add assistant message with tool calls to history for current request
+                    messages.append(
+                        ChatMessage(
+                            role="assistant",
+                            content=accumulated_content or None,
+                            tool_calls=tool_calls,
+                        )
+                    )
 
-                # Execute tools
-                tool_results = await execute_tool_calls(tool_calls, tenant_code)
+                    logger.info(f"Message history length: {len(messages)}")
 
-                for result in tool_results:
-                    # Send tool events
-                    call_data = {
-                        "name": result.tool_name,
-                        "call_id": result.tool_call_id,
-                    }
-                    yield f"event: tool_call\ndata: {json.dumps(call_data)}\n\n"
+                    # Execute tools
+                    tool_results = await execute_tool_calls(tool_calls, tenant_code)
 
-                    result_data = {
-                        "name": result.tool_name,
-                        "result": result.result[:1000],  # Truncate for SSE
-                    }
-                    yield f"event: tool_result\ndata: {json.dumps(result_data)}\n\n"
+                    for result in tool_results:
+                        # Send tool events
+                        call_data = {
+                            "name": result.tool_name,
+                            "call_id": result.tool_call_id,
+                        }
+                        yield f"event: tool_call\ndata: {json.dumps(call_data)}\n\n"
 
-                    # Save tool result to database
-                    await add_message(
-                        conversation_id=conversation_id,
-                        role="tool",
-                        content=result.result,
-                        tool_name=result.tool_name,
-                        tool_call_id=result.tool_call_id,
-                    )
+                        result_data = {
+                            "name": result.tool_name,
+                            "result": result.result[:1000],  # Truncate for SSE
+                        }
+                        yield f"event: tool_result\ndata: {json.dumps(result_data)}\n\n"
 
-                    # Add to message history
-                    messages.append(
-                        ChatMessage(
+                        # Save tool result to database
+                        await add_message(
+                            conversation_id=conversation_id,
                             role="tool",
                             content=result.result,
+                            tool_name=result.tool_name,
                             tool_call_id=result.tool_call_id,
-                            name=result.tool_name,  # Required by some providers like MiniMax
                         )
-                    )
+
+                        # Add to message history
+                        messages.append(
+                            ChatMessage(
+                                role="tool",
+                                content=result.result,
+                                tool_call_id=result.tool_call_id,
+                                name=result.tool_name,  # Required by some providers like MiniMax
+                            )
+                        )
 
             # Generate AI title for new conversations
             if is_new_conversation and accumulated_content:
@@ -585,6 +633,7 @@ async def chat(
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "X-Accel-Buffering": "no",  # Disable nginx buffering
+            "X-Request-ID": request_id,
         },
     )
 
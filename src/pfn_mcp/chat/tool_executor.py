@@ -3,6 +3,9 @@
 import logging
 from typing import Any
 
+from pfn_mcp import tracing
+from pfn_mcp.dispatch import run_tool
+
 from .tool_registry import get_tenant_aware_tools, get_tool
 
 logger = logging.getLogger(__name__)
@@ -48,19 +51,23 @@ async def execute_tool(
         tool_input["tenant"] = tenant_code
         logger.debug(f"Injected tenant '{tenant_code}' into {tool_name}")
 
-    try:
-        # Execute the tool
-        logger.info(f"Executing tool: {tool_name} with params: {tool_input}")
+    async def call() -> str:
         result = await tool_func(**tool_input)
 
         # Format the response
         # Some formatters need extra args (like list_devices needs search)
         if tool_name == "list_devices":
-            formatted = format_func(result, tool_input.get("search", ""))
-        else:
-            formatted = format_func(result)
+            return format_func(result, tool_input.get("search", ""))
+        return format_func(result)
 
-        return formatted
+    try:
+        # Execute the tool through the shared dispatch layer (result cache)
+        logger.info(f"Executing tool: {tool_name} with params: {tool_input}")
+        with tracing.span("tool.execute", tool=tool_name) as span:
+            result = await run_tool(tool_name, tool_input, tenant_code, call)
+            if span and result.startswith("Error"):
+                span.error = result[:200]
+            return result
 
     except TypeError as e:
         # Handle missing required parameters
@@ -10,9 +10,11 @@ from pfn_mcp.tools import discovery as discovery_tool
 from pfn_mcp.tools import electricity_cost as electricity_cost_tool
 from pfn_mcp.tools import energy_consumption as energy_consumption_tool
 from pfn_mcp.tools import group_telemetry as group_telemetry_tool
+from pfn_mcp.tools import latest_values as latest_values_tool
 from pfn_mcp.tools import peak_analysis as peak_analysis_tool
 from pfn_mcp.tools import quantities as quantities_tool
 from pfn_mcp.tools import telemetry as telemetry_tool
+from pfn_mcp.tools import telemetry_batch as telemetry_batch_tool
 from pfn_mcp.tools import tenants as tenants_tool
 from pfn_mcp.tools import wages_data as wages_data_tool
 
@@ -77,6 +79,14 @@ TOOL_REGISTRY: dict[str, tuple[ToolFunc, FormatFunc]] = {
         telemetry_tool.get_quantity_stats,
         telemetry_tool.format_quantity_stats_response,
     ),
+    "get_batch_telemetry": (
+        telemetry_batch_tool.get_batch_telemetry,
+        telemetry_batch_tool.format_batch_telemetry_response,
+    ),
+    "get_latest_values": (
+        latest_values_tool.get_latest_values,
+        latest_values_tool.format_latest_values_response,
+    ),
     "get_energy_consumption": (
         energy_consumption_tool.get_energy_consumption,
         energy_consumption_tool.format_energy_consumption_response,
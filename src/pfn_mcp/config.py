@@ -15,9 +15,20 @@ class Settings(BaseSettings):
 
     # Database connection
     database_url: str = "postgresql://localhost:5432/valkyrie"
+    database_replica_url: str | None = None  # analytics read replica (optional)
+    database_chat_url: str | None = None  # separate pool for mcp chat schema (optional)
     db_pool_min_size: int = 2
     db_pool_max_size: int = 10
     db_query_timeout: float = 30.0  # seconds
+    db_coalesce_reads: bool = True  # share identical in-flight read queries
+    db_replica_max_lag: float = 60.0  # seconds behind primary before falling back
+    db_replica_lag_check_interval: float = 15.0  # seconds between lag checks
+
+    # Admission control in front of the pool (see admission.py)
+    db_admission_enabled: bool = True
+    db_admission_heavy_slots: int = 6  # max pool connections for heavy tools
+    db_admission_max_wait: float = 20.0  # seconds queued before a query is shed
+    db_admission_tenant_weights: dict[str, float] = {}  # tenant_code -> weight
 
     # Server settings
     server_name: str = "pfn-mcp"
@@ -28,5 +39,67 @@ class Settings(BaseSettings):
     # Timezone for user-facing output
     display_timezone: str = "Asia/Jakarta"
 
+    # Tool-result cache (see cache.py)
+    tool_cache_enabled: bool = True
+    tool_cache_max_entries: int = 1024
+    tool_cache_default_ttl: float = 300.0  # seconds
+    tool_cache_watermark_interval: float = 60.0  # seconds between watermark checks
+
+    # Device x quantity coverage index (see coverage.py, migrations/003)
+    coverage_index_enabled: bool = True
+    coverage_reload_interval: float = 300.0  # seconds between incremental reloads
+
+    # Device last-seen tracker for check_data_freshness (see freshness.py)
+    freshness_tracker_enabled: bool = True
+    freshness_poll_interval: float = 60.0  # seconds between polls for new buckets
+    freshness_poll_overlap: float = 3600.0  # seconds re-read before the newest bucket seen
+
+    # Live last-value cache for get_latest_values (see last_values.py)
+    last_value_cache_enabled: bool = True
+    last_value_poll_interval: float = 30.0  # seconds between per-tenant polls
+    last_value_window: float = 3600.0  # seconds of raw data read on a tenant's first poll
+    last_value_late_arrival: float = 900.0  # seconds re-read before a tenant's high-water mark
+
+    # Map-reduce of long-range aggregates (see tools/partitioned.py)
+    partition_min_days: float = 62.0  # ranges at least this long are split per month
+    partition_concurrency: int = 4  # partitions queried at once (one connection each)
+
+    # Anonymized tool-call corpus for workload replay (see recording.py)
+    tool_recording_enabled: bool = False
+    tool_recording_path: str = "recordings/tool_calls.jsonl"
+    tool_recording_salt: str = ""  # HMAC key for pseudonyms; set it to keep refs unguessable
+
+    # Prometheus-style /metrics on the SSE server and chat API (see metrics.py)
+    metrics_enabled: bool = True
+
+    # Span tracing chat turn -> tool -> pool -> SQL (see tracing.py)
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 1.0  # fraction of root spans (requests) traced
+    tracing_exporter: str = "file"  # "file" (JSONL) or "otlp" (OTLP/HTTP JSON)
+    tracing_file: str = "traces/spans.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318"
+    tracing_sql_comments: bool = True  # traceparent comment on each traced statement
+
+    # Pre-execution cost guard for telemetry reads (see tools/cost_guard.py)
+    cost_guard_enabled: bool = True
+    cost_guard_max_scan_rows: int = 1_000_000  # estimated rows one read may scan
+    cost_guard_max_result_rows: int = 10_000  # rows one read may return to the tool
+
+    # JSON-lines slow log for queries and tool calls (see slowlog.py)
+    slow_log_enabled: bool = False
+    slow_log_path: str = "logs/slow.jsonl"
+    slow_query_threshold_ms: float = 500.0  # queries at or above this are always logged
+    slow_tool_threshold_ms: float = 2000.0  # tool calls at or above this are always logged
+    slow_log_samples_per_minute: float = 2.0  # fast calls logged per fingerprint (0 = none)
+
+    # Per-tool tracemalloc profiling (see memprofile.py); serializes tool calls
+    memory_profiling_enabled: bool = False
+    memory_profile_path: str = "logs/memory.jsonl"
+    memory_profile_top_sites: int = 10  # allocation sites recorded per call
+    memory_profile_frames: int = 1  # stack frames kept per allocation
+    memory_profile_interval: float = 0.005  # seconds between peak samples
+    memory_budget_default_mib: float = 0.0  # peak budget for tools not listed (0 = none)
+    memory_budgets_mib: dict[str, float] = {}  # tool -> peak budget in MiB
+
 
 settings = Settings()
@@ -0,0 +1,211 @@
+"""In-memory device x quantity coverage index.
+
+Discovery tools used to rediscover which devices report which quantities
+(and over what time range) by scanning telemetry_15min_agg on every call.
+The device_quantity_coverage catalog (migrations/003) is maintained
+incrementally in the database; this module mirrors it in memory so those
+questions are answered with dictionary lookups.
+
+The index is reloaded incrementally: each reload only fetches catalog rows
+whose updated_at moved since the previous load. Until the first load
+succeeds (or when the catalog table does not exist), get_coverage_index()
+returns None and tools fall back to querying the hypertable.
+
+Note: the catalog excludes buckets younger than the refresh settle interval
+(30 minutes by default), so last_bucket can trail live data by that much.
+Buckets that land more than the late-arrival overlap (2 hours by default)
+after their time are not counted, so row_count is approximate for devices
+that upload that late. Catalog rows with row_count = 0 (all data dropped by
+retention) are removed from the index.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from pfn_mcp import db
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+COVERAGE_QUERY = """
+    SELECT device_id, quantity_id, tenant_id, first_bucket, last_bucket,
+           row_count, updated_at
+    FROM device_quantity_coverage
+    WHERE updated_at > $1
+"""
+
+HIGH_WATER_QUERY = "SELECT high_water FROM device_quantity_coverage_state WHERE id"
+
+
+@dataclass
+class CoverageEntry:
+    """Coverage of one quantity on one device."""
+
+    device_id: int
+    quantity_id: int
+    tenant_id: int
+    first_bucket: datetime
+    last_bucket: datetime
+    row_count: int
+
+
+@dataclass
+class CoverageRange:
+    """Aggregated coverage over several device/quantity pairs."""
+
+    earliest: datetime | None
+    latest: datetime | None
+    row_count: int
+    device_count: int
+    quantity_count: int
+
+
+def _aggregate(entries: list[CoverageEntry]) -> CoverageRange:
+    if not entries:
+        return CoverageRange(None, None, 0, 0, 0)
+    return CoverageRange(
+        earliest=min(e.first_bucket for e in entries),
+        latest=max(e.last_bucket for e in entries),
+        row_count=sum(e.row_count for e in entries),
+        device_count=len({e.device_id for e in entries}),
+        quantity_count=len({e.quantity_id for e in entries}),
+    )
+
+
+class CoverageIndex:
+    """Device x quantity coverage with lookups by device, quantity and tenant."""
+
+    def __init__(self):
+        self._by_device: dict[int, dict[int, CoverageEntry]] = {}
+        self._by_quantity: dict[int, set[int]] = {}
+        self._by_tenant: dict[int, set[tuple[int, int]]] = {}
+        self.loaded_until: datetime | None = None  # max catalog updated_at seen
+        self.high_water: datetime | None = None  # catalog refresh high-water mark
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._by_device.values())
+
+    def upsert(self, entry: CoverageEntry) -> None:
+        """Insert or replace one device/quantity entry."""
+        previous = self._by_device.get(entry.device_id, {}).get(entry.quantity_id)
+        if previous is not None and previous.tenant_id != entry.tenant_id:
+            self._by_tenant[previous.tenant_id].discard(
+                (entry.device_id, entry.quantity_id)
+            )
+        self._by_device.setdefault(entry.device_id, {})[entry.quantity_id] = entry
+        self._by_quantity.setdefault(entry.quantity_id, set()).add(entry.device_id)
+        self._by_tenant.setdefault(entry.tenant_id, set()).add(
+            (entry.device_id, entry.quantity_id)
+        )
+
+    def remove(self, device_id: int, quantity_id: int) -> None:
+        """Remove one device/quantity entry (no data left)."""
+        entry = self._by_device.get(device_id, {}).pop(quantity_id, None)
+        if entry is None:
+            return
+        self._by_quantity.get(quantity_id, set()).discard(device_id)
+        self._by_tenant.get(entry.tenant_id, set()).discard((device_id, quantity_id))
+
+    def entries_for_device(
+        self, device_id: int, quantity_ids: list[int] | None = None
+    ) -> list[CoverageEntry]:
+        """Get coverage entries of a device (optionally for some quantities)."""
+        by_quantity = self._by_device.get(device_id, {})
+        if quantity_ids is None:
+            return list(by_quantity.values())
+        return [by_quantity[q] for q in quantity_ids if q in by_quantity]
+
+    def quantity_ids_for_device(self, device_id: int) -> list[int]:
+        """Get IDs of quantities with data on a device."""
+        return list(self._by_device.get(device_id, {}))
+
+    def device_ids_for_quantities(self, quantity_ids: list[int]) -> list[int]:
+        """Get IDs of devices with data for any of the quantities."""
+        device_ids: set[int] = set()
+        for quantity_id in quantity_ids:
+            device_ids |= self._by_quantity.get(quantity_id, set())
+        return sorted(device_ids)
+
+    def quantity_ids_in_use(self) -> list[int]:
+        """Get IDs of all quantities with data on any device."""
+        return sorted(q for q, devices in self._by_quantity.items() if devices)
+
+    def device_range(
+        self, device_id: int, quantity_ids: list[int] | None = None
+    ) -> CoverageRange:
+        """Get overall coverage of a device."""
+        return _aggregate(self.entries_for_device(device_id, quantity_ids))
+
+    def tenant_range(
+        self, tenant_id: int, device_ids: set[int] | None = None
+    ) -> CoverageRange:
+        """Get overall coverage of a tenant (optionally limited to some devices)."""
+        pairs = self._by_tenant.get(tenant_id, set())
+        return _aggregate([
+            self._by_device[d][q]
+            for d, q in pairs
+            if device_ids is None or d in device_ids
+        ])
+
+    async def reload(self) -> int:
+        """Fetch catalog rows changed since the last load. Returns rows applied."""
+        since = self.loaded_until or datetime(1970, 1, 1, tzinfo=UTC)
+        rows = await db.fetch_all(COVERAGE_QUERY, since)
+        for row in rows:
+            if row["row_count"] == 0:
+                self.remove(row["device_id"], row["quantity_id"])
+            else:
+                self.upsert(CoverageEntry(
+                    device_id=row["device_id"],
+                    quantity_id=row["quantity_id"],
+                    tenant_id=row["tenant_id"],
+                    first_bucket=row["first_bucket"],
+                    last_bucket=row["last_bucket"],
+                    row_count=row["row_count"],
+                ))
+            updated_at = row["updated_at"]
+            if self.loaded_until is None or updated_at > self.loaded_until:
+                self.loaded_until = updated_at
+        self.high_water = await db.fetch_val(HIGH_WATER_QUERY)
+        return len(rows)
+
+
+# Global index (None until the first successful load)
+_index: CoverageIndex | None = None
+
+
+def get_coverage_index() -> CoverageIndex | None:
+    """Get the loaded coverage index, or None to fall back to SQL."""
+    if not settings.coverage_index_enabled:
+        return None
+    return _index
+
+
+async def refresh_coverage_index() -> bool:
+    """Load or incrementally refresh the global index. Returns success."""
+    global _index
+
+    index = _index if _index is not None else CoverageIndex()
+    try:
+        applied = await index.reload()
+    except Exception as e:
+        # Missing table (migration not applied) or DB unavailable
+        if _index is None:
+            logger.warning(f"Coverage catalog unavailable, using hypertable scans: {e}")
+        else:
+            logger.warning(f"Coverage index refresh failed, serving last load: {e}")
+        return False
+
+    if _index is None:
+        _index = index
+        logger.info(f"Coverage index loaded: {len(index)} device/quantity pairs")
+    elif applied:
+        logger.debug(f"Coverage index refreshed: {applied} pairs updated")
+    return True
+
+
+def reset_coverage_index() -> None:
+    """Drop the loaded index (tools fall back to SQL until the next load)."""
+    global _index
+    _index = None
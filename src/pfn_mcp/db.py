@@ -2,101 +2,383 @@
 
 import asyncio
 import logging
-from contextlib import asynccontextmanager
+import re
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Any
 
 import asyncpg
 
+from pfn_mcp import metrics, tracing
+from pfn_mcp.admission import admission_slot, current_tenant, current_tool
 from pfn_mcp.config import settings
+from pfn_mcp.slowlog import get_slow_log
 
 logger = logging.getLogger(__name__)
 
-# Global connection pool
-_pool: asyncpg.Pool | None = None
+# Named connection pools. Only "primary" is required; "analytics" (read
+# replica) and "chat" (mcp schema) fall back to primary when not configured.
+PRIMARY = "primary"
+ANALYTICS = "analytics"
+CHAT = "chat"
 
+_pools: dict[str, asyncpg.Pool] = {}
 
-async def init_pool() -> asyncpg.Pool:
-    """Initialize the database connection pool."""
-    global _pool
-    if _pool is not None:
-        return _pool
+# Routing rules per query class (first match wins, default primary)
+QUERY_ROUTES: list[tuple[re.Pattern, str]] = [
+    # Conversation history and usage (reads and writes) stay off the tool pools
+    (re.compile(r"\bmcp\.", re.IGNORECASE), CHAT),
+    # Heavy hypertable / cost summary scans tolerate replica lag
+    (
+        re.compile(
+            r"\b(telemetry_15min_agg|telemetry_data|daily_energy_cost_summary)\b",
+            re.IGNORECASE,
+        ),
+        ANALYTICS,
+    ),
+]
+
+# Statements safe to share between concurrent callers: plain SELECTs, or
+# WITH queries without a data-modifying part. Anything else (INSERT ...
+# RETURNING through fetch_one, SELECT ... FOR UPDATE) always runs per caller.
+_READ_ONLY_START = re.compile(r"^\s*(?:(?:--[^\n]*\n|/\*.*?\*/)\s*)*(SELECT|WITH)\b", re.I | re.S)
+_DATA_MODIFYING = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b",
+    re.IGNORECASE,
+)
+
+
+def is_read_only(query: str) -> bool:
+    """Check whether a statement only reads (and so may be coalesced)."""
+    return bool(_READ_ONLY_START.match(query)) and not _DATA_MODIFYING.search(query)
+
+
+# Replica lag on a standby, 0 when fully replayed (or not a standby)
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# Replica health state (refreshed at most every db_replica_lag_check_interval)
+_replica_lag: float | None = None
+_replica_checked_at: float = float("-inf")
+_replica_lock = asyncio.Lock()
+
+# In-flight read queries shared between identical concurrent callers
+_inflight: dict[tuple, asyncio.Future] = {}
+_coalesce_stats = {"leaders": 0, "followers": 0}
+
+# Callers currently waiting for admission / a connection, per pool
+_acquire_waiting: dict[str, int] = {}
+
+
+@dataclass
+class QueryStats:
+    """What one query saw on its way to the server (for the slow log)."""
+
+    rows: int | None = None
+    pool: str | None = None  # None = never took a connection (coalesced)
+    pool_wait: float | None = None
+
+
+# Stats of the query being run; singleflight tasks inherit the leader's
+_query_stats: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
 
+
+async def _create_pool(name: str, dsn: str) -> asyncpg.Pool:
     min_size, max_size = settings.db_pool_min_size, settings.db_pool_max_size
-    logger.info(f"Creating connection pool (min={min_size}, max={max_size})")
-    _pool = await asyncpg.create_pool(
-        settings.database_url,
-        min_size=settings.db_pool_min_size,
-        max_size=settings.db_pool_max_size,
+    logger.info(f"Creating {name} connection pool (min={min_size}, max={max_size})")
+    return await asyncpg.create_pool(
+        dsn,
+        min_size=min_size,
+        max_size=max_size,
         command_timeout=settings.db_query_timeout,
     )
-    logger.info("Connection pool created successfully")
-    return _pool
+
+
+async def init_pool() -> asyncpg.Pool:
+    """Initialize the database connection pools. Returns the primary pool."""
+    if PRIMARY in _pools:
+        return _pools[PRIMARY]
+
+    _pools[PRIMARY] = await _create_pool(PRIMARY, settings.database_url)
+    if settings.database_replica_url:
+        try:
+            _pools[ANALYTICS] = await _create_pool(ANALYTICS, settings.database_replica_url)
+        except Exception as e:
+            logger.warning(f"Analytics replica unavailable, using primary: {e}")
+    if settings.database_chat_url:
+        _pools[CHAT] = await _create_pool(CHAT, settings.database_chat_url)
+    logger.info(f"Connection pools created successfully: {', '.join(_pools)}")
+    return _pools[PRIMARY]
 
 
 async def close_pool() -> None:
-    """Close the database connection pool."""
-    global _pool
-    if _pool is not None:
-        logger.info("Closing connection pool")
-        await _pool.close()
-        _pool = None
+    """Close all database connection pools."""
+    global _replica_lag, _replica_checked_at
+    for name in list(_pools):
+        logger.info(f"Closing {name} connection pool")
+        await _pools.pop(name).close()
+    _replica_lag = None
+    _replica_checked_at = float("-inf")
 
 
-def get_pool() -> asyncpg.Pool:
-    """Get the current connection pool. Raises if not initialized."""
-    if _pool is None:
+def get_pool(name: str = PRIMARY) -> asyncpg.Pool:
+    """Get a named connection pool (falls back to primary). Raises if not initialized."""
+    if PRIMARY not in _pools:
         raise RuntimeError("Database pool not initialized. Call init_pool() first.")
-    return _pool
+    return _pools.get(name, _pools[PRIMARY])
+
+
+def route_query(query: str) -> str:
+    """Get the pool name a query should run on according to QUERY_ROUTES."""
+    for pattern, pool_name in QUERY_ROUTES:
+        if pattern.search(query):
+            return pool_name
+    return PRIMARY
+
+
+async def _replica_usable() -> bool:
+    """Check whether the analytics replica is within the allowed lag."""
+    global _replica_lag, _replica_checked_at
+
+    if ANALYTICS not in _pools:
+        return False
+    if time.monotonic() - _replica_checked_at >= settings.db_replica_lag_check_interval:
+        async with _replica_lock:
+            if time.monotonic() - _replica_checked_at >= settings.db_replica_lag_check_interval:
+                try:
+                    async with _pools[ANALYTICS].acquire() as conn:
+                        _replica_lag = float(await conn.fetchval(REPLICA_LAG_QUERY))
+                except Exception as e:
+                    logger.warning(f"Replica lag check failed, routing to primary: {e}")
+                    _replica_lag = None
+                _replica_checked_at = time.monotonic()
+
+    if _replica_lag is None:
+        return False
+    return _replica_lag <= settings.db_replica_max_lag
+
+
+async def resolve_pool(query: str | None = None, write: bool = False) -> str:
+    """
+    Get the pool name to run a query on.
+
+    Writes never go to the replica. Analytics reads fall back to primary
+    when no replica is configured or it lags more than db_replica_max_lag.
+    """
+    name = route_query(query) if query else PRIMARY
+    if name == ANALYTICS and (write or not await _replica_usable()):
+        return PRIMARY
+    return name
+
+
+def get_pool_stats() -> dict:
+    """Get size/idle counts per pool and replica lag."""
+    return {
+        "pools": {
+            name: {
+                "size": pool.get_size(),
+                "idle": pool.get_idle_size(),
+                "waiting": _acquire_waiting.get(name, 0),
+            }
+            for name, pool in _pools.items()
+        },
+        "replica_lag": _replica_lag,
+    }
 
 
 @asynccontextmanager
-async def get_connection():
-    """Acquire a connection from the pool."""
-    pool = get_pool()
-    async with pool.acquire() as conn:
-        yield conn
+async def get_connection(name: str = PRIMARY):
+    """
+    Acquire a connection from a named pool.
+
+    Tool pools go through admission control first; the chat pool does not,
+    so conversation writes are never queued behind analytical reads.
+    """
+    pool = get_pool(name)
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.pool = name
+    acquire = tracing.start_span("db.acquire", pool=name)
+    started = time.perf_counter()
+    _acquire_waiting[name] = _acquire_waiting.get(name, 0) + 1
+    waiting = True
+
+    def acquired() -> None:
+        nonlocal waiting
+        if waiting:
+            waiting = False
+            _acquire_waiting[name] -= 1
+            wait = time.perf_counter() - started
+            metrics.DB_ACQUIRE_DURATION.observe(wait, pool=name)
+            if stats is not None:
+                stats.pool_wait = wait
+        tracing.end_span(acquire)
+
+    try:
+        if name == CHAT:
+            async with pool.acquire() as conn:
+                acquired()
+                yield conn
+            return
+        async with admission_slot(name), pool.acquire() as conn:
+            acquired()
+            yield conn
+    finally:
+        acquired()
+
+
+@contextmanager
+def _instrumented(operation: str, query: str, args: tuple):
+    """Trace span, latency / error metrics and slow log around one query."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    started = time.perf_counter()
+    error = None
+    with tracing.span("db.query", **{"db.operation": operation, "db.statement": query}) as span:
+        try:
+            yield stats
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            metrics.DB_QUERY_ERRORS.inc(operation=operation)
+            raise
+        finally:
+            _query_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            metrics.DB_QUERY_DURATION.observe(elapsed, operation=operation)
+            if span and stats.rows is not None:
+                span.set(rows=stats.rows)
+            slow_log = get_slow_log()
+            if slow_log is not None:
+                slow_log.query(
+                    operation,
+                    query,
+                    args,
+                    elapsed * 1000,
+                    rows=stats.rows,
+                    pool=stats.pool,
+                    pool_wait_ms=stats.pool_wait * 1000 if stats.pool_wait is not None else None,
+                    tool=current_tool.get(),
+                    tenant=current_tenant.get(),
+                    error=error,
+                )
+
+
+def _freeze(value: Any) -> Any:
+    """Convert query arguments into a hashable form (lists -> tuples)."""
+    if isinstance(value, list | tuple):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+async def _singleflight(
+    kind: str, query: str, args: tuple, timeout: float, run: Callable[[], Awaitable]
+):
+    """
+    Share one in-flight execution between identical concurrent read queries.
+
+    Only read-only statements (is_read_only) are shared; writes that return
+    rows through fetch_one / fetch_val always run once per caller.
+
+    The first caller (leader) starts the query as a task; callers arriving
+    with the same (kind, query, args, timeout) while it is running await that
+    same task instead of taking another pool connection. The timeout is part
+    of the key so no caller waits on another caller's deadline. Nothing is retained once
+    the query completes, so results are never staler than a fresh query.
+    The task is shielded so a cancelled caller does not cancel the others.
+    """
+    if not settings.db_coalesce_reads or not is_read_only(query):
+        return await run()
+
+    try:
+        key = (kind, query, _freeze(args), timeout)
+        hash(key)
+    except TypeError:
+        return await run()
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+        _coalesce_stats["leaders"] += 1
+    else:
+        _coalesce_stats["followers"] += 1
+    return await asyncio.shield(task)
+
+
+def get_coalesce_stats() -> dict:
+    """Get singleflight counters (leaders = queries run, followers = queries saved)."""
+    return {**_coalesce_stats, "in_flight": len(_inflight)}
 
 
 async def fetch_all(query: str, *args: Any, timeout: float | None = None) -> list[dict]:
     """Execute a query and return all rows as dictionaries."""
     timeout = timeout or settings.db_query_timeout
-    async with get_connection() as conn:
-        rows = await asyncio.wait_for(
-            conn.fetch(query, *args),
-            timeout=timeout,
-        )
-        return [dict(row) for row in rows]
+
+    async def run() -> list[asyncpg.Record]:
+        async with get_connection(await resolve_pool(query)) as conn:
+            return await asyncio.wait_for(
+                conn.fetch(tracing.with_sql_comment(query), *args),
+                timeout=timeout,
+            )
+
+    with _instrumented("fetch_all", query, args) as stats:
+        rows = await _singleflight("all", query, args, timeout, run)
+        stats.rows = len(rows)
+    return [dict(row) for row in rows]
 
 
 async def fetch_one(query: str, *args: Any, timeout: float | None = None) -> dict | None:
     """Execute a query and return a single row as dictionary."""
     timeout = timeout or settings.db_query_timeout
-    async with get_connection() as conn:
-        row = await asyncio.wait_for(
-            conn.fetchrow(query, *args),
-            timeout=timeout,
-        )
-        return dict(row) if row else None
+
+    async def run() -> asyncpg.Record | None:
+        async with get_connection(await resolve_pool(query)) as conn:
+            return await asyncio.wait_for(
+                conn.fetchrow(tracing.with_sql_comment(query), *args),
+                timeout=timeout,
+            )
+
+    with _instrumented("fetch_one", query, args) as stats:
+        row = await _singleflight("one", query, args, timeout, run)
+        stats.rows = 1 if row else 0
+    return dict(row) if row else None
 
 
 async def fetch_val(query: str, *args: Any, timeout: float | None = None) -> Any:
     """Execute a query and return a single value."""
     timeout = timeout or settings.db_query_timeout
-    async with get_connection() as conn:
-        return await asyncio.wait_for(
-            conn.fetchval(query, *args),
-            timeout=timeout,
-        )
+
+    async def run() -> Any:
+        async with get_connection(await resolve_pool(query)) as conn:
+            return await asyncio.wait_for(
+                conn.fetchval(tracing.with_sql_comment(query), *args),
+                timeout=timeout,
+            )
+
+    with _instrumented("fetch_val", query, args):
+        return await _singleflight("val", query, args, timeout, run)
 
 
 async def execute(query: str, *args: Any, timeout: float | None = None) -> str:
     """Execute a query and return the status."""
     timeout = timeout or settings.db_query_timeout
-    async with get_connection() as conn:
-        return await asyncio.wait_for(
-            conn.execute(query, *args),
-            timeout=timeout,
-        )
+    with _instrumented("execute", query, args):
+        async with get_connection(await resolve_pool(query, write=True)) as conn:
+            return await asyncio.wait_for(
+                conn.execute(tracing.with_sql_comment(query), *args),
+                timeout=timeout,
+            )
 
 
 async def check_connection() -> bool:
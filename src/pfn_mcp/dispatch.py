@@ -0,0 +1,100 @@
+"""Shared tool-dispatch wrapper used by the MCP server and the chat executor.
+
+Both entry points (server.call_tool and chat.tool_executor.execute_tool)
+route every tool call through run_tool(), which layers cross-cutting
+behaviour (result caching, admission tagging, metrics, slow log, memory
+profiling, call recording) around the actual tool invocation.
+"""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from pfn_mcp import metrics, tracing
+from pfn_mcp.admission import tool_context
+from pfn_mcp.cache import get_cache, get_data_watermark, is_error_response
+from pfn_mcp.config import settings
+from pfn_mcp.memprofile import get_memory_profiler
+from pfn_mcp.recording import get_recorder
+from pfn_mcp.slowlog import get_slow_log
+
+logger = logging.getLogger(__name__)
+
+ToolCall = Callable[[], Awaitable[str]]
+
+
+async def run_tool(
+    tool_name: str,
+    arguments: dict,
+    tenant: str | None,
+    call: ToolCall,
+) -> str:
+    """
+    Run a tool call through the dispatch layer.
+
+    Args:
+        tool_name: Name of the tool being called
+        arguments: Tool arguments (after tenant injection)
+        tenant: Tenant the call runs as (None = superuser/all tenants)
+        call: Zero-arg coroutine factory producing the formatted response
+
+    Returns:
+        Formatted string response
+    """
+    start = time.perf_counter()
+    result = None
+    try:
+        with tool_context(tool_name, tenant):
+            profiler = get_memory_profiler()
+            if profiler is not None:
+                result = await profiler.profile(
+                    tool_name, tenant, lambda: _cached_call(tool_name, arguments, tenant, call)
+                )
+            else:
+                result = await _cached_call(tool_name, arguments, tenant, call)
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        status = "error" if result is None or is_error_response(result) else "ok"
+        logger.info(f"Tool {tool_name} finished in {elapsed * 1000:.1f}ms ({status})")
+        metrics.TOOL_CALLS.inc(tool=tool_name, status=status)
+        metrics.TOOL_DURATION.observe(elapsed, tool=tool_name)
+        slow_log = get_slow_log()
+        if slow_log is not None:
+            slow_log.tool(
+                tool_name, arguments, tenant, elapsed * 1000, result, error=status == "error"
+            )
+        recorder = get_recorder()
+        if recorder is not None:
+            recorder.record(
+                tool_name, arguments, tenant, elapsed * 1000, result, error=status == "error"
+            )
+
+
+async def _cached_call(
+    tool_name: str,
+    arguments: dict,
+    tenant: str | None,
+    call: ToolCall,
+) -> str:
+    """Serve from the tool-result cache or run and store the result."""
+    cache = get_cache()
+    ttl = cache.ttl_for(tool_name)
+    if not settings.tool_cache_enabled or ttl <= 0:
+        return await call()
+
+    watermark = await get_data_watermark()
+    if watermark is None:
+        return await call()
+
+    key = cache.make_key(tool_name, arguments, tenant, watermark)
+    cached = cache.get(key, tool_name)
+    if cached is not None:
+        logger.debug(f"Cache hit for {tool_name}")
+        tracing.annotate(cache="hit")
+        return cached
+
+    result = await call()
+    if not is_error_response(result):
+        cache.set(key, result, ttl)
+    return result
@@ -0,0 +1,174 @@
+"""In-memory last-seen tracker for device data freshness.
+
+check_data_freshness used to run MAX(bucket) per device over the whole of
+telemetry_15min_agg. This module keeps a device_id -> last bucket map:
+
+- seeded once with chunk-bounded queries over widening windows (1 day,
+  7 days, 30 days, 1 year), so recent chunks answer for almost every device
+  and older chunks are only read for devices not seen yet
+- advanced by a poller that reads buckets from shortly before the newest
+  bucket seen so far (one or two chunks). The poll re-reads an overlap
+  (freshness_poll_overlap) so devices whose buckets land late (upload lag,
+  continuous aggregate refresh) are still advanced, and never starts after
+  now, so one device with a future timestamp cannot freeze the others
+- devices still unknown after seeding (silent for over a year, or new) are
+  looked up once on demand and remembered
+
+Until the seed completes, get_last_seen_tracker() returns None and the tool
+falls back to SQL.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from pfn_mcp import db
+from pfn_mcp.config import settings
+from pfn_mcp.tools.periods import utc_now_naive
+
+logger = logging.getLogger(__name__)
+
+# Seed windows in days, newest first
+SEED_WINDOWS = (1, 7, 30, 365)
+
+# Default re-read window before the high-water mark (>= cagg refresh settle)
+POLL_OVERLAP = timedelta(hours=1)
+
+RANGE_QUERY = """
+    SELECT device_id, MAX(bucket) as last_bucket
+    FROM telemetry_15min_agg
+    WHERE bucket > $1 AND bucket <= $2
+    GROUP BY device_id
+"""
+
+POLL_QUERY = """
+    SELECT device_id, MAX(bucket) as last_bucket
+    FROM telemetry_15min_agg
+    WHERE bucket >= $1
+    GROUP BY device_id
+"""
+
+DEVICES_QUERY = """
+    SELECT device_id, MAX(bucket) as last_bucket
+    FROM telemetry_15min_agg
+    WHERE device_id = ANY($1::int[])
+    GROUP BY device_id
+"""
+
+
+def classify_freshness(
+    last_reading: datetime | None,
+    now: datetime,
+    hours_threshold: float,
+) -> tuple[float | None, str]:
+    """
+    Classify a device by its last reading.
+
+    Args:
+        last_reading: Last bucket timestamp (naive UTC) or None
+        now: Current time (naive UTC)
+        hours_threshold: Hours after which data is "stale"
+
+    Returns:
+        (hours_ago, status) where status is online (<= 1h), recent
+        (<= threshold), stale or no_data
+    """
+    if last_reading is None:
+        return None, "no_data"
+    if last_reading.tzinfo is not None:
+        last_reading = last_reading.replace(tzinfo=None) - last_reading.utcoffset()
+    hours_ago = (now - last_reading).total_seconds() / 3600
+    if hours_ago <= 1:
+        return hours_ago, "online"
+    if hours_ago <= hours_threshold:
+        return hours_ago, "recent"
+    return hours_ago, "stale"
+
+
+class LastSeenTracker:
+    """Map of device_id -> last telemetry_15min_agg bucket (None = no data)."""
+
+    def __init__(self, overlap: timedelta = POLL_OVERLAP):
+        self.overlap = overlap  # How far before the high-water mark polls re-read
+        self._last_seen: dict[int, datetime | None] = {}
+        self.high_water: datetime | None = None
+        self.seeded = False
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def observe(self, device_id: int, bucket: datetime | None) -> None:
+        """Record a bucket for a device (older buckets are ignored)."""
+        current = self._last_seen.get(device_id)
+        if bucket is None:
+            self._last_seen.setdefault(device_id, None)
+            return
+        if current is None or bucket > current:
+            self._last_seen[device_id] = bucket
+        if self.high_water is None or bucket > self.high_water:
+            self.high_water = bucket
+
+    async def seed(self, now: datetime | None = None) -> None:
+        """Seed the map from chunk-bounded windows, newest first."""
+        now = now or utc_now_naive()
+        upper = now + timedelta(days=1)  # Tolerate clock skew in ingestion
+        for days in SEED_WINDOWS:
+            lower = now - timedelta(days=days)
+            rows = await db.fetch_all(RANGE_QUERY, lower, upper)
+            for row in rows:
+                # Newer windows were read first, so the first hit is the latest
+                if row["device_id"] not in self._last_seen:
+                    self.observe(row["device_id"], row["last_bucket"])
+            upper = lower
+        self.seeded = True
+
+    async def poll(self, now: datetime | None = None) -> int:
+        """Advance the map with buckets since the newest one seen. Returns rows read."""
+        now = now or utc_now_naive()
+        if self.high_water is None:
+            since = now - timedelta(days=SEED_WINDOWS[0])
+        else:
+            since = min(self.high_water, now) - self.overlap
+        rows = await db.fetch_all(POLL_QUERY, since)
+        for row in rows:
+            self.observe(row["device_id"], row["last_bucket"])
+        return len(rows)
+
+    async def last_seen_many(self, device_ids: list[int]) -> dict[int, datetime | None]:
+        """Get last buckets for devices, looking up unknown devices once."""
+        unknown = [d for d in device_ids if d not in self._last_seen]
+        if unknown:
+            rows = await db.fetch_all(DEVICES_QUERY, unknown)
+            for row in rows:
+                self.observe(row["device_id"], row["last_bucket"])
+            for device_id in unknown:
+                self._last_seen.setdefault(device_id, None)
+        return {d: self._last_seen[d] for d in device_ids}
+
+
+# Global tracker (None until seeded)
+_tracker: LastSeenTracker | None = None
+
+
+def get_last_seen_tracker() -> LastSeenTracker | None:
+    """Get the seeded last-seen tracker, or None to fall back to SQL."""
+    if not settings.freshness_tracker_enabled:
+        return None
+    return _tracker
+
+
+async def refresh_last_seen() -> None:
+    """Seed the global tracker on first run, then poll for new buckets."""
+    global _tracker
+    if _tracker is None:
+        tracker = LastSeenTracker(timedelta(seconds=settings.freshness_poll_overlap))
+        await tracker.seed()
+        _tracker = tracker
+        logger.info(f"Last-seen tracker seeded: {len(tracker)} devices")
+        return
+    await _tracker.poll()
+
+
+def reset_last_seen_tracker() -> None:
+    """Drop the tracker (tools fall back to SQL until it is seeded again)."""
+    global _tracker
+    _tracker = None
@@ -0,0 +1,133 @@
+"""Live last-value cache of (device, quantity) -> latest raw reading.
+
+"What is the current reading" questions used to pull an hour of raw
+telemetry_data per call. This cache is fed by one batched poller query per
+tenant: each poll reads only rows newer than that tenant's previous
+high-water mark (minus a late-arrival overlap, last_value_late_arrival, for
+gateways that upload behind) and keeps the latest reading per
+device/quantity. The high-water mark never moves past now, so a device with
+a future clock cannot hide the rest of its tenant.
+
+The cache is ready per tenant after its first poll. Callers must check
+is_ready() and fall back to a bounded telemetry_data query otherwise.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from pfn_mcp import db
+from pfn_mcp.config import settings
+from pfn_mcp.tools.periods import utc_now_naive
+
+logger = logging.getLogger(__name__)
+
+# Default re-read window before the high-water mark (gateway upload lag)
+LATE_ARRIVAL = timedelta(minutes=15)
+
+TENANTS_QUERY = "SELECT id FROM tenants WHERE is_active = true ORDER BY id"
+
+POLL_QUERY = """
+    SELECT DISTINCT ON (device_id, quantity_id)
+        device_id, quantity_id, timestamp, value
+    FROM telemetry_data
+    WHERE tenant_id = $1 AND timestamp > $2
+    ORDER BY device_id, quantity_id, timestamp DESC
+"""
+
+
+@dataclass
+class LastValue:
+    """Latest reading of one quantity on one device."""
+
+    timestamp: datetime
+    value: float | None
+
+
+class LastValueCache:
+    """Latest reading per device/quantity, polled incrementally per tenant."""
+
+    def __init__(self, window: timedelta, late_arrival: timedelta = LATE_ARRIVAL):
+        self.window = window  # How far back the first poll of a tenant looks
+        self.late_arrival = late_arrival  # How far before the high-water mark polls re-read
+        self._by_device: dict[int, dict[int, LastValue]] = {}
+        self._polled_until: dict[int, datetime] = {}
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._by_device.values())
+
+    def is_ready(self, tenant_id: int) -> bool:
+        """Whether the tenant has been polled at least once."""
+        return tenant_id in self._polled_until
+
+    def observe(
+        self, device_id: int, quantity_id: int, timestamp: datetime, value: float | None
+    ) -> None:
+        """Record a reading (older readings than the cached one are ignored)."""
+        by_quantity = self._by_device.setdefault(device_id, {})
+        current = by_quantity.get(quantity_id)
+        if current is None or timestamp > current.timestamp:
+            by_quantity[quantity_id] = LastValue(timestamp, value)
+
+    def get(
+        self, device_id: int, quantity_ids: list[int] | None = None
+    ) -> dict[int, LastValue]:
+        """Get cached readings of a device (optionally for some quantities)."""
+        by_quantity = self._by_device.get(device_id, {})
+        if quantity_ids is None:
+            return dict(by_quantity)
+        return {q: by_quantity[q] for q in quantity_ids if q in by_quantity}
+
+    async def poll_tenant(self, tenant_id: int, now: datetime | None = None) -> int:
+        """Fetch readings newer than the tenant's high-water mark. Returns rows read."""
+        now = now or utc_now_naive()
+        floor = now - self.window
+        polled_until = self._polled_until.get(tenant_id)
+        since = max(polled_until - self.late_arrival, floor) if polled_until else floor
+
+        rows = await db.fetch_all(POLL_QUERY, tenant_id, since)
+        newest = polled_until or floor
+        for row in rows:
+            self.observe(row["device_id"], row["quantity_id"], row["timestamp"], row["value"])
+            newest = max(newest, row["timestamp"])
+        self._polled_until[tenant_id] = min(newest, now)
+        return len(rows)
+
+    async def poll_all(self) -> int:
+        """Poll every active tenant once. Returns rows read."""
+        total = 0
+        for tenant in await db.fetch_all(TENANTS_QUERY):
+            try:
+                total += await self.poll_tenant(tenant["id"])
+            except Exception as e:
+                logger.warning(f"Last-value poll failed for tenant {tenant['id']}: {e}")
+        return total
+
+
+# Global cache (created on the first poll)
+_cache: LastValueCache | None = None
+
+
+def get_last_value_cache() -> LastValueCache | None:
+    """Get the last-value cache, or None when disabled / not started."""
+    if not settings.last_value_cache_enabled:
+        return None
+    return _cache
+
+
+async def refresh_last_values() -> None:
+    """Poll all tenants into the global cache (background job)."""
+    global _cache
+    if _cache is None:
+        _cache = LastValueCache(
+            timedelta(seconds=settings.last_value_window),
+            timedelta(seconds=settings.last_value_late_arrival),
+        )
+    rows = await _cache.poll_all()
+    logger.debug(f"Last-value cache polled: {rows} rows, {len(_cache)} entries")
+
+
+def reset_last_value_cache() -> None:
+    """Drop the cache (tools fall back to SQL until the next poll)."""
+    global _cache
+    _cache = None
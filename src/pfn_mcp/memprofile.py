@@ -0,0 +1,293 @@
+"""Per-tool memory profiling with tracemalloc (opt-in).
+
+With memory_profiling_enabled, every tool call runs under tracemalloc:
+- peak: the highest traced memory above the level at call start
+- net: what is still allocated when the call returns
+- top sites: the source lines holding the most new memory at the peak
+
+Intermediate copies (asyncpg Records, dict(row), point dicts, formatter
+lines) are freed by the time a call returns. So the top sites come from a
+snapshot taken near the peak: a sampler thread polls the traced size every
+memory_profile_interval seconds, snapshots each new high, and the highest
+snapshot is compared with the one taken at call start.
+
+tracemalloc counts every allocation in the process, so profiled calls run
+one at a time. Background pollers still add a little noise. Profiling slows
+calls down (snapshots are O(live allocations)): turn it on for a staging
+run or a short window, not permanently.
+
+Each call is appended as a JSON line to memory_profile_path. Calls whose
+peak is over their budget (memory_budgets_mib per tool, else
+memory_budget_default_mib) are logged as warnings with their top sites.
+Summarize a run with:
+
+    python -m pfn_mcp.memprofile summary logs/memory.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import linecache
+import logging
+import statistics
+import threading
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from pathlib import Path
+from typing import IO
+
+from pfn_mcp import metrics
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+
+MEMORY_BUDGET_VIOLATIONS = metrics.REGISTRY.counter(
+    "pfn_tool_memory_budget_violations_total",
+    "Profiled tool calls whose peak memory exceeded the tool's budget",
+    ("tool",),
+)
+
+# Allocations made by the profiler itself are not attributed to tools
+_OWN_FILES = frozenset({tracemalloc.__file__, linecache.__file__, threading.__file__, __file__})
+
+
+def short_site(filename: str, lineno: int) -> str:
+    """file:line relative to the package (or site-packages) root."""
+    for marker in ("/site-packages/", "/src/"):
+        if marker in filename:
+            filename = filename.rsplit(marker, 1)[1]
+            break
+    return f"{filename}:{lineno}"
+
+
+class _PeakSampler(threading.Thread):
+    """Snapshots traced memory each time it reaches a new high."""
+
+    def __init__(self, interval: float, baseline: int):
+        super().__init__(name="memprofile-sampler", daemon=True)
+        self.interval = interval
+        self.best = baseline
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def check(self) -> None:
+        current, _ = tracemalloc.get_traced_memory()
+        # Steps of 5% (at least 256 KiB) keep the snapshot count low
+        step = max(self.best // 20, MIB // 4)
+        if current > self.best + step or (self.snapshot is None and current > self.best):
+            self.snapshot = tracemalloc.take_snapshot()
+            self.best = current
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class MemoryProfiler:
+    """Profiles tool calls one at a time and records peaks against budgets."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        top_sites: int = 10,
+        frames: int = 1,
+        interval: float = 0.005,
+        budgets_mib: dict[str, float] | None = None,
+        default_budget_mib: float = 0.0,
+    ):
+        self.path = Path(path)
+        self.top_sites = top_sites
+        self.frames = frames
+        self.interval = interval
+        self.budgets_mib = budgets_mib or {}
+        self.default_budget_mib = default_budget_mib
+        self._lock = asyncio.Lock()
+        self._file: IO[str] | None = None
+
+    def budget_for(self, tool_name: str) -> int | None:
+        """Peak budget of a tool in bytes (None = unbounded)."""
+        mib = self.budgets_mib.get(tool_name, self.default_budget_mib)
+        return int(mib * MIB) if mib > 0 else None
+
+    async def profile(
+        self,
+        tool_name: str,
+        tenant: str | None,
+        call: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Run a tool call under tracemalloc and record its memory profile."""
+        async with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            sampler = _PeakSampler(self.interval, baseline)
+            sampler.start()
+            try:
+                return await call()
+            finally:
+                sampler.stop()
+                sampler.check()
+                current, peak = tracemalloc.get_traced_memory()
+                self._record(tool_name, tenant, before, sampler.snapshot,
+                             peak - baseline, current - baseline)
+
+    def _top_sites(
+        self, before: tracemalloc.Snapshot, at_peak: tracemalloc.Snapshot | None
+    ) -> list[dict]:
+        if at_peak is None:
+            return []
+        sites = []
+        for stat in at_peak.compare_to(before, "lineno"):
+            frame = stat.traceback[0]
+            if stat.size_diff <= 0 or frame.filename in _OWN_FILES:
+                continue
+            sites.append({
+                "site": short_site(frame.filename, frame.lineno),
+                "bytes": stat.size_diff,
+                "count": stat.count_diff,
+            })
+            if len(sites) >= self.top_sites:
+                break
+        return sites
+
+    def _record(
+        self,
+        tool_name: str,
+        tenant: str | None,
+        before: tracemalloc.Snapshot,
+        at_peak: tracemalloc.Snapshot | None,
+        peak: int,
+        net: int,
+    ) -> None:
+        budget = self.budget_for(tool_name)
+        over = budget is not None and peak > budget
+        sites = self._top_sites(before, at_peak)
+        if over:
+            MEMORY_BUDGET_VIOLATIONS.inc(tool=tool_name)
+            top = ", ".join(f"{s['site']} ({s['bytes'] / MIB:.1f} MiB)" for s in sites[:3])
+            logger.warning(
+                f"Tool {tool_name} peaked at {peak / MIB:.1f} MiB "
+                f"(budget {budget / MIB:.1f} MiB); top sites: {top or 'n/a'}"
+            )
+        self._write({
+            "ts": datetime.now().astimezone().isoformat(),
+            "tool": tool_name,
+            "tenant": tenant,
+            "peak_bytes": peak,
+            "net_bytes": net,
+            "budget_bytes": budget,
+            "over_budget": over,
+            "top_sites": sites,
+        })
+
+    def _write(self, line: dict) -> None:
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.path.open("a", buffering=1)
+            self._file.write(json.dumps(line) + "\n")
+        except Exception as e:
+            logger.warning(f"Memory profile write failed: {e}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_profiler: MemoryProfiler | None = None
+
+
+def get_memory_profiler() -> MemoryProfiler | None:
+    """Get the global profiler (None unless memory_profiling_enabled)."""
+    global _profiler
+    if not settings.memory_profiling_enabled:
+        return None
+    if _profiler is None:
+        _profiler = MemoryProfiler(
+            settings.memory_profile_path,
+            top_sites=settings.memory_profile_top_sites,
+            frames=settings.memory_profile_frames,
+            interval=settings.memory_profile_interval,
+            budgets_mib=settings.memory_budgets_mib,
+            default_budget_mib=settings.memory_budget_default_mib,
+        )
+    return _profiler
+
+
+# ============================================================================
+# Summary (CLI)
+# ============================================================================
+
+
+def load_profiles(path: Path) -> list[dict]:
+    """Records of a JSONL memory profile."""
+    with path.open() as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records: list[dict]) -> dict[str, dict]:
+    """Per-tool calls, median / max peak, violations and the worst call's sites."""
+    by_tool: dict[str, list[dict]] = {}
+    for record in records:
+        by_tool.setdefault(record["tool"], []).append(record)
+    summary = {}
+    for tool, calls in by_tool.items():
+        worst = max(calls, key=lambda r: r["peak_bytes"])
+        summary[tool] = {
+            "calls": len(calls),
+            "median_peak_bytes": statistics.median(r["peak_bytes"] for r in calls),
+            "max_peak_bytes": worst["peak_bytes"],
+            "max_net_bytes": max(r["net_bytes"] for r in calls),
+            "violations": sum(1 for r in calls if r["over_budget"]),
+            "top_sites": worst["top_sites"],
+        }
+    return summary
+
+
+def render_summary(summary: dict[str, dict], sites: int = 5) -> str:
+    """Table of tools by max peak, each followed by its worst call's top sites."""
+    lines = [
+        f"{'tool (MiB)':<36} {'calls':>6} {'p50 peak':>9} {'max peak':>9} "
+        f"{'max net':>9} {'over':>5}"
+    ]
+    for tool, s in sorted(summary.items(), key=lambda kv: -kv[1]["max_peak_bytes"]):
+        lines.append(
+            f"{tool:<36} {s['calls']:>6} {s['median_peak_bytes'] / MIB:>9.2f} "
+            f"{s['max_peak_bytes'] / MIB:>9.2f} {s['max_net_bytes'] / MIB:>9.2f} "
+            f"{s['violations']:>5}"
+        )
+        for site in s["top_sites"][:sites]:
+            lines.append(
+                f"    {site['site']:<52} {site['bytes'] / MIB:>9.2f} {site['count']:>9} blocks"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(prog="python -m pfn_mcp.memprofile")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary = commands.add_parser("summary", help="Peak memory and top sites per tool")
+    summary.add_argument("path", type=Path)
+    summary.add_argument("--sites", type=int, default=5, help="Top sites shown per tool")
+
+    args = parser.parse_args(argv)
+    records = load_profiles(args.path)
+    if not records:
+        raise SystemExit("No profiled calls")
+    print(render_summary(summarize(records), args.sites))
+
+
+if __name__ == "__main__":
+    main()
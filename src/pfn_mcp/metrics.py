@@ -0,0 +1,343 @@
+"""Shared metrics registry served at /metrics in the Prometheus text format.
+
+Counters and histograms are fed where the work happens:
+- dispatch layer: tool calls by outcome, tool latency
+- db layer: query latency and errors, pool acquire wait
+- chat loop: turns, LLM stream time, token throughput
+- SSE server: connections
+
+Gauges are read at scrape time from the state the modules already keep
+(pool size / idle / waiters, admission slots and queues, cache size and
+hit counts, read coalescing, replica lag, SSE sessions), so nothing is
+double-counted.
+
+No client library is needed: the registry is a few dicts, and recording is
+a dict update (skipped entirely when metrics_enabled is off).
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from pfn_mcp.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cache hits (~ms) up to long-range analytics (~30s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    @abstractmethod
+    def lines(self) -> list[str]:
+        """Sample lines of the metric in the text exposition format."""
+
+
+class Counter(_Metric):
+    """Monotonic counter per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def lines(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self.series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = self._key(labels)
+        counts, total = self.series.setdefault(
+            key, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def lines(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.labelnames, "le"), (*key, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Gauge (or counter) whose samples are read from a function at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        func: Callable[[], float | dict[LabelValues, float] | None],
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.func = func
+        self.kind = kind
+
+    def lines(self) -> list[str]:
+        samples = self.func()
+        if samples is None:
+            return []
+        if not isinstance(samples, dict):
+            samples = {(): samples}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(samples.items())
+            if value is not None
+        ]
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> Any:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        help_text: str,
+        func: Callable[[], float | dict[LabelValues, float] | None],
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ) -> CallbackMetric:
+        return self._add(CallbackMetric(name, help_text, func, labelnames, kind))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        out = []
+        for metric in self.metrics.values():
+            try:
+                lines = metric.lines()
+            except Exception as e:
+                # A broken gauge must not take the whole scrape down
+                lines = [f"# {metric.name} unavailable: {_escape(str(e))}"]
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Dispatch layer
+TOOL_CALLS = REGISTRY.counter(
+    "pfn_tool_calls_total", "Tool calls by tool and outcome (ok/error)", ("tool", "status")
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "pfn_tool_duration_seconds", "Tool call latency including cache lookups", ("tool",)
+)
+
+# DB layer
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "pfn_db_query_duration_seconds", "SQL round-trip latency including pool wait",
+    ("operation",),
+)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    "pfn_db_query_errors_total", "Failed SQL round trips (incl. timeouts, shed)", ("operation",)
+)
+DB_ACQUIRE_DURATION = REGISTRY.histogram(
+    "pfn_db_pool_acquire_seconds", "Wait for admission and a pool connection", ("pool",)
+)
+
+# Chat loop
+CHAT_TURNS = REGISTRY.counter(
+    "pfn_chat_turns_total", "Chat turns by outcome (ok/error/aborted)", ("status",)
+)
+LLM_STREAM_DURATION = REGISTRY.histogram(
+    "pfn_llm_stream_seconds", "Time streaming one LLM response", ("model",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "pfn_llm_tokens_total", "LLM tokens by direction (input/output)", ("model", "direction")
+)
+
+
+# ============================================================================
+# Scrape-time gauges
+# ============================================================================
+
+
+def _pool_stat(key: str) -> Callable[[], dict[LabelValues, float]]:
+    def read() -> dict[LabelValues, float]:
+        from pfn_mcp import db
+
+        return {(name,): stats[key] for name, stats in db.get_pool_stats()["pools"].items()}
+
+    return read
+
+
+def _replica_lag() -> float | None:
+    from pfn_mcp import db
+
+    return db.get_pool_stats()["replica_lag"]
+
+
+def _coalesced() -> dict[LabelValues, float]:
+    from pfn_mcp import db
+
+    stats = db.get_coalesce_stats()
+    return {("leader",): stats["leaders"], ("follower",): stats["followers"]}
+
+
+def _admission(read: Callable[[dict, str], float]) -> Callable[[], dict | None]:
+    def collect() -> dict[LabelValues, float] | None:
+        from pfn_mcp.admission import get_controllers
+
+        controllers = get_controllers()
+        if not controllers:
+            return None
+        values = {}
+        for pool, controller in controllers.items():
+            snapshot = controller.snapshot()
+            for lane in snapshot["lanes"]:
+                values[(pool, lane)] = read(snapshot, lane)
+        return values
+
+    return collect
+
+
+def _cache(read: Callable[[dict], dict[LabelValues, float] | float]) -> Callable:
+    def collect() -> dict[LabelValues, float] | float:
+        from pfn_mcp.cache import get_cache
+
+        return read(get_cache().snapshot())
+
+    return collect
+
+
+REGISTRY.callback("pfn_db_pool_size", "Open connections per pool", _pool_stat("size"), ("pool",))
+REGISTRY.callback("pfn_db_pool_idle", "Idle connections per pool", _pool_stat("idle"), ("pool",))
+REGISTRY.callback(
+    "pfn_db_pool_waiters", "Callers waiting for admission or a connection",
+    _pool_stat("waiting"), ("pool",),
+)
+REGISTRY.callback(
+    "pfn_db_replica_lag_seconds", "Last measured analytics replica lag", _replica_lag
+)
+REGISTRY.callback(
+    "pfn_db_coalesced_reads_total", "Read queries run (leader) or shared (follower)",
+    _coalesced, ("role",), kind="counter",
+)
+REGISTRY.callback(
+    "pfn_admission_in_use", "Admission slots in use per pool and lane",
+    _admission(lambda s, lane: s["in_use"][lane]), ("pool", "lane"),
+)
+REGISTRY.callback(
+    "pfn_admission_queue_depth", "Queries waiting for an admission slot per pool and lane",
+    _admission(lambda s, lane: s["queue_depth"][lane]), ("pool", "lane"),
+)
+REGISTRY.callback(
+    "pfn_admission_shed_total", "Queries rejected after the admission deadline",
+    _admission(lambda s, lane: s["lanes"][lane]["shed"]), ("pool", "lane"),
+    kind="counter",
+)
+REGISTRY.callback(
+    "pfn_tool_cache_entries", "Entries in the tool-result cache",
+    _cache(lambda s: s["entries"]),
+)
+REGISTRY.callback(
+    "pfn_tool_cache_requests_total", "Tool-result cache lookups by tool and result",
+    _cache(lambda s: {
+        (tool, result): counts[f"{result}s"]
+        for tool, counts in s["by_tool"].items()
+        for result in ("hit", "miss")
+    }),
+    ("tool", "result"), kind="counter",
+)
+REGISTRY.callback(
+    "pfn_tool_cache_hit_ratio", "Tool-result cache hit ratio since start",
+    _cache(lambda s: s["hit_ratio"]),
+)
@@ -0,0 +1,205 @@
+"""Tool-call recorder for workload replay.
+
+When enabled, every call through the dispatch layer (MCP server and chat
+executor alike) is appended to a local JSONL corpus as one line:
+
+    {"ts": ..., "tool": ..., "tenant": ..., "arguments": {...},
+     "latency_ms": ..., "result_bytes": ..., "error": false}
+
+Values that identify a customer (tenant, device, asset, tag, aggregation,
+IP address, device formulas) are replaced by pseudonym markers such as
+{"$anon": "device", "field": "name", "ref": "3f2a9c1b0e41"}. The ref is an
+HMAC of the value, so the same device always gets the same ref and the call
+mix keeps its shape, but nothing readable leaves the server. Periods,
+quantities, buckets, limits and other structural arguments are kept as-is.
+
+benchmarks.replay maps the markers onto entities of another database and
+re-runs the corpus.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import re
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, Any
+
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+ANON_KEY = "$anon"
+
+# Argument name -> (entity kind, field of that entity)
+_IDENTIFYING_PARAMS: dict[str, tuple[str, str]] = {
+    "tenant": ("tenant", "code"),
+    "tenant_name": ("tenant", "name"),
+    "tenant_id": ("tenant", "id"),
+    "device_id": ("device", "id"),
+    "device_ids": ("device", "id"),
+    "device_name": ("device", "name"),
+    "device_names": ("device", "name"),
+    "device": ("device", "name"),
+    "asset_id": ("asset", "id"),
+    "tag_key": ("tag_key", "key"),
+    "aggregation": ("aggregation", "name"),
+    "ip_address": ("ip", "address"),
+}
+
+# Tools whose free-text `search` looks up devices / tag values
+# (quantity searches are catalog terms and are kept)
+_DEVICE_SEARCH_TOOLS = {"list_devices", "resolve_device"}
+_TAG_SEARCH_TOOLS = {"search_tags"}
+
+
+def pseudonym(kind: str, value: Any, salt: str) -> str:
+    """Stable, non-reversible ref for an identifying value."""
+    message = f"{kind}:{str(value).strip().lower()}".encode()
+    return hmac.new(salt.encode(), message, hashlib.sha256).hexdigest()[:12]
+
+
+def _marker(kind: str, field: str, value: Any, salt: str) -> dict:
+    return {ANON_KEY: kind, "field": field, "ref": pseudonym(kind, value, salt)}
+
+
+def _anonymize_value(kind: str, field: str, value: Any, salt: str) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_anonymize_value(kind, field, v, salt) for v in value]
+    return _marker(kind, field, value, salt)
+
+
+def _anonymize_tag(key: Any, value: Any, salt: str) -> dict:
+    """A tag value marker carries its key's ref (values only exist per key)."""
+    marker = _marker("tag_value", "value", value, salt)
+    if key is not None:
+        marker["key"] = pseudonym("tag_key", key, salt)
+    return marker
+
+
+def _anonymize_formula(formula: str, salt: str) -> dict:
+    """Keep a formula's arithmetic, replace its device IDs by refs."""
+    refs: list[str] = []
+
+    def substitute(match: re.Match) -> str:
+        refs.append(pseudonym("device", match.group(), salt))
+        return f"{{{len(refs) - 1}}}"
+
+    template = re.sub(r"\d+", substitute, formula.replace("{", "").replace("}", ""))
+    return {ANON_KEY: "formula", "template": template, "refs": refs}
+
+
+def _anonymize_group(group: Any, salt: str) -> Any:
+    """compare_groups entries: {tag_key, tag_value} or {asset_id} (+ label)."""
+    if not isinstance(group, dict):
+        return group
+    result = {}
+    for key, value in group.items():
+        if key == "tag_value":
+            result[key] = _anonymize_tag(group.get("tag_key"), value, salt)
+        elif key in _IDENTIFYING_PARAMS:
+            result[key] = _anonymize_value(*_IDENTIFYING_PARAMS[key], value, salt)
+        elif key in ("label", "name"):
+            result[key] = pseudonym("label", value, salt)
+        else:
+            result[key] = value
+    return result
+
+
+def anonymize_arguments(tool_name: str, arguments: dict, salt: str) -> dict:
+    """Replace identifying argument values with pseudonym markers."""
+    result: dict[str, Any] = {}
+    for name, value in arguments.items():
+        if value is None:
+            continue
+        if name in _IDENTIFYING_PARAMS:
+            result[name] = _anonymize_value(*_IDENTIFYING_PARAMS[name], value, salt)
+        elif name == "tag_value":
+            result[name] = _anonymize_tag(arguments.get("tag_key"), value, salt)
+        elif name == "tags" and isinstance(value, list):
+            result[name] = [
+                {"key": _marker("tag_key", "key", t.get("key"), salt),
+                 "value": _anonymize_tag(t.get("key"), t.get("value"), salt)}
+                if isinstance(t, dict) else t
+                for t in value
+            ]
+        elif name == "groups" and isinstance(value, list):
+            result[name] = [_anonymize_group(g, salt) for g in value]
+        elif name == "formula" and isinstance(value, str):
+            result[name] = _anonymize_formula(value, salt)
+        elif name == "search" and tool_name in _DEVICE_SEARCH_TOOLS:
+            result[name] = _marker("device", "name", value, salt)
+        elif name == "search" and tool_name in _TAG_SEARCH_TOOLS:
+            result[name] = _marker("tag_value", "value", value, salt)
+        else:
+            result[name] = value
+    return result
+
+
+class ToolCallRecorder:
+    """Appends anonymized tool calls to a JSONL file."""
+
+    def __init__(self, path: str | Path, salt: str = ""):
+        self.path = Path(path)
+        self.salt = salt
+        self._file: IO[str] | None = None
+        self.recorded = 0
+
+    def record(
+        self,
+        tool_name: str,
+        arguments: dict,
+        tenant: str | None,
+        latency_ms: float,
+        result: str | None,
+        error: bool = False,
+    ) -> None:
+        """
+        Append one call (never raises - recording must not break a tool call).
+
+        error is the status run_tool derived (cache.is_error_response), so the
+        corpus counts errors the same way as the cache and metrics.
+        """
+        try:
+            line = {
+                "ts": datetime.now(UTC).isoformat(),
+                "tool": tool_name,
+                "tenant": (
+                    _marker("tenant", "code", tenant, self.salt) if tenant else None
+                ),
+                "arguments": anonymize_arguments(tool_name, arguments, self.salt),
+                "latency_ms": round(latency_ms, 3),
+                "result_bytes": len(result.encode()) if result is not None else 0,
+                "error": error,
+            }
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.path.open("a", buffering=1)
+            self._file.write(json.dumps(line, default=str) + "\n")
+            self.recorded += 1
+        except Exception as e:
+            logger.warning(f"Tool call recording failed: {e}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_recorder: ToolCallRecorder | None = None
+
+
+def get_recorder() -> ToolCallRecorder | None:
+    """Get the global recorder (None unless tool_recording_enabled)."""
+    global _recorder
+    if not settings.tool_recording_enabled:
+        return None
+    if _recorder is None:
+        _recorder = ToolCallRecorder(
+            settings.tool_recording_path, settings.tool_recording_salt
+        )
+        logger.info(f"Recording tool calls to {_recorder.path}")
+    return _recorder
@@ -8,7 +8,7 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
-from pfn_mcp import db
+from pfn_mcp import db, dispatch, services, tracing
 from pfn_mcp.config import settings
 from pfn_mcp.tool_schema import yaml_to_tools
 from pfn_mcp.tools import aggregations as aggregations_tool
@@ -18,9 +18,11 @@ from pfn_mcp.tools import discovery as discovery_tool
 from pfn_mcp.tools import electricity_cost as electricity_cost_tool
 from pfn_mcp.tools import energy_consumption as energy_consumption_tool
 from pfn_mcp.tools import group_telemetry as group_telemetry_tool
+from pfn_mcp.tools import latest_values as latest_values_tool
 from pfn_mcp.tools import peak_analysis as peak_analysis_tool
 from pfn_mcp.tools import quantities as quantities_tool
 from pfn_mcp.tools import telemetry as telemetry_tool
+from pfn_mcp.tools import telemetry_batch as telemetry_batch_tool
 from pfn_mcp.tools import tenants as tenants_tool
 from pfn_mcp.tools import wages_data as wages_data_tool
 
@@ -50,9 +52,22 @@ async def list_tools() -> list[Tool]:
 
 @mcp.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    """Handle tool calls."""
+    """Handle tool calls (via the shared dispatch layer)."""
     logger.info(f"Tool called: {name} with arguments: {arguments}")
 
+    async def call() -> str:
+        contents = await _handle_tool_call(name, arguments)
+        return "".join(c.text for c in contents)
+
+    with tracing.span("mcp.call_tool", tool=name) as span:
+        text = await dispatch.run_tool(name, arguments, arguments.get("tenant"), call)
+        if span and text.startswith("Error"):
+            span.error = text[:200]
+    return [TextContent(type="text", text=text)]
+
+
+async def _handle_tool_call(name: str, arguments: dict) -> list[TextContent]:
+    """Execute a tool and format its response."""
     if name == "list_tenants":
         try:
             results = await tenants_tool.list_tenants()
@@ -251,6 +266,8 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                 start_date=arguments.get("start_date"),
                 end_date=arguments.get("end_date"),
                 bucket=arguments.get("bucket", "auto"),
+                downsample=arguments.get("downsample"),
+                max_points=arguments.get("max_points", telemetry_tool.DEFAULT_MAX_POINTS),
             )
             response = telemetry_tool.format_telemetry_response(result)
             return [TextContent(type="text", text=response)]
@@ -258,6 +275,41 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             logger.error(f"get_device_telemetry failed: {e}")
             return [TextContent(type="text", text=f"Error: {e}")]
 
+    elif name == "get_batch_telemetry":
+        try:
+            result = await telemetry_batch_tool.get_batch_telemetry(
+                device_ids=arguments.get("device_ids"),
+                device_names=arguments.get("device_names"),
+                tenant=arguments.get("tenant"),
+                quantity_ids=arguments.get("quantity_ids"),
+                quantity_searches=arguments.get("quantity_searches"),
+                period=arguments.get("period"),
+                start_date=arguments.get("start_date"),
+                end_date=arguments.get("end_date"),
+                bucket=arguments.get("bucket", "auto"),
+            )
+            response = telemetry_batch_tool.format_batch_telemetry_response(result)
+            return [TextContent(type="text", text=response)]
+        except Exception as e:
+            logger.error(f"get_batch_telemetry failed: {e}")
+            return [TextContent(type="text", text=f"Error: {e}")]
+
+    elif name == "get_latest_values":
+        try:
+            result = await latest_values_tool.get_latest_values(
+                device_ids=arguments.get("device_ids"),
+                device_names=arguments.get("device_names"),
+                tenant=arguments.get("tenant"),
+                quantity_ids=arguments.get("quantity_ids"),
+                quantity_search=arguments.get("quantity_search"),
+                max_age_minutes=arguments.get("max_age_minutes", 60),
+            )
+            response = latest_values_tool.format_latest_values_response(result)
+            return [TextContent(type="text", text=response)]
+        except Exception as e:
+            logger.error(f"get_latest_values failed: {e}")
+            return [TextContent(type="text", text=f"Error: {e}")]
+
     elif name == "get_quantity_stats":
         device_id = arguments.get("device_id")
         if device_id is None:
@@ -547,6 +599,7 @@ async def run_server():
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         logger.warning("Server starting without database - tools will return errors")
+    await services.start_background_services()
 
     async def server_task():
         """Run the MCP server."""
@@ -581,6 +634,8 @@ async def run_server():
                 logger.warning(f"{len(still_pending)} task(s) did not cancel in time")
 
     finally:
+        await services.stop_background_services()
+
         # Close database pool with timeout
         logger.info("Closing database pool...")
         try:
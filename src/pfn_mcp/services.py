@@ -0,0 +1,74 @@
+"""Background services shared by the stdio server, SSE server and chat API.
+
+Each entry point calls start_background_services() after the database pool
+is initialized and stop_background_services() before closing it.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from pfn_mcp.config import settings
+from pfn_mcp.coverage import refresh_coverage_index
+from pfn_mcp.freshness import refresh_last_seen
+from pfn_mcp.last_values import refresh_last_values
+
+logger = logging.getLogger(__name__)
+
+_tasks: list[asyncio.Task] = []
+
+
+async def _run_periodically(
+    name: str,
+    job: Callable[[], Awaitable[object]],
+    interval: float,
+) -> None:
+    """Run a job now and then every `interval` seconds until cancelled."""
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.warning(f"Background job {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def start_background_services() -> None:
+    """Start periodic background jobs (idempotent)."""
+    if _tasks:
+        return
+
+    if settings.coverage_index_enabled:
+        _tasks.append(asyncio.create_task(
+            _run_periodically(
+                "coverage_index", refresh_coverage_index, settings.coverage_reload_interval
+            ),
+            name="coverage_index",
+        ))
+
+    if settings.freshness_tracker_enabled:
+        _tasks.append(asyncio.create_task(
+            _run_periodically(
+                "last_seen", refresh_last_seen, settings.freshness_poll_interval
+            ),
+            name="last_seen",
+        ))
+
+    if settings.last_value_cache_enabled:
+        _tasks.append(asyncio.create_task(
+            _run_periodically(
+                "last_values", refresh_last_values, settings.last_value_poll_interval
+            ),
+            name="last_values",
+        ))
+
+    if _tasks:
+        logger.info(f"Started background services: {', '.join(t.get_name() for t in _tasks)}")
+
+
+async def stop_background_services() -> None:
+    """Cancel background jobs and wait for them to exit."""
+    for task in _tasks:
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
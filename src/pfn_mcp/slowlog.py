@@ -0,0 +1,260 @@
+"""Structured slow-query and slow-tool log (JSON lines).
+
+Every SQL round trip (db layer) and tool call (dispatch layer) is offered
+to the slow log. Calls above slow_query_threshold_ms / slow_tool_threshold_ms
+are always written. Faster calls are sampled adaptively per fingerprint
+(SQL text or tool name): about slow_log_samples_per_minute of each per
+minute, however hot the fingerprint is. Rare queries therefore still show
+up, a query running 100x/s costs a handful of lines, and records are only
+built for calls that get written.
+
+Query lines:
+    {"kind": "query", "fingerprint", "statement", "operation", "duration_ms",
+     "pool", "pool_wait_ms", "coalesced", "rows", "args": {shape}, "tool",
+     "tenant", "slow", "sample_rate", "error"}
+Tool lines:
+    {"kind": "tool", "tool", "tenant", "duration_ms", "result_bytes",
+     "args": {shape}, "slow", "sample_rate", "error"}
+
+Argument shapes describe sizes, not values: number and types of bound
+parameters, list lengths, device count and the length of the time range.
+sample_rate is the probability the line was written with, so 1/sample_rate
+estimates how many calls it stands for.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import IO, Any
+
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 300
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL)
+_STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERALS = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+
+# Tool arguments that list devices
+_DEVICE_LIST_ARGS = ("device_ids", "device_names", "quantity_ids")
+
+
+def fingerprint(query: str) -> tuple[str, str]:
+    """Stable id and normalized text of a statement (comments/literals removed)."""
+    text = _COMMENTS.sub(" ", query)
+    text = _STRING_LITERALS.sub("?", text)
+    text = _NUMBER_LITERALS.sub("?", text)
+    normalized = " ".join(text.split())
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+def _range_days(values: list[datetime | date]) -> float | None:
+    if len(values) < 2:
+        return None
+    values = [
+        v if isinstance(v, datetime) else datetime(v.year, v.month, v.day) for v in values
+    ]
+    values = [v.replace(tzinfo=None) for v in values]
+    return round((max(values) - min(values)).total_seconds() / 86400, 3)
+
+
+def describe_query_args(args: tuple) -> dict:
+    """Shape of bound parameters: count, types, list lengths, range length."""
+    shape: dict[str, Any] = {"count": len(args), "types": [type(a).__name__ for a in args]}
+    lists = [len(a) for a in args if isinstance(a, list | tuple)]
+    if lists:
+        shape["list_lengths"] = lists
+        shape["device_count"] = max(
+            (len(a) for a in args if isinstance(a, list | tuple) and a and isinstance(a[0], int)),
+            default=None,
+        )
+    days = _range_days([a for a in args if isinstance(a, datetime | date)])
+    if days is not None:
+        shape["range_days"] = days
+    return shape
+
+
+def describe_tool_args(arguments: dict) -> dict:
+    """Shape of tool arguments: which were given, device count, period / range."""
+    shape: dict[str, Any] = {"keys": sorted(k for k, v in arguments.items() if v is not None)}
+    counts = [
+        len(arguments[k]) for k in _DEVICE_LIST_ARGS if isinstance(arguments.get(k), list)
+    ]
+    if counts:
+        shape["device_count"] = max(counts)
+    if isinstance(arguments.get("tags"), list):
+        shape["tag_count"] = len(arguments["tags"])
+    for key in ("period", "bucket", "breakdown", "output"):
+        if isinstance(arguments.get(key), str):
+            shape[key] = arguments[key]
+    dates = []
+    for key in ("start_date", "end_date"):
+        try:
+            dates.append(date.fromisoformat(str(arguments[key])[:10]))
+        except (KeyError, ValueError):
+            pass
+    days = _range_days(dates)
+    if days is not None:
+        shape["range_days"] = days
+    return shape
+
+
+class AdaptiveSampler:
+    """
+    Per-key sampling that targets a fixed number of samples per minute.
+
+    A key's rate for the next window is derived from its call count in the
+    previous one. Within a window the rate also decays with the running
+    count, so a key that suddenly gets hot is throttled right away.
+    """
+
+    def __init__(self, per_minute: float, window: float = 60.0):
+        self.budget = per_minute * window / 60.0
+        self.window = window
+        self._window_start = time.monotonic()
+        self._counts: dict[str, int] = {}
+        self._rates: dict[str, float] = {}
+
+    def rate(self, key: str) -> float:
+        """Sampling probability for one more call of key (and count it)."""
+        if self.budget <= 0:
+            return 0.0
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._rates = {k: min(1.0, self.budget / c) for k, c in self._counts.items()}
+            self._counts = {}
+            self._window_start = now
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        return min(self._rates.get(key, 1.0), self.budget / count, 1.0)
+
+    def sample(self, key: str) -> float | None:
+        """The sample rate if this call should be logged, else None."""
+        rate = self.rate(key)
+        return rate if rate > 0 and random.random() < rate else None
+
+
+class SlowLog:
+    """Writes slow and sampled calls as JSON lines."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        query_threshold_ms: float,
+        tool_threshold_ms: float,
+        samples_per_minute: float,
+    ):
+        self.path = Path(path)
+        self.query_threshold_ms = query_threshold_ms
+        self.tool_threshold_ms = tool_threshold_ms
+        self.sampler = AdaptiveSampler(samples_per_minute)
+        self._file: IO[str] | None = None
+
+    def _decide(self, key: str, duration_ms: float, threshold_ms: float) -> float | None:
+        if duration_ms >= threshold_ms:
+            return 1.0
+        return self.sampler.sample(key)
+
+    def _write(self, line: dict) -> None:
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.path.open("a", buffering=1)
+            self._file.write(json.dumps(line, default=str) + "\n")
+        except Exception as e:
+            logger.warning(f"Slow log write failed: {e}")
+
+    def query(
+        self,
+        operation: str,
+        query: str,
+        args: tuple,
+        duration_ms: float,
+        rows: int | None = None,
+        pool: str | None = None,
+        pool_wait_ms: float | None = None,
+        tool: str | None = None,
+        tenant: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Offer one SQL round trip (errors are always written)."""
+        qid, normalized = fingerprint(query)
+        slow = duration_ms >= self.query_threshold_ms
+        rate = self._decide(qid, duration_ms, self.query_threshold_ms)
+        if rate is None and not error:
+            return
+        self._write({
+            "ts": datetime.now().astimezone().isoformat(),
+            "kind": "query",
+            "fingerprint": qid,
+            "statement": normalized[:MAX_STATEMENT_LENGTH],
+            "operation": operation,
+            "duration_ms": round(duration_ms, 3),
+            "pool": pool,
+            "pool_wait_ms": round(pool_wait_ms, 3) if pool_wait_ms is not None else None,
+            "coalesced": pool is None and not error,
+            "rows": rows,
+            "args": describe_query_args(args),
+            "tool": tool,
+            "tenant": tenant,
+            "slow": slow,
+            "sample_rate": round(rate or 1.0, 4),
+            "error": error,
+        })
+
+    def tool(
+        self,
+        tool_name: str,
+        arguments: dict,
+        tenant: str | None,
+        duration_ms: float,
+        result: str | None,
+        error: bool = False,
+    ) -> None:
+        """Offer one tool call (errors are always written)."""
+        slow = duration_ms >= self.tool_threshold_ms
+        rate = self._decide(f"tool:{tool_name}", duration_ms, self.tool_threshold_ms)
+        if rate is None and not error:
+            return
+        self._write({
+            "ts": datetime.now().astimezone().isoformat(),
+            "kind": "tool",
+            "tool": tool_name,
+            "tenant": tenant,
+            "duration_ms": round(duration_ms, 3),
+            "result_bytes": len(result.encode()) if result is not None else 0,
+            "args": describe_tool_args(arguments),
+            "slow": slow,
+            "sample_rate": round(rate or 1.0, 4),
+            "error": error,
+        })
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_slow_log: SlowLog | None = None
+
+
+def get_slow_log() -> SlowLog | None:
+    """Get the global slow log (None unless slow_log_enabled)."""
+    global _slow_log
+    if not settings.slow_log_enabled:
+        return None
+    if _slow_log is None:
+        _slow_log = SlowLog(
+            settings.slow_log_path,
+            settings.slow_query_threshold_ms,
+            settings.slow_tool_threshold_ms,
+            settings.slow_log_samples_per_minute,
+        )
+    return _slow_log
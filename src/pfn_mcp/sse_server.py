@@ -3,6 +3,7 @@
   # It should only be accessible from the internal Docker network (Open WebUI).
 
 import logging
+import re
 from contextlib import asynccontextmanager
 from urllib.parse import parse_qs
 from uuid import UUID
@@ -11,10 +12,11 @@ import uvicorn
 from mcp.server.sse import SseServerTransport
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from starlette.routing import Mount, Route
 
-from pfn_mcp import db
+from pfn_mcp import db, metrics, services
+from pfn_mcp.admission import get_controllers
 from pfn_mcp.config import settings
 from pfn_mcp.server import mcp
 
@@ -24,18 +26,56 @@ logger = logging.getLogger(__name__)
 # SSE transport with message endpoint
 sse_transport = SseServerTransport("/messages/")
 
+SSE_CONNECTIONS = metrics.REGISTRY.counter(
+    "pfn_sse_connections_total", "MCP SSE connections opened"
+)
+
+# Live SSE sessions, tracked here instead of through the transport's private
+# state: registered when the endpoint event carrying the session_id is sent,
+# dropped when the client disconnects or the connection ends
+_open_sessions: set[UUID] = set()
+_ENDPOINT_SESSION_ID = re.compile(rb"session_id=([0-9a-fA-F]{32})")
+
+metrics.REGISTRY.callback(
+    "pfn_sse_sessions", "Open MCP SSE sessions", lambda: len(_open_sessions)
+)
+
 
 async def handle_sse(scope, receive, send):
     """Handle SSE connection for MCP communication (raw ASGI)."""
     # Only handle GET requests for SSE stream
     if scope["method"] == "GET":
         logger.info("New SSE connection")
-        async with sse_transport.connect_sse(scope, receive, send) as streams:
-            await mcp.run(
-                streams[0],
-                streams[1],
-                mcp.create_initialization_options(),
-            )
+        SSE_CONNECTIONS.inc()
+        session_id: UUID | None = None
+
+        async def tracking_send(message):
+            nonlocal session_id
+            if session_id is None and message["type"] == "http.response.body":
+                match = _ENDPOINT_SESSION_ID.search(message.get("body", b""))
+                if match:
+                    session_id = UUID(hex=match.group(1).decode())
+                    _open_sessions.add(session_id)
+            await send(message)
+
+        async def tracking_receive():
+            message = await receive()
+            if message["type"] == "http.disconnect" and session_id is not None:
+                _open_sessions.discard(session_id)
+            return message
+
+        try:
+            async with sse_transport.connect_sse(
+                scope, tracking_receive, tracking_send
+            ) as streams:
+                await mcp.run(
+                    streams[0],
+                    streams[1],
+                    mcp.create_initialization_options(),
+                )
+        finally:
+            if session_id is not None:
+                _open_sessions.discard(session_id)
     else:
         # Return 405 Method Not Allowed for non-GET
         await send({
@@ -87,10 +127,10 @@ async def handle_messages(scope, receive, send):
             })
             return
 
-        # Check if session exists and is still alive
-        writer = sse_transport._read_stream_writers.get(session_id)
-        if writer is None:
-            logger.warning(f"Session not found: {session_id}")
+        # Check the session is still open (unknown, disconnected or ended
+        # sessions are rejected here; the transport cleans up its own state)
+        if session_id not in _open_sessions:
+            logger.warning(f"Session not found or closed: {session_id}")
             await send({
                 "type": "http.response.start",
                 "status": 404,
@@ -102,23 +142,6 @@ async def handle_messages(scope, receive, send):
             })
             return
 
-        # Check if the stream writer is closed (stale session)
-        # anyio MemoryObjectSendStream has _closed attribute
-        if getattr(writer, "_closed", False):
-            logger.warning(f"Session stream closed (stale): {session_id}")
-            # Clean up the stale session
-            del sse_transport._read_stream_writers[session_id]
-            await send({
-                "type": "http.response.start",
-                "status": 404,
-                "headers": [[b"content-type", b"text/plain"]],
-            })
-            await send({
-                "type": "http.response.body",
-                "body": b"Session expired. Please reconnect.",
-            })
-            return
-
         # Session is valid, delegate to transport
         await sse_transport.handle_post_message(scope, receive, send)
     else:
@@ -137,14 +160,26 @@ async def health_check(request: Request):
     """Health check endpoint for monitoring."""
     db_ok = await db.check_connection()
     status = "healthy" if db_ok else "degraded"
+    controllers = get_controllers()
     return JSONResponse({
         "status": status,
         "server": settings.server_name,
         "version": settings.server_version,
         "database": "connected" if db_ok else "disconnected",
+        "admission": (
+            {pool: c.snapshot() for pool, c in controllers.items()} if controllers else None
+        ),
+        "pools": db.get_pool_stats(),
     }, status_code=200 if db_ok else 503)
 
 
+async def metrics_endpoint(request: Request):
+    """Prometheus scrape endpoint."""
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 async def root(request: Request):
     """Root endpoint with server info."""
     return JSONResponse({
@@ -154,6 +189,7 @@ async def root(request: Request):
             "sse": "/sse",
             "messages": "/sse/messages/",
             "health": "/health",
+            "metrics": "/metrics",
         },
     })
 
@@ -172,10 +208,12 @@ async def lifespan(app: Starlette):
             logger.warning("Database connection check failed")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
+    await services.start_background_services()
 
     yield
 
     # Cleanup
+    await services.stop_background_services()
     await db.close_pool()
     logger.info("Server shutdown complete")
 
@@ -185,6 +223,7 @@ app = Starlette(
     routes=[
         Route("/", endpoint=root, methods=["GET"]),
         Route("/health", endpoint=health_check, methods=["GET"]),
+        Route("/metrics", endpoint=metrics_endpoint, methods=["GET"]),
         Mount("/sse/messages", app=handle_messages),
         Mount("/sse", app=handle_sse),
     ],
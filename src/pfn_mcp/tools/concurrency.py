@@ -0,0 +1,46 @@
+"""Run independent tool sub-queries concurrently.
+
+Composite tools often await several queries that share nothing (a ranking
+and its totals, peaks and overall stats, ...). Each db.fetch_* call acquires
+its own pool connection, so running them together makes the tool's latency
+the slowest query instead of the sum.
+"""
+
+import asyncio
+from collections.abc import Awaitable
+from typing import Any
+
+# Concurrent queries per tool call (each holds one pool connection)
+MAX_CONCURRENT_QUERIES = 4
+
+
+async def gather_queries(
+    *aws: Awaitable[Any],
+    limit: int = MAX_CONCURRENT_QUERIES,
+) -> list[Any]:
+    """
+    Await independent queries concurrently, at most `limit` at a time.
+
+    Structured: if any query fails, the others are cancelled and the first
+    error is raised as-is (not wrapped in an ExceptionGroup), so callers keep
+    their existing error handling.
+
+    Args:
+        *aws: Coroutines to run
+        limit: Maximum number running at once
+
+    Returns:
+        Results in the order of the arguments
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await aw
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(run(aw)) for aw in aws]
+    except BaseExceptionGroup as eg:
+        raise eg.exceptions[0] from None
+    return [task.result() for task in tasks]
@@ -0,0 +1,123 @@
+"""Pre-execution cost guard for telemetry reads.
+
+Some requests read far more rows than they can usefully return, e.g.
+get_device_telemetry(bucket="1min") over two weeks, or a group time series
+over a year for a 200-device tag. They run until db_query_timeout while
+holding a pool slot. Before such a read runs, estimate_rows() estimates how
+many rows it would scan, using the coverage catalog: the 15-min buckets
+stored per device/quantity and the range they span. When a read is over
+budget, the tool picks a cheaper plan instead:
+- device telemetry: the next coarser bucket (raw 1-min -> 15-min aggregate
+  -> 1 hour -> ...)
+- group time series: the most recent part of the range that fits, with a
+  note (fit_range)
+
+Without the coverage index, the estimate assumes one row per interval per
+device. That is an upper bound for the 15-min aggregate.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from pfn_mcp.config import settings
+from pfn_mcp.coverage import get_coverage_index
+
+AGG_STEP = timedelta(minutes=15)  # telemetry_15min_agg
+RAW_STEP = timedelta(minutes=1)  # telemetry_data
+
+
+@dataclass
+class CostEstimate:
+    """Estimated rows scanned by a read."""
+
+    rows: int
+    basis: str  # "coverage" (catalog row counts) or "nominal" (one row per step)
+
+
+def estimate_rows(
+    device_ids: list[int],
+    quantity_id: int,
+    start: datetime,
+    end: datetime,
+    step: timedelta = AGG_STEP,
+) -> CostEstimate:
+    """
+    Estimate rows a read of one quantity on some devices scans.
+
+    Args:
+        device_ids: Devices read
+        quantity_id: Quantity read
+        start: Range start (naive UTC)
+        end: Range end (naive UTC, exclusive)
+        step: Row interval of the source table (AGG_STEP or RAW_STEP)
+
+    Returns:
+        CostEstimate. Each device's catalog density (share of 15-min buckets
+        present) is applied to the part of the range it has data for.
+    """
+    index = get_coverage_index()
+    if index is None:
+        return CostEstimate(int(len(device_ids) * ((end - start) / step)), "nominal")
+
+    rows_per_bucket = AGG_STEP / step
+    total = 0.0
+    for device_id in device_ids:
+        for entry in index.entries_for_device(device_id, [quantity_id]):
+            covered_end = entry.last_bucket + AGG_STEP
+            overlap = min(end, covered_end) - max(start, entry.first_bucket)
+            if overlap <= timedelta(0):
+                continue
+            density = min(1.0, entry.row_count / ((covered_end - entry.first_bucket) / AGG_STEP))
+            total += overlap / AGG_STEP * density * rows_per_bucket
+    return CostEstimate(int(total), "coverage")
+
+
+def bucket_count(start: datetime, end: datetime, bucket: timedelta) -> int:
+    """Number of time buckets a range spans."""
+    return math.ceil((end - start) / bucket)
+
+
+def within_budget(scanned: int, fetched: int | None = None) -> bool:
+    """Check estimated rows scanned (and fetched into the tool) against the budget."""
+    if scanned > settings.cost_guard_max_scan_rows:
+        return False
+    return fetched is None or fetched <= settings.cost_guard_max_result_rows
+
+
+def fit_range(
+    device_ids: list[int],
+    quantity_id: int,
+    start: datetime,
+    end: datetime,
+) -> tuple[datetime, dict | None]:
+    """
+    Shorten a 15-min aggregate read to the most recent part that fits the budget.
+
+    Returns:
+        (start, note): the original start and None when the read fits,
+        else a later day-aligned start and a note for the response
+    """
+    estimate = estimate_rows(device_ids, quantity_id, start, end)
+    if within_budget(estimate.rows):
+        return start, None
+
+    budget = settings.cost_guard_max_scan_rows
+    kept = (end - start) * (budget / estimate.rows)
+    # Round the new start up to midnight so the shorter range stays under budget
+    new_start = end - kept
+    day_start = new_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if day_start < new_start:
+        day_start += timedelta(days=1)
+    new_start = max(start, min(day_start, end - timedelta(days=1)))
+
+    return new_start, {
+        "type": "cost_guard",
+        "estimated_rows": estimate.rows,
+        "requested_start": start.isoformat(),
+        "message": (
+            f"The full period would read ~{estimate.rows:,} rows "
+            f"(limit {budget:,}), so only {new_start:%Y-%m-%d} onward is shown. "
+            "Narrow the group or request earlier periods separately."
+        ),
+    }
@@ -3,10 +3,48 @@
 import logging
 
 from pfn_mcp import db
-from pfn_mcp.tools.quantities import expand_quantity_aliases
+from pfn_mcp.coverage import get_coverage_index
+from pfn_mcp.tools.quantities import expand_quantity_aliases, fetch_quantities_by_ids
 
 logger = logging.getLogger(__name__)
 
+# Partially available quantities listed in the formatted comparison
+MAX_PARTIAL_LINES = 50
+
+DEVICES_BY_ID_QUERY = """
+    SELECT id, display_name, device_code
+    FROM devices
+    WHERE id = ANY($1::int[])
+"""
+
+# Best fuzzy match per name (same ranking as list_device_quantities), one query
+DEVICES_BY_NAME_QUERY = """
+    SELECT d.id, d.display_name, d.device_code
+    FROM unnest($1::text[]) WITH ORDINALITY AS n(name, ord)
+    CROSS JOIN LATERAL (
+        SELECT id, display_name, device_code
+        FROM devices
+        WHERE is_active = true
+          AND LOWER(display_name) LIKE '%' || LOWER(n.name) || '%'
+        ORDER BY
+            CASE
+                WHEN LOWER(display_name) = LOWER(n.name) THEN 0
+                WHEN LOWER(display_name) LIKE LOWER(n.name) || '%' THEN 1
+                ELSE 2
+            END
+        LIMIT 1
+    ) d
+    ORDER BY n.ord
+"""
+
+# Quantities per device for all compared devices, one grouped query
+MEMBERSHIP_QUERY = """
+    SELECT device_id, array_agg(DISTINCT quantity_id) as quantity_ids
+    FROM telemetry_15min_agg
+    WHERE device_id = ANY($1::int[])
+    GROUP BY device_id
+"""
+
 
 async def list_device_quantities(
     device_id: int | None = None,
@@ -55,39 +93,45 @@ async def list_device_quantities(
         if not device:
             return {"error": f"Device ID not found: {device_id}"}
 
-    # Build quantity filter
-    quantity_conditions = ["1=1"]
-    params = [device_id]
-    param_idx = 2
-
-    if search:
-        alias_patterns = expand_quantity_aliases(search)
-        pattern_conditions = []
-        for pattern in alias_patterns:
-            pattern_conditions.append(f"q.quantity_code ILIKE ${param_idx}")
-            params.append(pattern)
-            param_idx += 1
-        quantity_conditions.append(f"({' OR '.join(pattern_conditions)})")
-
-    where_clause = " AND ".join(quantity_conditions)
-
-    # Query available quantities for this device
-    query = f"""
-        SELECT DISTINCT
-            q.id,
-            q.quantity_code,
-            q.quantity_name,
-            q.unit,
-            q.category,
-            q.aggregation_method
-        FROM telemetry_15min_agg t
-        JOIN quantities q ON t.quantity_id = q.id
-        WHERE t.device_id = $1
-          AND {where_clause}
-        ORDER BY q.category, q.quantity_name
-    """
+    index = get_coverage_index()
+    if index is not None:
+        quantities = await fetch_quantities_by_ids(
+            index.quantity_ids_for_device(device_id), search=search
+        )
+    else:
+        # Build quantity filter
+        quantity_conditions = ["1=1"]
+        params = [device_id]
+        param_idx = 2
+
+        if search:
+            alias_patterns = expand_quantity_aliases(search)
+            pattern_conditions = []
+            for pattern in alias_patterns:
+                pattern_conditions.append(f"q.quantity_code ILIKE ${param_idx}")
+                params.append(pattern)
+                param_idx += 1
+            quantity_conditions.append(f"({' OR '.join(pattern_conditions)})")
+
+        where_clause = " AND ".join(quantity_conditions)
+
+        # Query available quantities for this device
+        query = f"""
+            SELECT DISTINCT
+                q.id,
+                q.quantity_code,
+                q.quantity_name,
+                q.unit,
+                q.category,
+                q.aggregation_method
+            FROM telemetry_15min_agg t
+            JOIN quantities q ON t.quantity_id = q.id
+            WHERE t.device_id = $1
+              AND {where_clause}
+            ORDER BY q.category, q.quantity_name
+        """
 
-    quantities = await db.fetch_all(query, *params)
+        quantities = await db.fetch_all(query, *params)
 
     return {
         "device": {
@@ -100,6 +144,51 @@ async def list_device_quantities(
     }
 
 
+async def _resolve_compare_devices(
+    device_ids: list[int] | None,
+    device_names: list[str] | None,
+) -> list[dict]:
+    """Resolve device IDs and names with one query each (deduplicated, in order)."""
+    devices = []
+    if device_ids:
+        rows = await db.fetch_all(DEVICES_BY_ID_QUERY, list(device_ids))
+        by_id = {row["id"]: row for row in rows}
+        devices.extend(by_id[did] for did in device_ids if did in by_id)
+    if device_names:
+        devices.extend(await db.fetch_all(DEVICES_BY_NAME_QUERY, list(device_names)))
+
+    seen: set[int] = set()
+    unique = []
+    for device in devices:
+        if device["id"] not in seen:
+            seen.add(device["id"])
+            unique.append(device)
+    return unique
+
+
+def quantity_bitmaps(
+    device_ids: list[int],
+    quantities_by_device: dict[int, set[int]],
+) -> dict[int, int]:
+    """
+    Build a quantity -> device membership bitmap.
+
+    Bit i is set when device_ids[i] reports the quantity, so a quantity is
+    shared by all devices when its bitmap equals (1 << len(device_ids)) - 1
+    and unique to one device when exactly one bit is set.
+    """
+    bitmaps: dict[int, int] = {}
+    for i, device_id in enumerate(device_ids):
+        for quantity_id in quantities_by_device.get(device_id, ()):
+            bitmaps[quantity_id] = bitmaps.get(quantity_id, 0) | (1 << i)
+    return bitmaps
+
+
+def format_bitmap(bitmap: int, device_count: int) -> str:
+    """Render a bitmap as one character per device, in device order (1 = has data)."""
+    return "".join("1" if bitmap >> i & 1 else "0" for i in range(device_count))
+
+
 async def compare_device_quantities(
     device_ids: list[int] | None = None,
     device_names: list[str] | None = None,
@@ -108,128 +197,50 @@ async def compare_device_quantities(
     """
     Compare quantities available across multiple devices.
 
+    Devices are resolved in bulk, device/quantity membership comes from the
+    coverage index (or one grouped query), and shared/unique quantities are
+    derived from per-quantity membership bitmaps.
+
     Args:
         device_ids: List of device IDs to compare
         device_names: List of device names (fuzzy search)
         search: Optional filter for quantity type (uses semantic aliases)
 
     Returns:
-        Dictionary with devices info, shared quantities, and per-device quantities
+        Dictionary with devices info, shared quantities, per-device quantities
+        and the membership bitmap of quantities not shared by all devices
     """
-    resolved_devices = []
-
-    # Resolve device IDs
-    if device_ids:
-        for did in device_ids:
-            device = await db.fetch_one(
-                "SELECT id, display_name, device_code FROM devices WHERE id = $1",
-                did,
-            )
-            if device:
-                resolved_devices.append(device)
-
-    if device_names:
-        for name in device_names:
-            device_query = """
-                SELECT id, display_name, device_code
-                FROM devices
-                WHERE is_active = true
-                  AND LOWER(display_name) LIKE LOWER($1)
-                ORDER BY
-                    CASE
-                        WHEN LOWER(display_name) = LOWER($2) THEN 0
-                        WHEN LOWER(display_name) LIKE LOWER($2) || '%' THEN 1
-                        ELSE 2
-                    END
-                LIMIT 1
-            """
-            device = await db.fetch_one(device_query, f"%{name}%", name)
-            if device:
-                # Avoid duplicates
-                if not any(d["id"] == device["id"] for d in resolved_devices):
-                    resolved_devices.append(device)
-
+    resolved_devices = await _resolve_compare_devices(device_ids, device_names)
     if len(resolved_devices) < 2:
         return {"error": "At least 2 devices are required for comparison"}
 
     device_ids_resolved = [d["id"] for d in resolved_devices]
 
-    # Build quantity filter
-    quantity_conditions = ["1=1"]
-    base_params = []
-    param_offset = len(device_ids_resolved) + 1
-
-    if search:
-        alias_patterns = expand_quantity_aliases(search)
-        pattern_conditions = []
-        for pattern in alias_patterns:
-            pattern_conditions.append(f"q.quantity_code ILIKE ${param_offset}")
-            base_params.append(pattern)
-            param_offset += 1
-        quantity_conditions.append(f"({' OR '.join(pattern_conditions)})")
-
-    where_clause = " AND ".join(quantity_conditions)
-
-    # Build device ID placeholders
-    device_placeholders = ", ".join(f"${i+1}" for i in range(len(device_ids_resolved)))
-
-    # Query quantities shared by ALL devices
-    shared_query = f"""
-        SELECT
-            q.id,
-            q.quantity_code,
-            q.quantity_name,
-            q.unit,
-            q.category
-        FROM quantities q
-        WHERE q.id IN (
-            SELECT quantity_id
-            FROM telemetry_15min_agg
-            WHERE device_id IN ({device_placeholders})
-            GROUP BY quantity_id
-            HAVING COUNT(DISTINCT device_id) = {len(device_ids_resolved)}
-        )
-        AND {where_clause}
-        ORDER BY q.category, q.quantity_name
-    """
+    index = get_coverage_index()
+    if index is not None:
+        quantities_by_device = {
+            did: set(index.quantity_ids_for_device(did)) for did in device_ids_resolved
+        }
+    else:
+        rows = await db.fetch_all(MEMBERSHIP_QUERY, device_ids_resolved)
+        quantities_by_device = {row["device_id"]: set(row["quantity_ids"]) for row in rows}
 
-    shared_quantities = await db.fetch_all(
-        shared_query, *device_ids_resolved, *base_params
-    )
+    bitmaps = quantity_bitmaps(device_ids_resolved, quantities_by_device)
+    # Metadata for every quantity seen (also applies the search filter)
+    quantities = await fetch_quantities_by_ids(sorted(bitmaps), search=search)
 
-    # Query per-device quantities
-    per_device = {}
-    # Adjust where clause for per-device query (params start at $2)
-    if base_params:
-        per_device_where = where_clause
-        for i in range(len(base_params)):
-            per_device_where = per_device_where.replace(
-                f"${param_offset - len(base_params) + i}", f"${i + 2}"
-            )
-    else:
-        per_device_where = where_clause
+    all_devices = (1 << len(device_ids_resolved)) - 1
+    shared_quantities = [q for q in quantities if bitmaps[q["id"]] == all_devices]
 
-    for device in resolved_devices:
-        device_query = f"""
-            SELECT DISTINCT
-                q.id,
-                q.quantity_code,
-                q.quantity_name,
-                q.category
-            FROM telemetry_15min_agg t
-            JOIN quantities q ON t.quantity_id = q.id
-            WHERE t.device_id = $1
-              AND {per_device_where}
-            ORDER BY q.category, q.quantity_name
-        """
-        if base_params:
-            quantities = await db.fetch_all(device_query, device["id"], *base_params)
-        else:
-            quantities = await db.fetch_all(device_query, device["id"])
+    per_device = {}
+    for i, device in enumerate(resolved_devices):
+        bit = 1 << i
+        device_quantities = [q for q in quantities if bitmaps[q["id"]] & bit]
         per_device[device["display_name"]] = {
             "device_id": device["id"],
-            "quantities": quantities,
-            "count": len(quantities),
+            "quantities": device_quantities,
+            "count": len(device_quantities),
+            "unique_quantities": [q for q in device_quantities if bitmaps[q["id"]] == bit],
         }
 
     return {
@@ -240,6 +251,15 @@ async def compare_device_quantities(
         "shared_quantities": shared_quantities,
         "shared_count": len(shared_quantities),
         "per_device": per_device,
+        "partial_quantities": [
+            {
+                "id": q["id"],
+                "quantity_name": q["quantity_name"],
+                "bitmap": format_bitmap(bitmaps[q["id"]], len(device_ids_resolved)),
+            }
+            for q in quantities
+            if bitmaps[q["id"]] != all_devices
+        ],
     }
 
 
@@ -320,6 +340,22 @@ def format_compare_quantities_response(result: dict) -> str:
 
     lines.append("## Per-Device Summary")
     for name, data in result["per_device"].items():
-        lines.append(f"- **{name}**: {data['count']} quantities")
+        unique = data.get("unique_quantities", [])
+        unique_note = f" ({len(unique)} only on this device)" if unique else ""
+        lines.append(f"- **{name}**: {data['count']} quantities{unique_note}")
+
+    partial = result.get("partial_quantities", [])
+    if partial:
+        legend = ", ".join(f"{i + 1}={d['name']}" for i, d in enumerate(devices))
+        lines.extend([
+            "",
+            f"## Partially Available Quantities ({len(partial)})",
+            f"Device order: {legend} (1 = has data)",
+            "",
+        ])
+        for q in partial[:MAX_PARTIAL_LINES]:
+            lines.append(f"- `{q['bitmap']}` {q['quantity_name']} (ID: {q['id']})")
+        if len(partial) > MAX_PARTIAL_LINES:
+            lines.append(f"  ... ({len(partial) - MAX_PARTIAL_LINES} more) ...")
 
     return "\n".join(lines)
@@ -2,16 +2,60 @@
 
 import json
 import logging
-from datetime import UTC, datetime
+from datetime import datetime
 
 from pfn_mcp import db
+from pfn_mcp.coverage import CoverageIndex, get_coverage_index
+from pfn_mcp.freshness import classify_freshness, get_last_seen_tracker
+from pfn_mcp.tools.concurrency import gather_queries
 from pfn_mcp.tools.datetime_utils import format_display_datetime
-from pfn_mcp.tools.quantities import expand_quantity_aliases
+from pfn_mcp.tools.periods import utc_now_naive
+from pfn_mcp.tools.quantities import expand_quantity_aliases, fetch_quantities_by_ids
 from pfn_mcp.tools.resolve import resolve_tenant
 
 logger = logging.getLogger(__name__)
 
 
+async def _data_range_from_index(
+    index: CoverageIndex,
+    device_id: int,
+    quantity_id: int | None,
+    quantity_search: str | None,
+) -> tuple[dict, list[dict]]:
+    """Build get_device_data_range's overall/breakdown rows from the coverage index."""
+    quantities = await fetch_quantities_by_ids(
+        index.quantity_ids_for_device(device_id), quantity_id, quantity_search
+    )
+    entries = {
+        e.quantity_id: e
+        for e in index.entries_for_device(device_id, [q["id"] for q in quantities])
+    }
+    coverage = index.device_range(device_id, list(entries))
+
+    overall = {
+        "earliest": coverage.earliest,
+        "latest": coverage.latest,
+        "quantity_count": coverage.quantity_count,
+        "record_count": coverage.row_count,
+    }
+    breakdown = [
+        {
+            "quantity_id": q["id"],
+            "quantity_code": q["quantity_code"],
+            "quantity_name": q["quantity_name"],
+            "unit": q["unit"],
+            "earliest": entries[q["id"]].first_bucket,
+            "latest": entries[q["id"]].last_bucket,
+            "record_count": entries[q["id"]].row_count,
+        }
+        for q in quantities
+        if q["id"] in entries
+    ]
+    # Top 10 by record count, as in the SQL breakdown
+    breakdown.sort(key=lambda r: r["record_count"], reverse=True)
+    return overall, breakdown[:10]
+
+
 async def get_device_data_range(
     device_id: int | None = None,
     device_name: str | None = None,
@@ -60,41 +104,67 @@ async def get_device_data_range(
         if not device:
             return {"error": f"Device ID not found: {device_id}"}
 
-    # Build quantity filter
-    quantity_conditions = []
-    params = [device_id]
-    param_idx = 2
-
-    if quantity_id:
-        quantity_conditions.append(f"t.quantity_id = ${param_idx}")
-        params.append(quantity_id)
-        param_idx += 1
-    elif quantity_search:
-        alias_patterns = expand_quantity_aliases(quantity_search)
-        pattern_conds = []
-        for pattern in alias_patterns:
-            pattern_conds.append(f"q.quantity_code ILIKE ${param_idx}")
-            params.append(pattern)
+    index = get_coverage_index()
+    if index is not None:
+        overall, breakdown = await _data_range_from_index(
+            index, device_id, quantity_id, quantity_search
+        )
+    else:
+        # Build quantity filter
+        quantity_conditions = []
+        params = [device_id]
+        param_idx = 2
+
+        if quantity_id:
+            quantity_conditions.append(f"t.quantity_id = ${param_idx}")
+            params.append(quantity_id)
             param_idx += 1
-        quantity_conditions.append(f"({' OR '.join(pattern_conds)})")
+        elif quantity_search:
+            alias_patterns = expand_quantity_aliases(quantity_search)
+            pattern_conds = []
+            for pattern in alias_patterns:
+                pattern_conds.append(f"q.quantity_code ILIKE ${param_idx}")
+                params.append(pattern)
+                param_idx += 1
+            quantity_conditions.append(f"({' OR '.join(pattern_conds)})")
+
+        quantity_where = ""
+        if quantity_conditions:
+            quantity_where = "AND " + " AND ".join(quantity_conditions)
+
+        # Get overall data range
+        range_query = f"""
+            SELECT
+                MIN(t.bucket) as earliest,
+                MAX(t.bucket) as latest,
+                COUNT(DISTINCT t.quantity_id) as quantity_count,
+                COUNT(*) as record_count
+            FROM telemetry_15min_agg t
+            JOIN quantities q ON t.quantity_id = q.id
+            WHERE t.device_id = $1
+            {quantity_where}
+        """
+        overall = await db.fetch_one(range_query, *params)
 
-    quantity_where = ""
-    if quantity_conditions:
-        quantity_where = "AND " + " AND ".join(quantity_conditions)
-
-    # Get overall data range
-    range_query = f"""
-        SELECT
-            MIN(t.bucket) as earliest,
-            MAX(t.bucket) as latest,
-            COUNT(DISTINCT t.quantity_id) as quantity_count,
-            COUNT(*) as record_count
-        FROM telemetry_15min_agg t
-        JOIN quantities q ON t.quantity_id = q.id
-        WHERE t.device_id = $1
-        {quantity_where}
-    """
-    overall = await db.fetch_one(range_query, *params)
+        # Get per-quantity breakdown (top 10 by record count)
+        breakdown_query = f"""
+            SELECT
+                q.id as quantity_id,
+                q.quantity_code,
+                q.quantity_name,
+                q.unit,
+                MIN(t.bucket) as earliest,
+                MAX(t.bucket) as latest,
+                COUNT(*) as record_count
+            FROM telemetry_15min_agg t
+            JOIN quantities q ON t.quantity_id = q.id
+            WHERE t.device_id = $1
+            {quantity_where}
+            GROUP BY q.id, q.quantity_code, q.quantity_name, q.unit
+            ORDER BY record_count DESC
+            LIMIT 10
+        """
+        breakdown = await db.fetch_all(breakdown_query, *params)
 
     if not overall or overall["earliest"] is None:
         return {
@@ -115,26 +185,6 @@ async def get_device_data_range(
     else:
         days_of_data = 0
 
-    # Get per-quantity breakdown (top 10 by record count)
-    breakdown_query = f"""
-        SELECT
-            q.id as quantity_id,
-            q.quantity_code,
-            q.quantity_name,
-            q.unit,
-            MIN(t.bucket) as earliest,
-            MAX(t.bucket) as latest,
-            COUNT(*) as record_count
-        FROM telemetry_15min_agg t
-        JOIN quantities q ON t.quantity_id = q.id
-        WHERE t.device_id = $1
-        {quantity_where}
-        GROUP BY q.id, q.quantity_code, q.quantity_name, q.unit
-        ORDER BY record_count DESC
-        LIMIT 10
-    """
-    breakdown = await db.fetch_all(breakdown_query, *params)
-
     return {
         "device": {
             "id": device["id"],
@@ -271,10 +321,22 @@ async def find_devices_by_quantity(
         if error:
             return {"error": error}
 
-    # Find devices with data for these quantities
-    # Use a more efficient subquery approach
+    # Find devices with data for these quantities - from the coverage index
+    # when loaded, otherwise with a subquery on the hypertable
+    index = get_coverage_index()
+    if index is not None:
+        device_filter = "d.id = ANY($1::int[])"
+        filter_param = index.device_ids_for_quantities(quantity_ids)
+    else:
+        device_filter = """d.id IN (
+                  SELECT DISTINCT device_id
+                  FROM telemetry_15min_agg
+                  WHERE quantity_id = ANY($1::int[])
+              )"""
+        filter_param = quantity_ids
+
     if tenant_id:
-        device_query = """
+        device_query = f"""
             SELECT
                 d.id as device_id,
                 d.display_name,
@@ -285,16 +347,12 @@ async def find_devices_by_quantity(
             JOIN tenants t_tenant ON d.tenant_id = t_tenant.id
             WHERE d.is_active = true
               AND d.tenant_id = $2
-              AND d.id IN (
-                  SELECT DISTINCT device_id
-                  FROM telemetry_15min_agg
-                  WHERE quantity_id = ANY($1::int[])
-              )
+              AND {device_filter}
             ORDER BY t_tenant.tenant_name, d.display_name
         """
-        query_params = [quantity_ids, tenant_id]
+        query_params = [filter_param, tenant_id]
     else:
-        device_query = """
+        device_query = f"""
             SELECT
                 d.id as device_id,
                 d.display_name,
@@ -304,14 +362,10 @@ async def find_devices_by_quantity(
             FROM devices d
             JOIN tenants t_tenant ON d.tenant_id = t_tenant.id
             WHERE d.is_active = true
-              AND d.id IN (
-                  SELECT DISTINCT device_id
-                  FROM telemetry_15min_agg
-                  WHERE quantity_id = ANY($1::int[])
-              )
+              AND {device_filter}
             ORDER BY t_tenant.tenant_name, d.display_name
         """
-        query_params = [quantity_ids]
+        query_params = [filter_param]
 
     devices = await db.fetch_all(device_query, *query_params)
 
@@ -674,7 +728,7 @@ async def check_data_freshness(
     Returns:
         Dictionary with device freshness status
     """
-    now = datetime.now(UTC)
+    now = utc_now_naive()
 
     if device_id or device_name:
         # Single device check
@@ -704,30 +758,19 @@ async def check_data_freshness(
                 return {"error": f"Device ID not found: {device_id}"}
 
         # Get last reading time
-        freshness_query = """
-            SELECT MAX(bucket) as last_reading
-            FROM telemetry_15min_agg
-            WHERE device_id = $1
-        """
-        result = await db.fetch_one(freshness_query, device_id)
-        last_reading = result["last_reading"] if result else None
-
-        if last_reading:
-            # Handle timezone-naive datetimes from database
-            if last_reading.tzinfo is None:
-                last_reading_utc = last_reading.replace(tzinfo=UTC)
-            else:
-                last_reading_utc = last_reading
-            hours_ago = (now - last_reading_utc).total_seconds() / 3600
-            if hours_ago <= 1:
-                status = "online"
-            elif hours_ago <= hours_threshold:
-                status = "recent"
-            else:
-                status = "stale"
+        tracker = get_last_seen_tracker()
+        if tracker is not None:
+            last_reading = (await tracker.last_seen_many([device_id]))[device_id]
         else:
-            hours_ago = None
-            status = "no_data"
+            freshness_query = """
+                SELECT MAX(bucket) as last_reading
+                FROM telemetry_15min_agg
+                WHERE device_id = $1
+            """
+            result = await db.fetch_one(freshness_query, device_id)
+            last_reading = result["last_reading"] if result else None
+
+        hours_ago, status = classify_freshness(last_reading, now, hours_threshold)
 
         return {
             "device": {
@@ -748,19 +791,36 @@ async def check_data_freshness(
             return {"error": error}
 
         # All devices for tenant
-        devices_query = """
-            SELECT
-                d.id,
-                d.display_name,
-                d.device_code,
-                MAX(t.bucket) as last_reading
-            FROM devices d
-            LEFT JOIN telemetry_15min_agg t ON d.id = t.device_id
-            WHERE d.tenant_id = $1 AND d.is_active = true
-            GROUP BY d.id, d.display_name, d.device_code
-            ORDER BY last_reading DESC NULLS LAST
-        """
-        devices = await db.fetch_all(devices_query, tenant_id)
+        tracker = get_last_seen_tracker()
+        if tracker is not None:
+            devices = await db.fetch_all(
+                """
+                SELECT id, display_name, device_code
+                FROM devices
+                WHERE tenant_id = $1 AND is_active = true
+                """,
+                tenant_id,
+            )
+            last_seen = await tracker.last_seen_many([d["id"] for d in devices])
+            devices = sorted(
+                ({**d, "last_reading": last_seen[d["id"]]} for d in devices),
+                key=lambda d: d["last_reading"] or datetime.min,
+                reverse=True,
+            )
+        else:
+            devices_query = """
+                SELECT
+                    d.id,
+                    d.display_name,
+                    d.device_code,
+                    MAX(t.bucket) as last_reading
+                FROM devices d
+                LEFT JOIN telemetry_15min_agg t ON d.id = t.device_id
+                WHERE d.tenant_id = $1 AND d.is_active = true
+                GROUP BY d.id, d.display_name, d.device_code
+                ORDER BY last_reading DESC NULLS LAST
+            """
+            devices = await db.fetch_all(devices_query, tenant_id)
 
         if not devices:
             return {"error": f"No devices found for tenant: {tenant}"}
@@ -770,22 +830,7 @@ async def check_data_freshness(
 
         for d in devices:
             last_reading = d["last_reading"]
-            if last_reading:
-                # Handle timezone-naive datetimes from database
-                if last_reading.tzinfo is None:
-                    last_reading_utc = last_reading.replace(tzinfo=UTC)
-                else:
-                    last_reading_utc = last_reading
-                hours_ago = (now - last_reading_utc).total_seconds() / 3600
-                if hours_ago <= 1:
-                    status = "online"
-                elif hours_ago <= hours_threshold:
-                    status = "recent"
-                else:
-                    status = "stale"
-            else:
-                hours_ago = None
-                status = "no_data"
+            hours_ago, status = classify_freshness(last_reading, now, hours_threshold)
 
             status_counts[status] += 1
             device_statuses.append({
@@ -872,6 +917,73 @@ def format_data_freshness_response(result: dict) -> str:
     return "\n".join(lines)
 
 
+async def _tenant_data_stats(tenant_id: int) -> dict:
+    """
+    Get a tenant's data range, quantity count and devices with data.
+
+    devices_with_data is None when the range comes from a sample device
+    (the caller fills in the active device count).
+    """
+    no_data = {
+        "earliest_data": None,
+        "latest_data": None,
+        "quantity_count": 0,
+        "devices_with_data": 0,
+    }
+
+    index = get_coverage_index()
+    if index is not None:
+        # Catalog coverage across all active devices, without touching the hypertable
+        active_devices = await db.fetch_all(
+            "SELECT id FROM devices WHERE tenant_id = $1 AND is_active = true",
+            tenant_id,
+        )
+        coverage = index.tenant_range(tenant_id, {d["id"] for d in active_devices})
+        return {
+            "earliest_data": coverage.earliest,
+            "latest_data": coverage.latest,
+            "quantity_count": coverage.quantity_count,
+            "devices_with_data": coverage.device_count,
+        }
+
+    # Get a sample device to check data range (much faster than aggregating all)
+    # This gives an approximation rather than exact range
+    sample_device = await db.fetch_one(
+        "SELECT id FROM devices WHERE tenant_id = $1 AND is_active = true LIMIT 1",
+        tenant_id,
+    )
+    if not sample_device:
+        return no_data
+
+    # Data range and quantity count of the sample device (fast)
+    data_stats, qty_count = await gather_queries(
+        db.fetch_one(
+            """
+            SELECT
+                MIN(bucket) as earliest_data,
+                MAX(bucket) as latest_data
+            FROM telemetry_15min_agg
+            WHERE device_id = $1
+            """,
+            sample_device["id"],
+        ),
+        db.fetch_one(
+            """
+            SELECT COUNT(DISTINCT quantity_id) as quantity_count
+            FROM telemetry_15min_agg
+            WHERE device_id = $1
+            """,
+            sample_device["id"],
+        ),
+    )
+    if not data_stats:
+        return no_data
+    data_stats = dict(data_stats)
+    data_stats["quantity_count"] = qty_count["quantity_count"] if qty_count else 0
+    data_stats["devices_with_data"] = None
+    return data_stats
+
+
 async def get_tenant_summary(
     tenant_id: int | None = None,
     tenant_name: str | None = None,
@@ -913,85 +1025,42 @@ async def get_tenant_summary(
         if not tenant:
             return {"error": f"Tenant ID not found: {tenant_id}"}
 
-    # Get device counts
-    device_counts = await db.fetch_one(
-        """
-        SELECT
-            COUNT(*) as total,
-            COUNT(*) FILTER (WHERE is_active) as active,
-            COUNT(*) FILTER (WHERE NOT is_active) as inactive
-        FROM devices
-        WHERE tenant_id = $1
-        """,
-        tenant_id,
-    )
-
-    # Get a sample device to check data range (much faster than aggregating all)
-    # This gives an approximation rather than exact range
-    sample_device = await db.fetch_one(
-        "SELECT id FROM devices WHERE tenant_id = $1 AND is_active = true LIMIT 1",
-        tenant_id,
-    )
-
-    if sample_device:
-        # Get data range from sample device (fast)
-        data_stats = await db.fetch_one(
+    # Device counts, data coverage and models are independent - run concurrently
+    device_counts, data_stats, model_stats = await gather_queries(
+        db.fetch_one(
             """
             SELECT
-                MIN(bucket) as earliest_data,
-                MAX(bucket) as latest_data
-            FROM telemetry_15min_agg
-            WHERE device_id = $1
+                COUNT(*) as total,
+                COUNT(*) FILTER (WHERE is_active) as active,
+                COUNT(*) FILTER (WHERE NOT is_active) as inactive
+            FROM devices
+            WHERE tenant_id = $1
             """,
-            sample_device["id"],
-        )
-        # Count quantities in use system-wide (already indexed)
-        qty_count = await db.fetch_one(
+            tenant_id,
+        ),
+        _tenant_data_stats(tenant_id),
+        db.fetch_all(
             """
-            SELECT COUNT(DISTINCT quantity_id) as quantity_count
-            FROM telemetry_15min_agg
-            WHERE device_id = $1
+            SELECT
+                metadata -> 'device_info' ->> 'manufacturer' as manufacturer,
+                metadata -> 'device_info' ->> 'model' as model,
+                COUNT(*) as count
+            FROM devices
+            WHERE tenant_id = $1 AND is_active = true
+            GROUP BY manufacturer, model
+            ORDER BY count DESC
+            LIMIT 5
             """,
-            sample_device["id"],
-        )
-        if data_stats:
-            data_stats = dict(data_stats)
-            data_stats["quantity_count"] = qty_count["quantity_count"] if qty_count else 0
-            data_stats["devices_with_data"] = device_counts["active"]
-        else:
-            data_stats = {
-                "earliest_data": None,
-                "latest_data": None,
-                "quantity_count": 0,
-                "devices_with_data": 0,
-            }
-    else:
-        data_stats = {
-            "earliest_data": None,
-            "latest_data": None,
-            "quantity_count": 0,
-            "devices_with_data": 0,
-        }
+            tenant_id,
+        ),
+    )
+    if data_stats["devices_with_data"] is None:
+        # Sampled range: assume every active device reports
+        data_stats["devices_with_data"] = device_counts["active"]
 
     # Skip expensive category breakdown - can be added as separate tool if needed
     category_stats = []
 
-    # Get devices by model
-    model_stats = await db.fetch_all(
-        """
-        SELECT
-            metadata -> 'device_info' ->> 'manufacturer' as manufacturer,
-            metadata -> 'device_info' ->> 'model' as model,
-            COUNT(*) as count
-        FROM devices
-        WHERE tenant_id = $1 AND is_active = true
-        GROUP BY manufacturer, model
-        ORDER BY count DESC
-        LIMIT 5
-        """,
-        tenant_id,
-    )
-
     return {
         "tenant": {
             "id": tenant["id"],
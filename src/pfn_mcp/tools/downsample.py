@@ -0,0 +1,111 @@
+"""Downsampling of telemetry series to a bounded number of points.
+
+Averaging into fixed buckets flattens short spikes. These helpers instead
+pick a subset of the fetched points that keeps the shape of the series:
+
+- lttb: Largest-Triangle-Three-Buckets, picks the point per bucket that forms
+  the largest triangle with its neighbours (visually faithful line charts)
+- minmax: per-bucket envelope, keeps the lowest and highest point of each
+  bucket so every peak and dip survives
+
+Points are the telemetry data point dicts (time, avg, min, max, ...) in
+time order. Values may be floats or Decimals (asyncpg NUMERIC). Selected
+points are returned unchanged.
+"""
+
+DOWNSAMPLE_MODES = ("lttb", "minmax")
+
+# Smallest sensible output (first, last and at least one point in between)
+MIN_POINTS = 3
+
+
+def _bucket_bounds(n: int, buckets: int) -> list[tuple[int, int]]:
+    """Split indexes 0..n-1 into `buckets` contiguous, near-equal ranges."""
+    return [(i * n // buckets, (i + 1) * n // buckets) for i in range(buckets)]
+
+
+def downsample_lttb(points: list[dict], max_points: int, key: str = "avg") -> list[dict]:
+    """
+    Downsample with Largest-Triangle-Three-Buckets.
+
+    Always keeps the first and last point. Points whose value is None are
+    skipped (gaps are not interpolated).
+
+    Args:
+        points: Data points in time order
+        max_points: Maximum number of points to return
+        key: Value field to use for the triangle areas
+
+    Returns:
+        At most max_points points, in time order
+    """
+    series = [p for p in points if p.get(key) is not None]
+    max_points = max(max_points, MIN_POINTS)
+    if len(series) <= max_points:
+        return series
+
+    # x is the position in the series: rows are (nearly) evenly spaced in time
+    # and this avoids datetime arithmetic in the inner loop
+    ys = [float(p[key]) for p in series]
+    selected = [series[0]]
+    a = 0
+    inner = _bucket_bounds(len(series) - 2, max_points - 2)
+
+    for i, (start, end) in enumerate(inner):
+        start, end = start + 1, end + 1
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 1 < len(inner):
+            next_start, next_end = inner[i + 1][0] + 1, inner[i + 1][1] + 1
+        else:
+            next_start, next_end = len(series) - 1, len(series)
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        ax, ay = a, ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(series[best])
+        a = best
+
+    selected.append(series[-1])
+    return selected
+
+
+def downsample_minmax(points: list[dict], max_points: int) -> list[dict]:
+    """
+    Downsample to a per-bucket min/max envelope.
+
+    Each bucket contributes the point with the lowest "min" and the point
+    with the highest "max" (one point if they coincide), in time order.
+
+    Args:
+        points: Data points in time order
+        max_points: Maximum number of points to return
+
+    Returns:
+        At most max_points points, in time order
+    """
+    series = [p for p in points if p.get("min") is not None and p.get("max") is not None]
+    max_points = max(max_points, MIN_POINTS)
+    if len(series) <= max_points:
+        return series
+
+    selected = []
+    for start, end in _bucket_bounds(len(series), max_points // 2):
+        low = min(range(start, end), key=lambda j: series[j]["min"])
+        high = max(range(start, end), key=lambda j: series[j]["max"])
+        for j in sorted({low, high}):
+            selected.append(series[j])
+    return selected
+
+
+def downsample(points: list[dict], mode: str, max_points: int) -> list[dict]:
+    """Downsample points with the given mode ("lttb" or "minmax")."""
+    if mode == "lttb":
+        return downsample_lttb(points, max_points)
+    if mode == "minmax":
+        return downsample_minmax(points, max_points)
+    raise ValueError(f"Invalid downsample mode: {mode}. Use: {', '.join(DOWNSAMPLE_MODES)}")
@@ -1,194 +1,20 @@
 """Electricity cost tools - Query daily_energy_cost_summary table."""
 
 import logging
-import re
-from datetime import UTC, datetime, timedelta
+from datetime import datetime, timedelta
 from typing import Literal
 
 from pfn_mcp import db
+from pfn_mcp.tools.concurrency import gather_queries
+from pfn_mcp.tools.periods import MONTH_PERIOD, RELATIVE_PERIOD, parse_period
 from pfn_mcp.tools.resolve import resolve_tenant
 
 logger = logging.getLogger(__name__)
 
-# Period patterns
-RELATIVE_PERIOD = re.compile(r"^(\d+)\s*([dDwWmMyY])$")  # 7d, 1M, 1Y
-MONTH_PERIOD = re.compile(r"^(\d{4})-(\d{2})$")  # 2025-12
-DATE_RANGE = re.compile(r"^(\d{4}-\d{2}-\d{2})\s+to\s+(\d{4}-\d{2}-\d{2})$")
-
 # Active Energy Delivered quantity ID
 ACTIVE_ENERGY_QTY_ID = 124
 
 
-def parse_period(
-    period: str | None,
-    start_date: str | None,
-    end_date: str | None,
-) -> tuple[datetime, datetime] | tuple[None, str]:
-    """
-    Parse period parameters into start/end datetime.
-
-    Supports:
-    - Relative: "7d", "30d", "3M", "1Y"
-    - Month: "2025-12"
-    - Range: "2025-12-01 to 2025-12-15"
-    - Explicit start_date/end_date
-
-    Returns (start, end) naive UTC datetimes or (None, error_message).
-    Note: Returns naive datetimes for compatibility with asyncpg and
-    PostgreSQL timestamp without timezone columns.
-    """
-    # Use UTC internally, but return naive datetimes for database compatibility
-    now_utc = datetime.now(UTC)
-    # Convert to naive UTC for database queries
-    now = now_utc.replace(tzinfo=None)
-    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Explicit date range takes precedence
-    if start_date:
-        try:
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        except ValueError:
-            return None, f"Invalid start_date format: {start_date}. Use YYYY-MM-DD"
-
-        if end_date:
-            try:
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                # End of day
-                end_dt = end_dt + timedelta(days=1)
-            except ValueError:
-                return None, f"Invalid end_date format: {end_date}. Use YYYY-MM-DD"
-        else:
-            end_dt = today + timedelta(days=1)  # End of today
-
-        return start_dt, end_dt
-
-    # Parse period string
-    if not period:
-        period = "7d"  # Default
-
-    period = period.strip()
-
-    # Try relative period (7d, 30d, 3M, 1Y)
-    match = RELATIVE_PERIOD.match(period)
-    if match:
-        value = int(match.group(1))
-        unit = match.group(2).lower()
-
-        if unit == "d":
-            delta = timedelta(days=value)
-        elif unit == "w":
-            delta = timedelta(weeks=value)
-        elif unit == "m":
-            delta = timedelta(days=value * 30)
-        elif unit == "y":
-            delta = timedelta(days=value * 365)
-        else:
-            delta = timedelta(days=value)
-
-        return today - delta, today + timedelta(days=1)
-
-    # Try month period (2025-12)
-    match = MONTH_PERIOD.match(period)
-    if match:
-        year = int(match.group(1))
-        month = int(match.group(2))
-        start_dt = datetime(year, month, 1)
-
-        # Calculate end of month
-        if month == 12:
-            end_dt = datetime(year + 1, 1, 1)
-        else:
-            end_dt = datetime(year, month + 1, 1)
-
-        return start_dt, end_dt
-
-    # Try date range (2025-12-01 to 2025-12-15)
-    match = DATE_RANGE.match(period)
-    if match:
-        try:
-            start_dt = datetime.strptime(match.group(1), "%Y-%m-%d")
-            end_dt = datetime.strptime(match.group(2), "%Y-%m-%d")
-            end_dt = end_dt + timedelta(days=1)  # End of day
-            return start_dt, end_dt
-        except ValueError:
-            return None, f"Invalid date range format: {period}"
-
-    # Try natural language periods (fallback)
-    period_lower = period.lower().strip()
-    nl_result = _parse_natural_language_period(period_lower, today)
-    if nl_result:
-        return nl_result
-
-    return None, f"Invalid period format: {period}. Use: 7d, 1M, 2025-12, or date range"
-
-
-def _parse_natural_language_period(
-    period: str, today: datetime
-) -> tuple[datetime, datetime] | None:
-    """Parse common natural language period terms.
-
-    Supports English and Indonesian terms:
-    - yesterday, kemarin
-    - today, hari ini
-    - day before yesterday, kemarin lusa
-    - last week, minggu lalu
-    - this week, minggu ini
-    - last month, bulan lalu
-    - this month, bulan ini
-
-    Returns (start, end) datetimes or None if not recognized.
-    """
-    # Single day references
-    if period in ("yesterday", "kemarin"):
-        yesterday = today - timedelta(days=1)
-        return yesterday, today
-
-    if period in ("today", "hari ini"):
-        return today, today + timedelta(days=1)
-
-    if period in ("day before yesterday", "kemarin lusa", "2 days ago"):
-        day_before = today - timedelta(days=2)
-        return day_before, day_before + timedelta(days=1)
-
-    # Week references
-    if period in ("last week", "minggu lalu"):
-        return today - timedelta(days=7), today + timedelta(days=1)
-
-    if period in ("this week", "minggu ini"):
-        # Monday of this week
-        days_since_monday = today.weekday()
-        start_of_week = today - timedelta(days=days_since_monday)
-        return start_of_week, today + timedelta(days=1)
-
-    # Month references
-    if period in ("last month", "bulan lalu"):
-        # First day of last month
-        first_of_this_month = today.replace(day=1)
-        last_month_end = first_of_this_month
-        if today.month == 1:
-            last_month_start = datetime(today.year - 1, 12, 1)
-        else:
-            last_month_start = datetime(today.year, today.month - 1, 1)
-        return last_month_start, last_month_end
-
-    if period in ("this month", "bulan ini"):
-        first_of_month = today.replace(day=1)
-        return first_of_month, today + timedelta(days=1)
-
-    # "last N days/hours" pattern
-    last_n_match = re.match(r"last\s+(\d+)\s+(day|days|hour|hours)", period)
-    if last_n_match:
-        n = int(last_n_match.group(1))
-        unit = last_n_match.group(2)
-        if unit.startswith("day"):
-            return today - timedelta(days=n), today + timedelta(days=1)
-        elif unit.startswith("hour"):
-            now = datetime.now(UTC).replace(tzinfo=None)
-            return now - timedelta(hours=n), now
-
-    return None
-
-
 async def _resolve_device(
     device: str | None,
 ) -> tuple[int | None, dict | None, str | None]:
@@ -316,7 +142,11 @@ async def get_electricity_cost(
         WHERE {where_clause}
     """
 
-    summary = await db.fetch_one(summary_query, *params)
+    # Summary and breakdown are independent - run them concurrently
+    queries = [db.fetch_one(summary_query, *params)]
+    if group_by != "none":
+        queries.append(_get_breakdown(group_by, where_clause, params, query_start, query_end))
+    summary, *breakdown_data = await gather_queries(*queries)
 
     total_consumption = float(summary["total_consumption_kwh"] or 0)
     total_cost = float(summary["total_cost_rp"] or 0)
@@ -358,10 +188,7 @@ async def get_electricity_cost(
 
     # Get breakdown if requested
     if group_by != "none":
-        breakdown_data = await _get_breakdown(
-            group_by, where_clause, params, query_start, query_end
-        )
-        result_dict["breakdown"] = breakdown_data
+        result_dict["breakdown"] = breakdown_data[0]
         result_dict["group_by"] = group_by
 
     return result_dict
@@ -735,10 +562,6 @@ async def get_electricity_cost_ranking(
         LIMIT $5
     """
 
-    rows = await db.fetch_all(
-        query, tenant_id, ACTIVE_ENERGY_QTY_ID, query_start, query_end, limit
-    )
-
     # Get tenant totals for percentage calculation
     totals_query = """
         SELECT
@@ -751,8 +574,9 @@ async def get_electricity_cost_ranking(
           AND daily_bucket < $4
     """
 
-    totals = await db.fetch_one(
-        totals_query, tenant_id, ACTIVE_ENERGY_QTY_ID, query_start, query_end
+    rows, totals = await gather_queries(
+        db.fetch_all(query, tenant_id, ACTIVE_ENERGY_QTY_ID, query_start, query_end, limit),
+        db.fetch_one(totals_query, tenant_id, ACTIVE_ENERGY_QTY_ID, query_start, query_end),
     )
 
     tenant_total_consumption = float(totals["total_consumption"] or 0)
@@ -862,7 +686,7 @@ def _format_period_label(period: str) -> str:
     if match:
         value = match.group(1)
         unit = match.group(2).lower()
-        unit_names = {"d": "days", "w": "weeks", "m": "months", "y": "years"}
+        unit_names = {"h": "hours", "d": "days", "w": "weeks", "m": "months", "y": "years"}
         return f"Last {value} {unit_names.get(unit, 'days')}"
 
     # Return as-is for date ranges
@@ -960,8 +784,10 @@ async def compare_electricity_periods(
     start2, end2 = result2
 
     # Get totals for each period
-    totals1 = await _get_period_totals(device_id, tenant_id, start1, end1)
-    totals2 = await _get_period_totals(device_id, tenant_id, start2, end2)
+    totals1, totals2 = await gather_queries(
+        _get_period_totals(device_id, tenant_id, start1, end1),
+        _get_period_totals(device_id, tenant_id, start2, end2),
+    )
 
     # Calculate changes
     consumption_change = totals2["consumption_kwh"] - totals1["consumption_kwh"]
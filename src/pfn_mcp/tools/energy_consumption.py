@@ -1,16 +1,16 @@
 """Energy consumption tools - Query actual consumption from cumulative meter data."""
 
 import logging
-from datetime import UTC, datetime, timedelta
+from datetime import datetime, timedelta
 
 from pfn_mcp import db
 from pfn_mcp.tools.datetime_utils import format_display_datetime
+from pfn_mcp.tools.periods import resolve_time_range
 from pfn_mcp.tools.resolve import resolve_tenant
 from pfn_mcp.tools.telemetry import (
     BUCKET_INTERVALS,
     BUCKET_LABELS,
     _resolve_device_id,
-    parse_period,
     select_bucket,
 )
 
@@ -358,35 +358,13 @@ async def get_energy_consumption(
     if error:
         return {"error": error}
 
-    # Determine time range
-    now = datetime.now(UTC).replace(tzinfo=None)
-    if period:
-        delta = parse_period(period)
-        if delta is None:
-            return {"error": f"Invalid period format: {period}. Use e.g. 24h, 7d, 30d"}
-        query_start = now - delta
-        query_end = now
-    elif start_date:
-        try:
-            query_start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
-            if query_start.tzinfo:
-                query_start = query_start.astimezone(UTC).replace(tzinfo=None)
-        except ValueError:
-            return {"error": f"Invalid start_date format: {start_date}"}
-
-        if end_date:
-            try:
-                query_end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-                if query_end.tzinfo:
-                    query_end = query_end.astimezone(UTC).replace(tzinfo=None)
-            except ValueError:
-                return {"error": f"Invalid end_date format: {end_date}"}
-        else:
-            query_end = now
-    else:
-        # Default to last 7 days for energy queries
-        query_start = now - timedelta(days=7)
-        query_end = now
+    # Determine time range (default last 7 days for energy queries)
+    range_result = resolve_time_range(
+        period, start_date, end_date, default=timedelta(days=7)
+    )
+    if range_result[0] is None:
+        return {"error": range_result[1]}
+    query_start, query_end = range_result
 
     # Select bucket size
     time_range = query_end - query_start
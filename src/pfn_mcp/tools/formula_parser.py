@@ -299,3 +299,22 @@ def calculate_formula_result(
         result += term.sign * term_sum
 
     return result
+
+
+def formula_coefficients(terms: list[FormulaTerm]) -> dict[int, int]:
+    """Net coefficient per device for a formula (e.g. "(94+11)-(84)").
+
+    Lets the formula be evaluated as SUM(coefficient * value) over rows:
+    a device appearing in several terms gets the sum of their signs.
+
+    Args:
+        terms: Parsed formula terms from parse_formula()
+
+    Returns:
+        Dict mapping device_id to its coefficient
+    """
+    coefficients: dict[int, int] = {}
+    for term in terms:
+        for device_id in term.device_ids:
+            coefficients[device_id] = coefficients.get(device_id, 0) + term.sign
+    return coefficients
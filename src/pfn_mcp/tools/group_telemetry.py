@@ -5,7 +5,12 @@ from datetime import datetime, timedelta
 from typing import Literal
 
 from pfn_mcp import db
-from pfn_mcp.tools.electricity_cost import parse_period
+from pfn_mcp.config import settings
+from pfn_mcp.tools.concurrency import gather_queries
+from pfn_mcp.tools.cost_guard import fit_range
+from pfn_mcp.tools.datetime_utils import format_display_datetime
+from pfn_mcp.tools.partitioned import PartialAggregate, map_partitions
+from pfn_mcp.tools.periods import parse_period
 from pfn_mcp.tools.resolve import resolve_tenant
 from pfn_mcp.tools.telemetry import BUCKET_MINUTES, _resolve_quantity_id
 
@@ -25,6 +30,39 @@ OutputMode = Literal["summary", "timeseries", "per_device"]
 # Default max rows for timeseries output
 DEFAULT_MAX_ROWS = 200
 
+# WAGE group summary in one scan: the grand total row (is_total) and one row
+# per device. Window functions give each device's min/max so the bucket where
+# it occurred comes out of the same pass (no re-scan matching the value).
+# Only mergeable aggregates, so long ranges can be run per month partition.
+GROUP_SUMMARY_QUERY = """
+    WITH scoped AS (
+        SELECT
+            device_id,
+            bucket,
+            aggregated_value,
+            MIN(aggregated_value) OVER (PARTITION BY device_id) as device_min,
+            MAX(aggregated_value) OVER (PARTITION BY device_id) as device_max
+        FROM telemetry_15min_agg
+        WHERE quantity_id = $1
+          AND bucket >= $2
+          AND bucket < $3
+          AND device_id = ANY($4::int[])
+    )
+    SELECT
+        device_id,
+        GROUPING(device_id) = 1 as is_total,
+        SUM(aggregated_value) as sum_value,
+        COUNT(aggregated_value) as value_count,
+        MIN(aggregated_value) as min_value,
+        MAX(aggregated_value) as max_value,
+        MIN(bucket) FILTER (WHERE aggregated_value = device_min) as min_bucket,
+        MIN(bucket) FILTER (WHERE aggregated_value = device_max) as max_bucket,
+        COUNT(DISTINCT bucket::date) as days_with_data,
+        COUNT(*) as data_points
+    FROM scoped
+    GROUP BY GROUPING SETS ((device_id), ())
+"""
+
 
 def select_group_bucket(
     time_range: timedelta,
@@ -922,13 +960,15 @@ async def _get_electricity_group_summary(
           AND device_id IN ({device_placeholders})
     """
 
-    summary = await db.fetch_one(
-        summary_query,
-        ACTIVE_ENERGY_QTY_ID,
-        query_start,
-        query_end,
-        *device_ids,
-    )
+    # Summary and breakdown are independent - run them concurrently
+    queries = [
+        db.fetch_one(summary_query, ACTIVE_ENERGY_QTY_ID, query_start, query_end, *device_ids)
+    ]
+    if breakdown == "device":
+        queries.append(_get_device_breakdown(device_ids, query_start, query_end))
+    elif breakdown == "daily":
+        queries.append(_get_daily_breakdown(device_ids, query_start, query_end))
+    summary, *breakdown_data = await gather_queries(*queries)
 
     total_consumption = float(summary["total_consumption_kwh"] or 0)
     total_cost = float(summary["total_cost_rp"] or 0)
@@ -955,16 +995,8 @@ async def _get_electricity_group_summary(
         },
     }
 
-    if breakdown == "device":
-        breakdown_data = await _get_device_breakdown(
-            device_ids, query_start, query_end, total_consumption
-        )
-        result_dict["breakdown"] = breakdown_data
-    elif breakdown == "daily":
-        breakdown_data = await _get_daily_breakdown(
-            device_ids, query_start, query_end
-        )
-        result_dict["breakdown"] = breakdown_data
+    if breakdown_data:
+        result_dict["breakdown"] = breakdown_data[0]
 
     return result_dict
 
@@ -1023,6 +1055,20 @@ async def _get_telemetry_timeseries(
             is_cumulative=is_cumulative,
         )
 
+    return _pivot_timeseries(rows, device_ids, device_names)
+
+
+def _pivot_timeseries(
+    rows: list[dict],
+    device_ids: list[int],
+    device_names: list[str],
+) -> list[dict]:
+    """
+    Pivot (time_bucket, device_id, value) rows into time-aligned dicts.
+
+    Returns rows like: [{time: "2025-01-01T00:00", device_1: 100, ...}] sorted
+    by time, with device display names as keys.
+    """
     if not rows:
         return []
 
@@ -1088,6 +1134,14 @@ async def _get_telemetry_group_summary(
 
     # Handle timeseries output mode
     if output == "timeseries":
+        # Over the cost budget, return the most recent part of the period
+        cost_note = None
+        if settings.cost_guard_enabled:
+            query_start, cost_note = fit_range(device_ids, quantity_id, query_start, query_end)
+            if cost_note:
+                start_str = query_start.strftime("%Y-%m-%d")
+                selected_bucket = select_group_bucket(query_end - query_start, device_count)
+
         timeseries = await _get_telemetry_timeseries(
             device_ids=device_ids,
             device_names=device_names,
@@ -1102,7 +1156,7 @@ async def _get_telemetry_group_summary(
         agg_method = (quantity_info.get("aggregation_method") or "avg").lower()
         is_cumulative = agg_method in CUMULATIVE_METHODS
 
-        return {
+        result_dict = {
             "group": {
                 "type": group_type,
                 "label": group_label,
@@ -1123,8 +1177,9 @@ async def _get_telemetry_group_summary(
                 "data": timeseries,
             },
         }
-    device_placeholders = ", ".join(f"${i+4}" for i in range(len(device_ids)))
-
+        if cost_note:
+            result_dict["cost_guard"] = cost_note
+        return result_dict
     # Determine aggregation method from quantity info
     agg_method = (quantity_info.get("aggregation_method") or "avg").lower()
     is_cumulative = agg_method in CUMULATIVE_METHODS
@@ -1132,94 +1187,41 @@ async def _get_telemetry_group_summary(
     # For cumulative quantities (energy), sum the values
     # For instantaneous quantities (power, voltage), average the values
     # Note: telemetry_15min_agg has aggregated_value column (no separate sum/avg/min/max)
-    if is_cumulative:
-        agg_func = "SUM(aggregated_value)"
-        agg_label = "total"
-    else:
-        agg_func = "AVG(aggregated_value)"
-        agg_label = "average"
-
-    summary_query = f"""
-        SELECT
-            {agg_func} as agg_value,
-            MIN(aggregated_value) as min_value,
-            MAX(aggregated_value) as max_value,
-            COUNT(DISTINCT bucket::date) as days_with_data,
-            COUNT(DISTINCT device_id) as devices_with_data,
-            COUNT(*) as data_points
-        FROM telemetry_15min_agg
-        WHERE quantity_id = $1
-          AND bucket >= $2
-          AND bucket < $3
-          AND device_id IN ({device_placeholders})
-    """
-
-    summary = await db.fetch_one(
-        summary_query,
-        quantity_id,
+    agg_label = "total" if is_cumulative else "average"
+
+    # Group summary, per-device stats and min/max attribution from one scan
+    # per partition (long ranges are split per month and run concurrently)
+    partitions = await map_partitions(
+        lambda lower, upper: db.fetch_all(
+            GROUP_SUMMARY_QUERY, quantity_id, lower, upper, device_ids
+        ),
         query_start,
         query_end,
-        *device_ids,
     )
+    by_device, days_with_data, data_points = _merge_group_summary(partitions)
 
-    agg_value = float(summary["agg_value"] or 0)
-    min_value = float(summary["min_value"]) if summary["min_value"] else None
-    max_value = float(summary["max_value"]) if summary["max_value"] else None
-    days_with_data = summary["days_with_data"] or 0
-    devices_with_data = summary["devices_with_data"] or 0
-    data_points = summary["data_points"] or 0
+    group_total = PartialAggregate()
+    for partial in by_device.values():
+        group_total.merge(partial)
+    agg_value = (group_total.sum if is_cumulative else group_total.avg) or 0.0
+    min_value = group_total.min
+    max_value = group_total.max
+    devices_with_data = len(by_device)
 
     unit = quantity_info.get("unit") or ""
 
-    # For instantaneous quantities, find which devices had min/max values
-    min_device = None
-    max_device = None
+    # For instantaneous quantities, find which devices (and when) had min/max values
+    min_device = max_device = None
+    min_time = max_time = None
     if is_instantaneous and min_value is not None and max_value is not None and device_count > 1:
-        # Query to find device with min value
-        min_device_query = f"""
-            SELECT d.display_name, t.aggregated_value, t.bucket
-            FROM telemetry_15min_agg t
-            JOIN devices d ON t.device_id = d.id
-            WHERE t.quantity_id = $1
-              AND t.bucket >= $2
-              AND t.bucket < $3
-              AND t.device_id IN ({device_placeholders})
-              AND t.aggregated_value = $4
-            LIMIT 1
-        """
-        min_row = await db.fetch_one(
-            min_device_query,
-            quantity_id,
-            query_start,
-            query_end,
-            *device_ids,
-            min_value,
-        )
-        if min_row:
-            min_device = min_row["display_name"]
-
-        # Query to find device with max value
-        max_device_query = f"""
-            SELECT d.display_name, t.aggregated_value, t.bucket
-            FROM telemetry_15min_agg t
-            JOIN devices d ON t.device_id = d.id
-            WHERE t.quantity_id = $1
-              AND t.bucket >= $2
-              AND t.bucket < $3
-              AND t.device_id IN ({device_placeholders})
-              AND t.aggregated_value = $4
-            LIMIT 1
-        """
-        max_row = await db.fetch_one(
-            max_device_query,
-            quantity_id,
-            query_start,
-            query_end,
-            *device_ids,
-            max_value,
-        )
-        if max_row:
-            max_device = max_row["display_name"]
+        id_to_name = dict(zip(device_ids, device_names))
+        for device_id, partial in by_device.items():
+            if (partial.min, partial.min_at) == (min_value, group_total.min_at):
+                min_device = id_to_name.get(device_id)
+                min_time = partial.min_at.isoformat()
+            if (partial.max, partial.max_at) == (max_value, group_total.max_at):
+                max_device = id_to_name.get(device_id)
+                max_time = partial.max_at.isoformat()
 
     result_dict = {
         "group": {
@@ -1239,10 +1241,12 @@ async def _get_telemetry_group_summary(
         },
         "summary": {
             f"{agg_label}_value": round(agg_value, 2),
-            "min_value": round(min_value, 2) if min_value else None,
-            "max_value": round(max_value, 2) if max_value else None,
+            "min_value": round(min_value, 2) if min_value is not None else None,
+            "max_value": round(max_value, 2) if max_value is not None else None,
             "min_device": min_device,
             "max_device": max_device,
+            "min_time": min_time,
+            "max_time": max_time,
             "unit": unit,
             "period": f"{start_str} to {end_str}",
             "days_with_data": days_with_data,
@@ -1251,11 +1255,9 @@ async def _get_telemetry_group_summary(
     }
 
     if breakdown == "device":
-        breakdown_data = await _get_telemetry_device_breakdown(
-            device_ids, quantity_id, query_start, query_end, agg_value,
-            is_cumulative, is_instantaneous
+        result_dict["breakdown"] = _build_telemetry_device_breakdown(
+            by_device, device_ids, device_names, agg_value, is_cumulative, is_instantaneous
         )
-        result_dict["breakdown"] = breakdown_data
     elif breakdown == "daily":
         breakdown_data = await _get_telemetry_daily_breakdown(
             device_ids, quantity_id, query_start, query_end, is_cumulative
@@ -1265,16 +1267,40 @@ async def _get_telemetry_group_summary(
     return result_dict
 
 
-async def _get_telemetry_device_breakdown(
+def _merge_group_summary(
+    partitions: list[list[dict]],
+) -> tuple[dict[int, PartialAggregate], int, int]:
+    """
+    Merge GROUP_SUMMARY_QUERY results of one or more partitions.
+
+    Returns:
+        (per-device aggregates for devices with data, days with data, data points)
+    """
+    by_device: dict[int, PartialAggregate] = {}
+    days_with_data = 0
+    data_points = 0
+    for rows in partitions:
+        for row in rows:
+            if row["is_total"]:
+                days_with_data += row["days_with_data"] or 0
+                data_points += row["data_points"] or 0
+                continue
+            by_device.setdefault(row["device_id"], PartialAggregate()).add(
+                row["sum_value"], row["value_count"], row["min_value"], row["max_value"],
+                row["min_bucket"], row["max_bucket"],
+            )
+    return by_device, days_with_data, data_points
+
+
+def _build_telemetry_device_breakdown(
+    by_device: dict[int, PartialAggregate],
     device_ids: list[int],
-    quantity_id: int,
-    start_dt: datetime,
-    end_dt: datetime,
+    device_names: list[str],
     total_value: float,
     is_cumulative: bool,
     is_instantaneous: bool = False,
 ) -> list[dict]:
-    """Get per-device breakdown for telemetry data.
+    """Build the per-device breakdown from the merged per-device aggregates.
 
     For instantaneous quantities (voltage, power):
     - Shows avg value per device with min/max
@@ -1282,51 +1308,22 @@ async def _get_telemetry_device_breakdown(
 
     For cumulative quantities (energy):
     - Shows total per device with percentage of group total
-    """
-    device_placeholders = ", ".join(f"${i+4}" for i in range(len(device_ids)))
 
-    if is_cumulative:
-        agg_func = "SUM(aggregated_value)"
-    else:
-        agg_func = "AVG(aggregated_value)"
-
-    query = f"""
-        SELECT
-            d.id as device_id,
-            d.display_name as device,
-            {agg_func} as agg_value,
-            MIN(t.aggregated_value) as min_value,
-            MAX(t.aggregated_value) as max_value
-        FROM devices d
-        LEFT JOIN telemetry_15min_agg t ON d.id = t.device_id
-            AND t.quantity_id = $1
-            AND t.bucket >= $2
-            AND t.bucket < $3
-        WHERE d.id IN ({device_placeholders})
-        GROUP BY d.id, d.display_name
-        ORDER BY agg_value DESC NULLS LAST
+    Devices without data are listed last with a value of 0.
     """
-
-    rows = await db.fetch_all(
-        query,
-        quantity_id,
-        start_dt,
-        end_dt,
-        *device_ids,
-    )
-
     breakdown = []
-    for row in rows:
-        agg_value = float(row.get("agg_value", 0) or 0)
-        min_val = float(row.get("min_value", 0) or 0) if row.get("min_value") else None
-        max_val = float(row.get("max_value", 0) or 0) if row.get("max_value") else None
+    for device_id, device_name in zip(device_ids, device_names):
+        partial = by_device.get(device_id, PartialAggregate())
+        agg_value = (partial.sum if is_cumulative else partial.avg) or 0.0
+        min_val = partial.min
+        max_val = partial.max
 
         item = {
-            "device": row.get("device"),
-            "device_id": row.get("device_id"),
+            "device": device_name,
+            "device_id": device_id,
             "value": round(agg_value, 2),
-            "min": round(min_val, 2) if min_val else None,
-            "max": round(max_val, 2) if max_val else None,
+            "min": round(min_val, 2) if min_val is not None else None,
+            "max": round(max_val, 2) if max_val is not None else None,
         }
 
         # Only add percentage for cumulative quantities (energy)
@@ -1337,6 +1334,11 @@ async def _get_telemetry_device_breakdown(
 
         breakdown.append(item)
 
+    # Same order as ORDER BY agg_value DESC NULLS LAST
+    def has_no_data(item: dict) -> bool:
+        return by_device.get(item["device_id"], PartialAggregate()).count == 0
+
+    breakdown.sort(key=lambda item: (has_no_data(item), -item["value"]))
     return breakdown
 
 
@@ -1401,9 +1403,12 @@ async def _get_device_breakdown(
     device_ids: list[int],
     start_dt: datetime,
     end_dt: datetime,
-    total_consumption: float,
 ) -> list[dict]:
-    """Get per-device breakdown."""
+    """Get per-device breakdown.
+
+    Percentages are relative to the sum over the same rows, which is the
+    group total (lets this run concurrently with the group summary).
+    """
     device_placeholders = ", ".join(f"${i+4}" for i in range(len(device_ids)))
 
     query = f"""
@@ -1430,6 +1435,8 @@ async def _get_device_breakdown(
         *device_ids,
     )
 
+    total_consumption = sum(float(row.get("consumption_kwh", 0) or 0) for row in rows)
+
     breakdown = []
     for row in rows:
         consumption = float(row.get("consumption_kwh", 0) or 0)
@@ -1521,9 +1528,10 @@ def _format_timeseries_response(
         f"**Bucket**: {ts['bucket']}",
         f"**Rows**: {ts['row_count']}",
         "",
-        "### Time Series Data",
-        "",
     ]
+    if "cost_guard" in result:
+        lines.extend([f"**Note**: {result['cost_guard']['message']}", ""])
+    lines.extend(["### Time Series Data", ""])
 
     if not data:
         lines.append("_No data available for this period._")
@@ -1631,13 +1639,19 @@ def format_group_telemetry_response(result: dict) -> str:
         if summary.get("min_value") is not None:
             min_line = f"- **Min**: {summary['min_value']:,.2f} {unit}"
             if is_instantaneous and summary.get("min_device"):
-                min_line += f" ({summary['min_device']})"
+                min_line += f" ({summary['min_device']}"
+                if summary.get("min_time"):
+                    min_line += f" at {format_display_datetime(summary['min_time'])}"
+                min_line += ")"
             lines.append(min_line)
 
         if summary.get("max_value") is not None:
             max_line = f"- **Max**: {summary['max_value']:,.2f} {unit}"
             if is_instantaneous and summary.get("max_device"):
-                max_line += f" ({summary['max_device']})"
+                max_line += f" ({summary['max_device']}"
+                if summary.get("max_time"):
+                    max_line += f" at {format_display_datetime(summary['max_time'])}"
+                max_line += ")"
             lines.append(max_line)
 
         if summary.get("data_points"):
@@ -0,0 +1,250 @@
+"""Latest values tool - current readings for many devices and quantities."""
+
+import logging
+from datetime import timedelta
+
+from pfn_mcp import db
+from pfn_mcp.last_values import LastValue, get_last_value_cache
+from pfn_mcp.tools.datetime_utils import format_display_datetime
+from pfn_mcp.tools.periods import utc_now_naive
+from pfn_mcp.tools.quantities import fetch_quantities_by_ids
+from pfn_mcp.tools.resolve import resolve_tenant
+from pfn_mcp.tools.telemetry import _resolve_quantity_id
+from pfn_mcp.tools.telemetry_batch import DEVICES_BY_ID_QUERY
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on devices per call (keeps fallback queries bounded)
+MAX_DEVICES = 50
+
+# Best match per requested name (same ranking as _resolve_device_id), one query
+DEVICES_BY_NAME_QUERY = """
+    SELECT n.name AS requested_name, d.id, d.display_name, d.device_code, d.tenant_id
+    FROM unnest($1::text[]) WITH ORDINALITY AS n(name, ord)
+    CROSS JOIN LATERAL (
+        SELECT id, display_name, device_code, tenant_id
+        FROM devices
+        WHERE is_active = true
+          AND ($2::int IS NULL OR tenant_id = $2)
+          AND (display_name ILIKE '%' || n.name || '%' OR device_name ILIKE '%' || n.name || '%')
+        ORDER BY
+            CASE
+                WHEN LOWER(display_name) = LOWER(n.name) THEN 0
+                WHEN LOWER(display_name) LIKE LOWER(n.name) || '%' THEN 1
+                ELSE 2
+            END
+        LIMIT 1
+    ) d
+    ORDER BY n.ord
+"""
+
+# Fallback when the last-value cache is not ready for a tenant
+LATEST_QUERY = """
+    SELECT DISTINCT ON (device_id, quantity_id)
+        device_id, quantity_id, timestamp, value
+    FROM telemetry_data
+    WHERE device_id = ANY($1::int[])
+      AND timestamp > $2
+      AND ($3::int[] IS NULL OR quantity_id = ANY($3::int[]))
+    ORDER BY device_id, quantity_id, timestamp DESC
+"""
+
+
+async def _resolve_devices(
+    device_ids: list[int] | None,
+    device_names: list[str] | None,
+    tenant_id: int | None,
+) -> tuple[list[dict], str | None]:
+    """
+    Resolve device IDs and names into device rows (deduplicated, in order).
+
+    One query for all IDs and one for all names; every unknown or
+    inaccessible device is reported in a single error.
+    """
+    devices: list[dict] = []
+    problems = []
+    if device_ids:
+        rows = await db.fetch_all(DEVICES_BY_ID_QUERY, list(device_ids))
+        by_id = {row["id"]: row for row in rows}
+        not_found = [str(d) for d in device_ids if d not in by_id]
+        denied = [
+            str(d) for d in device_ids
+            if d in by_id and tenant_id is not None and by_id[d]["tenant_id"] != tenant_id
+        ]
+        if not_found:
+            problems.append(f"Device IDs not found: {', '.join(not_found)}")
+        if denied:
+            problems.append(f"Device IDs not accessible for this tenant: {', '.join(denied)}")
+        devices.extend(by_id[d] for d in device_ids if d in by_id)
+    if device_names:
+        rows = await db.fetch_all(DEVICES_BY_NAME_QUERY, list(device_names), tenant_id)
+        matched = {row["requested_name"] for row in rows}
+        not_found = [name for name in device_names if name not in matched]
+        if not_found:
+            problems.append(f"Devices not found: {', '.join(not_found)}")
+        devices.extend(rows)
+    if problems:
+        return [], "; ".join(problems)
+
+    seen: set[int] = set()
+    unique = []
+    for device in devices:
+        if device["id"] not in seen:
+            seen.add(device["id"])
+            unique.append(device)
+    return unique, None
+
+
+async def get_latest_values(
+    device_ids: list[int] | None = None,
+    device_names: list[str] | None = None,
+    tenant: str | None = None,
+    quantity_ids: list[int] | None = None,
+    quantity_search: str | None = None,
+    max_age_minutes: int = 60,
+) -> dict:
+    """
+    Get the latest reading for each device/quantity.
+
+    Served from the in-memory last-value cache; tenants not yet polled fall
+    back to one bounded DISTINCT ON query over telemetry_data.
+
+    Args:
+        device_ids: Device IDs
+        device_names: Device names (fuzzy search)
+        tenant: Tenant name or code to filter devices (optional)
+        quantity_ids: Quantity IDs (all quantities if omitted)
+        quantity_search: Quantity search term (uses semantic aliases)
+        max_age_minutes: Readings older than this are reported as missing
+
+    Returns:
+        Dictionary with readings and device/quantity pairs without a recent reading
+    """
+    if not device_ids and not device_names:
+        return {"error": "Either device_ids or device_names is required"}
+
+    tenant_id = None
+    if tenant:
+        tenant_id, _, error = await resolve_tenant(tenant)
+        if error:
+            return {"error": error}
+
+    devices, error = await _resolve_devices(device_ids, device_names, tenant_id)
+    if error:
+        return {"error": error}
+    if len(devices) > MAX_DEVICES:
+        return {"error": f"Too many devices ({len(devices)}), maximum is {MAX_DEVICES}"}
+
+    # Resolve quantities (None = every quantity with a reading)
+    wanted_quantity_ids = list(quantity_ids) if quantity_ids else None
+    if quantity_search and not wanted_quantity_ids:
+        resolved_id, _, error = await _resolve_quantity_id(None, quantity_search)
+        if error:
+            return {"error": error}
+        wanted_quantity_ids = [resolved_id]
+
+    now = utc_now_naive()
+    cutoff = now - timedelta(minutes=max_age_minutes)
+
+    # Collect readings per device: cache when ready for the device's tenant
+    cache = get_last_value_cache()
+    readings: dict[int, dict[int, LastValue]] = {}
+    uncached = []
+    for device in devices:
+        if cache is not None and cache.is_ready(device["tenant_id"]):
+            readings[device["id"]] = cache.get(device["id"], wanted_quantity_ids)
+        else:
+            uncached.append(device["id"])
+
+    if uncached:
+        rows = await db.fetch_all(LATEST_QUERY, uncached, cutoff, wanted_quantity_ids)
+        for device_id in uncached:
+            readings[device_id] = {}
+        for row in rows:
+            readings[row["device_id"]][row["quantity_id"]] = LastValue(
+                row["timestamp"], row["value"]
+            )
+
+    # Quantity metadata for everything we are about to report
+    all_quantity_ids = set(wanted_quantity_ids or [])
+    for by_quantity in readings.values():
+        all_quantity_ids.update(by_quantity)
+    quantities = {
+        q["id"]: q for q in await fetch_quantities_by_ids(sorted(all_quantity_ids))
+    }
+
+    result_readings = []
+    missing = []
+    for device in devices:
+        by_quantity = readings.get(device["id"], {})
+        expected = wanted_quantity_ids or sorted(by_quantity)
+        for quantity_id in expected:
+            quantity = quantities.get(quantity_id, {})
+            reading = by_quantity.get(quantity_id)
+            entry = {
+                "device_id": device["id"],
+                "device": device["display_name"],
+                "quantity_id": quantity_id,
+                "quantity": quantity.get("quantity_name", f"Quantity {quantity_id}"),
+                "unit": quantity.get("unit"),
+            }
+            if reading is None or reading.timestamp < cutoff:
+                missing.append(entry)
+                continue
+            result_readings.append({
+                **entry,
+                "value": reading.value,
+                "timestamp": reading.timestamp.isoformat(),
+                "age_minutes": round((now - reading.timestamp).total_seconds() / 60, 1),
+            })
+        if not expected:
+            missing.append({
+                "device_id": device["id"],
+                "device": device["display_name"],
+                "quantity_id": None,
+                "quantity": "any quantity",
+                "unit": None,
+            })
+
+    if not uncached:
+        source = "cache"
+    elif len(uncached) == len(devices):
+        source = "query"
+    else:
+        source = "mixed"
+
+    return {
+        "readings": result_readings,
+        "missing": missing,
+        "max_age_minutes": max_age_minutes,
+        "source": source,
+    }
+
+
+def format_latest_values_response(result: dict) -> str:
+    """Format get_latest_values result for human-readable output."""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    readings = result["readings"]
+    lines = [f"## Latest Values ({len(readings)} readings)", ""]
+
+    current_device = None
+    for r in readings:
+        if r["device"] != current_device:
+            current_device = r["device"]
+            lines.append(f"### {current_device} (ID: {r['device_id']})")
+        value = f"{r['value']:.2f}" if r["value"] is not None else "-"
+        time_str = format_display_datetime(r["timestamp"])
+        lines.append(
+            f"- **{r['quantity']}**: {value} {r['unit'] or ''} "
+            f"({time_str} WIB, {r['age_minutes']} min ago)"
+        )
+
+    if result["missing"]:
+        lines.append("")
+        lines.append(f"### No reading in the last {result['max_age_minutes']} minutes")
+        for m in result["missing"]:
+            lines.append(f"- {m['device']}: {m['quantity']}")
+
+    return "\n".join(lines)
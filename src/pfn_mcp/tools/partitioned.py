@@ -0,0 +1,135 @@
+"""Map-reduce execution of long-range aggregates.
+
+A one-year aggregate over telemetry_15min_agg runs as one query on one
+backend. For long ranges, split_range() cuts the range at calendar month
+boundaries (aligned with the hypertable's time chunks, so each sub-query
+only touches its own chunks), map_partitions() runs the sub-queries
+concurrently on separate pool connections, and PartialAggregate merges the
+mergeable per-partition results: sum, count, min, max (with the time they
+occurred) and avg as sum / count.
+
+Partition boundaries fall on midnight, so no day spans two partitions and
+per-partition COUNT(DISTINCT bucket::date) values can be summed as well.
+"""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from pfn_mcp.config import settings
+from pfn_mcp.tools.concurrency import gather_queries
+
+
+@dataclass
+class PartialAggregate:
+    """Mergeable aggregate of one series (or one partition of it)."""
+
+    sum: float = 0.0
+    count: int = 0
+    min: float | None = None
+    max: float | None = None
+    min_at: Any = None
+    max_at: Any = None
+
+    def add(
+        self,
+        total: float | None,
+        count: int | None,
+        low: float | None,
+        high: float | None,
+        low_at: Any = None,
+        high_at: Any = None,
+    ) -> None:
+        """Merge one partition's sum/count/min/max columns (NULLs are ignored)."""
+        self.sum += float(total or 0)
+        self.count += count or 0
+        if low is not None and (
+            self.min is None
+            or low < self.min
+            or (low == self.min and _earlier(low_at, self.min_at))
+        ):
+            self.min, self.min_at = float(low), low_at
+        if high is not None and (
+            self.max is None
+            or high > self.max
+            or (high == self.max and _earlier(high_at, self.max_at))
+        ):
+            self.max, self.max_at = float(high), high_at
+
+    def merge(self, other: "PartialAggregate") -> None:
+        """Merge another partial aggregate into this one."""
+        self.add(other.sum, other.count, other.min, other.max, other.min_at, other.max_at)
+
+    @property
+    def avg(self) -> float | None:
+        return self.sum / self.count if self.count else None
+
+    def value(self, agg_method: str) -> float | None:
+        """Final value for an aggregation method: sum, avg, min or max."""
+        if agg_method == "avg":
+            return self.avg
+        if agg_method == "min":
+            return self.min
+        if agg_method == "max":
+            return self.max
+        return self.sum
+
+
+def _earlier(a: Any, b: Any) -> bool:
+    """Tie-break for equal min/max values: keep the earliest occurrence."""
+    return a is not None and (b is None or a < b)
+
+
+def _next_month(dt: datetime) -> datetime:
+    """Start of the calendar month after dt (keeps tzinfo)."""
+    first = dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if first.month == 12:
+        return first.replace(year=first.year + 1, month=1)
+    return first.replace(month=first.month + 1)
+
+
+def split_range(
+    start: datetime,
+    end: datetime,
+    min_days: float | None = None,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Split [start, end) at calendar month boundaries.
+
+    Ranges shorter than min_days (default: settings.partition_min_days) are
+    returned as a single partition.
+    """
+    if min_days is None:
+        min_days = settings.partition_min_days
+    if (end - start).total_seconds() < min_days * 86400:
+        return [(start, end)]
+
+    partitions = []
+    lower = start
+    while lower < end:
+        upper = min(_next_month(lower), end)
+        partitions.append((lower, upper))
+        lower = upper
+    return partitions
+
+
+async def map_partitions(
+    run: Callable[[datetime, datetime], Awaitable[Any]],
+    start: datetime,
+    end: datetime,
+    min_days: float | None = None,
+) -> list[Any]:
+    """
+    Run `run(lower, upper)` for every partition of [start, end) concurrently.
+
+    Returns:
+        One result per partition, in time order
+    """
+    partitions = split_range(start, end, min_days)
+    if len(partitions) == 1:
+        return [await run(start, end)]
+    return await gather_queries(
+        *(run(lower, upper) for lower, upper in partitions),
+        limit=settings.partition_concurrency,
+    )
@@ -5,9 +5,10 @@ from datetime import datetime, timedelta
 from typing import Literal
 
 from pfn_mcp import db
+from pfn_mcp.tools.concurrency import gather_queries
 from pfn_mcp.tools.datetime_utils import format_display_datetime
-from pfn_mcp.tools.electricity_cost import parse_period
 from pfn_mcp.tools.group_telemetry import _resolve_asset_devices, _resolve_tag_devices
+from pfn_mcp.tools.periods import parse_period
 from pfn_mcp.tools.resolve import resolve_tenant
 from pfn_mcp.tools.telemetry import _resolve_device_id, _resolve_quantity_id
 
@@ -196,26 +197,6 @@ async def get_peak_analysis(
         LIMIT ${len(device_ids) + 5}
     """
 
-    rows = await db.fetch_all(
-        simple_peak_query,
-        bucket_interval,
-        resolved_qty_id,
-        query_start,
-        query_end,
-        *device_ids,
-        top_n,
-    )
-
-    peaks = []
-    for row in rows:
-        peak_device_id = row.get("peak_device_id")
-        peaks.append({
-            "time": row["time_bucket"].isoformat() if row["time_bucket"] else None,
-            "value": round(row["peak_value"], 2) if row["peak_value"] else None,
-            "device_id": peak_device_id,
-            "device_name": device_map.get(peak_device_id, f"Device {peak_device_id}"),
-        })
-
     # Get overall stats (different placeholder positions - starts at $4)
     stats_placeholders = ", ".join(f"${i+4}" for i in range(len(device_ids)))
     stats_query = f"""
@@ -230,13 +211,35 @@ async def get_peak_analysis(
           AND device_id IN ({stats_placeholders})
     """
 
-    stats = await db.fetch_one(
-        stats_query,
-        resolved_qty_id,
-        query_start,
-        query_end,
-        *device_ids,
-    )
+    # Peaks, stats and the optional device breakdown are independent
+    queries = [
+        db.fetch_all(
+            simple_peak_query,
+            bucket_interval,
+            resolved_qty_id,
+            query_start,
+            query_end,
+            *device_ids,
+            top_n,
+        ),
+        db.fetch_one(stats_query, resolved_qty_id, query_start, query_end, *device_ids),
+    ]
+    with_breakdown = breakdown == "device_daily" and is_group and len(device_ids) > 1
+    if with_breakdown:
+        queries.append(_get_device_daily_breakdown(
+            device_ids, device_map, resolved_qty_id, query_start, query_end
+        ))
+    rows, stats, *breakdown_data = await gather_queries(*queries)
+
+    peaks = []
+    for row in rows:
+        peak_device_id = row.get("peak_device_id")
+        peaks.append({
+            "time": row["time_bucket"].isoformat() if row["time_bucket"] else None,
+            "value": round(row["peak_value"], 2) if row["peak_value"] else None,
+            "device_id": peak_device_id,
+            "device_name": device_map.get(peak_device_id, f"Device {peak_device_id}"),
+        })
 
     # Format period string
     start_str = query_start.strftime("%Y-%m-%d")
@@ -268,11 +271,8 @@ async def get_peak_analysis(
     }
 
     # Add device breakdown if requested and is a group
-    if breakdown == "device_daily" and is_group and len(device_ids) > 1:
-        breakdown_data = await _get_device_daily_breakdown(
-            device_ids, device_map, resolved_qty_id, query_start, query_end
-        )
-        result_dict["breakdown"] = breakdown_data
+    if with_breakdown:
+        result_dict["breakdown"] = breakdown_data[0]
 
     return result_dict
 
@@ -0,0 +1,320 @@
+"""Shared period parsing and normalization for time-range tools.
+
+All tools that accept a `period` go through this module so that relative
+ranges ("24h", "7d", "last 3 hours") resolve to the same snapped window for
+every caller within a 15-minute slot. Anchoring ranges at `datetime.now()`
+with sub-second precision made every call unique, which defeated both
+Postgres buffer locality and the tool-result cache.
+
+Two flavours of period resolution exist:
+- parse_period(): calendar periods for daily-bucketed tables (electricity
+  cost, WAGES, group telemetry). Day/month periods are day-aligned.
+- resolve_time_range(): rolling windows for telemetry tools, which also
+  accept ISO timestamps for start_date/end_date.
+
+All returned datetimes are naive UTC for asyncpg compatibility with
+`timestamp without time zone` columns.
+"""
+
+import re
+from datetime import UTC, datetime, timedelta
+
+# Relative period: "1h", "24h", "7d", "2w", "3M", "1Y"
+RELATIVE_PERIOD = re.compile(r"^(\d+)\s*([hHdDwWmMyY])$")
+MONTH_PERIOD = re.compile(r"^(\d{4})-(\d{2})$")  # 2025-12
+DATE_RANGE = re.compile(r"^(\d{4}-\d{2}-\d{2})\s+to\s+(\d{4}-\d{2}-\d{2})$")
+
+# Rolling windows are snapped to this grid (matches telemetry_15min_agg buckets)
+SNAP_INTERVAL = timedelta(minutes=15)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def utc_now_naive() -> datetime:
+    """Get current time as naive UTC datetime."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def snap_down(dt: datetime, interval: timedelta = SNAP_INTERVAL) -> datetime:
+    """Floor a naive datetime to an epoch-aligned interval boundary."""
+    return dt - (dt - _EPOCH) % interval
+
+
+def snap_up(dt: datetime, interval: timedelta = SNAP_INTERVAL) -> datetime:
+    """Ceil a naive datetime to an epoch-aligned interval boundary."""
+    floored = snap_down(dt, interval)
+    return floored if floored == dt else floored + interval
+
+
+def parse_relative_period(period: str) -> timedelta | None:
+    """
+    Parse relative period string like '1h', '24h', '7d', '2w', '3M', '1Y'.
+
+    Months are approximated as 30 days and years as 365 days.
+    Returns timedelta or None if not a relative period.
+    """
+    match = RELATIVE_PERIOD.match(period.strip())
+    if not match:
+        return None
+
+    value = int(match.group(1))
+    unit = match.group(2).lower()
+
+    if unit == "h":
+        return timedelta(hours=value)
+    elif unit == "w":
+        return timedelta(weeks=value)
+    elif unit == "m":
+        return timedelta(days=value * 30)
+    elif unit == "y":
+        return timedelta(days=value * 365)
+    return timedelta(days=value)
+
+
+def rolling_range(
+    delta: timedelta,
+    now: datetime | None = None,
+    interval: timedelta = SNAP_INTERVAL,
+) -> tuple[datetime, datetime]:
+    """
+    Get a rolling window ending at the next snap boundary after now.
+
+    The end is rounded up so the latest (partial) bucket is still included,
+    and the start keeps the exact requested duration.
+    """
+    end = snap_up(now or utc_now_naive(), interval)
+    return end - delta, end
+
+
+def range_key(start: datetime, end: datetime) -> str:
+    """Canonical string key for a resolved time range."""
+    return f"{start.isoformat(timespec='minutes')}/{end.isoformat(timespec='minutes')}"
+
+
+def _parse_iso_datetime(value: str) -> datetime | None:
+    """Parse an ISO date/datetime string into naive UTC, or None if invalid."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo:
+        dt = dt.astimezone(UTC).replace(tzinfo=None)
+    return dt
+
+
+def resolve_time_range(
+    period: str | None,
+    start_date: str | None,
+    end_date: str | None,
+    default: timedelta = timedelta(hours=24),
+) -> tuple[datetime, datetime] | tuple[None, str]:
+    """
+    Resolve telemetry-style period parameters into a (start, end) range.
+
+    Supports:
+    - Relative rolling windows: "1h", "24h", "7d", "30d", "3M", "1Y" (snapped)
+    - Explicit ISO start_date/end_date (used as given, end defaults to now)
+    - No arguments: rolling window of `default` length (snapped)
+
+    Returns (start, end) naive UTC datetimes or (None, error_message).
+    """
+    if period:
+        delta = parse_relative_period(period)
+        if delta is None:
+            return None, f"Invalid period format: {period}. Use e.g. 24h, 7d, 30d"
+        return rolling_range(delta)
+
+    if start_date:
+        query_start = _parse_iso_datetime(start_date)
+        if query_start is None:
+            return None, f"Invalid start_date format: {start_date}"
+
+        if end_date:
+            query_end = _parse_iso_datetime(end_date)
+            if query_end is None:
+                return None, f"Invalid end_date format: {end_date}"
+        else:
+            query_end = utc_now_naive()
+        return query_start, query_end
+
+    return rolling_range(default)
+
+
+def parse_period(
+    period: str | None,
+    start_date: str | None,
+    end_date: str | None,
+) -> tuple[datetime, datetime] | tuple[None, str]:
+    """
+    Parse calendar period parameters into start/end datetime.
+
+    Supports:
+    - Relative: "7d", "30d", "3M", "1Y" (day-aligned), "24h" (snapped rolling)
+    - Month: "2025-12"
+    - Range: "2025-12-01 to 2025-12-15"
+    - Natural language: "yesterday", "this month", "bulan lalu", ...
+    - Explicit start_date/end_date (YYYY-MM-DD, end inclusive)
+
+    Returns (start, end) naive UTC datetimes or (None, error_message).
+    Note: Returns naive datetimes for compatibility with asyncpg and
+    PostgreSQL timestamp without timezone columns.
+    """
+    now = utc_now_naive()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Explicit date range takes precedence
+    if start_date:
+        try:
+            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        except ValueError:
+            return None, f"Invalid start_date format: {start_date}. Use YYYY-MM-DD"
+
+        if end_date:
+            try:
+                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+                # End of day
+                end_dt = end_dt + timedelta(days=1)
+            except ValueError:
+                return None, f"Invalid end_date format: {end_date}. Use YYYY-MM-DD"
+        else:
+            end_dt = today + timedelta(days=1)  # End of today
+
+        return start_dt, end_dt
+
+    # Parse period string
+    if not period:
+        period = "7d"  # Default
+
+    period = period.strip()
+
+    # Try relative period (7d, 30d, 3M, 1Y are day-aligned; hours roll)
+    match = RELATIVE_PERIOD.match(period)
+    if match:
+        delta = parse_relative_period(period)
+        if match.group(2).lower() == "h":
+            return rolling_range(delta, now)
+        return today - delta, today + timedelta(days=1)
+
+    # Try month period (2025-12)
+    match = MONTH_PERIOD.match(period)
+    if match:
+        year = int(match.group(1))
+        month = int(match.group(2))
+        if not 1 <= month <= 12:
+            return None, f"Invalid month in period: {period}"
+        start_dt = datetime(year, month, 1)
+
+        # Calculate end of month
+        if month == 12:
+            end_dt = datetime(year + 1, 1, 1)
+        else:
+            end_dt = datetime(year, month + 1, 1)
+
+        return start_dt, end_dt
+
+    # Try date range (2025-12-01 to 2025-12-15)
+    match = DATE_RANGE.match(period)
+    if match:
+        try:
+            start_dt = datetime.strptime(match.group(1), "%Y-%m-%d")
+            end_dt = datetime.strptime(match.group(2), "%Y-%m-%d")
+            end_dt = end_dt + timedelta(days=1)  # End of day
+            return start_dt, end_dt
+        except ValueError:
+            return None, f"Invalid date range format: {period}"
+
+    # Try natural language periods (fallback)
+    nl_result = _parse_natural_language_period(period.lower(), today, now)
+    if nl_result:
+        return nl_result
+
+    return None, f"Invalid period format: {period}. Use: 7d, 1M, 2025-12, or date range"
+
+
+_LAST_N_PATTERN = re.compile(r"last\s+(\d+)\s+(day|days|hour|hours)")
+
+
+def _parse_natural_language_period(
+    period: str, today: datetime, now: datetime | None = None
+) -> tuple[datetime, datetime] | None:
+    """Parse common natural language period terms.
+
+    Supports English and Indonesian terms:
+    - yesterday, kemarin
+    - today, hari ini
+    - day before yesterday, kemarin lusa
+    - last week, minggu lalu
+    - this week, minggu ini
+    - last month, bulan lalu
+    - this month, bulan ini
+    - last N days / last N hours
+
+    Returns (start, end) datetimes or None if not recognized.
+    """
+    # Single day references
+    if period in ("yesterday", "kemarin"):
+        yesterday = today - timedelta(days=1)
+        return yesterday, today
+
+    if period in ("today", "hari ini"):
+        return today, today + timedelta(days=1)
+
+    if period in ("day before yesterday", "kemarin lusa", "2 days ago"):
+        day_before = today - timedelta(days=2)
+        return day_before, day_before + timedelta(days=1)
+
+    # Week references
+    if period in ("last week", "minggu lalu"):
+        return today - timedelta(days=7), today + timedelta(days=1)
+
+    if period in ("this week", "minggu ini"):
+        # Monday of this week
+        days_since_monday = today.weekday()
+        start_of_week = today - timedelta(days=days_since_monday)
+        return start_of_week, today + timedelta(days=1)
+
+    # Month references
+    if period in ("last month", "bulan lalu"):
+        # First day of last month
+        last_month_end = today.replace(day=1)
+        if today.month == 1:
+            last_month_start = datetime(today.year - 1, 12, 1)
+        else:
+            last_month_start = datetime(today.year, today.month - 1, 1)
+        return last_month_start, last_month_end
+
+    if period in ("this month", "bulan ini"):
+        first_of_month = today.replace(day=1)
+        return first_of_month, today + timedelta(days=1)
+
+    # "last N days/hours" pattern
+    last_n_match = _LAST_N_PATTERN.match(period)
+    if last_n_match:
+        n = int(last_n_match.group(1))
+        unit = last_n_match.group(2)
+        if unit.startswith("day"):
+            return today - timedelta(days=n), today + timedelta(days=1)
+        return rolling_range(timedelta(hours=n), now)
+
+    return None
+
+
+def normalized_range_key(
+    period: str | None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> str | None:
+    """
+    Get the canonical range key a period resolves to right now.
+
+    Used by the tool-result cache so that a relative period like "24h"
+    only shares a cache entry with calls that resolve to the same window.
+    Returns None if the period cannot be resolved.
+    """
+    if period and parse_relative_period(period) is not None:
+        result = resolve_time_range(period, None, None)
+    else:
+        result = parse_period(period, start_date, end_date)
+    if result[0] is None:
+        return None
+    return range_key(*result)
@@ -3,6 +3,7 @@
 import logging
 
 from pfn_mcp import db
+from pfn_mcp.coverage import get_coverage_index
 
 logger = logging.getLogger(__name__)
 
@@ -106,6 +107,53 @@ def expand_quantity_aliases(search: str) -> list[str]:
     return [f"%{search}%"]
 
 
+async def fetch_quantities_by_ids(
+    quantity_ids: list[int],
+    quantity_id: int | None = None,
+    search: str | None = None,
+) -> list[dict]:
+    """
+    Fetch quantity metadata for a set of quantity IDs.
+
+    Used with the coverage index, which knows which quantity IDs a device
+    reports but not their names/units.
+
+    Args:
+        quantity_ids: Candidate quantity IDs
+        quantity_id: Optional single quantity to keep
+        search: Optional quantity type filter (uses semantic aliases)
+
+    Returns:
+        List of quantity dictionaries ordered by category and name
+    """
+    conditions = ["q.id = ANY($1::int[])"]
+    params: list = [quantity_ids]
+
+    if quantity_id:
+        params.append(quantity_id)
+        conditions.append(f"q.id = ${len(params)}")
+    elif search:
+        pattern_conditions = []
+        for pattern in expand_quantity_aliases(search):
+            params.append(pattern)
+            pattern_conditions.append(f"q.quantity_code ILIKE ${len(params)}")
+        conditions.append(f"({' OR '.join(pattern_conditions)})")
+
+    query = f"""
+        SELECT
+            q.id,
+            q.quantity_code,
+            q.quantity_name,
+            q.unit,
+            q.category,
+            q.aggregation_method
+        FROM quantities q
+        WHERE {" AND ".join(conditions)}
+        ORDER BY q.category, q.quantity_name
+    """
+    return await db.fetch_all(query, *params)
+
+
 async def list_quantities(
     category: str | None = None,
     search: str | None = None,
@@ -129,10 +177,16 @@ async def list_quantities(
 
     # Filter to quantities in use (have telemetry data)
     if in_use_only:
-        in_use_subquery = """
-            q.id IN (SELECT DISTINCT quantity_id FROM telemetry_15min_agg)
-        """
-        conditions.append(in_use_subquery)
+        index = get_coverage_index()
+        if index is not None:
+            conditions.append(f"q.id = ANY(${param_idx}::int[])")
+            params.append(index.quantity_ids_in_use())
+            param_idx += 1
+        else:
+            in_use_subquery = """
+                q.id IN (SELECT DISTINCT quantity_id FROM telemetry_15min_agg)
+            """
+            conditions.append(in_use_subquery)
 
     # Category filter - normalize using aliases
     if category:
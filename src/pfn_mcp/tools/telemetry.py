@@ -1,29 +1,27 @@
 """Telemetry tools - Phase 2 time-series data access."""
 
 import logging
-import re
 from datetime import UTC, datetime, timedelta
 
 from pfn_mcp import db
+from pfn_mcp.config import settings
+from pfn_mcp.tools.cost_guard import (
+    AGG_STEP,
+    RAW_STEP,
+    bucket_count,
+    estimate_rows,
+    within_budget,
+)
 from pfn_mcp.tools.datetime_utils import format_display_datetime
+from pfn_mcp.tools.downsample import DOWNSAMPLE_MODES
+from pfn_mcp.tools.downsample import downsample as downsample_points
+from pfn_mcp.tools.periods import parse_relative_period, resolve_time_range, rolling_range
 from pfn_mcp.tools.quantities import expand_quantity_aliases
 from pfn_mcp.tools.resolve import resolve_tenant
 
 logger = logging.getLogger(__name__)
 
 
-# Period string patterns (e.g., "1h", "24h", "7d", "30d", "3M", "1Y")
-PERIOD_PATTERN = re.compile(r"^(\d+)\s*([hHdDwWmMyY])$")
-
-# Map period units to timedelta kwargs or special handling
-PERIOD_UNITS = {
-    "h": "hours",
-    "d": "days",
-    "w": "weeks",
-    "m": "days",  # months approximated as 30 days
-    "y": "days",  # years approximated as 365 days
-}
-
 # Bucket sizes in minutes for comparison
 BUCKET_MINUTES = {
     "15min": 15,
@@ -53,11 +51,17 @@ BUCKET_LABELS = {
     "1week": "1 week",
 }
 
+# Bucket sizes from finest to coarsest (cost guard downgrade order)
+BUCKET_ORDER = ["1min", "15min", "1hour", "4hour", "1day", "1week"]
+
 # Data source selection thresholds (hours)
 RAW_DATA_THRESHOLD_HOURS = 4  # Use raw data (1-min) below this
 RAW_AGGREGATED_THRESHOLD_HOURS = 24  # Use raw data with 15-min aggregation below this
 RAW_DATA_RETENTION_DAYS = 14  # Raw data retention period
 
+# Default cap on returned points when downsampling
+DEFAULT_MAX_POINTS = 500
+
 # Data source types
 DATA_SOURCE_RAW = "telemetry_data"
 DATA_SOURCE_RAW_AGGREGATED = "telemetry_data_aggregated"
@@ -246,22 +250,9 @@ def parse_period(period: str) -> timedelta | None:
     """
     Parse period string like '1h', '24h', '7d', '30d', '3M', '1Y'.
 
-    Returns timedelta or None if invalid.
+    Returns timedelta or None if invalid. See periods.parse_relative_period.
     """
-    match = PERIOD_PATTERN.match(period.strip())
-    if not match:
-        return None
-
-    value = int(match.group(1))
-    unit = match.group(2).lower()
-
-    if unit == "m":  # months
-        return timedelta(days=value * 30)
-    elif unit == "y":  # years
-        return timedelta(days=value * 365)
-    else:
-        unit_key = PERIOD_UNITS.get(unit, "days")
-        return timedelta(**{unit_key: value})
+    return parse_relative_period(period)
 
 
 def select_bucket(time_range: timedelta) -> str:
@@ -320,6 +311,75 @@ def select_data_source(time_range: timedelta, query_start: datetime) -> tuple[st
         return DATA_SOURCE_AGGREGATED, select_bucket(time_range)
 
 
+def _guard_device_read(
+    device_id: int,
+    quantity_id: int,
+    query_start: datetime,
+    query_end: datetime,
+    data_source: str,
+    bucket: str,
+    max_points: int | None = None,
+) -> tuple[str, str, dict | None]:
+    """
+    Coarsen a device read until its estimated cost fits the budget.
+
+    Raw sources scan one row per minute and the 15-min aggregate one row per
+    stored bucket (see tools/cost_guard.py). Over budget, the next coarser
+    bucket read from telemetry_15min_agg that fits is used instead.
+
+    With max_points (downsampled reads), the response is capped at
+    max_points whatever the bucket, so only the scan budget is checked.
+
+    Returns:
+        Tuple of (data_source, bucket, note); note is None when the
+        requested plan fits
+    """
+    def fetched(scanned: int, source: str, name: str) -> int:
+        if source == DATA_SOURCE_RAW:
+            points = scanned
+        else:
+            points = min(scanned, bucket_count(query_start, query_end, BUCKET_INTERVALS[name]))
+        return points if max_points is None else min(points, max_points)
+
+    def fits(scanned: int, source: str, name: str) -> bool:
+        if max_points is not None:
+            return within_budget(scanned)
+        return within_budget(scanned, fetched(scanned, source, name))
+
+    step = AGG_STEP if data_source == DATA_SOURCE_AGGREGATED else RAW_STEP
+    scanned = estimate_rows([device_id], quantity_id, query_start, query_end, step).rows
+    returned = fetched(scanned, data_source, bucket)
+    if fits(scanned, data_source, bucket):
+        return data_source, bucket, None
+
+    start_index = max(BUCKET_ORDER.index(bucket), 1)
+    if data_source == DATA_SOURCE_AGGREGATED:
+        start_index += 1
+    candidates = BUCKET_ORDER[start_index:]
+    if not candidates:
+        return data_source, bucket, None
+
+    aggregated = estimate_rows([device_id], quantity_id, query_start, query_end).rows
+    new_bucket = next(
+        (
+            name for name in candidates
+            if fits(aggregated, DATA_SOURCE_AGGREGATED, name)
+        ),
+        candidates[-1],
+    )
+    return DATA_SOURCE_AGGREGATED, new_bucket, {
+        "type": "cost_guard",
+        "requested_bucket": bucket,
+        "estimated_rows": scanned,
+        "message": (
+            f"{bucket} buckets over this period would read ~{scanned:,} rows "
+            f"and return ~{returned:,} points (limits {settings.cost_guard_max_scan_rows:,}"
+            f" / {settings.cost_guard_max_result_rows:,}), so {new_bucket} buckets "
+            "are shown instead. Shorten the period for finer buckets."
+        ),
+    }
+
+
 async def _query_raw_telemetry(
     device_id: int,
     quantity_id: int,
@@ -520,6 +580,8 @@ async def get_device_telemetry(
     start_date: str | None = None,
     end_date: str | None = None,
     bucket: str = "auto",
+    downsample: str | None = None,
+    max_points: int = DEFAULT_MAX_POINTS,
 ) -> dict:
     """
     Fetch aggregated telemetry data for a device.
@@ -534,10 +596,18 @@ async def get_device_telemetry(
         start_date: Start date (ISO format, alternative to period)
         end_date: End date (ISO format, defaults to now)
         bucket: Bucket size: "15min", "1hour", "4hour", "1day", "1week", "auto"
+        downsample: "lttb" or "minmax" to cap the output at max_points while
+            keeping peaks (None = return every row)
+        max_points: Maximum points when downsampling
 
     Returns:
         Dictionary with device, quantity, time range, and data points
     """
+    if downsample is not None and downsample not in DOWNSAMPLE_MODES:
+        return {
+            "error": f"Invalid downsample: {downsample}. Use: {', '.join(DOWNSAMPLE_MODES)}"
+        }
+
     # Resolve tenant first (if provided)
     tenant_id = None
     if tenant:
@@ -559,37 +629,11 @@ async def get_device_telemetry(
     if error:
         return {"error": error}
 
-    # Determine time range (use naive UTC for database compatibility)
-    now = datetime.now(UTC).replace(tzinfo=None)
-    if period:
-        delta = parse_period(period)
-        if delta is None:
-            return {"error": f"Invalid period format: {period}. Use e.g. 24h, 7d, 30d"}
-        query_start = now - delta
-        query_end = now
-    elif start_date:
-        try:
-            query_start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
-            # Convert to naive UTC for database
-            if query_start.tzinfo:
-                query_start = query_start.astimezone(UTC).replace(tzinfo=None)
-        except ValueError:
-            return {"error": f"Invalid start_date format: {start_date}"}
-
-        if end_date:
-            try:
-                query_end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-                # Convert to naive UTC for database
-                if query_end.tzinfo:
-                    query_end = query_end.astimezone(UTC).replace(tzinfo=None)
-            except ValueError:
-                return {"error": f"Invalid end_date format: {end_date}"}
-        else:
-            query_end = now
-    else:
-        # Default to last 24 hours
-        query_start = now - timedelta(hours=24)
-        query_end = now
+    # Determine time range (naive UTC, relative periods snapped to 15 min)
+    range_result = resolve_time_range(period, start_date, end_date)
+    if range_result[0] is None:
+        return {"error": range_result[1]}
+    query_start, query_end = range_result
 
     # Select data source and bucket size
     time_range = query_end - query_start
@@ -597,6 +641,9 @@ async def get_device_telemetry(
 
     if bucket == "auto":
         data_source, selected_bucket = select_data_source(time_range, query_start)
+        # Downsampling keeps peaks, so read raw rows instead of 15-min averages
+        if downsample and data_source == DATA_SOURCE_RAW_AGGREGATED:
+            data_source, selected_bucket = DATA_SOURCE_RAW, "1min"
     elif bucket in valid_buckets:
         selected_bucket = bucket
         # Determine data source based on bucket choice
@@ -611,6 +658,14 @@ async def get_device_telemetry(
             "error": f"Invalid bucket: {bucket}. Use: {', '.join(valid_buckets)}, auto"
         }
 
+    # Coarsen the bucket if the read would exceed the cost budget
+    cost_note = None
+    if settings.cost_guard_enabled:
+        data_source, selected_bucket, cost_note = _guard_device_read(
+            resolved_device_id, resolved_quantity_id, query_start, query_end,
+            data_source, selected_bucket, max_points if downsample else None,
+        )
+
     # Execute query based on data source
     if data_source == DATA_SOURCE_RAW:
         rows = await _query_raw_telemetry(
@@ -635,14 +690,18 @@ async def get_device_telemetry(
         point = {
             "time": row["time_bucket"].isoformat() if row["time_bucket"] else None,
             "time_dt": row["time_bucket"],  # datetime object for formatter
-            "avg": round(row["avg"], 3) if row["avg"] is not None else None,
-            "min": round(row["min"], 3) if row["min"] is not None else None,
-            "max": round(row["max"], 3) if row["max"] is not None else None,
-            "sum": round(row["sum"], 3) if row["sum"] is not None else None,
+            "avg": round(float(row["avg"]), 3) if row["avg"] is not None else None,
+            "min": round(float(row["min"]), 3) if row["min"] is not None else None,
+            "max": round(float(row["max"]), 3) if row["max"] is not None else None,
+            "sum": round(float(row["sum"]), 3) if row["sum"] is not None else None,
             "count": row["count"],
         }
         data_points.append(point)
 
+    original_count = len(data_points)
+    if downsample:
+        data_points = downsample_points(data_points, downsample, max_points)
+
     result = {
         "device": {
             "id": device_info["id"],
@@ -663,10 +722,15 @@ async def get_device_telemetry(
             "bucket": selected_bucket,
             "bucket_interval": BUCKET_LABELS[selected_bucket],
             "data_source": data_source,  # which table was used
+            "downsample": downsample,
         },
         "data": data_points,
         "point_count": len(data_points),
     }
+    if downsample:
+        result["original_point_count"] = original_count
+    if cost_note:
+        result["cost_guard"] = cost_note
 
     # Add warning for cumulative quantities (energy)
     if is_cumulative_quantity(resolved_quantity_id):
@@ -705,6 +769,11 @@ def format_telemetry_response(result: dict) -> str:
         source_note = " [raw data]"
     elif data_source == DATA_SOURCE_RAW_AGGREGATED:
         source_note = " [raw aggregated]"
+    if time_range.get("downsample") and "original_point_count" in result:
+        source_note += (
+            f" [{time_range['downsample']} downsampled from "
+            f"{result['original_point_count']} points]"
+        )
 
     lines = [
         f"## Telemetry: {device['name']}",
@@ -714,6 +783,10 @@ def format_telemetry_response(result: dict) -> str:
         "",
     ]
 
+    if "cost_guard" in result:
+        lines.append(f"**Note**: {result['cost_guard']['message']}")
+        lines.append("")
+
     # Show warning for cumulative quantities
     if "warning" in result:
         warning = result["warning"]
@@ -822,10 +895,8 @@ async def get_quantity_stats(
     if delta is None:
         return {"error": f"Invalid period format: {period}. Use e.g. 24h, 7d, 30d"}
 
-    # Use naive UTC for database compatibility
-    now = datetime.now(UTC).replace(tzinfo=None)
-    query_start = now - delta
-    query_end = now
+    # Snapped rolling window (naive UTC for database compatibility)
+    query_start, query_end = rolling_range(delta)
 
     # Query stats from telemetry_15min_agg
     # Note: telemetry_15min_agg has aggregated_value column (no separate min/max/avg)
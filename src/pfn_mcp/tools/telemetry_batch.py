@@ -0,0 +1,360 @@
+"""Batch telemetry tool - many devices x many quantities in one call.
+
+get_device_telemetry resolves and queries one device/quantity pair per call.
+This tool resolves device and quantity lists in bulk and reads every series
+with a single = ANY() query on the selected data tier, returning a shared
+time axis with one value array per series. Every tier is time-bucketed
+(raw data into 1-minute buckets), since meters do not report at the same
+instant and raw timestamps would not line up across devices.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from pfn_mcp import db
+from pfn_mcp.tools.datetime_utils import format_display_datetime
+from pfn_mcp.tools.periods import resolve_time_range
+from pfn_mcp.tools.resolve import resolve_tenant
+from pfn_mcp.tools.telemetry import (
+    BUCKET_INTERVALS,
+    BUCKET_LABELS,
+    DATA_SOURCE_RAW,
+    DATA_SOURCE_RAW_AGGREGATED,
+    _resolve_device_id,
+    _resolve_quantity_id,
+    is_cumulative_quantity,
+    select_data_source,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds per call (series = devices x quantities)
+MAX_DEVICES = 20
+MAX_QUANTITIES = 10
+MAX_SERIES = 60
+
+DEVICES_BY_ID_QUERY = """
+    SELECT id, display_name, device_code, tenant_id
+    FROM devices
+    WHERE id = ANY($1::int[]) AND is_active = true
+"""
+
+QUANTITIES_BY_ID_QUERY = """
+    SELECT id, quantity_code, quantity_name, unit, aggregation_method
+    FROM quantities
+    WHERE id = ANY($1::int[]) AND is_active = true
+"""
+
+# Raw tiers (1min and short ranges); 1min reads use a 1-minute bucket
+RAW_AGGREGATED_QUERY = """
+    SELECT
+        time_bucket($1::interval, timestamp) as time_bucket,
+        device_id,
+        quantity_id,
+        AVG(value) as value
+    FROM telemetry_data
+    WHERE device_id = ANY($2::int[])
+      AND quantity_id = ANY($3::int[])
+      AND timestamp >= $4
+      AND timestamp < $5
+    GROUP BY 1, device_id, quantity_id
+    ORDER BY 1
+"""
+
+AGGREGATED_QUERY = """
+    SELECT
+        time_bucket($1::interval, bucket) as time_bucket,
+        device_id,
+        quantity_id,
+        AVG(aggregated_value) as value
+    FROM telemetry_15min_agg
+    WHERE device_id = ANY($2::int[])
+      AND quantity_id = ANY($3::int[])
+      AND bucket >= $4
+      AND bucket < $5
+    GROUP BY 1, device_id, quantity_id
+    ORDER BY 1
+"""
+
+
+def _dedupe(rows: list[dict]) -> list[dict]:
+    """Drop rows whose id was already seen, keeping order."""
+    seen: set[int] = set()
+    unique = []
+    for row in rows:
+        if row["id"] not in seen:
+            seen.add(row["id"])
+            unique.append(dict(row))
+    return unique
+
+
+async def _resolve_devices(
+    device_ids: list[int] | None,
+    device_names: list[str] | None,
+    tenant_id: int | None,
+) -> tuple[list[dict], str | None]:
+    """Resolve devices: IDs in one query, names via fuzzy search (deduplicated)."""
+    devices: list[dict] = []
+    if device_ids:
+        rows = await db.fetch_all(DEVICES_BY_ID_QUERY, list(device_ids))
+        by_id = {row["id"]: row for row in rows}
+        for device_id in device_ids:
+            device = by_id.get(device_id)
+            if device is None:
+                return [], f"Device ID not found: {device_id}"
+            if tenant_id is not None and device["tenant_id"] != tenant_id:
+                return [], f"Device ID {device_id} not accessible for this tenant"
+            devices.append(device)
+    for name in device_names or []:
+        _, device, error = await _resolve_device_id(None, name, tenant_id)
+        if error:
+            return [], error
+        devices.append(device)
+
+    return _dedupe(devices), None
+
+
+async def _resolve_quantities(
+    quantity_ids: list[int] | None,
+    quantity_searches: list[str] | None,
+) -> tuple[list[dict], str | None]:
+    """Resolve quantities: IDs in one query, search terms via aliases (deduplicated)."""
+    quantities: list[dict] = []
+    if quantity_ids:
+        rows = await db.fetch_all(QUANTITIES_BY_ID_QUERY, list(quantity_ids))
+        by_id = {row["id"]: row for row in rows}
+        for quantity_id in quantity_ids:
+            if quantity_id not in by_id:
+                return [], f"Quantity ID not found: {quantity_id}"
+            quantities.append(by_id[quantity_id])
+    for search in quantity_searches or []:
+        _, quantity, error = await _resolve_quantity_id(None, search)
+        if error:
+            return [], error
+        quantities.append(quantity)
+
+    return _dedupe(quantities), None
+
+
+def _select_source(
+    bucket: str, query_start: datetime, query_end: datetime
+) -> tuple[str, str] | tuple[None, str]:
+    """Select (data_source, bucket) like get_device_telemetry, or (None, error)."""
+    time_range = query_end - query_start
+    auto_source, auto_bucket = select_data_source(time_range, query_start)
+    if bucket == "auto":
+        return auto_source, auto_bucket
+    if bucket not in BUCKET_LABELS:
+        valid = ", ".join(BUCKET_LABELS)
+        return None, f"Invalid bucket: {bucket}. Use: {valid}, auto"
+    if bucket == "1min":
+        return DATA_SOURCE_RAW, bucket
+    if auto_source == DATA_SOURCE_RAW:
+        return DATA_SOURCE_RAW_AGGREGATED, bucket
+    return auto_source, bucket
+
+
+def align_series(
+    rows: list[dict],
+    pairs: list[tuple[int, int]],
+) -> tuple[list[datetime], dict[tuple[int, int], list[float | None]]]:
+    """
+    Align (time_bucket, device_id, quantity_id, value) rows on a shared axis.
+
+    Args:
+        rows: Query rows ordered by time_bucket
+        pairs: (device_id, quantity_id) pairs to return, in output order
+
+    Returns:
+        (timestamps, values) where values maps each pair to one value per
+        timestamp (None where the series has no row)
+    """
+    timestamps = sorted({row["time_bucket"] for row in rows})
+    index = {ts: i for i, ts in enumerate(timestamps)}
+    values = {pair: [None] * len(timestamps) for pair in pairs}
+    for row in rows:
+        series = values.get((row["device_id"], row["quantity_id"]))
+        if series is not None and row["value"] is not None:
+            series[index[row["time_bucket"]]] = round(row["value"], 3)
+    return timestamps, values
+
+
+async def get_batch_telemetry(
+    device_ids: list[int] | None = None,
+    device_names: list[str] | None = None,
+    tenant: str | None = None,
+    quantity_ids: list[int] | None = None,
+    quantity_searches: list[str] | None = None,
+    period: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    bucket: str = "auto",
+) -> dict:
+    """
+    Fetch telemetry for several devices and quantities in one call.
+
+    Args:
+        device_ids: Device IDs (preferred)
+        device_names: Device names (fuzzy search)
+        tenant: Tenant name or code to filter devices (optional)
+        quantity_ids: Quantity IDs (preferred)
+        quantity_searches: Quantity search terms (use semantic aliases)
+        period: Time period like "1h", "24h", "7d", "30d", "3M", "1Y"
+        start_date: Start date (ISO format, alternative to period)
+        end_date: End date (ISO format, defaults to now)
+        bucket: Bucket size: "1min", "15min", "1hour", "4hour", "1day", "1week", "auto"
+
+    Returns:
+        Dictionary with the shared time axis and one value array per
+        device/quantity series
+    """
+    if not device_ids and not device_names:
+        return {"error": "Either device_ids or device_names is required"}
+    if not quantity_ids and not quantity_searches:
+        return {"error": "Either quantity_ids or quantity_searches is required"}
+
+    tenant_id = None
+    if tenant:
+        tenant_id, _, error = await resolve_tenant(tenant)
+        if error:
+            return {"error": error}
+
+    devices, error = await _resolve_devices(device_ids, device_names, tenant_id)
+    if error:
+        return {"error": error}
+    quantities, error = await _resolve_quantities(quantity_ids, quantity_searches)
+    if error:
+        return {"error": error}
+
+    if len(devices) > MAX_DEVICES:
+        return {"error": f"Too many devices ({len(devices)}), maximum is {MAX_DEVICES}"}
+    if len(quantities) > MAX_QUANTITIES:
+        return {
+            "error": f"Too many quantities ({len(quantities)}), maximum is {MAX_QUANTITIES}"
+        }
+    if len(devices) * len(quantities) > MAX_SERIES:
+        return {
+            "error": (
+                f"Too many series ({len(devices)} devices x {len(quantities)} "
+                f"quantities), maximum is {MAX_SERIES}"
+            )
+        }
+
+    range_result = resolve_time_range(period, start_date, end_date)
+    if range_result[0] is None:
+        return {"error": range_result[1]}
+    query_start, query_end = range_result
+
+    data_source, selected_bucket = _select_source(bucket, query_start, query_end)
+    if data_source is None:
+        return {"error": selected_bucket}
+
+    device_id_list = [d["id"] for d in devices]
+    quantity_id_list = [q["id"] for q in quantities]
+    if data_source in (DATA_SOURCE_RAW, DATA_SOURCE_RAW_AGGREGATED):
+        query = RAW_AGGREGATED_QUERY
+    else:
+        query = AGGREGATED_QUERY
+    bucket_interval = BUCKET_INTERVALS.get(selected_bucket, timedelta(minutes=15))
+    rows = await db.fetch_all(
+        query, bucket_interval, device_id_list, quantity_id_list, query_start, query_end
+    )
+
+    pairs = [(d["id"], q["id"]) for d in devices for q in quantities]
+    timestamps, values = align_series(rows, pairs)
+
+    device_names_by_id = {
+        d["id"]: d.get("display_name") or d.get("device_code") for d in devices
+    }
+    quantities_by_id = {q["id"]: q for q in quantities}
+    series = []
+    for device_id, quantity_id in pairs:
+        quantity = quantities_by_id[quantity_id]
+        series_values = values[(device_id, quantity_id)]
+        present = [v for v in series_values if v is not None]
+        series.append({
+            "device_id": device_id,
+            "device": device_names_by_id[device_id],
+            "quantity_id": quantity_id,
+            "quantity": quantity["quantity_name"],
+            "unit": quantity.get("unit"),
+            "values": series_values,
+            "avg": round(sum(present) / len(present), 3) if present else None,
+            "min": min(present) if present else None,
+            "max": max(present) if present else None,
+            "last": present[-1] if present else None,
+            "count": len(present),
+        })
+
+    result = {
+        "time_range": {
+            "start": query_start.isoformat(),
+            "end": query_end.isoformat(),
+            "start_dt": query_start,  # datetime object for formatter
+            "end_dt": query_end,  # datetime object for formatter
+            "bucket": selected_bucket,
+            "bucket_interval": BUCKET_LABELS[selected_bucket],
+            "data_source": data_source,
+        },
+        "timestamps": [ts.isoformat() for ts in timestamps],
+        "series": series,
+        "point_count": len(timestamps),
+        "series_count": len(series),
+    }
+
+    cumulative = [q["quantity_name"] for q in quantities if is_cumulative_quantity(q["id"])]
+    if cumulative:
+        result["warning"] = {
+            "type": "cumulative_quantity",
+            "message": (
+                f"Note: {', '.join(cumulative)} are cumulative (meter reading) "
+                "quantities. The values shown are meter readings, not consumption. "
+                "For actual consumption, use `get_energy_consumption` instead."
+            ),
+            "recommendation": "get_energy_consumption",
+        }
+
+    return result
+
+
+def format_batch_telemetry_response(result: dict) -> str:
+    """Format get_batch_telemetry response for human-readable output."""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    time_range = result["time_range"]
+    start_str = format_display_datetime(time_range.get("start_dt")) or time_range["start"][:16]
+    end_str = format_display_datetime(time_range.get("end_dt")) or time_range["end"][:16]
+
+    lines = [
+        f"## Batch Telemetry ({result['series_count']} series)",
+        f"**Period**: {start_str} to {end_str} (WIB)",
+        f"**Bucket**: {time_range['bucket']} ({result['point_count']} points per series)",
+        "",
+    ]
+
+    if "warning" in result:
+        warning = result["warning"]
+        lines.append(f"**Warning**: {warning['message']}")
+        lines.append(f"Recommended tool: `{warning['recommendation']}`")
+        lines.append("")
+
+    if result["point_count"] == 0:
+        lines.append("No data available for this period.")
+        lines.append("\nTry using `get_device_data_range` to check data availability.")
+        return "\n".join(lines)
+
+    lines.append("| Device | Quantity | Avg | Min | Max | Last | Points |")
+    lines.append("|--------|----------|-----|-----|-----|------|--------|")
+
+    def fmt(value: float | None) -> str:
+        return f"{value:.2f}" if value is not None else "-"
+
+    for s in result["series"]:
+        unit = f" ({s['unit']})" if s["unit"] else ""
+        lines.append(
+            f"| {s['device']} | {s['quantity']}{unit} | {fmt(s['avg'])} | "
+            f"{fmt(s['min'])} | {fmt(s['max'])} | {fmt(s['last'])} | {s['count']} |"
+        )
+
+    return "\n".join(lines)
@@ -17,13 +17,17 @@ from datetime import timedelta
 from typing import Literal
 
 from pfn_mcp import db
-from pfn_mcp.tools.electricity_cost import parse_period
+from pfn_mcp.tools.concurrency import gather_queries
+from pfn_mcp.tools.datetime_utils import format_display_datetime
 from pfn_mcp.tools.formula_parser import (
     FormulaParseError,
     calculate_formula_result,
+    formula_coefficients,
     get_all_device_ids,
     parse_formula,
 )
+from pfn_mcp.tools.partitioned import PartialAggregate, map_partitions
+from pfn_mcp.tools.periods import parse_period
 from pfn_mcp.tools.resolve import resolve_tenant
 
 logger = logging.getLogger(__name__)
@@ -42,6 +46,14 @@ OutputType = Literal["summary", "timeseries"]
 ACTIVE_ENERGY_QTY_IDS = (124, 131)
 CUMULATIVE_QUANTITY_IDS = {62, 89, 96, 124, 130, 131, 481}
 
+# Value expression of the combined timeseries per agg_method (fixed SQL only)
+SERIES_VALUE_EXPRESSIONS = {
+    "sum": "SUM(c.sign * t.aggregated_value)",
+    "avg": "AVG(t.aggregated_value)",
+    "max": "MAX(t.aggregated_value)",
+    "min": "MIN(t.aggregated_value)",
+}
+
 BUCKET_MINUTES = {
     "15min": 15,
     "1hour": 60,
@@ -50,6 +62,9 @@ BUCKET_MINUTES = {
     "1week": 10080,
 }
 
+# Maximum points in the combined series for output="timeseries"
+TIMESERIES_MAX_POINTS = 500
+
 
 async def get_wages_data(
     # Scope parameters (use ONE)
@@ -102,6 +117,12 @@ async def get_wages_data(
     Returns:
         Result dict with summary, optional breakdown, and metadata
     """
+    if agg_method is not None and agg_method not in SERIES_VALUE_EXPRESSIONS:
+        return {
+            "error": f"Invalid agg_method: {agg_method}. "
+            f"Use: {', '.join(SERIES_VALUE_EXPRESSIONS)}"
+        }
+
     # Resolve scope
     scope_result = await _resolve_scope(
         device_id=device_id,
@@ -882,19 +903,15 @@ async def _query_telemetry(
     # Build device filter
     device_placeholders = ", ".join(f"${i+4}" for i in range(len(device_ids)))
 
-    # Map agg_method to SQL function
-    sql_agg = {
-        "sum": "SUM(aggregated_value)",
-        "avg": "AVG(aggregated_value)",
-        "max": "MAX(aggregated_value)",
-        "min": "MIN(aggregated_value)",
-    }.get(agg_method, "SUM(aggregated_value)")
-
-    # Query per-device aggregates for formula support
+    # Query per-device partial aggregates for formula support. Only mergeable
+    # aggregates, so long ranges run per month partition and are merged here.
     device_query = f"""
         SELECT
             device_id,
-            {sql_agg} as value,
+            SUM(aggregated_value) as sum_value,
+            COUNT(aggregated_value) as value_count,
+            MIN(aggregated_value) as min_value,
+            MAX(aggregated_value) as max_value,
             SUM(sample_count) as samples
         FROM telemetry_15min_agg
         WHERE bucket >= $1
@@ -904,7 +921,23 @@ async def _query_telemetry(
         GROUP BY device_id
     """
 
-    rows = await db.fetch_all(device_query, query_start, query_end, qty_id, *device_ids)
+    partitions_query = map_partitions(
+        lambda lower, upper: db.fetch_all(device_query, lower, upper, qty_id, *device_ids),
+        query_start,
+        query_end,
+    )
+    if output == "timeseries":
+        series_bucket = _select_bucket(time_range, 1, target_rows=TIMESERIES_MAX_POINTS)
+        partitions, series_rows = await gather_queries(
+            partitions_query,
+            _query_telemetry_timeseries(
+                device_ids, qty_id, query_start, query_end,
+                series_bucket, agg_method, formula_terms,
+            ),
+        )
+    else:
+        partitions = await partitions_query
+    rows = _merge_device_partials(partitions, agg_method)
 
     if not rows:
         return {
@@ -973,9 +1006,102 @@ async def _query_telemetry(
         result["breakdown"] = breakdown_data
         result["breakdown_type"] = "device"
 
+    if output == "timeseries":
+        result["timeseries"] = {
+            "bucket": series_bucket,
+            "data": [
+                {
+                    "time": row["time_bucket"].isoformat(),
+                    "time_dt": row["time_bucket"],
+                    "value": round(float(row["value"]), 3),
+                    "devices": row["device_count"],
+                }
+                for row in series_rows
+                if row["value"] is not None
+            ],
+        }
+        result["timeseries"]["point_count"] = len(result["timeseries"]["data"])
+
     return result
 
 
+def _series_coefficients(device_ids: list[int], formula_terms=None) -> dict[int, int]:
+    """Per-device sign for the combined series: formula signs, else +1."""
+    if formula_terms is not None:
+        return formula_coefficients(formula_terms)
+    return {device_id: 1 for device_id in device_ids}
+
+
+async def _query_telemetry_timeseries(
+    device_ids: list[int],
+    qty_id: int,
+    query_start,
+    query_end,
+    bucket: str,
+    agg_method: str,
+    formula_terms=None,
+) -> list[dict]:
+    """
+    Query the combined series of the scope, one row per time bucket.
+
+    For "sum" the formula is applied in SQL: devices are joined to their
+    signs via unnest() and each bucket is SUM(sign * aggregated_value), so
+    "(94+11)-(84)" comes back as one series instead of one per device.
+    Signs do not apply to avg/max/min, which aggregate all devices as-is.
+    """
+    if agg_method not in SERIES_VALUE_EXPRESSIONS:
+        raise ValueError(f"Invalid agg_method: {agg_method}")
+    value_expr = SERIES_VALUE_EXPRESSIONS[agg_method]
+    coefficients = _series_coefficients(device_ids, formula_terms)
+
+    query = f"""
+        WITH coef AS (
+            SELECT * FROM unnest($4::int[], $5::float8[]) AS c(device_id, sign)
+        )
+        SELECT
+            time_bucket($1::interval, t.bucket) as time_bucket,
+            {value_expr} as value,
+            COUNT(DISTINCT t.device_id) as device_count
+        FROM telemetry_15min_agg t
+        JOIN coef c ON c.device_id = t.device_id
+        WHERE t.bucket >= $2
+          AND t.bucket < $3
+          AND t.quantity_id = $6
+        GROUP BY 1
+        ORDER BY 1
+    """
+    return await db.fetch_all(
+        query,
+        timedelta(minutes=BUCKET_MINUTES[bucket]),
+        query_start,
+        query_end,
+        list(coefficients),
+        [float(sign) for sign in coefficients.values()],
+        qty_id,
+    )
+
+
+def _merge_device_partials(partitions: list[list[dict]], agg_method: str) -> list[dict]:
+    """Merge per-partition device aggregates into device_id/value/samples rows."""
+    partials: dict[int, PartialAggregate] = {}
+    samples: dict[int, int] = {}
+    for rows in partitions:
+        for row in rows:
+            device_id = row["device_id"]
+            partials.setdefault(device_id, PartialAggregate()).add(
+                row["sum_value"], row["value_count"], row["min_value"], row["max_value"]
+            )
+            samples[device_id] = samples.get(device_id, 0) + (row["samples"] or 0)
+    return [
+        {
+            "device_id": device_id,
+            "value": partial.value(agg_method),
+            "samples": samples[device_id],
+        }
+        for device_id, partial in partials.items()
+    ]
+
+
 async def _resolve_quantity(
     quantity_id: int | None, quantity_search: str | None
 ) -> tuple[int | None, dict | None, str | None]:
@@ -1018,10 +1144,11 @@ async def _resolve_quantity(
     return None, None, "Either quantity_id or quantity_search is required"
 
 
-def _select_bucket(time_range: timedelta, device_count: int) -> str:
+def _select_bucket(
+    time_range: timedelta, device_count: int, target_rows: int = 1000
+) -> str:
     """Select optimal bucket size based on time range and device count."""
     hours = time_range.total_seconds() / 3600
-    target_rows = 1000
     target_buckets = target_rows // max(device_count, 1)
 
     bucket_order = ["15min", "1hour", "4hour", "1day", "1week"]
@@ -1153,6 +1280,28 @@ def format_wages_data_response(result: dict) -> str:
         if len(result["breakdown"]) > 10:
             lines.append(f"- _(and {len(result['breakdown']) - 10} more...)_")
 
+    # Combined series (output="timeseries")
+    if "timeseries" in result:
+        series = result["timeseries"]
+        data = series["data"]
+        unit = summary.get("unit", "")
+        lines.append("")
+        lines.append(
+            f"### Time Series ({series['bucket']} buckets, {series['point_count']} points)"
+        )
+
+        def format_point(p: dict) -> str:
+            time_str = format_display_datetime(p.get("time_dt")) or p["time"][:16]
+            return f"- {time_str}: {p['value']:,.3f} {unit}"
+
+        if len(data) <= 10:
+            lines.extend(format_point(p) for p in data)
+        else:
+            # Show first 3 and last 3
+            lines.extend(format_point(p) for p in data[:3])
+            lines.append(f"  ... ({len(data) - 6} more points) ...")
+            lines.extend(format_point(p) for p in data[-3:])
+
     return "\n".join(lines)
 
 
@@ -0,0 +1,448 @@
+"""Lightweight span tracing from chat turn to SQL statement.
+
+Spans nest through a context variable, so asyncio tasks started inside a
+span (gathered queries, singleflight leaders) attach to it automatically:
+
+    chat.turn (trace id = request id)
+      llm.iteration
+        llm.stream
+        tool.execute (tool=...)
+          db.query
+            db.acquire   (admission slot + pool acquire)
+
+The MCP server starts its traces at mcp.call_tool instead of chat.turn.
+Each SQL statement carries a sqlcommenter-style comment with the W3C
+traceparent of its db.query span, so statements in Postgres logs
+(log_min_duration_statement, pg_stat_activity) can be matched to a trace.
+
+Finished traces are exported when their root span ends, either as JSONL to
+a local file or as OTLP/HTTP JSON to a collector. Tracing is off unless
+tracing_enabled is set; disabled spans cost one settings check.
+
+Render a trace file with:
+    python -m pfn_mcp.tracing show traces/spans.jsonl --slowest 5
+    python -m pfn_mcp.tracing folded traces/spans.jsonl > stacks.txt  # flamegraph.pl / speedscope
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import secrets
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from pfn_mcp.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest SQL text kept in a span (statements are normalized to one line)
+MAX_STATEMENT_LENGTH = 500
+
+
+@dataclass
+class Span:
+    """One timed operation in a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    sampled: bool = True
+    tool: str | None = None  # inherited, tagged onto SQL comments
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        attributes = dict(self.attributes)
+        statement = attributes.get("db.statement")
+        if isinstance(statement, str):
+            attributes["db.statement"] = " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+
+# Spans of traces whose root is still open (exported together with the root)
+_pending: dict[str, list[Span]] = {}
+
+
+def current_span() -> Span | None:
+    """The innermost open span of this context, if tracing."""
+    span = _current.get()
+    return span if span is not None and span.sampled else None
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes on the current span (no-op when not tracing)."""
+    span = current_span()
+    if span is not None:
+        span.set(**attributes)
+
+
+def start_span(name: str, trace_id: str | None = None, **attributes: Any) -> Span | None:
+    """
+    Start a span under the current one without making it current.
+
+    Returns None when tracing is disabled. A new trace is started (and
+    sampled at tracing_sample_rate) when there is no current span.
+    """
+    if not settings.tracing_enabled:
+        return None
+    parent = _current.get()
+    if parent is None:
+        sampled = random.random() < settings.tracing_sample_rate
+        trace_id = trace_id or secrets.token_hex(16)
+        if sampled:
+            _pending[trace_id] = []
+    else:
+        sampled = parent.sampled
+        trace_id = parent.trace_id
+    return Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+        sampled=sampled,
+        tool=attributes.get("tool") or (parent.tool if parent else None),
+    )
+
+
+def end_span(span: Span | None, error: str | None = None) -> None:
+    """Finish a span (idempotent); exports the trace when its root ends."""
+    if span is None or span.end_ns is not None:
+        return
+    span.end_ns = time.time_ns()
+    if error:
+        span.error = error
+    if not span.sampled:
+        return
+    if span.parent_id is None:
+        finished = _pending.pop(span.trace_id, [])
+        finished.append(span)
+        _export(finished)
+    elif span.trace_id in _pending:
+        _pending[span.trace_id].append(span)
+    else:
+        # Outlived its root (detached task) - export on its own
+        _export([span])
+
+
+@contextmanager
+def span(name: str, trace_id: str | None = None, **attributes: Any) -> Iterator[Span | None]:
+    """Run the block as a span (yields None when tracing is disabled)."""
+    current = start_span(name, trace_id, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    error = None
+    try:
+        yield current
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Async generator closed from another context (client went away)
+            pass
+        end_span(current, error)
+
+
+# ============================================================================
+# SQL comments
+# ============================================================================
+
+
+def sql_comment() -> str:
+    """sqlcommenter comment for the current span ('' when not tracing)."""
+    current = current_span()
+    if current is None or not settings.tracing_sql_comments:
+        return ""
+    tags = {
+        "application": settings.server_name,
+        "traceparent": f"00-{current.trace_id}-{current.span_id}-01",
+    }
+    if current.tool:
+        tags["tool"] = current.tool
+    pairs = ",".join(f"{key}='{quote(str(value), safe='')}'" for key, value in sorted(tags.items()))
+    return f"/*{pairs}*/"
+
+
+def with_sql_comment(query: str) -> str:
+    """Append the trace comment to a statement (before a trailing semicolon)."""
+    comment = sql_comment()
+    if not comment:
+        return query
+    body = query.rstrip()
+    if body.endswith(";"):
+        return f"{body[:-1]} {comment};"
+    return f"{body} {comment}"
+
+
+# ============================================================================
+# Export
+# ============================================================================
+
+
+class FileExporter:
+    """Appends finished spans as JSON lines."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def export(self, spans: list[Span]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: list[Span], service_name: str) -> dict:
+    """OTLP/HTTP JSON ExportTraceServiceRequest for the spans."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": service_name}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "pfn_mcp.tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        "parentSpanId": s.parent_id or "",
+                        "name": s.name,
+                        "kind": 1,  # internal
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [
+                            {"key": k, "value": _otlp_value(v)}
+                            for k, v in s.to_dict()["attributes"].items()
+                        ],
+                        "status": (
+                            {"code": 2, "message": s.error} if s.error else {"code": 1}
+                        ),
+                    }
+                    for s in spans
+                ],
+            }],
+        }],
+    }
+
+
+class OTLPExporter:
+    """Posts finished traces to an OTLP/HTTP collector (JSON encoding)."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _post(self, payload: dict) -> None:
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.post(self.url, json=payload)
+                response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"OTLP trace export failed: {e}")
+
+    def export(self, spans: list[Span]) -> None:
+        payload = otlp_payload(spans, self.service_name)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._post(payload))
+            return
+        # Never block the request on the collector
+        task = loop.create_task(self._post(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+_exporter: FileExporter | OTLPExporter | None = None
+
+
+def get_exporter() -> FileExporter | OTLPExporter:
+    """Get the configured exporter."""
+    global _exporter
+    if _exporter is None:
+        if settings.tracing_exporter == "otlp":
+            _exporter = OTLPExporter(settings.tracing_otlp_endpoint, settings.server_name)
+        else:
+            _exporter = FileExporter(settings.tracing_file)
+    return _exporter
+
+
+def _export(spans: list[Span]) -> None:
+    try:
+        get_exporter().export(spans)
+    except Exception as e:
+        logger.warning(f"Trace export failed: {e}")
+
+
+# ============================================================================
+# Rendering (CLI)
+# ============================================================================
+
+
+def load_traces(path: Path) -> dict[str, list[dict]]:
+    """Spans of a JSONL trace file grouped by trace id."""
+    traces: dict[str, list[dict]] = {}
+    with path.open() as f:
+        for line in f:
+            if line.strip():
+                s = json.loads(line)
+                traces.setdefault(s["trace_id"], []).append(s)
+    return traces
+
+
+def span_label(s: dict) -> str:
+    """Span name plus its most telling attribute."""
+    attributes = s.get("attributes", {})
+    for key in ("tool", "iteration", "db.operation"):
+        if key in attributes:
+            return f"{s['name']} {attributes[key]}"
+    return s["name"]
+
+
+def _children(spans: list[dict]) -> tuple[list[dict], dict[str, list[dict]]]:
+    ids = {s["span_id"] for s in spans}
+    roots, children = [], {}
+    for s in sorted(spans, key=lambda s: s["start_ns"]):
+        if s["parent_id"] in ids:
+            children.setdefault(s["parent_id"], []).append(s)
+        else:
+            roots.append(s)
+    return roots, children
+
+
+def _duration_ms(s: dict) -> float:
+    return ((s["end_ns"] or s["start_ns"]) - s["start_ns"]) / 1e6
+
+
+def render_trace(spans: list[dict], width: int = 40) -> str:
+    """Waterfall of one trace: span tree with time bars relative to the root."""
+    roots, children = _children(spans)
+    begin = min(s["start_ns"] for s in spans)
+    total = max((s["end_ns"] or s["start_ns"]) for s in spans) - begin or 1
+    lines = []
+
+    def walk(s: dict, depth: int) -> None:
+        offset = round((s["start_ns"] - begin) / total * width)
+        length = max(round(((s["end_ns"] or s["start_ns"]) - s["start_ns"]) / total * width), 1)
+        bar = " " * offset + "█" * min(length, width - offset)
+        own = _duration_ms(s) - sum(_duration_ms(c) for c in children.get(s["span_id"], []))
+        label = ("  " * depth + span_label(s))[:48]
+        flag = "  !" if s.get("error") else ""
+        lines.append(
+            f"{label:<48} {_duration_ms(s):>10.1f}ms {max(own, 0):>9.1f}ms "
+            f"|{bar:<{width}}|{flag}"
+        )
+        for child in children.get(s["span_id"], []):
+            walk(child, depth + 1)
+
+    lines.append(f"{'span':<48} {'total':>12} {'self':>11}")
+    for root in roots:
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def folded_stacks(traces: dict[str, list[dict]]) -> dict[str, float]:
+    """Self time (ms) per span stack across traces, for flame graph tools."""
+    stacks: dict[str, float] = {}
+    for spans in traces.values():
+        roots, children = _children(spans)
+
+        def walk(s: dict, prefix: str) -> None:
+            stack = f"{prefix};{span_label(s)}" if prefix else span_label(s)
+            kids = children.get(s["span_id"], [])
+            own = _duration_ms(s) - sum(_duration_ms(c) for c in kids)
+            stacks[stack] = stacks.get(stack, 0.0) + max(own, 0.0)
+            for child in kids:
+                walk(child, stack)
+
+        for root in roots:
+            walk(root, "")
+    return stacks
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(prog="python -m pfn_mcp.tracing")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    show = commands.add_parser("show", help="Waterfall breakdown of traces")
+    show.add_argument("path", type=Path)
+    show.add_argument("--trace", help="Trace / request id (default: slowest traces)")
+    show.add_argument("--slowest", type=int, default=3, help="How many traces to show")
+
+    folded = commands.add_parser("folded", help="Folded stacks (self time in us)")
+    folded.add_argument("path", type=Path)
+
+    args = parser.parse_args(argv)
+    traces = load_traces(args.path)
+
+    if args.command == "folded":
+        for stack, ms in sorted(folded_stacks(traces).items()):
+            print(f"{stack} {round(ms * 1000)}")
+        return
+
+    if args.trace:
+        selected = [args.trace] if args.trace in traces else []
+    else:
+        selected = sorted(
+            traces, key=lambda t: -max(_duration_ms(s) for s in traces[t])
+        )[:args.slowest]
+    if not selected:
+        raise SystemExit("No matching traces")
+    for trace_id in selected:
+        print(f"trace {trace_id}")
+        print(render_trace(traces[trace_id]))
+        print()
+
+
+if __name__ == "__main__":
+    main()
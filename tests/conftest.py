@@ -1,6 +1,12 @@
-"""Pytest configuration and shared fixtures for integration tests."""
+"""Pytest configuration and shared fixtures.
+
+Integration fixtures (db_pool, sample_*) need a database. recording_db
+replaces db.fetch_all for unit tests that run without one.
+"""
 
 import asyncio
+import inspect
+from collections.abc import Callable
 
 import pytest
 import pytest_asyncio
@@ -8,6 +14,49 @@ import pytest_asyncio
 from pfn_mcp import db
 
 
+class RecordingDb:
+    """
+    Fake db.fetch_all that records queries and answers them from handlers.
+
+    handlers maps query text to a callable taking the bound arguments;
+    other queries go to default(query, *args), or return no rows. Handlers
+    may be async.
+    """
+
+    def __init__(self, handlers: dict[str, Callable] | None = None, default=None):
+        self.handlers = dict(handlers or {})
+        self.default = default
+        self.queries: list[tuple[str, tuple]] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.queries)
+
+    async def fetch_all(self, query, *args):
+        self.queries.append((query, args))
+        handler = self.handlers.get(query)
+        if handler is not None:
+            rows = handler(*args)
+        elif self.default is not None:
+            rows = self.default(query, *args)
+        else:
+            rows = []
+        return await rows if inspect.isawaitable(rows) else rows
+
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    """Factory: recording_db(handlers, default) patches db.fetch_all with a RecordingDb."""
+
+    def install(handlers=None, default=None, patch: bool = True) -> RecordingDb:
+        fake = RecordingDb(handlers, default)
+        if patch:
+            monkeypatch.setattr(db, "fetch_all", fake.fetch_all)
+        return fake
+
+    return install
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create a single event loop for the entire test session."""
@@ -0,0 +1,134 @@
+"""Unit tests for per-tenant admission control (no database)."""
+
+import asyncio
+
+import pytest
+
+from pfn_mcp import admission
+from pfn_mcp.admission import (
+    HEAVY,
+    INTERACTIVE,
+    AdmissionController,
+    AdmissionRejectedError,
+    admission_slot,
+    classify_tool,
+    current_lane,
+    current_tenant,
+    tool_context,
+)
+
+
+async def _queue(controller, tenant, lane, admitted):
+    """Acquire a slot, record admission order, then hold until cancelled."""
+    await controller.acquire(tenant, lane)
+    admitted.append((tenant, lane))
+
+
+class TestClassification:
+    """Tests for lane selection and context tagging."""
+
+    def test_heavy_and_interactive_tools(self):
+        assert classify_tool("get_group_telemetry") == HEAVY
+        assert classify_tool("list_devices") == INTERACTIVE
+
+    def test_tool_context_sets_and_resets(self):
+        with tool_context("get_wages_data", "PRS"):
+            assert current_tenant.get() == "PRS"
+            assert current_lane.get() == HEAVY
+        assert current_tenant.get() is None
+        assert current_lane.get() == INTERACTIVE
+
+
+class TestAdmissionController:
+    """Tests for slot accounting, fairness and shedding."""
+
+    async def test_immediate_admission_when_free(self):
+        controller = AdmissionController(slots=2, heavy_slots=1, max_wait=1)
+        await controller.acquire("PRS", INTERACTIVE)
+        assert controller.snapshot()["in_use"] == {INTERACTIVE: 1, HEAVY: 0}
+        controller.release(INTERACTIVE)
+        assert controller.snapshot()["in_use"] == {INTERACTIVE: 0, HEAVY: 0}
+
+    async def test_heavy_lane_capped_interactive_passes(self):
+        controller = AdmissionController(slots=3, heavy_slots=1, max_wait=1)
+        await controller.acquire("PRS", HEAVY)
+
+        admitted = []
+        heavy = asyncio.ensure_future(_queue(controller, "PRS", HEAVY, admitted))
+        await asyncio.sleep(0)
+        await controller.acquire("IOP", INTERACTIVE)  # Not blocked by queued heavy
+        assert controller.queue_depth(HEAVY) == 1
+
+        controller.release(HEAVY)
+        await heavy
+        assert admitted == [("PRS", HEAVY)]
+
+    async def test_tenants_interleave_fairly(self):
+        controller = AdmissionController(slots=1, heavy_slots=1, max_wait=1)
+        await controller.acquire("busy", INTERACTIVE)
+
+        admitted = []
+        tasks = [
+            asyncio.ensure_future(_queue(controller, "busy", INTERACTIVE, admitted))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(_queue(controller, "quiet", INTERACTIVE, admitted)))
+        await asyncio.sleep(0)
+
+        for _ in range(4):
+            controller.release(INTERACTIVE)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        # The quiet tenant is admitted before the busy tenant's backlog drains
+        assert admitted.index(("quiet", INTERACTIVE)) < 3
+
+    async def test_weight_gives_more_share(self):
+        controller = AdmissionController(
+            slots=1, heavy_slots=1, max_wait=1, weights={"GOLD": 4.0}
+        )
+        assert controller._next_start_tag("gold", INTERACTIVE) == 0.0
+        assert controller._next_start_tag("gold", INTERACTIVE) == 0.25
+        assert controller._next_start_tag("other", INTERACTIVE) == 0.0
+        assert controller._next_start_tag("other", INTERACTIVE) == 1.0
+
+    async def test_shed_after_deadline(self):
+        controller = AdmissionController(slots=1, heavy_slots=1, max_wait=0.01)
+        await controller.acquire("PRS", INTERACTIVE)
+        with pytest.raises(AdmissionRejectedError, match="Server busy"):
+            await controller.acquire("IOP", INTERACTIVE)
+        snapshot = controller.snapshot()
+        assert snapshot["lanes"][INTERACTIVE]["shed"] == 1
+        assert snapshot["queue_depth"][INTERACTIVE] == 0
+
+    async def test_cancelled_waiter_frees_queue(self):
+        controller = AdmissionController(slots=1, heavy_slots=1, max_wait=5)
+        await controller.acquire("PRS", INTERACTIVE)
+        waiter = asyncio.ensure_future(controller.acquire("IOP", INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        controller.release(INTERACTIVE)
+        assert controller.snapshot()["in_use"] == {INTERACTIVE: 0, HEAVY: 0}
+
+
+class TestPerPool:
+    """Each pool has its own slot budget."""
+
+    @pytest.fixture
+    def controllers(self, monkeypatch):
+        monkeypatch.setattr(admission.settings, "db_admission_enabled", True)
+        monkeypatch.setattr(admission.settings, "db_pool_max_size", 1)
+        monkeypatch.setattr(admission.settings, "db_admission_max_wait", 0.05)
+        monkeypatch.setattr(admission, "_controllers", {})
+        return admission._controllers
+
+    async def test_busy_analytics_pool_does_not_block_primary(self, controllers):
+        async with admission_slot("analytics"):
+            with pytest.raises(AdmissionRejectedError):
+                async with admission_slot("analytics"):
+                    pass
+            async with admission_slot("primary"):
+                assert controllers["primary"].snapshot()["in_use"][INTERACTIVE] == 1
+        assert set(admission.get_controllers()) == {"analytics", "primary"}
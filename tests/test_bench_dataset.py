@@ -0,0 +1,105 @@
+"""Unit tests for the synthetic dataset generator (no database needed)."""
+
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.dataset import (
+    QUANTITY_CATALOG,
+    DatasetConfig,
+    _parse_args,
+    build_catalog,
+    config_from_args,
+    device_rows,
+    shift_and_rate,
+)
+
+END = datetime(2025, 3, 1)
+
+
+def rows_by_table(config: DatasetConfig, device_id: int = 1) -> dict[str, list[list[str]]]:
+    tables: dict[str, list[list[str]]] = {}
+    for table, line in device_rows(device_id, 1, config, QUANTITY_CATALOG):
+        tables.setdefault(table, []).append(line.rstrip("\n").split(","))
+    return tables
+
+
+class TestCatalog:
+    """Tests for tenants, assets, devices and tags."""
+
+    def test_counts_and_hierarchy(self):
+        config = DatasetConfig(
+            tenants=3, devices=100, hierarchy_depth=2, hierarchy_fanout=3,
+            tag_keys=4, tag_cardinality=5,
+        )
+        catalog = build_catalog(config)
+        assert len(catalog.tenants) == 3
+        assert len(catalog.devices) == 100
+        # Root + 3 + 9 assets per tenant, devices only on the deepest level
+        assert len(catalog.assets) == 3 * 13
+        leaf_ids = {a[0] for a in catalog.assets if a[7] == 2}
+        assert {d[2] for d in catalog.devices} <= leaf_ids
+        assert len(catalog.device_tags) == 100 * 4
+        assert len({t[2] for t in catalog.device_tags if t[1] == "building"}) <= 5
+
+    def test_deterministic(self):
+        assert build_catalog(DatasetConfig(seed=7)) == build_catalog(DatasetConfig(seed=7))
+
+    def test_facility_formula_uses_tenant_devices(self):
+        catalog = build_catalog(DatasetConfig(tenants=2, devices=10))
+        formulas = {(a[0], a[1]): a[3] for a in catalog.meter_aggregations}
+        assert formulas[(2, "facility")] == "6+7+8+9"
+        assert formulas[(2, "main_division")] == "(6)-(7)"
+
+
+class TestTelemetry:
+    """Tests for the per-device telemetry rows."""
+
+    def test_full_history_without_gaps(self):
+        config = DatasetConfig(
+            days=2, raw_days=1, raw_interval_minutes=5, end=END,
+            gap_rate=0, dropout_rate=0, stale_rate=0,
+        )
+        tables = rows_by_table(config)
+        assert len(tables["telemetry_15min_agg"]) == 2 * 96 * len(QUANTITY_CATALOG)
+        assert len(tables["telemetry_data"]) == 96 * 3 * len(QUANTITY_CATALOG)
+
+    def test_energy_register_is_monotonic(self):
+        config = DatasetConfig(days=3, raw_days=0, end=END, gap_rate=0.5)
+        energy = [
+            float(r[4]) for r in rows_by_table(config)["telemetry_15min_agg"] if r[3] == "124"
+        ]
+        assert energy == sorted(energy)
+
+    def test_gaps_remove_buckets(self):
+        config = DatasetConfig(days=20, raw_days=0, end=END, gap_rate=1.0, stale_rate=0)
+        buckets = {r[0] for r in rows_by_table(config)["telemetry_15min_agg"]}
+        assert len(buckets) < 20 * 96
+
+    def test_cost_summary_matches_register(self):
+        config = DatasetConfig(days=2, raw_days=0, end=END, gap_rate=0, stale_rate=0)
+        tables = rows_by_table(config)
+        energy = [float(r[4]) for r in tables["telemetry_15min_agg"] if r[3] == "124"]
+        consumption = sum(float(r[9]) for r in tables["daily_energy_cost_summary"])
+        assert abs(consumption - (energy[-1] - energy[0])) < 0.01
+        assert Counter(r[6] for r in tables["daily_energy_cost_summary"]).keys() <= {
+            "WBP", "LWBP1", "LWBP2",
+        }
+
+
+class TestTariffs:
+    """Tests for local shift and tariff assignment."""
+
+    def test_peak_hours_local_time(self):
+        # 10:00 UTC is 17:00 in Jakarta
+        assert shift_and_rate(datetime(2025, 1, 1, 10)) == ("SHIFT2", "WBP")
+        assert shift_and_rate(datetime(2025, 1, 1, 1)) == ("SHIFT1", "LWBP1")
+        assert shift_and_rate(datetime(2025, 1, 1, 16)) == ("SHIFT3", "LWBP2")
+
+
+class TestCli:
+    """Tests for scale presets and overrides."""
+
+    def test_flags_override_preset(self):
+        config = config_from_args(_parse_args(["--scale", "large", "--days", "90"]))
+        assert config.devices == 10_000
+        assert config.days == 90
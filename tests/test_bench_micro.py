@@ -0,0 +1,49 @@
+"""Unit tests for the pure-Python microbenchmarks."""
+
+from benchmarks import micro
+from pfn_mcp.tools.group_telemetry import _pivot_timeseries
+
+
+class TestCases:
+    """Every case must build its inputs and run cleanly."""
+
+    def test_each_case_runs(self):
+        for case in micro.CASES:
+            case.setup()()
+
+    def test_case_names_unique(self):
+        names = [c.name for c in micro.CASES]
+        assert len(names) == len(set(names))
+
+    def test_renderers_produce_output(self):
+        from pfn_mcp.tools.telemetry import format_telemetry_response
+
+        text = format_telemetry_response(micro.telemetry_result(100))
+        assert not text.startswith("Error")
+
+
+class TestPivot:
+    """Tests for the extracted group pivot."""
+
+    def test_wide_rows_keep_device_order(self):
+        rows, device_ids, names = micro.pivot_rows(3, 2)
+        data = _pivot_timeseries(rows, device_ids, names)
+        assert len(data) == 2
+        assert list(data[0])[1:] == names
+        assert data[1][names[2]] == 1.0 + 3
+
+
+class TestMeasure:
+    """Tests for timing and comparison."""
+
+    def test_measure_reports_per_call_times(self):
+        case = micro.Case("noop", lambda: (lambda: None))
+        result = micro.measure(case, repeat=2, min_time=0.001)
+        assert result["loops"] >= 1
+        assert 0 <= result["best_us"] <= result["median_us"]
+
+    def test_compare_uses_median(self):
+        baseline = {"meta": {}, "results": {"a": {"median_us": 10.0, "best_us": 1.0}}}
+        current = {"meta": {}, "results": {"a": {"median_us": 10.5, "best_us": 9.0}}}
+        regressions = micro.compare_reports(baseline, current, 0.1, micro.COMPARED_METRICS)
+        assert regressions == []
@@ -0,0 +1,139 @@
+"""Unit tests for EXPLAIN plan analysis and comparison (no database needed)."""
+
+import json
+
+from benchmarks import plans
+from benchmarks.plans import HypertableCatalog, PlanCapture
+from pfn_mcp import db
+
+CATALOG = HypertableCatalog(
+    hypertables={"telemetry_data", "telemetry_15min_agg"},
+    chunk_parent={
+        "_hyper_1_1_chunk": "telemetry_data",
+        "_hyper_1_2_chunk": "telemetry_data",
+        "_hyper_5_9_chunk": "telemetry_15min_agg",
+        "_hyper_5_10_chunk": "telemetry_15min_agg",
+    },
+    chunk_counts={"telemetry_data": 2, "telemetry_15min_agg": 2},
+)
+
+
+def scan(node_type: str, relation: str, rows: int = 10, est: int = 10, **extra) -> dict:
+    return {
+        "Node Type": node_type, "Relation Name": relation,
+        "Plan Rows": est, "Actual Rows": rows, "Actual Loops": 1, **extra,
+    }
+
+
+def append(*children: dict, rows: int = 20) -> dict:
+    return {
+        "Node Type": "Custom Scan", "Custom Plan Provider": "ChunkAppend",
+        "Plan Rows": rows, "Actual Rows": rows, "Actual Loops": 1, "Plans": list(children),
+    }
+
+
+class TestAnalyzePlan:
+    """Findings for hypertable scans and estimates."""
+
+    def test_seq_scan_on_all_chunks(self):
+        plan = append(
+            scan("Seq Scan", "_hyper_1_1_chunk"), scan("Seq Scan", "_hyper_1_2_chunk"),
+        )
+        kinds = {f["kind"]: f for f in plans.analyze_plan(plan, CATALOG)}
+        assert kinds["seq_scan_hypertable"]["relation"] == "telemetry_data"
+        assert kinds["seq_scan_hypertable"]["rows"] == 20
+        assert kinds["no_chunk_exclusion"]["chunks"] == 2
+
+    def test_index_scan_with_exclusion_is_clean(self):
+        plan = append(
+            scan("Index Scan", "_hyper_5_9_chunk", **{"Index Cond": "(device_id = $1)"}),
+            scan("Index Scan", "_hyper_5_10_chunk", **{"Actual Loops": 0}),
+        )
+        assert plans.analyze_plan(plan, CATALOG) == []
+
+    def test_unfiltered_decompression(self):
+        plan = {
+            "Node Type": "Custom Scan", "Custom Plan Provider": "DecompressChunk",
+            "Relation Name": "_hyper_1_1_chunk", "Plan Rows": 10, "Actual Rows": 5000,
+            "Actual Loops": 1,
+            "Plans": [scan("Seq Scan", "compress_hyper_2_7_chunk")],
+        }
+        kinds = {f["kind"] for f in plans.analyze_plan(plan, CATALOG)}
+        assert kinds == {"decompress_unfiltered", "row_estimate"}
+
+    def test_row_estimate_threshold(self):
+        off = scan("Index Scan", "devices", rows=20_000, est=100)
+        small = scan("Index Scan", "devices", rows=500, est=1)
+        assert plans.analyze_plan(off, CATALOG)[0]["factor"] == 200.0
+        assert plans.analyze_plan(small, CATALOG) == []
+
+
+class TestPlanShape:
+    """Shapes ignore chunk counts and chunk-specific names."""
+
+    def test_chunks_fold_into_hypertable(self):
+        two = append(
+            scan("Index Scan", "_hyper_1_1_chunk", **{"Index Name": "_hyper_1_1_chunk_idx"}),
+            scan("Index Scan", "_hyper_1_2_chunk", **{"Index Name": "_hyper_1_2_chunk_idx"}),
+        )
+        one = append(
+            scan("Index Scan", "_hyper_1_1_chunk", **{"Index Name": "_hyper_1_1_chunk_idx"}),
+        )
+        shape = plans.plan_shape(two, CATALOG)
+        assert shape["children"] == [
+            {"node": "Index Scan", "relation": "telemetry_data", "index": "<chunk>_idx"}
+        ]
+        assert plans.shape_hash(shape) == plans.shape_hash(plans.plan_shape(one, CATALOG))
+
+
+class TestComparePlans:
+    """Shape changes and new findings are reported."""
+
+    def report(self, shape_hash: str, findings: list[dict]) -> dict:
+        return {"meta": {}, "results": {"telemetry": {"tool": "t", "queries": [
+            {"query_id": "q1", "site": "tools.telemetry:f", "shape_hash": shape_hash,
+             "findings": findings},
+        ]}}}
+
+    def test_shape_and_new_finding(self):
+        seq = {"kind": "seq_scan_hypertable", "relation": "telemetry_data", "rows": 1}
+        changes = plans.compare_plans(self.report("a", []), self.report("b", [seq]))
+        assert [c["change"] for c in changes] == ["shape", "finding"]
+        assert "seq scan on telemetry_data" in plans.format_changes(changes)
+
+    def test_same_plan_no_changes(self):
+        seq = {"kind": "seq_scan_hypertable", "relation": "telemetry_data", "rows": 1}
+        bigger = {**seq, "rows": 99}
+        assert plans.compare_plans(self.report("a", [seq]), self.report("a", [bigger])) == []
+
+
+class TestPlanCapture:
+    """Read queries are explained once per SQL text with the same arguments."""
+
+    async def test_explains_reads(self, monkeypatch):
+        explained = []
+
+        async def fake_all(query, *args, **kwargs):
+            return []
+
+        async def fake_val(query, *args, **kwargs):
+            explained.append((query, args))
+            return json.dumps([{"Plan": scan("Seq Scan", "_hyper_1_1_chunk"),
+                                "Execution Time": 1.5}])
+
+        monkeypatch.setattr(db, "fetch_all", fake_all)
+        monkeypatch.setattr(db, "fetch_val", fake_val)
+
+        capture = PlanCapture(CATALOG)
+        with capture.installed():
+            await db.fetch_all("SELECT * FROM telemetry_data WHERE device_id = $1", 7)
+            await db.fetch_all("SELECT *  FROM telemetry_data WHERE device_id = $1", 8)
+            await db.fetch_all("UPDATE devices SET status = 'x'")
+        assert db.fetch_val is fake_val
+        [entry] = capture.queries.values()
+        assert entry["calls"] == 2
+        assert entry["site"] == "unknown"  # no pfn_mcp frame on the stack
+        assert entry["findings"][0]["kind"] == "seq_scan_hypertable"
+        assert explained == [
+            (plans.EXPLAIN_PREFIX + "SELECT * FROM telemetry_data WHERE device_id = $1", (7,))
+        ]
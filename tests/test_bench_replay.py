@@ -0,0 +1,101 @@
+"""Unit tests for corpus replay (no database needed)."""
+
+import json
+
+from benchmarks import replay
+from benchmarks.replay import Resolver, TargetTenant
+from pfn_mcp.recording import anonymize_arguments, pseudonym
+
+TENANTS = [
+    TargetTenant(
+        1, "SYN01", "Synthetic 1",
+        devices=[(1, "Compressor 0001 (SYN01)"), (2, "Compressor 0002 (SYN01)")],
+        assets=[10, 11],
+        tags={"building": ["building_1", "building_2"], "equipment_type": ["Pump"]},
+        aggregations=["facility"],
+    ),
+    TargetTenant(2, "SYN02", "Synthetic 2", devices=[(3, "Compressor 0003 (SYN02)")]),
+]
+
+
+def record(tool: str, arguments: dict, tenant: str | None, ts: str = "2025-01-01T00:00:00") -> dict:
+    return {
+        "ts": ts, "tool": tool, "latency_ms": 12.0,
+        "tenant": {"$anon": "tenant", "field": "code", "ref": pseudonym("tenant", tenant, "s")}
+        if tenant else None,
+        "arguments": anonymize_arguments(tool, arguments, "s"),
+    }
+
+
+class TestResolver:
+    """Markers map onto target entities consistently."""
+
+    def test_same_ref_same_entity(self):
+        resolver = Resolver(TENANTS)
+        args, tenant = resolver.resolve_record(
+            record("get_device_telemetry", {"tenant": "PRS", "device_name": "Chiller 3",
+                                            "period": "7d"}, "PRS")
+        )
+        again, _ = resolver.resolve_record(
+            record("get_device_telemetry", {"device_name": "Chiller 3"}, "PRS")
+        )
+        other, _ = resolver.resolve_record(
+            record("get_device_telemetry", {"device_name": "Chiller 9"}, "PRS")
+        )
+        assert tenant == "SYN01" and args["tenant"] == "SYN01"
+        assert args["device_name"] == again["device_name"] == "Compressor 0001 (SYN01)"
+        assert other["device_name"] == "Compressor 0002 (SYN01)"
+        assert args["period"] == "7d"
+
+    def test_second_tenant_uses_its_own_devices(self):
+        resolver = Resolver(TENANTS)
+        resolver.resolve_record(record("list_tags", {}, "PRS"))
+        args, tenant = resolver.resolve_record(
+            record("get_quantity_stats", {"device_id": 94}, "IOP")
+        )
+        assert (tenant, args["device_id"]) == ("SYN02", 3)
+
+    def test_tags_formula_and_missing_entities(self):
+        resolver = Resolver(TENANTS)
+        args, _ = resolver.resolve_record(record("get_wages_data", {
+            "tag_key": "area", "tag_value": "Hall 2", "formula": "94+11-(84)",
+        }, "PRS"))
+        assert args["tag_key"] in TENANTS[0].tags
+        assert args["tag_value"] in TENANTS[0].tags[args["tag_key"]]
+        assert args["formula"] == "1+2-(1)"
+
+        args, _ = resolver.resolve_record(record("get_wages_data", {"aggregation": "x"}, "IOP"))
+        assert "aggregation" not in args  # SYN02 has no aggregations
+
+
+class TestCorpus:
+    """Loading, pacing and summaries."""
+
+    def test_load_skips_unknown_tools_and_sorts(self, tmp_path):
+        path = tmp_path / "calls.jsonl"
+        lines = [
+            record("list_tenants", {}, None, "2025-01-01T00:00:05"),
+            record("retired_tool", {}, None, "2025-01-01T00:00:01"),
+            record("list_quantities", {}, None, "2025-01-01T00:00:00"),
+        ]
+        path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+        records = replay.load_corpus(path)
+        assert [r["tool"] for r in records] == ["list_quantities", "list_tenants"]
+
+    def test_schedule_scales_gaps(self):
+        records = [record("list_tenants", {}, None, ts) for ts in (
+            "2025-01-01T00:00:00+00:00", "2025-01-01T00:00:10+00:00",
+        )]
+        assert replay.schedule(records, 2.0) == [0.0, 5.0]
+        assert replay.schedule(records, 0) == [0.0, 0.0]
+
+    def test_summarize(self):
+        outcomes = [
+            {"tool": "a", "latency_ms": float(ms), "lag_ms": 0.0, "recorded_ms": 5.0,
+             "error": ms == 40}
+            for ms in (10, 20, 30, 40)
+        ]
+        results = replay.summarize(outcomes, wall_s=2.0)
+        assert results[replay.OVERALL]["throughput_rps"] == 2.0
+        assert results["a"]["errors"] == 1
+        assert (results["a"]["p50_ms"], results["a"]["max_ms"]) == (20.0, 40.0)
@@ -0,0 +1,101 @@
+"""Unit tests for the per-tool benchmark suite (no database needed)."""
+
+import math
+
+from benchmarks import tools as bench
+from pfn_mcp import db
+from pfn_mcp.chat.tool_registry import TOOL_REGISTRY
+from pfn_mcp.tool_schema import get_tool_metadata
+
+FIXTURES = bench.Fixtures(
+    tenant="SYN01", device_id=1, device_name="Compressor 0001 (SYN01)",
+    device_ids=list(range(1, 11)), tag_key="building", tag_value="building_1",
+    other_tag_value="building_2", asset_id=1, aggregation="facility",
+)
+
+
+def report(**results) -> dict:
+    return {"meta": {}, "results": results}
+
+
+class TestScenarios:
+    """Every scenario must be a valid call of a registered tool."""
+
+    def test_scenarios_use_known_tools_and_params(self):
+        metadata = get_tool_metadata()
+        for scenario in bench.SCENARIOS:
+            assert scenario.tool in TOOL_REGISTRY, scenario.name
+            args = scenario.args(FIXTURES)
+            assert set(args) <= set(metadata[scenario.tool]["params"]), scenario.name
+            assert set(metadata[scenario.tool]["required"]) <= set(args) | {"tenant"}
+
+    def test_scenario_names_unique(self):
+        names = [s.name for s in bench.SCENARIOS]
+        assert len(names) == len(set(names))
+
+    def test_every_registered_tool_is_benchmarked(self):
+        assert {s.tool for s in bench.SCENARIOS} == set(TOOL_REGISTRY)
+
+
+class TestPercentile:
+    """Tests for nearest-rank percentiles."""
+
+    def test_nearest_rank(self):
+        values = [float(v) for v in range(1, 21)]
+        assert bench.percentile(values, 50) == 10.0
+        assert bench.percentile(values, 95) == 19.0
+        assert bench.percentile([7.0], 95) == 7.0
+
+
+class TestQueryCounter:
+    """Tests for round-trip and row counting."""
+
+    async def test_counts_and_restores(self, monkeypatch):
+        async def fake_all(query, *args, **kwargs):
+            return [{"a": 1}, {"a": 2}, {"a": 3}]
+
+        async def fake_one(query, *args, **kwargs):
+            return None
+
+        async def fake_val(query, *args, **kwargs):
+            return 5
+
+        monkeypatch.setattr(db, "fetch_all", fake_all)
+        monkeypatch.setattr(db, "fetch_one", fake_one)
+        monkeypatch.setattr(db, "fetch_val", fake_val)
+
+        counter = bench.QueryCounter()
+        with counter.installed():
+            await db.fetch_all("q")
+            await db.fetch_one("q")
+            await db.fetch_val("q")
+        assert (counter.round_trips, counter.rows) == (3, 4)
+        assert db.fetch_all is fake_all
+
+
+class TestCompareReports:
+    """Tests for regression detection."""
+
+    def test_flags_relative_regressions(self):
+        baseline = report(a={"p50_ms": 10.0, "round_trips": 2, "rows": 100})
+        current = report(a={"p50_ms": 20.0, "round_trips": 3, "rows": 110})
+        regressions = bench.compare_reports(baseline, current, threshold=0.2)
+        assert {r["metric"] for r in regressions} == {"p50_ms", "round_trips"}
+
+    def test_latency_noise_floor(self):
+        baseline = report(a={"p50_ms": 1.0})
+        current = report(a={"p50_ms": 2.5})
+        assert bench.compare_reports(baseline, current) == []
+
+    def test_improvements_and_new_scenarios_ignored(self):
+        baseline = report(a={"p95_ms": 50.0, "rows": 10})
+        current = report(a={"p95_ms": 20.0, "rows": 10}, b={"p95_ms": 999.0})
+        assert bench.compare_reports(baseline, current) == []
+
+    def test_new_error_and_zero_baseline(self):
+        baseline = report(a={"round_trips": 0})
+        current = report(a={"round_trips": 1, "error": "Error: boom"})
+        regressions = bench.compare_reports(baseline, current)
+        assert regressions[0]["metric"] == "error"
+        assert regressions[1]["change"] == math.inf
+        assert "now fails" in bench.format_comparison(regressions, 0.2)
@@ -0,0 +1,77 @@
+"""Unit tests for set-based compare_device_quantities (no database)."""
+
+import pytest
+
+from pfn_mcp.tools import device_quantities
+from pfn_mcp.tools.device_quantities import (
+    compare_device_quantities,
+    format_bitmap,
+    quantity_bitmaps,
+)
+
+DEVICES = {
+    1: {"id": 1, "display_name": "Meter A", "device_code": "A"},
+    2: {"id": 2, "display_name": "Meter B", "device_code": "B"},
+    3: {"id": 3, "display_name": "Meter C", "device_code": "C"},
+}
+
+MEMBERSHIP = {1: [185, 3332, 124], 2: [185, 3332], 3: [185, 501]}
+
+
+def unexpected(query, *args):
+    raise AssertionError(f"Unexpected query: {query}")
+
+
+@pytest.fixture
+def fake_db(recording_db, monkeypatch):
+    fake = recording_db(
+        {
+            device_quantities.DEVICES_BY_ID_QUERY: lambda ids: [
+                DEVICES[i] for i in ids if i in DEVICES
+            ],
+            device_quantities.DEVICES_BY_NAME_QUERY: lambda names: [
+                d for name in names for d in DEVICES.values()
+                if name.lower() in d["display_name"].lower()
+            ][:len(names)],
+            device_quantities.MEMBERSHIP_QUERY: lambda ids: [
+                {"device_id": d, "quantity_ids": MEMBERSHIP[d]} for d in ids
+            ],
+        },
+        default=unexpected,
+    )
+    monkeypatch.setattr(device_quantities, "get_coverage_index", lambda: None)
+
+    async def fetch_quantities_by_ids(quantity_ids, quantity_id=None, search=None):
+        return [{"id": q, "quantity_name": f"Q{q}", "category": None} for q in quantity_ids]
+
+    monkeypatch.setattr(device_quantities, "fetch_quantities_by_ids", fetch_quantities_by_ids)
+    return fake
+
+
+class TestBitmaps:
+    """Tests for membership bitmaps."""
+
+    def test_bits_follow_device_order(self):
+        bitmaps = quantity_bitmaps([1, 2, 3], {d: set(q) for d, q in MEMBERSHIP.items()})
+        assert bitmaps == {185: 0b111, 3332: 0b011, 124: 0b001, 501: 0b100}
+        assert format_bitmap(bitmaps[3332], 3) == "110"
+
+
+class TestCompareDeviceQuantities:
+    """Tests for shared/unique quantities from a constant number of queries."""
+
+    async def test_shared_unique_and_partial(self, fake_db):
+        result = await compare_device_quantities(device_ids=[1, 2, 3])
+        assert [q["id"] for q in result["shared_quantities"]] == [185]
+        assert [q["id"] for q in result["per_device"]["Meter A"]["unique_quantities"]] == [124]
+        assert result["per_device"]["Meter B"]["unique_quantities"] == []
+        partial = {q["id"]: q["bitmap"] for q in result["partial_quantities"]}
+        assert partial == {124: "100", 501: "001", 3332: "110"}
+
+    async def test_query_count_independent_of_device_count(self, fake_db):
+        await compare_device_quantities(device_ids=[1, 2], device_names=["meter c"])
+        assert len(fake_db.queries) == 3
+
+    async def test_needs_two_devices(self, fake_db):
+        result = await compare_device_quantities(device_ids=[1, 1, 99])
+        assert result == {"error": "At least 2 devices are required for comparison"}
@@ -0,0 +1,61 @@
+"""Unit tests for concurrent tool sub-queries."""
+
+import asyncio
+
+import pytest
+
+from pfn_mcp.tools.concurrency import gather_queries
+
+
+class Tracker:
+    """Records how many fake queries run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def query(self, result, delay=0.01, error=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(delay)
+            if error:
+                raise error
+            return result
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+
+
+class TestGatherQueries:
+    """Tests for ordering, bounding and cancellation."""
+
+    async def test_results_in_argument_order(self):
+        tracker = Tracker()
+        results = await gather_queries(
+            tracker.query("slow", 0.03), tracker.query("fast", 0.001)
+        )
+        assert results == ["slow", "fast"]
+        assert tracker.peak == 2
+
+    async def test_respects_limit(self):
+        tracker = Tracker()
+        results = await gather_queries(*(tracker.query(i) for i in range(6)), limit=2)
+        assert results == list(range(6))
+        assert tracker.peak == 2
+
+    async def test_failure_cancels_siblings_and_raises_original(self):
+        tracker = Tracker()
+        with pytest.raises(ValueError, match="boom"):
+            await gather_queries(
+                tracker.query("ok", 1.0),
+                tracker.query(None, 0.001, error=ValueError("boom")),
+            )
+        assert tracker.cancelled == 1
+        assert tracker.running == 0
+
+    async def test_no_queries(self):
+        assert await gather_queries() == []
@@ -0,0 +1,155 @@
+"""Tests for the pre-execution cost guard (no database)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from pfn_mcp.config import settings
+from pfn_mcp.coverage import CoverageEntry, CoverageIndex
+from pfn_mcp.tools import cost_guard, group_telemetry, telemetry
+from pfn_mcp.tools.cost_guard import RAW_STEP, estimate_rows, fit_range
+from pfn_mcp.tools.telemetry import (
+    DATA_SOURCE_AGGREGATED,
+    DATA_SOURCE_RAW,
+    DATA_SOURCE_RAW_AGGREGATED,
+    _guard_device_read,
+)
+
+END = datetime(2026, 1, 1)
+YEAR = datetime(2025, 1, 1)
+POWER = {"id": 5, "quantity_name": "Active Power", "unit": "kW", "aggregation_method": "avg"}
+
+
+def index_with(*entries: CoverageEntry) -> CoverageIndex:
+    index = CoverageIndex()
+    for entry in entries:
+        index.upsert(entry)
+    return index
+
+
+def full_year(device_id: int, quantity_id: int = 5, density: float = 1.0) -> CoverageEntry:
+    buckets = int(365 * 96 * density)
+    return CoverageEntry(device_id, quantity_id, 1, YEAR, END - timedelta(minutes=15), buckets)
+
+
+@pytest.fixture
+def no_index(monkeypatch):
+    monkeypatch.setattr(cost_guard, "get_coverage_index", lambda: None)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(settings, "cost_guard_enabled", True)
+    monkeypatch.setattr(settings, "cost_guard_max_scan_rows", 1_000_000)
+    monkeypatch.setattr(settings, "cost_guard_max_result_rows", 10_000)
+
+
+class TestEstimate:
+    """Row estimates from the coverage catalog or nominal density."""
+
+    def test_nominal_without_index(self, no_index):
+        estimate = estimate_rows([1, 2], 5, END - timedelta(days=1), END)
+        assert (estimate.rows, estimate.basis) == (192, "nominal")
+        assert estimate_rows([1], 5, END - timedelta(days=1), END, RAW_STEP).rows == 1440
+
+    def test_coverage_density_and_overlap(self, monkeypatch):
+        index = index_with(
+            full_year(1),
+            full_year(2, density=0.5),
+            full_year(3, quantity_id=6),
+        )
+        monkeypatch.setattr(cost_guard, "get_coverage_index", lambda: index)
+        # Half of the range lies after the coverage ends
+        window = timedelta(days=10)
+        estimate = estimate_rows([1, 2, 3, 4], 5, END - window, END + window)
+        assert estimate.basis == "coverage"
+        assert estimate.rows == pytest.approx(960 + 480, abs=1)
+
+    def test_fit_range_keeps_recent_days(self, no_index, budget):
+        start, note = fit_range(list(range(200)), 5, YEAR, END)
+        assert note is not None and note["estimated_rows"] == 200 * 365 * 96
+        assert start.time() == datetime.min.time()
+        assert estimate_rows(list(range(200)), 5, start, END).rows <= 1_000_000
+        assert (END - start).days == 52
+
+    def test_fit_range_within_budget(self, no_index, budget):
+        assert fit_range([1, 2], 5, YEAR, END) == (YEAR, None)
+
+
+class TestDeviceTelemetry:
+    """Bucket downgrades for get_device_telemetry."""
+
+    def test_raw_two_weeks_downgraded(self, no_index, budget):
+        source, bucket, note = _guard_device_read(
+            1, 5, END - timedelta(days=14), END, DATA_SOURCE_RAW, "1min"
+        )
+        assert (source, bucket) == (DATA_SOURCE_AGGREGATED, "15min")
+        assert note["requested_bucket"] == "1min"
+        assert "20,160 rows" in note["message"]
+
+    def test_downsampled_raw_read_keeps_bucket(self, no_index, budget):
+        # 20,160 raw rows fit the scan budget; only 500 points are returned
+        plan = _guard_device_read(
+            1, 5, END - timedelta(days=14), END, DATA_SOURCE_RAW, "1min", max_points=500
+        )
+        assert plan == (DATA_SOURCE_RAW, "1min", None)
+
+    def test_downsampled_read_over_scan_budget_downgraded(self, no_index, budget):
+        source, bucket, note = _guard_device_read(
+            1, 5, YEAR - timedelta(days=365), END, DATA_SOURCE_RAW, "1min", max_points=500
+        )
+        assert (source, bucket) == (DATA_SOURCE_AGGREGATED, "15min")
+        assert "return ~500 points" in note["message"]
+
+    def test_fine_bucket_over_year_downgraded(self, no_index, budget):
+        source, bucket, note = _guard_device_read(1, 5, YEAR, END, DATA_SOURCE_AGGREGATED, "15min")
+        assert (source, bucket) == (DATA_SOURCE_AGGREGATED, "1hour")
+        assert note is not None
+
+    def test_within_budget_unchanged(self, no_index, budget):
+        plan = _guard_device_read(
+            1, 5, END - timedelta(hours=20), END, DATA_SOURCE_RAW_AGGREGATED, "15min"
+        )
+        assert plan == (DATA_SOURCE_RAW_AGGREGATED, "15min", None)
+
+    def test_note_in_response(self):
+        result = {
+            "device": {"name": "Pump 1"},
+            "quantity": {"name": "Active Power", "unit": "kW"},
+            "time_range": {"start": "2026-01-01T00:00", "end": "2026-01-02T00:00",
+                           "bucket": "15min"},
+            "data": [],
+            "point_count": 0,
+            "cost_guard": {"message": "1min buckets over this period would read"},
+        }
+        text = telemetry.format_telemetry_response(result)
+        assert "**Note**: 1min buckets over this period would read" in text
+
+
+class TestGroupTimeseries:
+    """Group time series are shortened to the budget instead of timing out."""
+
+    async def test_year_over_large_group_truncated(self, no_index, budget, recording_db):
+        fake = recording_db()
+        device_ids = list(range(1, 201))
+        result = await group_telemetry._get_telemetry_group_summary(
+            device_ids=device_ids,
+            device_names=[f"Dev {i}" for i in device_ids],
+            device_count=200,
+            result_type="aggregated_group",
+            group_type="tag",
+            group_label="process=Waterjet",
+            quantity_id=5,
+            quantity_info=POWER,
+            query_start=YEAR,
+            query_end=END,
+            start_str="2025-01-01",
+            end_str="2025-12-31",
+            breakdown="none",
+            output="timeseries",
+            selected_bucket="1week",
+        )
+        [(_, args)] = fake.queries
+        assert args[2] == datetime(2025, 11, 10)
+        assert result["timeseries"]["period"] == "2025-11-10 to 2025-12-31"
+        assert result["cost_guard"]["requested_start"] == YEAR.isoformat()
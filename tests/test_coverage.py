@@ -0,0 +1,163 @@
+"""Unit tests for the device x quantity coverage index (no database)."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from pfn_mcp import coverage
+from pfn_mcp.coverage import CoverageEntry, CoverageIndex
+from pfn_mcp.tools import discovery
+
+
+def _entry(device_id, quantity_id, tenant_id=1, first=1, last=10, rows=100):
+    return CoverageEntry(
+        device_id=device_id,
+        quantity_id=quantity_id,
+        tenant_id=tenant_id,
+        first_bucket=datetime(2025, 1, first),
+        last_bucket=datetime(2025, 1, last),
+        row_count=rows,
+    )
+
+
+@pytest.fixture
+def index():
+    idx = CoverageIndex()
+    idx.upsert(_entry(1, 185, first=1, last=10, rows=100))
+    idx.upsert(_entry(1, 124, first=3, last=12, rows=50))
+    idx.upsert(_entry(2, 185, first=5, last=8, rows=30))
+    idx.upsert(_entry(3, 526, tenant_id=2, rows=7))
+    return idx
+
+
+class TestCoverageIndex:
+    """Tests for index lookups."""
+
+    def test_device_range(self, index):
+        r = index.device_range(1)
+        assert r.earliest == datetime(2025, 1, 1)
+        assert r.latest == datetime(2025, 1, 12)
+        assert r.row_count == 150
+        assert r.quantity_count == 2
+
+    def test_device_range_filtered(self, index):
+        r = index.device_range(1, [124])
+        assert r.row_count == 50
+        assert r.earliest == datetime(2025, 1, 3)
+
+    def test_devices_for_quantities(self, index):
+        assert index.device_ids_for_quantities([185]) == [1, 2]
+        assert index.device_ids_for_quantities([185, 526]) == [1, 2, 3]
+        assert index.device_ids_for_quantities([999]) == []
+
+    def test_quantities_in_use(self, index):
+        assert index.quantity_ids_in_use() == [124, 185, 526]
+
+    def test_tenant_range_limited_to_devices(self, index):
+        r = index.tenant_range(1)
+        assert r.device_count == 2
+        assert r.row_count == 180
+        assert index.tenant_range(1, {2}).row_count == 30
+        assert index.tenant_range(99).earliest is None
+
+    def test_upsert_replaces_entry(self, index):
+        index.upsert(_entry(1, 185, last=20, rows=200))
+        assert index.device_range(1, [185]).row_count == 200
+        assert len(index) == 4
+
+    def test_upsert_moves_tenant(self, index):
+        index.upsert(_entry(2, 185, tenant_id=2))
+        assert index.tenant_range(1).device_count == 1
+        assert index.tenant_range(2).device_count == 2
+
+
+    def test_remove_entry(self, index):
+        index.remove(2, 185)
+        index.remove(2, 185)
+        assert index.device_ids_for_quantities([185]) == [1]
+        assert index.tenant_range(1).device_count == 1
+        assert len(index) == 3
+
+
+class TestCoverageRefresh:
+    """Tests for loading the global index from the catalog."""
+
+    @pytest.fixture(autouse=True)
+    def reset(self, monkeypatch):
+        monkeypatch.setattr(coverage, "_index", None)
+        monkeypatch.setattr(coverage.settings, "coverage_index_enabled", True)
+
+    async def test_incremental_reload(self, monkeypatch):
+        calls = []
+        t1 = datetime(2025, 1, 1, tzinfo=UTC)
+
+        async def fake_fetch_all(query, since):
+            calls.append(since)
+            if len(calls) == 1:
+                return [{
+                    "device_id": 1, "quantity_id": 185, "tenant_id": 1,
+                    "first_bucket": datetime(2025, 1, 1), "last_bucket": datetime(2025, 1, 2),
+                    "row_count": 96, "updated_at": t1,
+                }]
+            return []
+
+        async def fake_fetch_val(query):
+            return datetime(2025, 1, 2)
+
+        monkeypatch.setattr(coverage.db, "fetch_all", fake_fetch_all)
+        monkeypatch.setattr(coverage.db, "fetch_val", fake_fetch_val)
+
+        assert await coverage.refresh_coverage_index()
+        assert await coverage.refresh_coverage_index()
+        assert calls[1] == t1  # Second load only asks for newer rows
+        assert len(coverage.get_coverage_index()) == 1
+
+    async def test_reload_removes_pairs_without_data(self, monkeypatch, index):
+        t1 = datetime(2025, 1, 1, tzinfo=UTC)
+
+        async def fake_fetch_all(query, since):
+            # Retention dropped every bucket of device 2; device 1 was recounted
+            return [
+                {"device_id": 2, "quantity_id": 185, "tenant_id": 1,
+                 "first_bucket": datetime(2025, 1, 5), "last_bucket": datetime(2025, 1, 8),
+                 "row_count": 0, "updated_at": t1},
+                {"device_id": 1, "quantity_id": 185, "tenant_id": 1,
+                 "first_bucket": datetime(2025, 1, 4), "last_bucket": datetime(2025, 1, 10),
+                 "row_count": 60, "updated_at": t1},
+            ]
+
+        async def fake_fetch_val(query):
+            return datetime(2025, 1, 10)
+
+        monkeypatch.setattr(coverage.db, "fetch_all", fake_fetch_all)
+        monkeypatch.setattr(coverage.db, "fetch_val", fake_fetch_val)
+
+        assert await index.reload() == 2
+        assert index.device_ids_for_quantities([185]) == [1]
+        r = index.device_range(1, [185])
+        assert (r.earliest, r.row_count) == (datetime(2025, 1, 4), 60)
+
+    async def test_missing_catalog_falls_back(self, monkeypatch):
+        async def failing_fetch_all(query, since):
+            raise RuntimeError('relation "device_quantity_coverage" does not exist')
+
+        monkeypatch.setattr(coverage.db, "fetch_all", failing_fetch_all)
+        assert not await coverage.refresh_coverage_index()
+        assert coverage.get_coverage_index() is None
+
+
+class TestDataRangeFromIndex:
+    """Tests for get_device_data_range's index path."""
+
+    async def test_breakdown_sorted_by_records(self, index, monkeypatch):
+        async def fake_quantities(quantity_ids, quantity_id=None, search=None):
+            return [
+                {"id": q, "quantity_code": f"Q{q}", "quantity_name": f"Q{q}", "unit": None}
+                for q in sorted(quantity_ids)
+            ]
+
+        monkeypatch.setattr(discovery, "fetch_quantities_by_ids", fake_quantities)
+        overall, breakdown = await discovery._data_range_from_index(index, 1, None, None)
+        assert overall["record_count"] == 150
+        assert overall["quantity_count"] == 2
+        assert [b["quantity_id"] for b in breakdown] == [185, 124]
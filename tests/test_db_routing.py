@@ -0,0 +1,81 @@
+"""Unit tests for named-pool query routing in db.py (no database)."""
+
+import pytest
+
+from pfn_mcp import db
+
+
+class FakePool:
+    """Pool stub with a configurable replica lag."""
+
+    def __init__(self, lag=0.0):
+        self.lag = lag
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+    async def fetchval(self, query, *args):
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self.lag
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    pools = {db.PRIMARY: FakePool()}
+    monkeypatch.setattr(db, "_pools", pools)
+    monkeypatch.setattr(db, "_replica_lag", None)
+    monkeypatch.setattr(db, "_replica_checked_at", float("-inf"))
+    monkeypatch.setattr(db.settings, "db_replica_max_lag", 60.0)
+    return pools
+
+
+class TestRouteQuery:
+    """Tests for static routing rules."""
+
+    def test_hypertable_scan_routes_to_analytics(self):
+        assert db.route_query("SELECT * FROM telemetry_15min_agg WHERE x") == db.ANALYTICS
+        assert db.route_query("SELECT * FROM daily_energy_cost_summary") == db.ANALYTICS
+
+    def test_chat_schema_routes_to_chat(self):
+        assert db.route_query("INSERT INTO mcp.messages VALUES ($1)") == db.CHAT
+
+    def test_reference_tables_stay_on_primary(self):
+        assert db.route_query("SELECT id FROM devices WHERE tenant_id = $1") == db.PRIMARY
+
+
+class TestResolvePool:
+    """Tests for replica availability and lag fallback."""
+
+    async def test_no_replica_falls_back_to_primary(self, pools):
+        assert await db.resolve_pool("SELECT 1 FROM telemetry_15min_agg") == db.PRIMARY
+
+    async def test_healthy_replica_used(self, pools):
+        pools[db.ANALYTICS] = FakePool(lag=2.0)
+        assert await db.resolve_pool("SELECT 1 FROM telemetry_15min_agg") == db.ANALYTICS
+
+    async def test_lagging_replica_skipped(self, pools):
+        pools[db.ANALYTICS] = FakePool(lag=600.0)
+        assert await db.resolve_pool("SELECT 1 FROM telemetry_15min_agg") == db.PRIMARY
+
+    async def test_failed_lag_check_skips_replica(self, pools):
+        pools[db.ANALYTICS] = FakePool(lag=RuntimeError("down"))
+        assert await db.resolve_pool("SELECT 1 FROM telemetry_15min_agg") == db.PRIMARY
+
+    async def test_writes_never_use_replica(self, pools):
+        pools[db.ANALYTICS] = FakePool(lag=0.0)
+        assert (
+            await db.resolve_pool("DELETE FROM telemetry_15min_agg", write=True) == db.PRIMARY
+        )
+
+    async def test_unconfigured_pool_aliases_primary(self, pools):
+        assert db.get_pool(db.CHAT) is pools[db.PRIMARY]
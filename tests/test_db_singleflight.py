@@ -0,0 +1,163 @@
+"""Unit tests for in-flight read query coalescing in db.py (no database)."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from pfn_mcp import db
+
+
+@pytest.fixture
+def fake_conn(monkeypatch, recording_db):
+    """Connection whose queries are recorded and block until conn.release is set."""
+    release = asyncio.Event()
+
+    async def answer(query, *args):
+        await release.wait()
+        if conn.fail:
+            raise RuntimeError("query failed")
+        return [{"id": 1, "query": query, "args": args}]
+
+    conn = recording_db(default=answer, patch=False)
+    conn.release = release
+    conn.fail = False
+    conn.fetch = conn.fetch_all
+
+    async def fetchrow(query, *args):
+        return (await conn.fetch_all(query, *args))[0]
+
+    conn.fetchrow = fetchrow
+
+    @asynccontextmanager
+    async def get_connection(name=db.PRIMARY):
+        yield conn
+
+    monkeypatch.setattr(db, "get_connection", get_connection)
+    monkeypatch.setattr(db, "_inflight", {})
+    monkeypatch.setattr(db.settings, "db_coalesce_reads", True)
+    return conn
+
+
+async def _run_concurrently(conn, *coros):
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    await asyncio.sleep(0)
+    conn.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class TestSingleflight:
+    """Tests for read coalescing."""
+
+    async def test_identical_queries_share_one_execution(self, fake_conn):
+        results = await _run_concurrently(
+            fake_conn,
+            db.fetch_all("SELECT 1 WHERE x = $1", 5),
+            db.fetch_all("SELECT 1 WHERE x = $1", 5),
+            db.fetch_all("SELECT 1 WHERE x = $1", 5),
+        )
+        assert fake_conn.calls == 1
+        assert results[0] == results[1] == results[2]
+
+    async def test_different_args_not_coalesced(self, fake_conn):
+        await _run_concurrently(
+            fake_conn,
+            db.fetch_all("SELECT 1 WHERE x = $1", 5),
+            db.fetch_all("SELECT 1 WHERE x = $1", 6),
+        )
+        assert fake_conn.calls == 2
+
+    async def test_different_timeouts_not_coalesced(self, fake_conn):
+        results = await _run_concurrently(
+            fake_conn,
+            db.fetch_all("SELECT 1 WHERE x = $1", 5, timeout=0.01),
+            db.fetch_all("SELECT 1 WHERE x = $1", 5, timeout=60),
+        )
+        assert fake_conn.calls == 2
+        assert not isinstance(results[1], BaseException)
+
+    async def test_short_deadline_not_extended_by_leader(self, fake_conn):
+        leader = asyncio.ensure_future(db.fetch_all("SELECT 1", timeout=60))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await db.fetch_all("SELECT 1", timeout=0.01)
+        fake_conn.release.set()
+        await leader
+        assert fake_conn.calls == 2
+
+    async def test_list_args_are_hashable(self, fake_conn):
+        await _run_concurrently(
+            fake_conn,
+            db.fetch_all("SELECT 1 WHERE x = ANY($1)", [1, 2]),
+            db.fetch_all("SELECT 1 WHERE x = ANY($1)", [1, 2]),
+        )
+        assert fake_conn.calls == 1
+
+    async def test_waiters_get_independent_rows(self, fake_conn):
+        first, second = await _run_concurrently(
+            fake_conn,
+            db.fetch_all("SELECT 1"),
+            db.fetch_all("SELECT 1"),
+        )
+        first[0]["id"] = 99
+        assert second[0]["id"] == 1
+
+    async def test_exception_propagates_to_all_waiters(self, fake_conn):
+        fake_conn.fail = True
+        results = await _run_concurrently(
+            fake_conn,
+            db.fetch_one("SELECT 1"),
+            db.fetch_one("SELECT 1"),
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert db._inflight == {}
+
+    async def test_cancelled_caller_does_not_cancel_others(self, fake_conn):
+        leader = asyncio.ensure_future(db.fetch_all("SELECT 1"))
+        follower = asyncio.ensure_future(db.fetch_all("SELECT 1"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        fake_conn.release.set()
+        assert (await follower)[0]["id"] == 1
+        assert fake_conn.calls == 1
+
+    async def test_completed_query_not_reused(self, fake_conn):
+        fake_conn.release.set()
+        await db.fetch_all("SELECT 1")
+        await db.fetch_all("SELECT 1")
+        assert fake_conn.calls == 2
+
+    async def test_insert_returning_never_shared(self, fake_conn):
+        query = "INSERT INTO mcp.conversations (user_id) VALUES ($1) RETURNING id"
+        await _run_concurrently(
+            fake_conn,
+            db.fetch_one(query, "u1"),
+            db.fetch_one(query, "u1"),
+        )
+        assert fake_conn.calls == 2
+
+    async def test_modifying_cte_and_locking_reads_not_shared(self, fake_conn):
+        await _run_concurrently(
+            fake_conn,
+            db.fetch_all("WITH d AS (DELETE FROM t RETURNING id) SELECT id FROM d"),
+            db.fetch_all("WITH d AS (DELETE FROM t RETURNING id) SELECT id FROM d"),
+            db.fetch_all("SELECT id FROM t FOR UPDATE"),
+            db.fetch_all("SELECT id FROM t FOR UPDATE"),
+        )
+        assert fake_conn.calls == 4
+
+    def test_is_read_only(self):
+        assert db.is_read_only("\n  -- latest\n  select 1")
+        assert db.is_read_only("/* c */ WITH x AS (SELECT 1) SELECT * FROM x")
+        assert not db.is_read_only("INSERT INTO t VALUES (1) RETURNING id")
+        assert not db.is_read_only("UPDATE t SET a = 1 RETURNING a")
+
+    async def test_disabled_setting(self, fake_conn, monkeypatch):
+        monkeypatch.setattr(db.settings, "db_coalesce_reads", False)
+        await _run_concurrently(
+            fake_conn,
+            db.fetch_all("SELECT 1"),
+            db.fetch_all("SELECT 1"),
+        )
+        assert fake_conn.calls == 2
@@ -0,0 +1,84 @@
+"""Unit tests for telemetry downsampling (LTTB and min/max envelope)."""
+
+import math
+from decimal import Decimal
+
+import pytest
+
+from pfn_mcp.tools.downsample import downsample, downsample_lttb, downsample_minmax
+
+
+def make_series(values: list[float]) -> list[dict]:
+    return [{"time": i, "avg": v, "min": v, "max": v} for i, v in enumerate(values)]
+
+
+@pytest.fixture
+def spiky():
+    """Sine wave with one single-row spike and one single-row dip."""
+    values = [math.sin(i / 50) * 10 + 100 for i in range(1440)]
+    values[333] = 500.0
+    values[1000] = -50.0
+    return make_series(values)
+
+
+class TestLTTB:
+    """Tests for Largest-Triangle-Three-Buckets."""
+
+    def test_caps_points_and_keeps_endpoints(self, spiky):
+        result = downsample_lttb(spiky, 100)
+        assert len(result) == 100
+        assert result[0] is spiky[0]
+        assert result[-1] is spiky[-1]
+        assert [p["time"] for p in result] == sorted(p["time"] for p in result)
+
+    def test_keeps_spikes(self, spiky):
+        values = {p["avg"] for p in downsample_lttb(spiky, 100)}
+        assert 500.0 in values
+        assert -50.0 in values
+
+    def test_short_series_unchanged(self):
+        series = make_series([1.0, 2.0, 3.0])
+        assert downsample_lttb(series, 100) == series
+
+    def test_decimal_values(self, spiky):
+        series = [{**p, "avg": Decimal(str(round(p["avg"], 3)))} for p in spiky]
+        values = {p["avg"] for p in downsample_lttb(series, 100)}
+        assert Decimal("500.0") in values
+        assert Decimal("-50.0") in values
+
+    def test_skips_missing_values(self):
+        series = make_series([1.0] * 10)
+        series[5]["avg"] = None
+        assert all(p["avg"] is not None for p in downsample_lttb(series, 4))
+
+
+class TestMinMax:
+    """Tests for the per-bucket min/max envelope."""
+
+    def test_caps_points_and_keeps_extremes(self, spiky):
+        result = downsample_minmax(spiky, 100)
+        assert len(result) <= 100
+        assert max(p["max"] for p in result) == 500.0
+        assert min(p["min"] for p in result) == -50.0
+        assert [p["time"] for p in result] == sorted(p["time"] for p in result)
+
+    def test_uses_min_and_max_fields(self):
+        series = [
+            {"time": i, "avg": 10.0, "min": 10.0 - (i == 2) * 5, "max": 10.0 + (i == 7) * 5}
+            for i in range(20)
+        ]
+        result = downsample_minmax(series, 4)
+        assert {p["time"] for p in result} >= {2, 7}
+
+    def test_decimal_values(self, spiky):
+        series = [
+            {**p, "min": Decimal(str(p["min"])), "max": Decimal(str(p["max"]))} for p in spiky
+        ]
+        result = downsample(series, "minmax", 100)
+        assert max(p["max"] for p in result) == Decimal("500.0")
+        assert min(p["min"] for p in result) == Decimal("-50.0")
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        downsample([], "mean", 10)
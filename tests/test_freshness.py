@@ -0,0 +1,114 @@
+"""Unit tests for the device last-seen tracker (no database)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from pfn_mcp import freshness
+from pfn_mcp.freshness import LastSeenTracker, classify_freshness
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def latest(buckets: dict[int, list[datetime]], keep) -> list[dict]:
+    """Last bucket per device among the buckets keep(device_id, bucket) accepts."""
+    rows = []
+    for device_id, device_buckets in buckets.items():
+        kept = [b for b in device_buckets if keep(device_id, b)]
+        if kept:
+            rows.append({"device_id": device_id, "last_bucket": max(kept)})
+    return rows
+
+
+@pytest.fixture
+def buckets():
+    return {
+        1: [NOW - timedelta(minutes=30)],
+        2: [NOW - timedelta(days=3), NOW - timedelta(days=10)],
+        3: [NOW - timedelta(days=400)],
+    }
+
+
+@pytest.fixture
+def telemetry(recording_db, buckets):
+    return recording_db({
+        freshness.RANGE_QUERY: lambda lower, upper: latest(
+            buckets, lambda d, b: lower < b <= upper
+        ),
+        freshness.POLL_QUERY: lambda since: latest(buckets, lambda d, b: b >= since),
+        freshness.DEVICES_QUERY: lambda ids: latest(buckets, lambda d, b: d in ids),
+    })
+
+
+class TestClassifyFreshness:
+    """Tests for online/recent/stale classification."""
+
+    def test_statuses(self):
+        assert classify_freshness(None, NOW, 24) == (None, "no_data")
+        assert classify_freshness(NOW - timedelta(minutes=30), NOW, 24)[1] == "online"
+        assert classify_freshness(NOW - timedelta(hours=5), NOW, 24)[1] == "recent"
+        assert classify_freshness(NOW - timedelta(hours=30), NOW, 24)[1] == "stale"
+
+    def test_hours_ago(self):
+        hours_ago, _ = classify_freshness(NOW - timedelta(hours=5), NOW, 24)
+        assert hours_ago == 5
+
+
+class TestLastSeenTracker:
+    """Tests for seeding, polling and on-demand lookups."""
+
+    async def test_seed_picks_latest_per_device(self, telemetry):
+        tracker = LastSeenTracker()
+        await tracker.seed(NOW)
+        last_seen = await tracker.last_seen_many([1, 2])
+        assert last_seen[1] == NOW - timedelta(minutes=30)
+        assert last_seen[2] == NOW - timedelta(days=3)
+        assert tracker.high_water == NOW - timedelta(minutes=30)
+        # Only the seed windows were queried
+        assert len(telemetry.queries) == len(freshness.SEED_WINDOWS)
+
+    async def test_old_and_unknown_devices_looked_up_once(self, telemetry):
+        tracker = LastSeenTracker()
+        await tracker.seed(NOW)
+        last_seen = await tracker.last_seen_many([3, 4])
+        assert last_seen[3] == NOW - timedelta(days=400)
+        assert last_seen[4] is None
+        queries = len(telemetry.queries)
+        await tracker.last_seen_many([3, 4])
+        assert len(telemetry.queries) == queries
+
+    async def test_poll_advances_map(self, telemetry, buckets):
+        tracker = LastSeenTracker()
+        await tracker.seed(NOW)
+        buckets[2].append(NOW)
+        await tracker.poll()
+        assert (await tracker.last_seen_many([2]))[2] == NOW
+        assert tracker.high_water == NOW
+        high_water = NOW - timedelta(minutes=30)
+        assert telemetry.queries[-1][1] == (high_water - freshness.POLL_OVERLAP,)
+
+    async def test_poll_catches_late_device(self, telemetry, buckets):
+        tracker = LastSeenTracker()
+        await tracker.seed(NOW)
+        # Device 2 uploads a bucket older than the high-water mark
+        buckets[2].append(NOW - timedelta(minutes=45))
+        await tracker.poll(NOW + timedelta(minutes=1))
+        assert (await tracker.last_seen_many([2]))[2] == NOW - timedelta(minutes=45)
+
+    async def test_future_bucket_does_not_freeze_poll(self, telemetry, buckets):
+        buckets[3].append(NOW + timedelta(hours=12))
+        tracker = LastSeenTracker()
+        await tracker.seed(NOW)
+        assert tracker.high_water == NOW + timedelta(hours=12)
+        buckets[2].append(NOW + timedelta(minutes=15))
+        await tracker.poll(NOW + timedelta(minutes=20))
+        assert (await tracker.last_seen_many([2]))[2] == NOW + timedelta(minutes=15)
+        since = NOW + timedelta(minutes=20) - freshness.POLL_OVERLAP
+        assert telemetry.queries[-1][1] == (since,)
+
+    def test_observe_ignores_older_bucket(self):
+        tracker = LastSeenTracker()
+        tracker.observe(1, NOW)
+        tracker.observe(1, NOW - timedelta(hours=1))
+        tracker.observe(1, None)
+        assert tracker._last_seen[1] == NOW
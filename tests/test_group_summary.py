@@ -0,0 +1,116 @@
+"""Unit tests for the single-scan WAGE group summary (no database)."""
+
+from datetime import datetime
+
+import pytest
+
+from pfn_mcp.tools.group_telemetry import _get_telemetry_group_summary
+
+T1 = datetime(2025, 6, 1, 8, 0)
+T2 = datetime(2025, 6, 1, 14, 15)
+
+VOLTAGE = {"id": 3332, "quantity_name": "Voltage L-N Avg", "unit": "V",
+           "aggregation_method": "avg"}
+ENERGY = {"id": 124, "quantity_name": "Active Energy Delivered", "unit": "kWh",
+          "aggregation_method": "sum"}
+
+
+def row(device_id, agg, lo, hi, lo_at=T1, hi_at=T2, points=96, days=1):
+    """GROUP_SUMMARY_QUERY row whose average is `agg` over `points` values."""
+    return {
+        "device_id": device_id, "is_total": device_id is None,
+        "sum_value": agg * points if agg is not None else None,
+        "value_count": points if agg is not None else 0,
+        "min_value": lo, "max_value": hi, "min_bucket": lo_at, "max_bucket": hi_at,
+        "days_with_data": days, "data_points": points,
+    }
+
+
+@pytest.fixture
+def fake_db(recording_db):
+    rows = [
+        row(1, 225.0, 210.0, 231.0, lo_at=T1, hi_at=T1),
+        row(2, 229.0, 220.0, 240.0, lo_at=T2, hi_at=T2),
+        row(None, 227.0, 210.0, 240.0, points=192),
+    ]
+    return recording_db(default=lambda query, *args: rows)
+
+
+async def summarize(quantity_info, breakdown="none", device_ids=(1, 2, 3)):
+    return await _get_telemetry_group_summary(
+        device_ids=list(device_ids),
+        device_names=[f"Dev {i}" for i in device_ids],
+        device_count=len(device_ids),
+        result_type="tag",
+        group_type="tag",
+        group_label="building=A",
+        quantity_id=quantity_info["id"],
+        quantity_info=quantity_info,
+        query_start=datetime(2025, 6, 1),
+        query_end=datetime(2025, 6, 2),
+        start_str="2025-06-01",
+        end_str="2025-06-02",
+        breakdown=breakdown,
+    )
+
+
+class TestGroupSummary:
+    """Summary, attribution and breakdown come from one query."""
+
+    async def test_single_query_with_attribution(self, fake_db):
+        result = await summarize(VOLTAGE)
+        assert len(fake_db.queries) == 1
+        summary = result["summary"]
+        assert summary["average_value"] == 227.0
+        assert (summary["min_device"], summary["min_time"]) == ("Dev 1", T1.isoformat())
+        assert (summary["max_device"], summary["max_time"]) == ("Dev 2", T2.isoformat())
+        assert summary["data_points"] == 192
+
+    async def test_instantaneous_auto_device_breakdown(self, fake_db):
+        result = await summarize(VOLTAGE)
+        breakdown = result["breakdown"]
+        assert [b["device_id"] for b in breakdown] == [2, 1, 3]
+        assert breakdown[2]["value"] == 0 and breakdown[2]["min"] is None
+        assert "percentage" not in breakdown[0]
+
+    async def test_cumulative_breakdown_percentages(self, fake_db):
+        result = await summarize(ENERGY, breakdown="device")
+        assert len(fake_db.queries) == 1
+        assert "SUM(aggregated_value)" in fake_db.queries[0][0]
+        assert result["summary"]["min_device"] is None
+        percentages = {b["device_id"]: b["percentage"] for b in result["breakdown"]}
+        assert percentages == {1: 49.6, 2: 50.4, 3: 0}
+
+    async def test_no_data(self, recording_db):
+        empty = [row(None, None, None, None, None, None, points=0, days=0)]
+        recording_db(default=lambda query, *args: empty)
+        result = await summarize(VOLTAGE)
+        assert result["summary"]["min_value"] is None
+        assert result["summary"]["min_device"] is None
+
+    async def test_long_range_merges_month_partitions(self, fake_db):
+        result = await _get_telemetry_group_summary(
+            device_ids=[1, 2],
+            device_names=["Dev 1", "Dev 2"],
+            device_count=2,
+            result_type="tag",
+            group_type="tag",
+            group_label="building=A",
+            quantity_id=VOLTAGE["id"],
+            quantity_info=VOLTAGE,
+            query_start=datetime(2025, 1, 1),
+            query_end=datetime(2025, 4, 1),
+            start_str="2025-01-01",
+            end_str="2025-03-31",
+            breakdown="none",
+        )
+        # One query per month, each partition's rows merged
+        assert [q[1][1:3] for q in fake_db.queries] == [
+            (datetime(2025, 1, 1), datetime(2025, 2, 1)),
+            (datetime(2025, 2, 1), datetime(2025, 3, 1)),
+            (datetime(2025, 3, 1), datetime(2025, 4, 1)),
+        ]
+        summary = result["summary"]
+        assert summary["average_value"] == 227.0
+        assert summary["data_points"] == 3 * 192
+        assert summary["days_with_data"] == 3
@@ -0,0 +1,155 @@
+"""Unit tests for the live last-value cache (no database)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from pfn_mcp import last_values
+from pfn_mcp.last_values import LATE_ARRIVAL, LastValueCache
+from pfn_mcp.tools import latest_values
+
+NOW = datetime(2025, 6, 1, 12, 0)
+WINDOW = timedelta(hours=1)
+
+
+def latest_since(raw_rows, tenant_id: int, since: datetime) -> list[dict]:
+    """Latest row per device/quantity of a tenant newer than since (POLL_QUERY)."""
+    latest = {}
+    for t, d, q, ts, v in raw_rows:
+        if t == tenant_id and ts > since:
+            if (d, q) not in latest or ts > latest[(d, q)]["timestamp"]:
+                latest[(d, q)] = {"device_id": d, "quantity_id": q, "timestamp": ts, "value": v}
+    return list(latest.values())
+
+
+@pytest.fixture
+def raw_rows():
+    """(tenant_id, device_id, quantity_id, timestamp, value) rows of telemetry_data."""
+    return [
+        (1, 10, 185, NOW - timedelta(minutes=10), 100.0),
+        (1, 10, 185, NOW - timedelta(minutes=2), 120.0),
+        (1, 10, 501, NOW - timedelta(minutes=5), 230.0),
+        (2, 20, 185, NOW - timedelta(minutes=1), 50.0),
+    ]
+
+
+@pytest.fixture
+def telemetry(recording_db, raw_rows):
+    return recording_db({
+        last_values.TENANTS_QUERY: lambda: [{"id": t} for t in sorted({r[0] for r in raw_rows})],
+        last_values.POLL_QUERY: lambda tenant_id, since: latest_since(raw_rows, tenant_id, since),
+    })
+
+
+class TestLastValueCache:
+    """Tests for observing, reading and polling the cache."""
+
+    def test_observe_keeps_newest(self):
+        cache = LastValueCache(WINDOW)
+        cache.observe(10, 185, NOW, 1.0)
+        cache.observe(10, 185, NOW - timedelta(minutes=1), 2.0)
+        assert cache.get(10)[185].value == 1.0
+
+    def test_get_filters_quantities(self):
+        cache = LastValueCache(WINDOW)
+        cache.observe(10, 185, NOW, 1.0)
+        cache.observe(10, 501, NOW, 2.0)
+        assert set(cache.get(10, [501, 999])) == {501}
+        assert cache.get(11) == {}
+
+    async def test_first_poll_reads_window(self, telemetry):
+        cache = LastValueCache(WINDOW)
+        assert not cache.is_ready(1)
+        await cache.poll_tenant(1, NOW)
+        assert cache.is_ready(1)
+        assert not cache.is_ready(2)
+        assert telemetry.queries[-1][1] == (1, NOW - WINDOW)
+        assert cache.get(10)[185].value == 120.0
+        assert cache.get(20) == {}
+
+    async def test_next_poll_starts_at_high_water(self, telemetry, raw_rows):
+        cache = LastValueCache(WINDOW)
+        await cache.poll_tenant(1, NOW)
+        raw_rows.append((1, 10, 185, NOW + timedelta(seconds=30), 125.0))
+        await cache.poll_tenant(1, NOW + timedelta(minutes=1))
+        high_water = NOW - timedelta(minutes=2)
+        assert telemetry.queries[-1][1] == (1, high_water - LATE_ARRIVAL)
+        assert cache.get(10)[185].value == 125.0
+
+    async def test_poll_catches_lagging_device(self, telemetry, raw_rows):
+        cache = LastValueCache(WINDOW)
+        await cache.poll_tenant(1, NOW)
+        # Device 11's gateway uploads ten minutes behind the tenant's newest row
+        raw_rows.append((1, 11, 185, NOW - timedelta(minutes=12), 7.0))
+        await cache.poll_tenant(1, NOW + timedelta(minutes=1))
+        assert cache.get(11)[185].value == 7.0
+
+    async def test_future_timestamp_does_not_freeze_tenant(self, telemetry, raw_rows):
+        raw_rows.append((1, 12, 185, NOW + timedelta(days=1), 1.0))
+        cache = LastValueCache(WINDOW)
+        await cache.poll_tenant(1, NOW)
+        assert cache._polled_until[1] == NOW
+        raw_rows.append((1, 10, 185, NOW + timedelta(minutes=1), 130.0))
+        await cache.poll_tenant(1, NOW + timedelta(minutes=2))
+        assert telemetry.queries[-1][1] == (1, NOW - LATE_ARRIVAL)
+        assert cache.get(10)[185].value == 130.0
+
+    async def test_poll_all_covers_every_tenant(self, telemetry, monkeypatch):
+        monkeypatch.setattr(last_values, "utc_now_naive", lambda: NOW)
+        cache = LastValueCache(WINDOW)
+        await cache.poll_all()
+        assert cache.is_ready(1) and cache.is_ready(2)
+        assert len(cache) == 3
+
+
+DEVICES = {
+    10: {"id": 10, "display_name": "Feeder 10", "device_code": "F10", "tenant_id": 1},
+    20: {"id": 20, "display_name": "Feeder 20", "device_code": "F20", "tenant_id": 2},
+}
+
+
+def devices_by_name(names, tenant_id):
+    """First device per name whose display name contains it (DEVICES_BY_NAME_QUERY)."""
+    rows = []
+    for name in names:
+        match = next(
+            (
+                d for d in DEVICES.values()
+                if name.lower() in d["display_name"].lower()
+                and (tenant_id is None or d["tenant_id"] == tenant_id)
+            ),
+            None,
+        )
+        if match is not None:
+            rows.append({"requested_name": name, **match})
+    return rows
+
+
+class TestResolveDevices:
+    """Device IDs and names are resolved with one query each."""
+
+    @pytest.fixture
+    def devices_db(self, recording_db):
+        return recording_db({
+            latest_values.DEVICES_BY_ID_QUERY: lambda ids: [
+                DEVICES[i] for i in ids if i in DEVICES
+            ],
+            latest_values.DEVICES_BY_NAME_QUERY: devices_by_name,
+        })
+
+    async def test_many_devices_two_queries(self, devices_db):
+        devices, error = await latest_values._resolve_devices(
+            [10, 20, 10] * 20, ["feeder 10"], None
+        )
+        assert error is None
+        assert [d["id"] for d in devices] == [10, 20]
+        assert len(devices_db.queries) == 2
+
+    async def test_unknown_and_inaccessible_reported_together(self, devices_db):
+        devices, error = await latest_values._resolve_devices([10, 20, 98, 99], ["pump"], 1)
+        assert devices == []
+        assert error == (
+            "Device IDs not found: 98, 99; "
+            "Device IDs not accessible for this tenant: 20; "
+            "Devices not found: pump"
+        )
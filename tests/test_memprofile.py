@@ -0,0 +1,105 @@
+"""Tests for per-tool tracemalloc profiling and allocation budgets."""
+
+import asyncio
+import json
+import tracemalloc
+
+import pytest
+
+from pfn_mcp import dispatch, memprofile
+from pfn_mcp.config import settings
+from pfn_mcp.memprofile import MIB, MemoryProfiler
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(memprofile.MEMORY_BUDGET_VIOLATIONS, "values", {})
+    profiler = MemoryProfiler(
+        tmp_path / "memory.jsonl",
+        top_sites=3,
+        interval=0.001,
+        budgets_mib={"get_group_telemetry": 1.0},
+    )
+    yield profiler
+    profiler.close()
+    tracemalloc.stop()
+
+
+def read_lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def build_rows() -> str:
+    """Allocates ~several MiB of intermediate dicts, returns a small string."""
+    rows = [{"time": i, "value": float(i), "device": f"dev-{i}"} for i in range(10_000)]
+    await asyncio.sleep(0.01)
+    return f"{len(rows)} rows"
+
+
+class TestProfiler:
+    """Peaks, top sites and budgets."""
+
+    async def test_peak_and_sites_of_freed_intermediates(self, profiler):
+        result = await profiler.profile("get_group_telemetry", "PRS", build_rows)
+        assert result == "10000 rows"
+        [line] = read_lines(profiler.path)
+        assert line["tool"] == "get_group_telemetry"
+        assert line["peak_bytes"] > 2 * MIB
+        assert line["net_bytes"] < line["peak_bytes"] / 10
+        assert "test_memprofile.py:" in line["top_sites"][0]["site"]
+        assert line["top_sites"][0]["bytes"] > MIB
+
+    async def test_budget_violation_logged(self, profiler, caplog):
+        await profiler.profile("get_group_telemetry", None, build_rows)
+        [line] = read_lines(profiler.path)
+        assert line["over_budget"] is True and line["budget_bytes"] == MIB
+        assert memprofile.MEMORY_BUDGET_VIOLATIONS.values == {("get_group_telemetry",): 1}
+        assert "get_group_telemetry peaked at" in caplog.text
+
+    async def test_unbudgeted_tool(self, profiler):
+        await profiler.profile("list_tags", None, build_rows)
+        [line] = read_lines(profiler.path)
+        assert line["budget_bytes"] is None and line["over_budget"] is False
+
+    def test_default_budget(self):
+        profiler = MemoryProfiler("unused", budgets_mib={"a": 2}, default_budget_mib=0.5)
+        assert profiler.budget_for("a") == 2 * MIB
+        assert profiler.budget_for("b") == MIB // 2
+
+    async def test_run_tool_profiles_when_enabled(self, profiler, monkeypatch):
+        monkeypatch.setattr(settings, "memory_profiling_enabled", True)
+        monkeypatch.setattr(settings, "tool_cache_enabled", False)
+        monkeypatch.setattr(memprofile, "_profiler", profiler)
+        await dispatch.run_tool("get_peak_analysis", {}, "PRS", build_rows)
+        [line] = read_lines(profiler.path)
+        assert (line["tool"], line["tenant"]) == ("get_peak_analysis", "PRS")
+
+
+class TestSummary:
+    """Per-tool summary of a profile file."""
+
+    RECORDS = [
+        {"tool": "a", "peak_bytes": 1 * MIB, "net_bytes": 0, "over_budget": False,
+         "top_sites": [{"site": "x.py:1", "bytes": MIB, "count": 10}]},
+        {"tool": "a", "peak_bytes": 5 * MIB, "net_bytes": MIB, "over_budget": True,
+         "top_sites": [{"site": "y.py:2", "bytes": 4 * MIB, "count": 99}]},
+        {"tool": "b", "peak_bytes": 2 * MIB, "net_bytes": 0, "over_budget": False,
+         "top_sites": []},
+    ]
+
+    def test_summarize_keeps_worst_call_sites(self):
+        summary = memprofile.summarize(self.RECORDS)
+        assert summary["a"]["calls"] == 2
+        assert summary["a"]["median_peak_bytes"] == 3 * MIB
+        assert summary["a"]["violations"] == 1
+        assert summary["a"]["top_sites"][0]["site"] == "y.py:2"
+
+    def test_render_sorted_by_max_peak(self):
+        lines = memprofile.render_summary(memprofile.summarize(self.RECORDS)).splitlines()
+        assert lines[1].startswith("a ")
+        assert "y.py:2" in lines[2]
+        assert lines[3].startswith("b ")
+
+    def test_short_site(self):
+        assert memprofile.short_site("/opt/app/src/pfn_mcp/db.py", 12) == "pfn_mcp/db.py:12"
+        assert memprofile.short_site("/x/site-packages/asyncpg/pool.py", 3) == "asyncpg/pool.py:3"
@@ -0,0 +1,133 @@
+"""Tests for the Prometheus metrics registry and its feeds."""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from pfn_mcp import db, dispatch, metrics
+from pfn_mcp.config import settings
+from pfn_mcp.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+class TestRendering:
+    """Prometheus text exposition format."""
+
+    def test_counter_with_labels(self, registry):
+        calls = registry.counter("pfn_calls_total", "Calls", ("tool", "status"))
+        calls.inc(tool="get_wages_data", status="ok")
+        calls.inc(2, tool="get_wages_data", status="ok")
+        calls.inc(tool='say "hi"\n', status="error")
+        text = registry.render()
+        assert "# TYPE pfn_calls_total counter" in text
+        assert 'pfn_calls_total{tool="get_wages_data",status="ok"} 3' in text
+        assert 'pfn_calls_total{tool="say \\"hi\\"\\n",status="error"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        latency = registry.histogram("pfn_latency_seconds", "Latency", ("tool",), (0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            latency.observe(value, tool="t")
+        lines = registry.render().splitlines()
+        assert 'pfn_latency_seconds_bucket{tool="t",le="0.1"} 1' in lines
+        assert 'pfn_latency_seconds_bucket{tool="t",le="1"} 3' in lines
+        assert 'pfn_latency_seconds_bucket{tool="t",le="+Inf"} 4' in lines
+        assert 'pfn_latency_seconds_sum{tool="t"} 6.25' in lines
+        assert 'pfn_latency_seconds_count{tool="t"} 4' in lines
+
+    def test_callbacks_read_at_scrape_time(self, registry):
+        state = {"sessions": 2}
+        registry.callback("pfn_sessions", "Sessions", lambda: state["sessions"])
+        registry.callback("pfn_missing", "Absent", lambda: None)
+        registry.callback("pfn_broken", "Broken", lambda: 1 / 0)
+        state["sessions"] = 5
+        text = registry.render()
+        assert "pfn_sessions 5" in text
+        assert not [line for line in text.splitlines() if line.startswith("pfn_missing")]
+        assert "# pfn_broken unavailable: division by zero" in text
+
+    def test_disabled_records_nothing(self, registry, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_enabled", False)
+        calls = registry.counter("pfn_calls_total", "Calls")
+        calls.inc()
+        assert calls.values == {}
+
+    def test_base_metric_is_abstract(self):
+        with pytest.raises(TypeError):
+            metrics._Metric("pfn_base", "Base")
+
+    def test_default_registry_renders_without_pools(self, monkeypatch):
+        monkeypatch.setattr(db, "_pools", {})
+        text = metrics.REGISTRY.render()
+        assert "# TYPE pfn_db_pool_waiters gauge" in text
+        assert "# TYPE pfn_tool_cache_requests_total counter" in text
+
+
+class TestFeeds:
+    """Dispatch and db layers record into the shared registry."""
+
+    async def test_run_tool_counts_outcomes(self, monkeypatch):
+        monkeypatch.setattr(settings, "tool_cache_enabled", False)
+        monkeypatch.setattr(metrics.TOOL_CALLS, "values", {})
+        monkeypatch.setattr(metrics.TOOL_DURATION, "series", {})
+
+        async def ok():
+            return "fine"
+
+        async def failed():
+            return "Error: no data"
+
+        await dispatch.run_tool("list_tags", {}, None, ok)
+        await dispatch.run_tool("list_tags", {}, None, failed)
+        assert metrics.TOOL_CALLS.values == {("list_tags", "ok"): 1, ("list_tags", "error"): 1}
+        counts, _ = metrics.TOOL_DURATION.series[("list_tags",)]
+        assert sum(counts) == 2
+
+    async def test_pool_waiters_and_acquire_time(self, monkeypatch):
+        monkeypatch.setattr(metrics.DB_ACQUIRE_DURATION, "series", {})
+        monkeypatch.setattr(db, "_acquire_waiting", {})
+        seen = []
+
+        class Pool:
+            @asynccontextmanager
+            async def acquire(self):
+                seen.append(dict(db._acquire_waiting))
+                yield object()
+
+        monkeypatch.setattr(db, "get_pool", lambda name=db.PRIMARY: Pool())
+        async with db.get_connection(db.CHAT):
+            pass
+        assert seen == [{db.CHAT: 1}]
+        assert db._acquire_waiting == {db.CHAT: 0}
+        assert (db.CHAT,) in metrics.DB_ACQUIRE_DURATION.series
+
+    async def test_query_errors_counted(self, monkeypatch):
+        monkeypatch.setattr(metrics.DB_QUERY_ERRORS, "values", {})
+        monkeypatch.setattr(db.settings, "db_coalesce_reads", False)
+
+        @asynccontextmanager
+        async def get_connection(name=db.PRIMARY):
+            raise ConnectionError("down")
+            yield
+
+        monkeypatch.setattr(db, "get_connection", get_connection)
+        with pytest.raises(ConnectionError):
+            await db.fetch_val("SELECT 1")
+        assert metrics.DB_QUERY_ERRORS.values == {("fetch_val",): 1}
+
+
+class TestChatEndpoint:
+    """The chat API serves the registry."""
+
+    def test_metrics_endpoint(self):
+        from fastapi.testclient import TestClient
+
+        from pfn_mcp.chat.app import app
+
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE pfn_chat_turns_total counter" in response.text
@@ -0,0 +1,81 @@
+"""Unit tests for map-reduce execution of long-range aggregates."""
+
+import asyncio
+from datetime import datetime
+
+from pfn_mcp.tools.partitioned import PartialAggregate, map_partitions, split_range
+from pfn_mcp.tools.wages_data import _merge_device_partials
+
+
+class TestSplitRange:
+    """Tests for month-aligned partitioning."""
+
+    def test_short_range_is_one_partition(self):
+        start, end = datetime(2025, 1, 10), datetime(2025, 2, 10)
+        assert split_range(start, end, min_days=62) == [(start, end)]
+
+    def test_long_range_split_at_month_starts(self):
+        partitions = split_range(datetime(2024, 11, 15, 6), datetime(2025, 2, 3), min_days=62)
+        assert partitions == [
+            (datetime(2024, 11, 15, 6), datetime(2024, 12, 1)),
+            (datetime(2024, 12, 1), datetime(2025, 1, 1)),
+            (datetime(2025, 1, 1), datetime(2025, 2, 1)),
+            (datetime(2025, 2, 1), datetime(2025, 2, 3)),
+        ]
+
+    def test_year_is_twelve_partitions(self):
+        assert len(split_range(datetime(2024, 1, 1), datetime(2025, 1, 1), min_days=62)) == 12
+
+
+class TestPartialAggregate:
+    """Tests for merging sum/count/min/max."""
+
+    def test_merge_matches_single_pass(self):
+        values = [[3.0, 5.0], [1.0], [], [7.0, 2.0, 4.0]]
+        merged = PartialAggregate()
+        for part in values:
+            merged.add(sum(part), len(part), min(part, default=None), max(part, default=None))
+        flat = [v for part in values for v in part]
+        assert merged.sum == sum(flat)
+        assert merged.avg == sum(flat) / len(flat)
+        assert (merged.min, merged.max) == (1.0, 7.0)
+        assert merged.value("sum") == merged.sum
+
+    def test_ties_keep_earliest_time(self):
+        merged = PartialAggregate()
+        merged.add(10.0, 1, 10.0, 10.0, datetime(2025, 3, 1), datetime(2025, 3, 1))
+        merged.add(10.0, 1, 10.0, 10.0, datetime(2025, 1, 1), datetime(2025, 1, 1))
+        assert merged.min_at == merged.max_at == datetime(2025, 1, 1)
+
+    def test_empty(self):
+        assert PartialAggregate().avg is None
+
+
+async def test_map_partitions_runs_concurrently():
+    running = peak = 0
+
+    async def run(lower, upper):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return lower.month
+
+    results = await map_partitions(run, datetime(2025, 1, 1), datetime(2025, 7, 1), min_days=62)
+    assert results == [1, 2, 3, 4, 5, 6]
+    assert peak > 1
+
+
+def test_merge_device_partials_for_wages():
+    partitions = [
+        [{"device_id": 1, "sum_value": 10.0, "value_count": 2, "min_value": 4.0,
+          "max_value": 6.0, "samples": 30}],
+        [{"device_id": 1, "sum_value": 20.0, "value_count": 2, "min_value": 9.0,
+          "max_value": 11.0, "samples": 30}],
+    ]
+    assert _merge_device_partials(partitions, "avg") == [
+        {"device_id": 1, "value": 7.5, "samples": 60}
+    ]
+    assert _merge_device_partials(partitions, "max")[0]["value"] == 11.0
+    assert _merge_device_partials(partitions, "sum")[0]["value"] == 30.0
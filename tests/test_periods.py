@@ -0,0 +1,113 @@
+"""Unit tests for shared period normalization.
+
+Tests for src/pfn_mcp/tools/periods.py
+"""
+
+from datetime import datetime, timedelta
+
+from pfn_mcp.tools import electricity_cost, telemetry
+from pfn_mcp.tools.periods import (
+    normalized_range_key,
+    parse_period,
+    parse_relative_period,
+    range_key,
+    resolve_time_range,
+    rolling_range,
+    snap_down,
+    snap_up,
+)
+
+
+class TestSnapping:
+    """Tests for 15-minute snapping."""
+
+    def test_snap_down(self):
+        dt = datetime(2025, 12, 1, 10, 7, 31, 123456)
+        assert snap_down(dt) == datetime(2025, 12, 1, 10, 0)
+
+    def test_snap_up(self):
+        dt = datetime(2025, 12, 1, 10, 7, 31, 123456)
+        assert snap_up(dt) == datetime(2025, 12, 1, 10, 15)
+
+    def test_snap_up_on_boundary_is_identity(self):
+        dt = datetime(2025, 12, 1, 10, 15)
+        assert snap_up(dt) == dt
+
+    def test_custom_interval(self):
+        dt = datetime(2025, 12, 1, 10, 7)
+        assert snap_down(dt, timedelta(hours=1)) == datetime(2025, 12, 1, 10, 0)
+
+
+class TestRollingRange:
+    """Tests for snapped rolling windows."""
+
+    def test_calls_within_slot_share_range(self):
+        a = rolling_range(timedelta(hours=24), datetime(2025, 12, 1, 10, 1, 2, 3))
+        b = rolling_range(timedelta(hours=24), datetime(2025, 12, 1, 10, 14, 59))
+        assert a == b
+        assert range_key(*a) == range_key(*b)
+
+    def test_range_keeps_duration(self):
+        start, end = rolling_range(timedelta(hours=24), datetime(2025, 12, 1, 10, 7))
+        assert end == datetime(2025, 12, 1, 10, 15)
+        assert end - start == timedelta(hours=24)
+
+
+class TestParseRelativePeriod:
+    """Tests for the unified relative period parser."""
+
+    def test_units(self):
+        assert parse_relative_period("24h") == timedelta(hours=24)
+        assert parse_relative_period("7d") == timedelta(days=7)
+        assert parse_relative_period("2w") == timedelta(weeks=2)
+        assert parse_relative_period("3M") == timedelta(days=90)
+        assert parse_relative_period("1Y") == timedelta(days=365)
+
+    def test_invalid(self):
+        assert parse_relative_period("2025-12") is None
+        assert parse_relative_period("abc") is None
+
+    def test_telemetry_and_electricity_share_parser(self):
+        assert telemetry.parse_period("7d") == parse_relative_period("7d")
+        assert electricity_cost.parse_period is parse_period
+
+
+class TestResolveTimeRange:
+    """Tests for telemetry-style range resolution."""
+
+    def test_relative_is_snapped(self):
+        start, end = resolve_time_range("24h", None, None)
+        assert end.minute % 15 == 0
+        assert end.second == 0 and end.microsecond == 0
+        assert end - start == timedelta(hours=24)
+
+    def test_explicit_dates_not_snapped(self):
+        start, end = resolve_time_range(None, "2025-12-01T10:07:00Z", "2025-12-01T11:00:00")
+        assert start == datetime(2025, 12, 1, 10, 7)
+        assert end == datetime(2025, 12, 1, 11, 0)
+
+    def test_invalid_period(self):
+        result = resolve_time_range("bogus", None, None)
+        assert result[0] is None
+        assert "Invalid period" in result[1]
+
+
+class TestParsePeriod:
+    """Tests for calendar-style period parsing."""
+
+    def test_hours_now_supported(self):
+        start, end = parse_period("24h", None, None)
+        assert end - start == timedelta(hours=24)
+
+    def test_invalid_month(self):
+        result = parse_period("2025-13", None, None)
+        assert result[0] is None
+
+    def test_natural_language_last_hours_snapped(self):
+        start, end = parse_period("last 3 hours", None, None)
+        assert end.minute % 15 == 0
+        assert end - start == timedelta(hours=3)
+
+    def test_range_key_stable(self):
+        assert normalized_range_key("2025-12") == "2025-12-01T00:00/2026-01-01T00:00"
+        assert normalized_range_key("bogus") is None
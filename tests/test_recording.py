@@ -0,0 +1,109 @@
+"""Tests for the anonymized tool-call recorder."""
+
+import json
+
+import pytest
+
+from pfn_mcp import dispatch, recording
+from pfn_mcp.config import settings
+from pfn_mcp.recording import ANON_KEY, ToolCallRecorder, anonymize_arguments, pseudonym
+
+
+class TestAnonymizeArguments:
+    """Identifying values become markers, structural ones are kept."""
+
+    def test_identifiers_replaced(self):
+        args = {
+            "tenant": "PRS", "device_name": "Chiller 3 (Gedung B)", "device_ids": [94, 11],
+            "quantity_search": "power", "period": "7d", "bucket": "1hour", "limit": 5,
+        }
+        result = anonymize_arguments("get_batch_telemetry", args, "s")
+        text = json.dumps(result)
+        assert "PRS" not in text and "Chiller" not in text and "94" not in text
+        assert result["device_name"][ANON_KEY] == "device"
+        assert [m["field"] for m in result["device_ids"]] == ["id", "id"]
+        assert {k: result[k] for k in ("quantity_search", "period", "bucket", "limit")} == {
+            "quantity_search": "power", "period": "7d", "bucket": "1hour", "limit": 5,
+        }
+
+    def test_refs_stable_per_value_and_salt(self):
+        assert pseudonym("device", "Chiller 3", "a") == pseudonym("device", " chiller 3", "a")
+        assert pseudonym("device", "Chiller 3", "a") != pseudonym("device", "Chiller 3", "b")
+        assert pseudonym("device", 94, "a") != pseudonym("asset", 94, "a")
+
+    def test_search_depends_on_tool(self):
+        devices = anonymize_arguments("list_devices", {"search": "Gedung B"}, "s")
+        quantities = anonymize_arguments("list_quantities", {"search": "voltage"}, "s")
+        assert devices["search"][ANON_KEY] == "device"
+        assert quantities["search"] == "voltage"
+
+    def test_tags_formula_and_groups(self):
+        result = anonymize_arguments("get_wages_data", {
+            "tag_key": "building", "tag_value": "Factory B",
+            "tags": [{"key": "building", "value": "Factory B"}],
+            "formula": "(94+11)-(84)",
+        }, "s")
+        assert result["tag_value"]["key"] == result["tag_key"]["ref"]
+        assert result["tags"][0]["value"] == result["tag_value"]
+        assert result["formula"]["template"] == "({0}+{1})-({2})"
+        assert result["formula"]["refs"][0] == pseudonym("device", "94", "s")
+
+        groups = anonymize_arguments("compare_groups", {
+            "groups": [{"tag_key": "building", "tag_value": "A", "label": "Plant A"},
+                       {"asset_id": 5}],
+        }, "s")["groups"]
+        assert "Plant A" not in json.dumps(groups)
+        assert groups[1]["asset_id"][ANON_KEY] == "asset"
+
+
+class TestDispatchRecording:
+    """run_tool appends one line per call when recording is enabled."""
+
+    @pytest.fixture
+    def recorder(self, monkeypatch, tmp_path):
+        rec = ToolCallRecorder(tmp_path / "calls.jsonl", salt="s")
+        monkeypatch.setattr(settings, "tool_recording_enabled", True)
+        monkeypatch.setattr(settings, "tool_cache_enabled", False)
+        monkeypatch.setattr(recording, "_recorder", rec)
+        yield rec
+        rec.close()
+
+    def lines(self, rec: ToolCallRecorder) -> list[dict]:
+        rec.close()
+        return [json.loads(line) for line in rec.path.read_text().splitlines()]
+
+    async def test_records_call(self, recorder):
+        async def call():
+            return "Device list"
+
+        await dispatch.run_tool("list_devices", {"tenant": "PRS", "search": "pump"}, "PRS", call)
+        [line] = self.lines(recorder)
+        assert line["tool"] == "list_devices"
+        assert line["tenant"]["ref"] == pseudonym("tenant", "PRS", "s")
+        assert line["result_bytes"] == len("Device list")
+        assert line["error"] is False
+        assert "pump" not in json.dumps(line)
+
+    async def test_records_failures(self, recorder):
+        async def call():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await dispatch.run_tool("get_date_info", {}, None, call)
+        [line] = self.lines(recorder)
+        assert line["error"] is True and line["tenant"] is None
+
+    async def test_error_status_matches_dispatch(self, recorder):
+        async def unknown():
+            return "Unknown tool: get_nothing"
+
+        async def late_error():
+            return "## Device Telemetry\n\nError: no data for this period"
+
+        await dispatch.run_tool("get_nothing", {}, None, unknown)
+        await dispatch.run_tool("get_device_telemetry", {}, None, late_error)
+        assert [line["error"] for line in self.lines(recorder)] == [True, True]
+
+    async def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.setattr(settings, "tool_recording_enabled", False)
+        assert recording.get_recorder() is None
@@ -0,0 +1,162 @@
+"""Tests for the structured slow log and its adaptive sampling."""
+
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from pfn_mcp import db, dispatch, slowlog
+from pfn_mcp.config import settings
+from pfn_mcp.slowlog import AdaptiveSampler, SlowLog
+
+
+def read_lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    log = SlowLog(tmp_path / "slow.jsonl", 100.0, 1000.0, samples_per_minute=0)
+    monkeypatch.setattr(settings, "slow_log_enabled", True)
+    monkeypatch.setattr(slowlog, "_slow_log", log)
+    yield log
+    log.close()
+
+
+class TestShapes:
+    """Fingerprints and argument shapes carry sizes, not values."""
+
+    def test_fingerprint_ignores_literals_and_comments(self):
+        a = slowlog.fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'x' /*tool='a'*/")
+        b = slowlog.fingerprint("SELECT *\n  FROM t WHERE id = 17 AND name = 'it''s'")
+        assert a == b
+        assert a[1] == "SELECT * FROM t WHERE id = ? AND name = ?"
+        assert slowlog.fingerprint("SELECT $1")[1] == "SELECT $1"
+
+    def test_query_args(self):
+        start = datetime(2026, 1, 1)
+        shape = slowlog.describe_query_args(([1, 2, 3], start, start + timedelta(days=7), 264))
+        assert shape["count"] == 4
+        assert shape["types"] == ["list", "datetime", "datetime", "int"]
+        assert shape["device_count"] == 3
+        assert shape["range_days"] == 7.0
+
+    def test_tool_args(self):
+        shape = slowlog.describe_tool_args({
+            "device_names": ["Pump 1", "Pump 2"],
+            "start_date": "2026-01-01",
+            "end_date": "2026-01-31",
+            "bucket": "1day",
+            "tenant": None,
+        })
+        assert shape == {
+            "keys": ["bucket", "device_names", "end_date", "start_date"],
+            "device_count": 2,
+            "bucket": "1day",
+            "range_days": 30.0,
+        }
+
+
+class TestSampler:
+    """Adaptive per-key sampling."""
+
+    def test_budget_caps_hot_keys(self):
+        sampler = AdaptiveSampler(per_minute=2)
+        rates = [sampler.rate("hot") for _ in range(10)]
+        assert rates[:2] == [1.0, 1.0]
+        assert rates[-1] == pytest.approx(0.2)
+        assert sampler.rate("rare") == 1.0
+
+    def test_next_window_uses_previous_rate(self, monkeypatch):
+        clock = [0.0]
+        monkeypatch.setattr(slowlog.time, "monotonic", lambda: clock[0])
+        sampler = AdaptiveSampler(per_minute=5)
+        for _ in range(50):
+            sampler.rate("hot")
+        clock[0] = 61.0
+        assert sampler.rate("hot") == pytest.approx(0.1)
+        assert sampler.rate("new") == 1.0
+
+    def test_zero_budget_samples_nothing(self):
+        assert AdaptiveSampler(per_minute=0).sample("k") is None
+
+
+class TestSlowLog:
+    """Threshold, sampling and feeds from the db and dispatch layers."""
+
+    def test_fast_calls_dropped_without_budget(self, slow_log):
+        slow_log.query("fetch_all", "SELECT 1", (), 5.0)
+        slow_log.tool("list_tags", {}, None, 50.0, "ok")
+        assert not slow_log.path.exists()
+
+    def test_fast_calls_sampled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(slowlog.random, "random", lambda: 0.99)
+        log = SlowLog(tmp_path / "slow.jsonl", 100.0, 1000.0, samples_per_minute=1)
+        for _ in range(20):
+            log.query("fetch_all", "SELECT 1", (), 5.0)
+        log.close()
+        [line] = read_lines(log.path)
+        assert line["slow"] is False
+        assert line["sample_rate"] == 1.0
+
+    def test_errors_always_logged(self, slow_log):
+        slow_log.tool("get_wages_data", {}, "PRS", 10.0, "Error: no data", error=True)
+        [line] = read_lines(slow_log.path)
+        assert line["error"] is True and line["slow"] is False
+
+    async def test_slow_query_from_tool(self, slow_log, monkeypatch):
+        slow_log.query_threshold_ms = 0
+        monkeypatch.setattr(settings, "tool_cache_enabled", False)
+        monkeypatch.setattr(db.settings, "db_coalesce_reads", True)
+        monkeypatch.setattr(db, "_acquire_waiting", {})
+
+        class Conn:
+            async def fetch(self, query, *args):
+                return [{"v": 1}, {"v": 2}]
+
+        class Pool:
+            @asynccontextmanager
+            async def acquire(self):
+                yield Conn()
+
+        @asynccontextmanager
+        async def no_admission(pool=db.PRIMARY):
+            yield
+
+        async def resolve_pool(query, write=False):
+            return db.ANALYTICS
+
+        monkeypatch.setattr(db, "get_pool", lambda name=db.PRIMARY: Pool())
+        monkeypatch.setattr(db, "admission_slot", no_admission)
+        monkeypatch.setattr(db, "resolve_pool", resolve_pool)
+
+        async def call():
+            await db.fetch_all("SELECT v FROM t WHERE device_id = ANY($1)", [1, 2, 3])
+            return "ok"
+
+        await dispatch.run_tool("get_group_telemetry", {"tags": ["a"]}, "PRS", call)
+        [query] = read_lines(slow_log.path)
+        assert query["kind"] == "query"
+        assert query["tool"] == "get_group_telemetry"
+        assert query["tenant"] == "PRS"
+        assert query["rows"] == 2
+        assert query["pool"] == db.ANALYTICS
+        assert query["slow"] is True
+        assert 0 <= query["pool_wait_ms"] <= query["duration_ms"]
+        assert query["args"]["device_count"] == 3
+        assert query["coalesced"] is False
+
+    async def test_slow_tool(self, slow_log, monkeypatch):
+        slow_log.tool_threshold_ms = 0
+        monkeypatch.setattr(settings, "tool_cache_enabled", False)
+
+        async def call():
+            return "result"
+
+        await dispatch.run_tool("get_peak_analysis", {"period": "7d"}, None, call)
+        [line] = read_lines(slow_log.path)
+        assert line["kind"] == "tool"
+        assert line["slow"] is True
+        assert line["args"]["period"] == "7d"
+        assert line["result_bytes"] == 6
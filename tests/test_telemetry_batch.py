@@ -0,0 +1,112 @@
+"""Unit tests for batch telemetry (no database)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from pfn_mcp.tools import telemetry_batch
+from pfn_mcp.tools.telemetry import DATA_SOURCE_AGGREGATED, DATA_SOURCE_RAW
+from pfn_mcp.tools.telemetry_batch import align_series, get_batch_telemetry
+
+T0 = datetime(2025, 6, 1, 0, 0)
+
+DEVICES = {
+    1: {"id": 1, "display_name": "Feeder 1", "device_code": "F1", "tenant_id": 10},
+    2: {"id": 2, "display_name": "Feeder 2", "device_code": "F2", "tenant_id": 10},
+    3: {"id": 3, "display_name": "Other", "device_code": "O1", "tenant_id": 20},
+}
+
+QUANTITIES = {
+    185: {"id": 185, "quantity_code": "P", "quantity_name": "Active Power",
+          "unit": "kW", "aggregation_method": "avg"},
+    3332: {"id": 3332, "quantity_code": "V", "quantity_name": "Voltage L-N Avg",
+           "unit": "V", "aggregation_method": "avg"},
+}
+
+
+ROWS = [
+    {"time_bucket": T0, "device_id": 1, "quantity_id": 185, "value": 10.0},
+    {"time_bucket": T0, "device_id": 2, "quantity_id": 185, "value": 20.0},
+    {"time_bucket": T0 + timedelta(hours=1), "device_id": 1, "quantity_id": 185, "value": 12.0},
+    {"time_bucket": T0 + timedelta(hours=1), "device_id": 1, "quantity_id": 3332,
+     "value": 230.0},
+]
+
+
+@pytest.fixture
+def fake_db(recording_db, monkeypatch):
+    monkeypatch.setattr(
+        telemetry_batch, "resolve_time_range", lambda *a: (T0, T0 + timedelta(days=7))
+    )
+    monkeypatch.setattr(
+        telemetry_batch, "select_data_source", lambda *a: (DATA_SOURCE_AGGREGATED, "1hour")
+    )
+    return recording_db(
+        {
+            telemetry_batch.DEVICES_BY_ID_QUERY: lambda ids: [
+                DEVICES[i] for i in ids if i in DEVICES
+            ],
+            telemetry_batch.QUANTITIES_BY_ID_QUERY: lambda ids: [
+                QUANTITIES[i] for i in ids if i in QUANTITIES
+            ],
+        },
+        default=lambda query, *args: ROWS,
+    )
+
+
+class TestAlignSeries:
+    """Tests for aligning rows on a shared time axis."""
+
+    def test_shared_axis_with_gaps(self, fake_db):
+        pairs = [(1, 185), (2, 185), (2, 3332)]
+        timestamps, values = align_series(ROWS, pairs)
+        assert timestamps == [T0, T0 + timedelta(hours=1)]
+        assert values[(1, 185)] == [10.0, 12.0]
+        assert values[(2, 185)] == [20.0, None]
+        assert values[(2, 3332)] == [None, None]
+
+    def test_ignores_unrequested_pairs(self, fake_db):
+        _, values = align_series(ROWS, [(1, 185)])
+        assert list(values) == [(1, 185)]
+
+
+class TestGetBatchTelemetry:
+    """Tests for resolution, limits and the single data query."""
+
+    async def test_one_data_query_for_all_series(self, fake_db):
+        result = await get_batch_telemetry(
+            device_ids=[1, 2, 1], quantity_ids=[185, 3332], period="7d"
+        )
+        assert result["series_count"] == 4
+        assert result["point_count"] == 2
+        data_queries = [q for q in fake_db.queries if q[0] is telemetry_batch.AGGREGATED_QUERY]
+        assert len(data_queries) == 1
+        assert data_queries[0][1][1:3] == ([1, 2], [185, 3332])
+        first = result["series"][0]
+        assert (first["device"], first["quantity"]) == ("Feeder 1", "Active Power")
+        assert (first["avg"], first["last"], first["count"]) == (11.0, 12.0, 2)
+
+    async def test_raw_tier_bucketed_per_minute(self, fake_db, monkeypatch):
+        monkeypatch.setattr(
+            telemetry_batch, "select_data_source", lambda *a: (DATA_SOURCE_RAW, "1min")
+        )
+        result = await get_batch_telemetry(device_ids=[1, 2], quantity_ids=[185], period="1h")
+        query, args = fake_db.queries[-1]
+        assert query is telemetry_batch.RAW_AGGREGATED_QUERY
+        assert args[0] == timedelta(minutes=1)
+        assert result["time_range"]["bucket"] == "1min"
+
+    async def test_unknown_device(self, fake_db):
+        result = await get_batch_telemetry(device_ids=[99], quantity_ids=[185], period="7d")
+        assert result == {"error": "Device ID not found: 99"}
+
+    async def test_requires_devices_and_quantities(self, fake_db):
+        assert "error" in await get_batch_telemetry(quantity_ids=[185])
+        assert "error" in await get_batch_telemetry(device_ids=[1])
+
+    async def test_series_limit(self, fake_db, monkeypatch):
+        monkeypatch.setattr(telemetry_batch, "MAX_SERIES", 3)
+        result = await get_batch_telemetry(
+            device_ids=[1, 2], quantity_ids=[185, 3332], period="7d"
+        )
+        assert "Too many series" in result["error"]
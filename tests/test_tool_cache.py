@@ -0,0 +1,137 @@
+"""Unit tests for the tool-result cache and dispatch layer.
+
+Tests for src/pfn_mcp/cache.py and src/pfn_mcp/dispatch.py (no database).
+"""
+
+import pytest
+
+from pfn_mcp import cache as cache_module
+from pfn_mcp import dispatch
+from pfn_mcp.cache import ToolResultCache, canonicalize_arguments, is_error_response
+
+
+class TestCanonicalizeArguments:
+    """Tests for argument normalization."""
+
+    def test_key_order_does_not_matter(self):
+        a = canonicalize_arguments("get_wages_data", {"tenant": "PRS", "period": "7d"})
+        b = canonicalize_arguments("get_wages_data", {"period": "7d", "tenant": "PRS"})
+        assert a == b
+
+    def test_none_values_dropped(self):
+        a = canonicalize_arguments("get_wages_data", {"period": "7d", "device_id": None})
+        b = canonicalize_arguments("get_wages_data", {"period": "7d"})
+        assert a == b
+
+    def test_schema_defaults_filled(self):
+        a = canonicalize_arguments("get_device_telemetry", {"device_id": 1})
+        b = canonicalize_arguments("get_device_telemetry", {"device_id": 1, "bucket": "auto"})
+        assert a == b
+
+    def test_strings_trimmed(self):
+        a = canonicalize_arguments("get_wages_data", {"period": " 7d "})
+        b = canonicalize_arguments("get_wages_data", {"period": "7d"})
+        assert a == b
+
+
+class TestToolResultCache:
+    """Tests for LRU/TTL behavior."""
+
+    def test_hit_and_miss_counted(self):
+        cache = ToolResultCache(max_entries=10, default_ttl=60)
+        assert cache.get("k", "tool") is None
+        cache.set("k", "value", 60)
+        assert cache.get("k", "tool") == "value"
+        snapshot = cache.snapshot()
+        assert snapshot["hits"] == 1
+        assert snapshot["misses"] == 1
+        assert snapshot["by_tool"]["tool"] == {"hits": 1, "misses": 1}
+
+    def test_lru_eviction(self):
+        cache = ToolResultCache(max_entries=2, default_ttl=60)
+        cache.set("a", "1", 60)
+        cache.set("b", "2", 60)
+        cache.get("a", "tool")  # touch a so b is least recently used
+        cache.set("c", "3", 60)
+        assert cache.get("b", "tool") is None
+        assert cache.get("a", "tool") == "1"
+        assert cache.stats.evictions == 1
+
+    def test_expired_entry_is_miss(self):
+        cache = ToolResultCache(max_entries=10, default_ttl=60)
+        cache.set("k", "value", -1)
+        assert cache.get("k", "tool") is None
+        assert cache.stats.expirations == 1
+
+    def test_key_includes_tenant_and_watermark(self):
+        k1 = ToolResultCache.make_key("t", {"x": 1}, "PRS", "w1")
+        k2 = ToolResultCache.make_key("t", {"x": 1}, "IOP", "w1")
+        k3 = ToolResultCache.make_key("t", {"x": 1}, "PRS", "w2")
+        assert len({k1, k2, k3}) == 3
+
+    def test_ttl_policy(self):
+        cache = ToolResultCache(max_entries=10, default_ttl=300)
+        assert cache.ttl_for("get_date_info") == 0
+        assert cache.ttl_for("get_wages_data") == 300
+
+
+class TestIsErrorResponse:
+    """Tests for error detection."""
+
+    def test_plain_error(self):
+        assert is_error_response("Error: Device not found")
+
+    def test_deprecated_error(self):
+        assert is_error_response("⚠️ DEPRECATED: use X.\n\nError: bad period")
+
+    def test_normal_response(self):
+        assert not is_error_response("## Telemetry: Panel 1\n**Quantity**: Power")
+
+
+class TestDispatchCache:
+    """Tests for run_tool caching behavior."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(
+            cache_module, "_cache", ToolResultCache(max_entries=10, default_ttl=60)
+        )
+
+        async def fake_watermark():
+            return "wm"
+
+        monkeypatch.setattr(dispatch, "get_data_watermark", fake_watermark)
+
+    async def test_second_call_served_from_cache(self):
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return "ok"
+
+        args = {"tenant": "PRS", "period": "7d"}
+        assert await dispatch.run_tool("get_wages_data", args, "PRS", call) == "ok"
+        assert await dispatch.run_tool("get_wages_data", args, "PRS", call) == "ok"
+        assert len(calls) == 1
+
+    async def test_errors_not_cached(self):
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return "Error: boom"
+
+        await dispatch.run_tool("get_wages_data", {}, None, call)
+        await dispatch.run_tool("get_wages_data", {}, None, call)
+        assert len(calls) == 2
+
+    async def test_uncacheable_tool_bypasses_cache(self):
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return "ok"
+
+        await dispatch.run_tool("get_date_info", {}, None, call)
+        await dispatch.run_tool("get_date_info", {}, None, call)
+        assert len(calls) == 2
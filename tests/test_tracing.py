@@ -0,0 +1,148 @@
+"""Tests for span tracing and sqlcommenter comments."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from pfn_mcp import db, tracing
+from pfn_mcp.config import settings
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.batches: list[list[tracing.Span]] = []
+
+    def export(self, spans):
+        self.batches.append(list(spans))
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    collected = CollectingExporter()
+    monkeypatch.setattr(settings, "tracing_enabled", True)
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "tracing_sql_comments", True)
+    monkeypatch.setattr(tracing, "_exporter", collected)
+    monkeypatch.setattr(tracing, "_pending", {})
+    return collected
+
+
+class TestSpans:
+    """Nesting, export and sampling."""
+
+    def test_disabled_is_noop(self, monkeypatch):
+        monkeypatch.setattr(settings, "tracing_enabled", False)
+        with tracing.span("chat.turn") as span:
+            assert span is None
+            assert tracing.with_sql_comment("SELECT 1") == "SELECT 1"
+
+    async def test_trace_exported_when_root_ends(self, exporter):
+        async def query(n):
+            with tracing.span("db.query", n=n):
+                await asyncio.sleep(0)
+
+        with tracing.span("chat.turn", trace_id="a" * 32) as root:
+            with tracing.span("tool.execute", tool="get_wages_data") as tool:
+                await asyncio.gather(query(1), query(2))
+            assert exporter.batches == []
+
+        [batch] = exporter.batches
+        assert {s.name for s in batch} == {"chat.turn", "tool.execute", "db.query"}
+        assert all(s.trace_id == "a" * 32 for s in batch)
+        queries = [s for s in batch if s.name == "db.query"]
+        assert {s.parent_id for s in queries} == {tool.span_id}
+        assert tool.parent_id == root.span_id
+        assert all(s.tool == "get_wages_data" for s in queries)
+
+    def test_error_recorded(self, exporter):
+        with pytest.raises(ValueError), tracing.span("mcp.call_tool"):
+            raise ValueError("bad")
+        assert exporter.batches[0][0].error == "ValueError: bad"
+
+    def test_unsampled_traces_not_exported(self, exporter, monkeypatch):
+        monkeypatch.setattr(settings, "tracing_sample_rate", 0.0)
+        with tracing.span("chat.turn"), tracing.span("db.query") as child:
+            assert tracing.current_span() is None
+            assert child is not None and not child.sampled
+        assert exporter.batches == []
+
+
+class TestSqlComment:
+    """sqlcommenter format and placement."""
+
+    def test_comment_carries_traceparent_and_tool(self, exporter):
+        with tracing.span("tool.execute", tool="get_peak_analysis") as span:
+            sql = tracing.with_sql_comment("SELECT 1;")
+        assert sql.endswith(
+            "/*application='pfn-mcp',"
+            f"tool='get_peak_analysis',traceparent='00-{span.trace_id}-{span.span_id}-01'*/;"
+        )
+
+    def test_comments_can_be_disabled(self, exporter, monkeypatch):
+        monkeypatch.setattr(settings, "tracing_sql_comments", False)
+        with tracing.span("tool.execute"):
+            assert tracing.with_sql_comment("SELECT 1") == "SELECT 1"
+
+    async def test_db_query_span_and_comment(self, exporter, monkeypatch):
+        seen = []
+
+        class Conn:
+            async def fetch(self, query, *args):
+                seen.append(query)
+                return [{"a": 1}]
+
+        @asynccontextmanager
+        async def get_connection(name=db.PRIMARY):
+            yield Conn()
+
+        monkeypatch.setattr(db, "get_connection", get_connection)
+        monkeypatch.setattr(db.settings, "db_coalesce_reads", False)
+
+        with tracing.span("tool.execute", tool="list_tags"):
+            await db.fetch_all("SELECT tag_key FROM device_tags WHERE device_id = $1", 3)
+
+        spans = {s.name: s for s in exporter.batches[0]}
+        query = spans["db.query"]
+        assert query.attributes["rows"] == 1
+        assert f"-{query.span_id}-01'" in seen[0]
+        assert seen[0].startswith("SELECT tag_key FROM device_tags WHERE device_id = $1 /*")
+
+
+class TestRendering:
+    """Waterfall, folded stacks and OTLP payloads."""
+
+    SPANS = [
+        {"trace_id": "t", "span_id": "1", "parent_id": None, "name": "chat.turn",
+         "start_ns": 0, "end_ns": 100_000_000, "attributes": {}, "error": None},
+        {"trace_id": "t", "span_id": "2", "parent_id": "1", "name": "tool.execute",
+         "start_ns": 10_000_000, "end_ns": 70_000_000,
+         "attributes": {"tool": "get_wages_data"}, "error": None},
+        {"trace_id": "t", "span_id": "3", "parent_id": "2", "name": "db.query",
+         "start_ns": 20_000_000, "end_ns": 60_000_000,
+         "attributes": {"db.operation": "fetch_all"}, "error": None},
+    ]
+
+    def test_folded_stacks_use_self_time(self):
+        stacks = tracing.folded_stacks({"t": self.SPANS})
+        assert stacks == {
+            "chat.turn": 40.0,
+            "chat.turn;tool.execute get_wages_data": 20.0,
+            "chat.turn;tool.execute get_wages_data;db.query fetch_all": 40.0,
+        }
+
+    def test_render_trace(self):
+        text = tracing.render_trace(self.SPANS, width=10)
+        lines = text.splitlines()
+        assert lines[1].startswith("chat.turn")
+        assert "    db.query fetch_all" in lines[3]
+        assert "|  ████    |" in lines[3]
+
+    def test_otlp_payload(self):
+        span = tracing.Span("db.query", "a" * 32, "b" * 16, None, 1, 2,
+                            attributes={"rows": 3}, error="boom")
+        [otlp] = tracing.otlp_payload([span], "pfn-mcp")["resourceSpans"][0][
+            "scopeSpans"][0]["spans"]
+        assert otlp["traceId"] == "a" * 32
+        assert otlp["attributes"] == [{"key": "rows", "value": {"intValue": "3"}}]
+        assert otlp["status"]["code"] == 2
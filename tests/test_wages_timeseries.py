@@ -0,0 +1,96 @@
+"""Unit tests for get_wages_data output="timeseries" (server-side formula series)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from pfn_mcp.tools import wages_data
+from pfn_mcp.tools.formula_parser import formula_coefficients, parse_formula
+
+
+class TestFormulaCoefficients:
+    """Tests for compiling formula terms into per-device signs."""
+
+    def test_grouped_formula(self):
+        assert formula_coefficients(parse_formula("(94+11+27)-(84)")) == {
+            94: 1, 11: 1, 27: 1, 84: -1,
+        }
+
+    def test_repeated_device_nets_out(self):
+        assert formula_coefficients(parse_formula("94+94-11")) == {94: 2, 11: -1}
+
+    def test_non_formula_scope_is_all_positive(self):
+        assert wages_data._series_coefficients([3, 5]) == {3: 1, 5: 1}
+
+
+class TestTimeseriesQuery:
+    """Tests for the combined-series query."""
+
+    async def test_signed_sum_is_one_query(self, recording_db):
+        fake = recording_db()
+        start, end = datetime(2025, 1, 1), datetime(2025, 1, 2)
+        await wages_data._query_telemetry_timeseries(
+            [94, 11, 84], 124, start, end, "1hour", "sum", parse_formula("(94+11)-(84)"),
+        )
+
+        [(query, args)] = fake.queries
+        assert "SUM(c.sign * t.aggregated_value)" in query
+        assert "unnest($4::int[], $5::float8[])" in query
+        assert args == (timedelta(hours=1), start, end, [94, 11, 84], [1.0, 1.0, -1.0], 124)
+
+    async def test_avg_ignores_signs(self, recording_db):
+        fake = recording_db()
+        await wages_data._query_telemetry_timeseries(
+            [1, 2], 9, datetime(2025, 1, 1), datetime(2025, 1, 2), "15min", "avg",
+        )
+        [(query, _)] = fake.queries
+        assert "AVG(t.aggregated_value)" in query
+        assert "c.sign *" not in query
+
+    async def test_hostile_agg_method_rejected(self, recording_db, monkeypatch):
+        fake = recording_db()
+        monkeypatch.setattr(wages_data.db, "fetch_one", fake.fetch_all)
+        hostile = "avg(1); DROP TABLE tenants; --"
+        with pytest.raises(ValueError):
+            await wages_data._query_telemetry_timeseries(
+                [1, 2], 9, datetime(2025, 1, 1), datetime(2025, 1, 2), "15min", hostile,
+            )
+        result = await wages_data.get_wages_data(
+            device_id=1, quantity_id=9, agg_method=hostile, output="timeseries"
+        )
+        assert result["error"].startswith("Invalid agg_method")
+        assert fake.queries == []
+
+    def test_series_bucket_targets_max_points(self):
+        bucket = wages_data._select_bucket(
+            timedelta(days=30), 1, target_rows=wages_data.TIMESERIES_MAX_POINTS
+        )
+        assert bucket == "4hour"
+
+
+class TestTimeseriesFormatting:
+    """Tests for the timeseries section of the response."""
+
+    def test_series_shown_first_and_last(self):
+        base = datetime(2025, 1, 1)
+        data = [
+            {
+                "time": (base + timedelta(hours=i)).isoformat(),
+                "value": float(i),
+                "devices": 3,
+            }
+            for i in range(12)
+        ]
+        result = {
+            "summary": {
+                "value": 66.0, "unit": "kWh", "quantity": "Active Energy",
+                "agg_method": "sum", "period": "1d", "bucket": "1hour",
+            },
+            "scope_type": "formula",
+            "scope": {"formula": "(94+11)-(84)"},
+            "timeseries": {"bucket": "1hour", "data": data, "point_count": 12},
+        }
+        text = wages_data.format_wages_data_response(result)
+        assert "### Time Series (1hour buckets, 12 points)" in text
+        assert "... (6 more points) ..." in text
+        assert "11.000 kWh" in text